@@ -0,0 +1,41 @@
+import json
+import logging
+from typing import Dict
+
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import REGION_SIZES, TEMPLATE_FILENAME, make_region_image, synthetic_profile
+from mark_i.core.config_manager import ConfigManager, TEMPLATES_SUBDIR_NAME
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+
+@pytest.fixture(scope="session", autouse=True)
+def quiet_app_logging():
+    """Keeps log record creation and output out of the measurements (the hot path logs at INFO)."""
+    app_logger = logging.getLogger(APP_ROOT_LOGGER_NAME)
+    previous_level = app_logger.level
+    app_logger.setLevel(logging.WARNING)
+    yield
+    app_logger.setLevel(previous_level)
+
+
+@pytest.fixture(scope="session")
+def region_images() -> Dict[str, np.ndarray]:
+    return {size_name: make_region_image(width, height) for size_name, (width, height) in REGION_SIZES.items()}
+
+
+@pytest.fixture(scope="session")
+def profile_factory(tmp_path_factory, region_images):
+    """Writes a synthetic profile (and its template image) to disk and loads it with ConfigManager."""
+
+    def _load(rule_count: int) -> ConfigManager:
+        profile_dir = tmp_path_factory.mktemp(f"profile_{rule_count}")
+        (profile_dir / TEMPLATES_SUBDIR_NAME).mkdir()
+        cv2.imwrite(str(profile_dir / TEMPLATES_SUBDIR_NAME / TEMPLATE_FILENAME), region_images["medium"][8:40, 8:40])
+        profile_path = profile_dir / "benchmark_profile.json"
+        profile_path.write_text(json.dumps(synthetic_profile(rule_count)), encoding="utf-8")
+        return ConfigManager(str(profile_path))
+
+    return _load
@@ -0,0 +1,62 @@
+"""Synthetic frames and profiles shared by the benchmarks (deterministic, so runs are comparable)."""
+from typing import Any, Dict, List
+
+import cv2
+import numpy as np
+
+# Region sizes (width, height) the analysis benchmarks run on: a status icon, a typical panel, most of a screen
+REGION_SIZES: Dict[str, tuple] = {"small": (32, 32), "medium": (320, 240), "large": (1280, 720)}
+RULE_COUNTS = (10, 100, 1000)
+REGION_NAMES = ("status_bar", "chat", "minimap", "inventory")
+TEMPLATE_FILENAME = "icon.png"
+
+
+def make_region_image(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """A BGR frame with flat UI-like panels, gradients and noise, so k-means and template matching do real work."""
+    rng = np.random.default_rng(seed)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = (40, 30, 20)
+    image[: height // 2, : width // 2] = (200, 100, 50)
+    image[height // 2 :, width // 2 :] = np.linspace(0, 255, max(1, width - width // 2), dtype=np.uint8)[None, :, None]
+    noise = rng.integers(0, 24, size=image.shape, dtype=np.uint8)
+    return cv2.add(image, noise)
+
+
+def synthetic_rules(rule_count: int) -> List[Dict[str, Any]]:
+    """
+    `rule_count` rules cycling through every local condition type (and an AND compound) over
+    REGION_NAMES. About a quarter of them match on make_region_image() frames, and those run a
+    log_message action with placeholders.
+    """
+    condition_factories = [
+        lambda i: {"type": "pixel_color", "relative_x": 2, "relative_y": 2, "expected_bgr": [210, 110, 60], "tolerance": 40},
+        lambda i: {"type": "average_color_is", "expected_bgr": [0, 0, 255], "tolerance": 10},
+        lambda i: {"type": "dominant_color_matches", "expected_bgr": [200, 100, 50], "tolerance": 30, "check_top_n_dominant": 2, "min_percentage": 5.0},
+        lambda i: {"type": "ocr_contains_text", "text_to_find": f"quest {i % 7}, level up", "min_ocr_confidence": 60, "capture_as": "ocr_line"},
+        lambda i: {"type": "template_match_found", "template_filename": TEMPLATE_FILENAME, "min_confidence": 0.99, "capture_as": "icon_match"},
+        lambda i: {"type": "always_true"},
+        lambda i: {"logical_operator": "AND", "sub_conditions": [{"type": "average_color_is", "expected_bgr": [90, 60, 60], "tolerance": 80}, {"type": "always_true"}]},
+        lambda i: {"type": "pixel_color", "relative_x": 1, "relative_y": 1, "expected_bgr": [0, 0, 0], "tolerance": 5},
+    ]
+    rules = []
+    for i in range(rule_count):
+        rules.append(
+            {
+                "name": f"rule_{i:04d}",
+                "region": REGION_NAMES[i % len(REGION_NAMES)],
+                "condition": condition_factories[i % len(condition_factories)](i),
+                "action": {"type": "log_message", "message": f"rule_{i:04d} matched: {{ocr_line}} / {{icon_match.value.confidence}}", "level": "INFO"},
+            }
+        )
+    return rules
+
+
+def synthetic_profile(rule_count: int) -> Dict[str, Any]:
+    width, height = REGION_SIZES["medium"]
+    return {
+        "profile_description": f"Benchmark profile with {rule_count} rules",
+        "settings": {"monitoring_interval_seconds": 1.0, "analysis_dominant_colors_k": 3},
+        "regions": [{"name": region_name, "x": 0, "y": index * height, "width": width, "height": height} for index, region_name in enumerate(REGION_NAMES)],
+        "templates": [{"name": "icon", "filename": TEMPLATE_FILENAME}],
+        "rules": synthetic_rules(rule_count),
+    }
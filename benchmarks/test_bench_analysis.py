@@ -0,0 +1,46 @@
+import shutil
+
+import pytest
+
+from benchmarks.synthetic import REGION_SIZES
+from mark_i.engines.analysis_engine import AnalysisEngine
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def analysis_engine():
+    return AnalysisEngine()
+
+
+@pytest.mark.benchmark(group="analysis.pixel_color")
+@pytest.mark.parametrize("size_name", REGION_SIZES)
+def test_analyze_pixel_color(benchmark, analysis_engine, region_images, size_name):
+    assert benchmark(analysis_engine.analyze_pixel_color, region_images[size_name], 2, 2, [210, 110, 60], 40) is True
+
+
+@pytest.mark.benchmark(group="analysis.average_color")
+@pytest.mark.parametrize("size_name", REGION_SIZES)
+def test_analyze_average_color(benchmark, analysis_engine, region_images, size_name):
+    assert benchmark(analysis_engine.analyze_average_color, region_images[size_name]) is not None
+
+
+@pytest.mark.benchmark(group="analysis.match_template")
+@pytest.mark.parametrize("size_name", REGION_SIZES)
+def test_match_template(benchmark, analysis_engine, region_images, size_name):
+    image = region_images[size_name]
+    template = image[4:20, 4:20].copy()  # Always inside the frame, so every size finds it
+    assert benchmark(analysis_engine.match_template, image, template, 0.9) is not None
+
+
+@pytest.mark.benchmark(group="analysis.dominant_colors")
+@pytest.mark.parametrize("size_name", REGION_SIZES)
+def test_analyze_dominant_colors(benchmark, analysis_engine, region_images, size_name):
+    assert benchmark(analysis_engine.analyze_dominant_colors, region_images[size_name], 3)
+
+
+@pytest.mark.benchmark(group="analysis.ocr")
+@pytest.mark.skipif(shutil.which("tesseract") is None, reason="Tesseract OCR is not installed")
+@pytest.mark.parametrize("size_name", REGION_SIZES)
+def test_ocr_extract_text(benchmark, analysis_engine, region_images, size_name):
+    assert benchmark.pedantic(analysis_engine.ocr_extract_text, args=(region_images[size_name],), rounds=5, iterations=1) is not None
@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from benchmarks.synthetic import REGION_SIZES
+from mark_i.engines.capture_engine import CaptureEngine
+
+pytest.importorskip("pytest_benchmark")
+
+PIL_MODES = ("RGB", "RGBA", "L", "P")
+
+
+@pytest.fixture(scope="module")
+def screen_grabs(region_images):
+    """(PIL mode, size name) -> what ImageGrab.grab would return for a region of that size."""
+    grabs = {}
+    for size_name, image_bgr in region_images.items():
+        rgb_image = Image.fromarray(cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB))
+        for mode in PIL_MODES:
+            grabs[(mode, size_name)] = rgb_image if mode == "RGB" else rgb_image.convert(mode)
+    return grabs
+
+
+def _region_spec(size_name):
+    width, height = REGION_SIZES[size_name]
+    return {"name": f"bench_{size_name}", "x": 0, "y": 0, "width": width, "height": height}
+
+
+@pytest.mark.benchmark(group="capture")
+@pytest.mark.parametrize("size_name", REGION_SIZES)
+@pytest.mark.parametrize("mode", PIL_MODES)
+def test_capture_region_conversion(benchmark, screen_grabs, mode, size_name):
+    """Screen grab to BGR conversion per PIL mode; the grab itself is replaced by a prepared image."""
+    engine = CaptureEngine()
+    with patch("mark_i.engines.capture_engine.ImageGrab.grab", return_value=screen_grabs[(mode, size_name)]):
+        frame = benchmark(engine.capture_region, _region_spec(size_name))
+    assert frame is not None and frame.shape == REGION_SIZES[size_name][::-1] + (3,)
+
+
+@pytest.mark.benchmark(group="capture")
+@pytest.mark.parametrize("size_name", REGION_SIZES)
+def test_capture_region_into_reused_buffer(benchmark, screen_grabs, size_name):
+    engine = CaptureEngine()
+    width, height = REGION_SIZES[size_name]
+    out_buffer = np.empty((height, width, 3), dtype=np.uint8)
+    with patch("mark_i.engines.capture_engine.ImageGrab.grab", return_value=screen_grabs[("RGB", size_name)]):
+        frame = benchmark(engine.capture_region, _region_spec(size_name), out_buffer=out_buffer)
+    assert frame is out_buffer
@@ -0,0 +1,77 @@
+from unittest.mock import create_autospec
+
+import pytest
+
+from benchmarks.synthetic import REGION_SIZES, TEMPLATE_FILENAME
+from mark_i.engines.analysis_engine import AnalysisEngine
+from mark_i.engines.condition_evaluators import (
+    GEMINI_BATCHED_RESPONSES_KEY,
+    AlwaysTrueEvaluator,
+    AverageColorEvaluator,
+    DominantColorEvaluator,
+    GeminiVisionQueryEvaluator,
+    OcrContainsTextEvaluator,
+    PixelColorEvaluator,
+    TemplateMatchEvaluator,
+    gemini_query_batch_key,
+)
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+
+pytest.importorskip("pytest_benchmark")
+
+GEMINI_SPEC = {
+    "type": "gemini_vision_query",
+    "prompt": "Is a quest completion banner visible? Answer in JSON.",
+    "expected_response_contains": ["completed"],
+    "expected_response_json_path": "banner.visible",
+    "expected_json_value": "True",
+    "capture_as": "banner",
+}
+
+# Condition type -> (evaluator class, spec). Each spec matches on the synthetic frames.
+EVALUATOR_CASES = {
+    "pixel_color": (PixelColorEvaluator, {"type": "pixel_color", "relative_x": 2, "relative_y": 2, "expected_bgr": [210, 110, 60], "tolerance": 40}),
+    "average_color_is": (AverageColorEvaluator, {"type": "average_color_is", "expected_bgr": [90, 60, 60], "tolerance": 120}),
+    "dominant_color_matches": (DominantColorEvaluator, {"type": "dominant_color_matches", "expected_bgr": [200, 100, 50], "tolerance": 40, "check_top_n_dominant": 3, "min_percentage": 1.0}),
+    "ocr_contains_text": (OcrContainsTextEvaluator, {"type": "ocr_contains_text", "text_to_find": "completed, level up", "min_ocr_confidence": 60, "capture_as": "ocr_line"}),
+    "template_match_found": (TemplateMatchEvaluator, {"type": "template_match_found", "template_filename": TEMPLATE_FILENAME, "min_confidence": 0.9, "capture_as": "icon_match"}),
+    "gemini_vision_query": (GeminiVisionQueryEvaluator, GEMINI_SPEC),
+    "always_true": (AlwaysTrueEvaluator, {"type": "always_true"}),
+}
+
+
+@pytest.fixture(scope="module")
+def analysis_engine():
+    return AnalysisEngine()
+
+
+@pytest.fixture(scope="module")
+def region_packets(analysis_engine, region_images):
+    """Size name -> a region data packet as MainController builds it (pre-emptive analyses done, Gemini answer batched)."""
+    packets = {}
+    for size_name, image in region_images.items():
+        packets[size_name] = {
+            "image": image,
+            "average_color": analysis_engine.analyze_average_color(image),
+            "dominant_colors_result": analysis_engine.analyze_dominant_colors(image, 3),
+            "ocr_analysis_result": {"text": "quest 3 completed, level up", "average_confidence": 88.0, "raw_data": {}},
+            GEMINI_BATCHED_RESPONSES_KEY: {
+                gemini_query_batch_key(GEMINI_SPEC): {"status": "success", "text_content": '{"banner": {"visible": true, "text": "completed"}}', "json_content": {"banner": {"visible": True, "text": "completed"}}}
+            },
+        }
+    return packets
+
+
+@pytest.mark.benchmark(group="condition_evaluators")
+@pytest.mark.parametrize("size_name", REGION_SIZES)
+@pytest.mark.parametrize("condition_type", EVALUATOR_CASES)
+def test_condition_evaluator(benchmark, analysis_engine, region_images, region_packets, condition_type, size_name):
+    """One evaluate() call on pre-analyzed data; the Gemini evaluator reads the answer its batched request already fetched."""
+    evaluator_class, spec = EVALUATOR_CASES[condition_type]
+    template = region_images["small"][4:20, 4:20].copy()  # Present in every synthetic frame (same seed)
+    gemini_analyzer = create_autospec(GeminiAnalyzer, instance=True)
+    evaluator = evaluator_class(analysis_engine, lambda template_filename, rule_name: template, gemini_analyzer, lambda key, default: default)
+
+    result = benchmark(evaluator.evaluate, spec, "bench_region", region_packets[size_name], f"bench_{condition_type}")
+    assert result.met
+    gemini_analyzer.query_vision_model.assert_not_called()
@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.synthetic import REGION_NAMES, RULE_COUNTS, TEMPLATE_FILENAME
+from mark_i.core.config_manager import ConfigManager
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def config_manager(profile_factory) -> ConfigManager:
+    return profile_factory(RULE_COUNTS[-1])
+
+
+@pytest.mark.benchmark(group="config_manager")
+def test_get_setting(benchmark, config_manager):
+    assert benchmark(config_manager.get_setting, "analysis_dominant_colors_k", 5) == 3
+
+
+@pytest.mark.benchmark(group="config_manager")
+def test_get_regions(benchmark, config_manager):
+    assert len(benchmark(config_manager.get_regions)) == len(REGION_NAMES)
+
+
+@pytest.mark.benchmark(group="config_manager")
+def test_get_region_config(benchmark, config_manager):
+    assert benchmark(config_manager.get_region_config, REGION_NAMES[-1])["name"] == REGION_NAMES[-1]
+
+
+@pytest.mark.benchmark(group="config_manager")
+def test_get_rules(benchmark, config_manager):
+    assert len(benchmark(config_manager.get_rules)) == RULE_COUNTS[-1]
+
+
+@pytest.mark.benchmark(group="config_manager")
+def test_get_template_image_path(benchmark, config_manager):
+    assert benchmark(config_manager.get_template_image_path, TEMPLATE_FILENAME).endswith(TEMPLATE_FILENAME)
+
+
+@pytest.mark.benchmark(group="config_manager")
+def test_get_profile_data(benchmark, config_manager):
+    assert benchmark(config_manager.get_profile_data)["rules"]
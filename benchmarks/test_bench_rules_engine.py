@@ -0,0 +1,63 @@
+import pytest
+
+from benchmarks.synthetic import REGION_NAMES, RULE_COUNTS
+from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.analysis_engine import AnalysisEngine
+from mark_i.engines.input_backends import DryRunInputBackend
+from mark_i.engines.rules_engine import RulesEngine
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def analysis_engine():
+    return AnalysisEngine()
+
+
+@pytest.fixture(scope="module")
+def all_region_data(analysis_engine, region_images):
+    """One cycle's region data for every region of the synthetic profile, pre-emptive analyses included."""
+    image = region_images["medium"]
+    packet = {
+        "image": image,
+        "average_color": analysis_engine.analyze_average_color(image),
+        "dominant_colors_result": analysis_engine.analyze_dominant_colors(image, 3),
+        "ocr_analysis_result": {"text": "quest 3 completed, level up", "average_confidence": 88.0, "raw_data": {}},
+    }
+    return {region_name: dict(packet) for region_name in REGION_NAMES}
+
+
+def _rules_engine(config_manager, analysis_engine):
+    return RulesEngine(config_manager, analysis_engine, ActionExecutor(config_manager, input_backend=DryRunInputBackend()))
+
+
+@pytest.mark.benchmark(group="rules_engine.evaluate_rules")
+@pytest.mark.parametrize("rule_count", RULE_COUNTS)
+def test_evaluate_rules(benchmark, monkeypatch, profile_factory, analysis_engine, all_region_data, rule_count):
+    """A full evaluation pass: conditions, variable capture, placeholder substitution and inline log_message actions."""
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    rules_engine = _rules_engine(profile_factory(rule_count), analysis_engine)
+    rules_engine.preload_templates()
+
+    executed_actions = benchmark(rules_engine.evaluate_rules, all_region_data)
+    assert executed_actions
+
+
+@pytest.mark.benchmark(group="rules_engine.substitute_variables")
+def test_substitute_variables(benchmark, monkeypatch, profile_factory, analysis_engine):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    rules_engine = _rules_engine(profile_factory(RULE_COUNTS[0]), analysis_engine)
+    variable_context = {
+        "ocr_line": {"value": "quest 3 completed, level up", "_source_region_for_capture_": "chat"},
+        "icon_match": {"value": {"confidence": 0.97, "center_x": 120, "center_y": 48}, "_source_region_for_capture_": "minimap"},
+        "party": {"value": {"members": [{"name": "Ayla", "hp": 81}, {"name": "Brann", "hp": 34}]}, "_source_region_for_capture_": "status_bar"},
+    }
+    action_spec = {
+        "type": "type_text",
+        "text": "{ocr_line} at {icon_match.value.center_x},{icon_match.value.center_y}",
+        "pyautogui_pause_before": 0.1,
+        "extra": {"targets": ["{party.value.members.0.name}", "{party.value.members.1.hp}"], "note": "conf {icon_match.value.confidence}"},
+    }
+
+    substituted = benchmark(rules_engine._substitute_variables, action_spec, variable_context, "bench")
+    assert substituted["text"] == "quest 3 completed, level up at 120,48" and substituted["extra"]["targets"] == ["Ayla", "34"]
@@ -1,6 +1,12 @@
 import sys
 import logging
 
+if "--trace-imports" in sys.argv[1:]:
+    # Installed before anything else is imported so the report covers the whole startup.
+    from mark_i.core.lazy_imports import start_import_trace
+
+    start_import_trace()
+
 # --- Attempt to set up core components first ---
 try:
     # Ensure relative imports work correctly when run as a module
@@ -101,11 +107,26 @@ def main():
         logger.critical(f"CRITICAL ERROR: Failed to re-setup logging with CLI arguments: {e}. Application cannot continue reliably.", exc_info=True)
         sys.exit(1)
 
+    if getattr(args, "trace_file", None):
+        from .core.tracing import configure_default_tracer
+
+        configure_default_tracer(args.trace_file, sample_rate=args.trace_sample_rate)
+
+    if getattr(args, "gemini_cassette", None):
+        try:
+            from .engines.gemini_cassette import configure_default_cassette
+
+            configure_default_cassette(args.gemini_cassette, mode=args.gemini_cassette_mode, latency_mode=args.gemini_cassette_latency)
+        except Exception as e:
+            logger.critical(f"Failed to open Gemini cassette '{args.gemini_cassette}': {e}", exc_info=True)
+            sys.exit(1)
+
     # Dispatch to the command handler function set by argparse subcommands
     if hasattr(args, "func") and callable(args.func):
         try:
             logger.info(f"Executing command: '{args.command}' with arguments: {vars(args)}")
             args.func(args)  # Call the handler (e.g., handle_run, handle_edit)
+            cli.report_import_trace()  # For commands that do not report at the end of their own startup
             logger.info(f"Command '{args.command}' finished successfully.")
         except SystemExit as e:  # Allow command handlers to signal exit
             logger.warning(f"Command '{args.command}' initiated a system exit with code {e.code}.")
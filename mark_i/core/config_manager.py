@@ -1,7 +1,8 @@
 import json
 import logging
 import os
-from typing import Dict, Any, Optional, List
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterator
 import copy  # For deepcopying default profile structure
 import sys  # For printing to stderr in critical failure
 
@@ -9,6 +10,7 @@ import dotenv  # For loading .env files
 
 # Standardized logger for this module
 from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME  # Use the app's root for consistency if desired
+from mark_i.core.frozen_config import FrozenDict, FrozenList, freeze_config, thaw_config, build_name_index
 
 logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.core.config_manager")
 # Alternatively, for strict module-level logging:
@@ -77,9 +79,15 @@ class ConfigManager:
     (JSON files). It also handles path resolution for profiles and their
     associated assets like templates. Ensures basic profile structure keys exist
     when data is loaded or created by merging with a default structure.
+
+    The profile is held as an immutable snapshot (FrozenDict/FrozenList) with name indexes
+    for regions and templates, so getters return shared read-only data without copying and
+    `get_region_config` is a dict lookup. Edits go through `edit_profile()`,
+    `update_profile_data()` or `set_setting()`, which build and swap in a new snapshot
+    (copy-on-write); readers holding the previous snapshot are unaffected.
     """
 
-    def __init__(self, profile_path_or_name: Optional[str] = None, create_if_missing: bool = False):
+    def __init__(self, profile_path_or_name: Optional[str] = None, create_if_missing: bool = False, preloaded_profile_data: Optional[Dict[str, Any]] = None):
         """
         Initializes the ConfigManager.
 
@@ -95,6 +103,9 @@ class ConfigManager:
             create_if_missing: If True and the specified profile doesn't exist, a new
                                default profile structure will be initialized in memory.
                                If False (default) and profile not found, FileNotFoundError is raised.
+            preloaded_profile_data: Optional. Already validated and merged profile data for this
+                                    path (e.g. from a compiled profile cache). When given, the
+                                    JSON file is not read or merged again.
         """
         self.project_root = self._find_project_root()
         self.profiles_base_dir = os.path.join(self.project_root, PROFILES_DIR_NAME)
@@ -106,11 +117,15 @@ class ConfigManager:
             # Continue, but saving to default location might fail if it's not project root.
 
         self.profile_path: Optional[str] = None  # Absolute path to the current .json file
-        self.profile_data: Dict[str, Any] = {}  # In-memory representation of the profile
+        self.snapshot_version = 0  # Incremented whenever a new profile snapshot is swapped in
+        self.profile_data = {}  # In-memory representation of the profile (frozen snapshot, see property)
 
         if profile_path_or_name:
             self.profile_path = self._resolve_profile_path(profile_path_or_name)
-            if os.path.exists(self.profile_path):
+            if preloaded_profile_data is not None:
+                self.profile_data = preloaded_profile_data
+                logger.info(f"Profile '{os.path.basename(self.profile_path)}' taken from preloaded (compiled) data.")
+            elif os.path.exists(self.profile_path):
                 self._load_profile()  # Loads into self.profile_data
             elif create_if_missing:
                 logger.info(f"Profile file '{self.profile_path}' not found. Initializing with default structure for a new profile (as create_if_missing=True).")
@@ -151,20 +166,39 @@ class ConfigManager:
                 "rules": [],
             }
 
-        self.profile_data = copy.deepcopy(DEFAULT_PROFILE_STRUCTURE)
+        default_profile_data = copy.deepcopy(DEFAULT_PROFILE_STRUCTURE)
         # Ensure essential keys are present even if default structure changes
-        self.profile_data.setdefault("profile_description", "New Profile")
-        self.profile_data.setdefault("settings", {})
-        self.profile_data["settings"].setdefault("monitoring_interval_seconds", 1.0)
-        self.profile_data["settings"].setdefault("analysis_dominant_colors_k", 3)
-        self.profile_data["settings"].setdefault("gemini_default_model_name", "gemini-1.5-flash-latest")
-        self.profile_data["settings"].setdefault("tesseract_cmd_path", None)  # Ensure it exists
-        self.profile_data["settings"].setdefault("tesseract_config_custom", "")  # Ensure it exists
-        self.profile_data.setdefault("regions", [])
-        self.profile_data.setdefault("templates", [])
-        self.profile_data.setdefault("rules", [])
+        default_profile_data.setdefault("profile_description", "New Profile")
+        default_profile_data.setdefault("settings", {})
+        default_profile_data["settings"].setdefault("monitoring_interval_seconds", 1.0)
+        default_profile_data["settings"].setdefault("analysis_dominant_colors_k", 3)
+        default_profile_data["settings"].setdefault("gemini_default_model_name", "gemini-1.5-flash-latest")
+        default_profile_data["settings"].setdefault("tesseract_cmd_path", None)  # Ensure it exists
+        default_profile_data["settings"].setdefault("tesseract_config_custom", "")  # Ensure it exists
+        default_profile_data.setdefault("regions", [])
+        default_profile_data.setdefault("templates", [])
+        default_profile_data.setdefault("rules", [])
+        self.profile_data = default_profile_data
         logger.debug("Initialized in-memory profile_data with default structure.")
 
+    @property
+    def profile_data(self) -> FrozenDict:
+        """The current profile as a read-only snapshot. Assigning a dict swaps in a new snapshot."""
+        return self._profile_snapshot
+
+    @profile_data.setter
+    def profile_data(self, new_profile_data: Dict[str, Any]) -> None:
+        snapshot = freeze_config(new_profile_data)
+        regions = snapshot.get("regions")
+        templates = snapshot.get("templates")
+        # Assigned together so readers on other threads never see an index from another snapshot
+        self._profile_snapshot, self._region_index, self._template_index = (
+            snapshot,
+            build_name_index(regions if isinstance(regions, list) else []),
+            build_name_index(templates if isinstance(templates, list) else []),
+        )
+        self.snapshot_version += 1
+
     def _find_project_root(self) -> str:
         """Determines the project root directory."""
         current_file_dir = os.path.dirname(os.path.abspath(__file__))
@@ -266,9 +300,32 @@ class ConfigManager:
             self._initialize_default_profile_data()
             raise IOError(f"Could not read or process profile file: {self.profile_path}. Error: {e}")
 
-    def get_profile_data(self) -> Dict[str, Any]:
-        """Returns a deep copy of the current in-memory profile data."""
-        return copy.deepcopy(self.profile_data)
+    def get_profile_data(self) -> FrozenDict:
+        """Returns the current read-only profile snapshot (no copy). Use get_mutable_profile_data() to edit."""
+        return self.profile_data
+
+    def get_mutable_profile_data(self) -> Dict[str, Any]:
+        """Returns a plain, deep-copied dict of the profile for editing (e.g. by the GUI editor)."""
+        return thaw_config(self.profile_data)
+
+    @contextmanager
+    def edit_profile(self) -> Iterator[Dict[str, Any]]:
+        """
+        Copy-on-write editing. Yields a mutable copy of the profile; when the block exits
+        without an exception, the copy is merged with defaults and becomes the new snapshot.
+
+            with config_manager.edit_profile() as profile:
+                profile["settings"]["monitoring_interval_seconds"] = 0.5
+        """
+        editable_profile_data = self.get_mutable_profile_data()
+        yield editable_profile_data
+        self.update_profile_data(editable_profile_data)
+
+    def set_setting(self, key: str, value: Any) -> None:
+        """Sets one value in 'settings', swapping in a new snapshot."""
+        new_profile_data = dict(self.profile_data)
+        new_profile_data["settings"] = {**self.profile_data.get("settings", {}), key: value}
+        self.profile_data = new_profile_data  # Unchanged regions/rules/templates are reused as-is (already frozen)
 
     def update_profile_data(self, new_data: Dict[str, Any]):
         """
@@ -325,33 +382,32 @@ class ConfigManager:
         """Safely retrieves a value from the 'settings' dictionary in the profile data."""
         return self.profile_data.get("settings", {}).get(key, default)
 
-    def get_regions(self) -> List[Dict[str, Any]]:
-        """Returns a copy of the list of region configurations."""
-        return copy.deepcopy(self.profile_data.get("regions", []))
+    def get_regions(self) -> FrozenList:
+        """Returns the read-only list of region configurations."""
+        return self.profile_data.get("regions", FrozenList())
 
-    def get_region_config(self, region_name: str) -> Optional[Dict[str, Any]]:
-        """Retrieves a copy of a specific region's configuration by its name."""
-        for region in self.profile_data.get("regions", []):  # Iterate internal data
-            if region.get("name") == region_name:
-                return copy.deepcopy(region)
-        logger.debug(f"Region named '{region_name}' not found in current profile.")
-        return None
+    def get_region_config(self, region_name: str) -> Optional[FrozenDict]:
+        """Retrieves a specific region's read-only configuration by its name."""
+        region = self._region_index.get(region_name)
+        if region is None:
+            logger.debug(f"Region named '{region_name}' not found in current profile.")
+        return region
+
+    def get_templates(self) -> FrozenList:
+        """Returns the read-only list of template configurations."""
+        return self.profile_data.get("templates", FrozenList())
+
+    def get_template_config(self, template_name: str) -> Optional[FrozenDict]:
+        """Retrieves a specific template's read-only configuration by its name."""
+        return self._template_index.get(template_name)
+
+    def get_rules(self) -> FrozenList:
+        """Returns the read-only list of rule configurations."""
+        return self.profile_data.get("rules", FrozenList())
 
-    def get_templates(self) -> List[Dict[str, Any]]:
-        """Returns a copy of the list of template configurations."""
-        return copy.deepcopy(self.profile_data.get("templates", []))
-
-    def get_rules(self) -> List[Dict[str, Any]]:
-        """Returns a copy of the list of rule configurations."""
-        return copy.deepcopy(self.profile_data.get("rules", []))
-
-    def get_all_region_configs(self) -> Dict[str, Dict[str, Any]]:
-        """Returns a dictionary of copies of all region configurations, keyed by region name."""
-        return {
-            region.get("name", f"UnnamedRegion_idx{i}"): copy.deepcopy(region)
-            for i, region in enumerate(self.profile_data.get("regions", []))
-            if region.get("name")  # Ensure region has a name to be used as key
-        }
+    def get_all_region_configs(self) -> FrozenDict:
+        """Returns a read-only mapping of all named region configurations, keyed by region name."""
+        return self._region_index
 
     @staticmethod
     def save_profile_data_to_path(filepath: str, data_to_save: Dict[str, Any]):
@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import re
+import signal
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.core.flight_recorder")
+
+DEFAULT_FLIGHT_RECORDER_CYCLES = 50
+DEFAULT_MIN_DUMP_INTERVAL_SEC = 60.0  # Exception and rule-marker dumps closer together than this are dropped
+
+# Field names of each event kind, in the order record() receives them after the kind
+EVENT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "capture": ("region", "duration_ms", "shape"),
+    "analysis": ("region", "analysis", "result", "duration_ms"),
+    "condition": ("rule", "met", "duration_ms"),
+    "variables": ("rule", "variables"),
+    "action": ("rule", "action_type", "spec"),
+    "marker": ("rule",),
+    "error": ("source", "error"),
+}
+
+_live_recorders: "weakref.WeakSet[FlightRecorder]" = weakref.WeakSet()
+
+
+def _default_dump_dir() -> str:
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(project_root, "logs", "flight_recorder")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return f"<ndarray shape={value.shape} dtype={value.dtype}>"  # Never dump pixels
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+class _CycleRecord:
+    __slots__ = ("number", "started_at", "started_perf", "info", "events", "duration_ms")
+
+    def __init__(self, number: int, info: Dict[str, Any]):
+        self.number = number
+        self.started_at = time.time()
+        self.started_perf = time.perf_counter()
+        self.info = info
+        self.events: List[Tuple[Any, ...]] = []
+        self.duration_ms: Optional[float] = None  # None while the cycle is running
+
+    def to_dict(self) -> Dict[str, Any]:
+        events = []
+        for event in list(self.events):
+            event_time, kind, fields = event[0], event[1], event[2:]
+            field_names = EVENT_FIELDS.get(kind)
+            decoded = dict(zip(field_names, fields)) if field_names else {"fields": list(fields)}
+            events.append({"t_ms": round((event_time - self.started_perf) * 1000.0, 3), "kind": kind, **decoded})
+        return {
+            "cycle": self.number,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="milliseconds"),
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            **self.info,
+            "events": events,
+        }
+
+
+class FlightRecorder:
+    """
+    Keeps the structured events of the last `max_cycles` monitoring cycles in memory.
+
+    `record()` only appends a tuple (timestamp, kind, *fields) to the running cycle, so the
+    recorder can stay on in production. Events are decoded to JSON (see EVENT_FIELDS) only
+    when a dump is written: after a cycle in which an exception or a rule with
+    "flight_recorder_dump" asked for one, or on demand (signal, control API).
+    """
+
+    def __init__(
+        self,
+        name: str = "profile",
+        max_cycles: int = DEFAULT_FLIGHT_RECORDER_CYCLES,
+        dump_dir: Optional[str] = None,
+        min_dump_interval_sec: float = DEFAULT_MIN_DUMP_INTERVAL_SEC,
+    ):
+        self.name = name
+        self.dump_dir = dump_dir or _default_dump_dir()
+        self.min_dump_interval_sec = min_dump_interval_sec
+        self._cycles: Deque[_CycleRecord] = deque(maxlen=max(1, int(max_cycles)))
+        self._current: Optional[_CycleRecord] = None
+        self._cycle_count = 0
+        self._pending_dump_reason: Optional[str] = None
+        self._last_dump_time: Optional[float] = None
+        self._lock = threading.Lock()
+        self.dumps_written = 0
+        self.dumps_suppressed = 0
+        _live_recorders.add(self)
+
+    def begin_cycle(self, **info: Any) -> None:
+        """Starts recording a cycle; `info` (e.g. degraded=True) is written with it."""
+        self._cycle_count += 1
+        cycle = _CycleRecord(self._cycle_count, info)
+        with self._lock:
+            self._current = cycle
+            self._cycles.append(cycle)
+
+    def record(self, kind: str, *fields: Any) -> None:
+        """Appends an event to the running cycle; ignored outside cycles. Fields follow EVENT_FIELDS[kind]."""
+        cycle = self._current
+        if cycle is not None:
+            cycle.events.append((time.perf_counter(), kind) + fields)
+
+    def request_dump(self, reason: str) -> None:
+        """Asks for a dump once the running cycle ends, so the dump includes all of it."""
+        if self._pending_dump_reason is None:
+            self._pending_dump_reason = reason
+
+    def end_cycle(self) -> Optional[threading.Thread]:
+        """Closes the running cycle and, if one was requested, starts writing a dump in the background."""
+        cycle = self._current
+        if cycle is not None:
+            cycle.duration_ms = (time.perf_counter() - cycle.started_perf) * 1000.0
+        with self._lock:
+            self._current = None
+        reason, self._pending_dump_reason = self._pending_dump_reason, None
+        if reason is None:
+            return None
+        now = time.monotonic()
+        if self._last_dump_time is not None and now - self._last_dump_time < self.min_dump_interval_sec:
+            self.dumps_suppressed += 1
+            logger.debug("FlightRecorder '%s': Dump for '%s' suppressed (last dump %.1fs ago).", self.name, reason, now - self._last_dump_time)
+            return None
+        self._last_dump_time = now
+        cycles = self.snapshot()  # Taken now, so the writer thread sees exactly these cycles
+        dump_thread = threading.Thread(target=self._write_dump, args=(reason, cycles), name=f"FlightRecorderDump-{self.name}", daemon=True)
+        dump_thread.start()
+        return dump_thread
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """The recorded cycles, oldest first, decoded to dicts (the running cycle included)."""
+        with self._lock:
+            cycles = list(self._cycles)
+        return [cycle.to_dict() for cycle in cycles]
+
+    def dump(self, reason: str = "manual") -> Optional[str]:
+        """Writes the recorded cycles now, regardless of the dump rate limit. Returns the file path, or None on failure."""
+        return self._write_dump(reason, self.snapshot())
+
+    def _write_dump(self, reason: str, cycles: List[Dict[str, Any]]) -> Optional[str]:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{self.name}_{reason}")
+        dump_path = os.path.join(self.dump_dir, f"flight_{datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]}_{safe_name}.json")
+        try:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            with open(dump_path, "w", encoding="utf-8") as f:
+                json.dump({"profile": self.name, "reason": reason, "dumped_at": datetime.now().isoformat(timespec="milliseconds"), "cycles": cycles}, f, indent=1, default=_json_default)
+        except Exception as e:
+            logger.error(f"FlightRecorder '{self.name}': Could not write dump '{dump_path}': {e}", exc_info=True)
+            return None
+        self.dumps_written += 1
+        logger.warning(f"FlightRecorder '{self.name}': Dumped the last {len(cycles)} cycle(s) ({reason}) to '{dump_path}'.")
+        return dump_path
+
+
+def dump_all_flight_recorders(reason: str = "signal") -> List[str]:
+    """Writes a dump of every live flight recorder (one per running profile). Returns the file paths."""
+    return [dump_path for dump_path in (recorder.dump(reason) for recorder in list(_live_recorders)) if dump_path]
+
+
+def install_dump_signal_handler() -> Optional[str]:
+    """
+    Makes SIGUSR1 (SIGBREAK, i.e. Ctrl+Break, on Windows) dump every flight recorder.
+    Must be called from the main thread. Returns the signal's name, or None if unavailable.
+    """
+    dump_signal = getattr(signal, "SIGUSR1", None) or getattr(signal, "SIGBREAK", None)
+    if dump_signal is None:
+        return None
+
+    def _on_dump_signal(signum: int, frame: Any) -> None:
+        threading.Thread(target=dump_all_flight_recorders, args=("signal",), name="FlightRecorderSignalDump", daemon=True).start()
+
+    try:
+        signal.signal(dump_signal, _on_dump_signal)
+    except ValueError:  # Not the main thread
+        logger.warning("FlightRecorder: Dump signal handler can only be installed from the main thread.")
+        return None
+    signal_name = signal.Signals(dump_signal).name
+    logger.info(f"FlightRecorder: Send {signal_name} to dump the recent cycles of every running profile.")
+    return signal_name
@@ -0,0 +1,79 @@
+from typing import Any, Dict, Iterable, Mapping
+
+
+class FrozenConfigError(TypeError):
+    """Raised when code tries to modify a read-only profile snapshot in place."""
+
+
+def _read_only(self, *args, **kwargs):
+    raise FrozenConfigError(f"{self.__class__.__name__} is a read-only profile snapshot. Edit the profile through ConfigManager.edit_profile() or get_mutable_profile_data().")
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict used for profile snapshots. It is still a `dict`, so existing
+    `isinstance(x, dict)` checks, `json.dumps`, `{**spec}` and `dict(spec)` keep working;
+    only in-place mutation raises FrozenConfigError. `copy.deepcopy` returns a mutable copy.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Any:
+        return thaw_config(self)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+class FrozenList(list):
+    """Read-only list counterpart of FrozenDict."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Any:
+        return thaw_config(self)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+
+def freeze_config(value: Any) -> Any:
+    """Recursively converts JSON-like dicts/lists into FrozenDict/FrozenList. Already frozen values are reused."""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, Mapping):
+        return FrozenDict((key, freeze_config(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze_config(item) for item in value)
+    return value
+
+
+def thaw_config(value: Any) -> Any:
+    """Recursively converts (frozen) dicts/lists into new plain, mutable dicts/lists."""
+    if isinstance(value, Mapping):
+        return {key: thaw_config(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw_config(item) for item in value]
+    return value
+
+
+def build_name_index(items: Iterable[Mapping[str, Any]]) -> FrozenDict:
+    """Maps each item's 'name' to the item. The first item wins if names repeat, like a linear scan would."""
+    index: Dict[str, Any] = {}
+    for item in items:
+        name = item.get("name") if isinstance(item, Mapping) else None
+        if name and name not in index:
+            index[name] = item
+    return FrozenDict(index)
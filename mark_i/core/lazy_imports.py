@@ -0,0 +1,174 @@
+import importlib
+import importlib.abc
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict, List, Optional, TextIO
+
+DEFAULT_IMPORT_REPORT_TOP_N = 25
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Lets heavy optional dependencies (Gemini SDK, Tesseract bindings, ...) be referenced at module
+    level as usual while only being imported once the code path that needs them actually runs.
+    Attribute writes are forwarded to the real module, so `unittest.mock.patch` works through it.
+    """
+
+    __slots__ = ("_lazy_module_name", "_lazy_module")
+
+    def __init__(self, module_name: str):
+        object.__setattr__(self, "_lazy_module_name", module_name)
+        object.__setattr__(self, "_lazy_module", None)
+
+    def _load(self) -> ModuleType:
+        module = object.__getattribute__(self, "_lazy_module")
+        if module is None:
+            module = importlib.import_module(object.__getattribute__(self, "_lazy_module_name"))
+            object.__setattr__(self, "_lazy_module", module)
+        return module
+
+    def __getattr__(self, attribute_name: str) -> Any:
+        return getattr(self._load(), attribute_name)
+
+    def __setattr__(self, attribute_name: str, value: Any) -> None:
+        setattr(self._load(), attribute_name, value)
+
+    def __delattr__(self, attribute_name: str) -> None:
+        delattr(self._load(), attribute_name)
+
+    def __repr__(self) -> str:
+        state = "loaded" if object.__getattribute__(self, "_lazy_module") is not None else "not loaded"
+        return f"<LazyModule '{object.__getattribute__(self, '_lazy_module_name')}' ({state})>"
+
+
+def lazy_import(module_name: str) -> LazyModule:
+    """Returns a `LazyModule` for `module_name` (e.g. `genai = lazy_import("google.generativeai")`)."""
+    return LazyModule(module_name)
+
+
+class _TimedLoader:
+    """Wraps a module loader to time `exec_module`; everything else is delegated to the original loader."""
+
+    def __init__(self, original_loader: Any, tracer: "ImportTimeTracer"):
+        self._original_loader = original_loader
+        self._tracer = tracer
+
+    def create_module(self, spec: Any) -> Optional[ModuleType]:
+        create_module = getattr(self._original_loader, "create_module", None)
+        return create_module(spec) if create_module else None
+
+    def exec_module(self, module: ModuleType) -> None:
+        # The module only ever sees its real loader
+        module.__loader__ = self._original_loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._original_loader
+        self._tracer._enter(module.__name__)
+        try:
+            self._original_loader.exec_module(module)
+        finally:
+            self._tracer._exit(module.__name__)
+
+    def __getattr__(self, attribute_name: str) -> Any:
+        return getattr(self._original_loader, attribute_name)
+
+
+class ImportTimeTracer(importlib.abc.MetaPathFinder):
+    """
+    Records how long each module takes to import, like `python -X importtime` but switchable at runtime.
+
+    Installed first on `sys.meta_path`; it asks the remaining finders for the spec and wraps the
+    loader so that module execution is timed. Self time excludes nested imports, cumulative time
+    includes them.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.timings: Dict[str, Dict[str, float]] = {}  # module name -> {"self_ms", "cumulative_ms"}
+        self.started_at = time.perf_counter()
+
+    def install(self) -> "ImportTimeTracer":
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname: str, path: Any = None, target: Any = None) -> Any:
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._local.finding = False
+
+    def _enter(self, module_name: str) -> None:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append([module_name, time.perf_counter(), 0.0])
+
+    def _exit(self, module_name: str) -> None:
+        stack = self._local.stack
+        _, start_time, nested_ms = stack.pop()
+        cumulative_ms = (time.perf_counter() - start_time) * 1000.0
+        if stack:
+            stack[-1][2] += cumulative_ms
+        with self._lock:
+            self.timings[module_name] = {"self_ms": cumulative_ms - nested_ms, "cumulative_ms": cumulative_ms}
+
+    def total_ms(self) -> float:
+        """Total time spent executing traced modules (the sum of their self times)."""
+        with self._lock:
+            timings = dict(self.timings)
+        return sum(timing["self_ms"] for timing in timings.values())
+
+    def format_report(self, top_n: int = DEFAULT_IMPORT_REPORT_TOP_N) -> str:
+        with self._lock:
+            slowest = sorted(self.timings.items(), key=lambda item: item[1]["cumulative_ms"], reverse=True)[:top_n]
+        lines: List[str] = [
+            f"Import trace: {len(self.timings)} modules imported in {self.total_ms():.1f} ms "
+            f"({(time.perf_counter() - self.started_at) * 1000.0:.1f} ms since tracing started). Slowest {len(slowest)}:",
+            f"{'self ms':>10} | {'cumulative ms':>13} | module",
+        ]
+        for module_name, timing in slowest:
+            lines.append(f"{timing['self_ms']:>10.1f} | {timing['cumulative_ms']:>13.1f} | {module_name}")
+        return "\n".join(lines)
+
+
+_active_tracer: Optional[ImportTimeTracer] = None
+
+
+def start_import_trace() -> ImportTimeTracer:
+    """Starts the process-wide import tracer (used by `--trace-imports`)."""
+    global _active_tracer
+    if _active_tracer is None:
+        _active_tracer = ImportTimeTracer().install()
+    return _active_tracer
+
+
+def report_import_trace(stream: Optional[TextIO] = None, top_n: int = DEFAULT_IMPORT_REPORT_TOP_N) -> Optional[str]:
+    """Writes the import report once startup is done and stops tracing. No-op if tracing was not started."""
+    global _active_tracer
+    if _active_tracer is None:
+        return None
+    tracer, _active_tracer = _active_tracer, None
+    tracer.uninstall()
+    report = tracer.format_report(top_n=top_n)
+    print(report, file=stream or sys.stderr)
+    return report
@@ -1,15 +1,31 @@
+import atexit
+import contextlib
+import copy
 import logging
 import logging.handlers
 import os
+import queue
 import sys
+import threading
 from datetime import date  # For default log filename if TimedRotatingFileHandler isn't used (not current)
-from typing import Optional  # Added this line
+from typing import Iterator, Optional  # Added this line
 
 # This name should be used by all modules in the application when getting a logger
 # e.g., logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.my_module")
 # or, more simply, logger = logging.getLogger(__name__) which will result in names like "mark_i.core.some_module"
 APP_ROOT_LOGGER_NAME = "mark_i"
 
+# Set to "1" to write log records on the calling thread instead of the background listener (e.g. when debugging logging itself)
+ENV_SYNC_LOGGING = "MARK_I_SYNC_LOGGING"
+
+# Loggers that emit records on every monitoring cycle; their DEBUG/INFO records are subject to per-cycle sampling
+HOT_PATH_LOGGER_NAMES = tuple(
+    f"{APP_ROOT_LOGGER_NAME}.{name}"
+    for name in ("main_controller", "engines.capture_engine", "engines.analysis_engine", "engines.condition_evaluators", "engines.rules_engine", "engines.shared_frame")
+)
+
+_LAZY_ARG_TYPES = (str, int, float, bool, type(None))
+
 
 class MaxLevelFilter(logging.Filter):
     """Filters log records to allow only those below or equal to a max level."""
@@ -22,6 +38,108 @@ class MaxLevelFilter(logging.Filter):
         return record.levelno <= self.max_level
 
 
+class CycleLogSampler(logging.Filter):
+    """
+    Per-cycle log sampling for the monitoring hot path.
+
+    `begin_cycle(every_n_cycles)` marks whether the cycle starting now on the calling thread
+    is logged: with N > 1 only every Nth cycle's DEBUG/INFO records from the hot-path loggers
+    get through; WARNING and above, and records from every other logger, always pass.
+
+    The cycle count and decision are thread-local (filters run on the logging thread), so each
+    monitoring thread (one per profile, or the supervisor's) samples its own cycles. A worker
+    thread doing part of a cycle adopts its decision with `in_cycle()`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._cycle_state = threading.local()  # .cycle_count, .sampled (None outside cycles)
+        self._suppressed_lock = threading.Lock()
+        self.suppressed_count = 0
+
+    @property
+    def sampled(self) -> bool:
+        """Whether hot-path DEBUG/INFO records on the calling thread are logged right now."""
+        return getattr(self._cycle_state, "sampled", None) is not False
+
+    def begin_cycle(self, every_n_cycles: int = 1) -> bool:
+        """Starts a monitoring cycle on the calling thread; returns whether its hot-path records are logged."""
+        cycle_count = getattr(self._cycle_state, "cycle_count", 0) + 1
+        self._cycle_state.cycle_count = cycle_count
+        self._cycle_state.sampled = every_n_cycles <= 1 or (cycle_count - 1) % every_n_cycles == 0
+        return self._cycle_state.sampled
+
+    def end_cycle(self) -> None:
+        self._cycle_state.sampled = None
+
+    @contextlib.contextmanager
+    def in_cycle(self, sampled: bool) -> Iterator[None]:
+        """Applies a cycle's sampling decision (from `sampled` on the cycle's thread) to the calling worker thread."""
+        previous = getattr(self._cycle_state, "sampled", None)
+        self._cycle_state.sampled = sampled
+        try:
+            yield
+        finally:
+            self._cycle_state.sampled = previous
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(self._cycle_state, "sampled", None) is not False or record.levelno >= logging.WARNING or not record.name.startswith(HOT_PATH_LOGGER_NAMES):
+            return True
+        with self._suppressed_lock:
+            self.suppressed_count += 1
+        return False
+
+
+_cycle_log_sampler = CycleLogSampler()
+
+
+def get_cycle_log_sampler() -> CycleLogSampler:
+    """The process-wide sampler; MainController and ProfileSupervisor mark cycle boundaries on it."""
+    return _cycle_log_sampler
+
+
+def hot_path_log_enabled(hot_path_logger: logging.Logger, level: int = logging.DEBUG) -> bool:
+    """Whether a hot-path record at `level` would be written; guards summaries that are costly to build."""
+    return hot_path_logger.isEnabledFor(level) and (_cycle_log_sampler.sampled or level >= logging.WARNING)
+
+
+class DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock QueueHandler formats every record on the calling thread before enqueueing it.
+    Here `%`-style messages whose arguments are immutable scalars are enqueued as-is and
+    formatted by the listener; other arguments (which could change before the listener gets
+    to them) are merged on the calling thread. Tracebacks are always rendered immediately.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)  # Other handlers of the same logger still see the original
+        if record.args and not (isinstance(record.args, tuple) and all(isinstance(arg, _LAZY_ARG_TYPES) for arg in record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None  # Tracebacks keep whole frames alive; the text is all the handlers need
+        return record
+
+
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_queue_listener() -> None:
+    """Stops the background log listener, writing out every queued record first."""
+    global _queue_listener
+    if _queue_listener is not None:
+        listener, _queue_listener = _queue_listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+
+
+atexit.register(_stop_queue_listener)
+
+
 def setup_logging(
     console_log_level: int = logging.INFO,
     log_file_path_override: Optional[str] = None,
@@ -30,6 +148,7 @@ def setup_logging(
     log_file_when: str = "midnight",  # Rotate at midnight
     log_file_interval: int = 1,  # Rotate every 1 day (when='midnight' makes interval less relevant for D)
     log_file_backup_count: int = 7,  # Keep 7 backup log files
+    async_logging: Optional[bool] = None,  # None: on unless MARK_I_SYNC_LOGGING=1
 ):
     """
     Configures logging for the Mark-I application.
@@ -46,12 +165,17 @@ def setup_logging(
         log_file_when: Type of interval for rotation for TimedRotatingFileHandler.
         log_file_interval: Interval for rotation.
         log_file_backup_count: Number of backup log files to keep.
+        async_logging: If True, callers only enqueue records; a background QueueListener formats
+                       and writes them to the console and file handlers. Defaults to True unless
+                       the MARK_I_SYNC_LOGGING environment variable is "1".
     """
+    global _queue_listener
     app_env = os.getenv("APP_ENV", "production").lower()  # Default to production for safety
     logger_instance = logging.getLogger(APP_ROOT_LOGGER_NAME)
 
-    logger_instance.setLevel(logging.DEBUG)  # Logger itself set to lowest, handlers filter
+    logger_instance.setLevel(logging.DEBUG)  # Lowered to what the handlers accept once they are built
 
+    _stop_queue_listener()  # Flushes records queued under the previous configuration
     if logger_instance.hasHandlers():
         logger_instance.handlers.clear()
     logger_instance.propagate = False  # Prevent messages going to default root logger handlers
@@ -143,9 +267,28 @@ def setup_logging(
     # If stdout_handler's level is DEBUG, it shows DEBUG and INFO. If INFO, it shows INFO.
     # The MaxLevelFilter ensures it doesn't show WARNING+ on stdout.
 
+    # Records no handler would accept are not even created; this is also what makes
+    # `logger.isEnabledFor(logging.DEBUG)` guards skip expensive debug summaries.
+    output_handlers = list(logger_instance.handlers)
+    logger_instance.setLevel(min(handler.level for handler in output_handlers))
+    if async_logging is None:
+        async_logging = os.getenv(ENV_SYNC_LOGGING, "0") != "1"
+    if async_logging:
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        queue_handler = DeferredFormatQueueHandler(log_queue)
+        queue_handler.addFilter(_cycle_log_sampler)
+        logger_instance.handlers.clear()
+        logger_instance.addHandler(queue_handler)
+        _queue_listener = logging.handlers.QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+        _queue_listener.start()
+    else:
+        for handler in output_handlers:
+            handler.addFilter(_cycle_log_sampler)
+
     logger_instance.info(
         f"Logging setup complete for '{APP_ROOT_LOGGER_NAME}'. APP_ENV: '{app_env}'. "
         f"Console (stdout) Level Effective Min: {effective_stdout_level_name} (shows up to INFO). "
         f"Console (stderr) Level Effective Min: {logging.getLevelName(logging.WARNING)}. "
-        f"File Level Effective Min: {logging.getLevelName(file_log_level_setting) if enable_file_logging and 'file_handler_timed' in locals() else 'N/A (Disabled)'}."
+        f"File Level Effective Min: {logging.getLevelName(file_log_level_setting) if enable_file_logging and 'file_handler_timed' in locals() else 'N/A (Disabled)'}. "
+        f"Handlers run {'on a background QueueListener thread' if async_logging else 'synchronously'}."
     )
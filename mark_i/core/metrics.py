@@ -0,0 +1,110 @@
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (ms) of the latency histogram buckets; an implicit +Inf bucket follows.
+DEFAULT_LATENCY_BUCKETS_MS: Tuple[float, ...] = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Thread-safe cumulative latency histogram (Prometheus-style buckets, in milliseconds)."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets_ms: Tuple[float, ...] = tuple(sorted(float(b) for b in buckets_ms))
+        self._counts: List[int] = [0] * (len(self.buckets_ms) + 1)  # Last slot: above every bound
+        self._sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        slot = len(self.buckets_ms)
+        for index, bound in enumerate(self.buckets_ms):
+            if value_ms <= bound:
+                slot = index
+                break
+        with self._lock:
+            self._counts[slot] += 1
+            self._sum_ms += value_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{"buckets": [(upper bound ms, cumulative count), ..., (inf, count)], "sum_ms": ..., "count": ...}"""
+        with self._lock:
+            counts, sum_ms = list(self._counts), self._sum_ms
+        cumulative, buckets = 0, []
+        for bound, count in zip(list(self.buckets_ms) + [math.inf], counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return {"buckets": buckets, "sum_ms": sum_ms, "count": cumulative}
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Optional[Dict[str, Any]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return "NaN"
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+class PrometheusTextBuilder:
+    """
+    Builds a Prometheus text exposition (format 0.0.4). Samples of one metric may be added
+    in several calls (e.g. one per profile label); HELP/TYPE lines are written once.
+    """
+
+    def __init__(self, prefix: str = "mark_i_"):
+        self.prefix = prefix
+        self._families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def _family(self, name: str, metric_type: str, help_text: str) -> List[str]:
+        full_name = self.prefix + name
+        if full_name not in self._families:
+            self._families[full_name] = (metric_type, help_text, [])
+        return self._families[full_name][2]
+
+    def add(self, name: str, metric_type: str, help_text: str, value: Any, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Adds one counter/gauge sample. None values are skipped."""
+        if value is None:
+            return
+        self._family(name, metric_type, help_text).append(f"{self.prefix}{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def add_counter(self, name: str, help_text: str, value: Any, labels: Optional[Dict[str, Any]] = None) -> None:
+        self.add(name, "counter", help_text, value, labels)
+
+    def add_gauge(self, name: str, help_text: str, value: Any, labels: Optional[Dict[str, Any]] = None) -> None:
+        self.add(name, "gauge", help_text, value, labels)
+
+    def add_histogram(self, name: str, help_text: str, snapshot: Dict[str, Any], labels: Optional[Dict[str, Any]] = None, unit_scale: float = 0.001) -> None:
+        """Adds a LatencyHistogram snapshot; bounds and sum are scaled by `unit_scale` (default: ms -> seconds)."""
+        samples = self._family(name, "histogram", help_text)
+        base_labels = dict(labels or {})
+        for bound, cumulative_count in snapshot["buckets"]:
+            le = "+Inf" if math.isinf(bound) else _format_value(bound * unit_scale)
+            samples.append(f"{self.prefix}{name}_bucket{_format_labels({**base_labels, 'le': le})} {cumulative_count}")
+        samples.append(f"{self.prefix}{name}_sum{_format_labels(base_labels)} {_format_value(snapshot['sum_ms'] * unit_scale)}")
+        samples.append(f"{self.prefix}{name}_count{_format_labels(base_labels)} {snapshot['count']}")
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for full_name, (metric_type, help_text, samples) in self._families.items():
+            if not samples:
+                continue
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def cache_hit_ratio(stats: Dict[str, Any]) -> Optional[float]:
+    """hits / (hits + misses) from a cache's stats dict, or None before the first lookup."""
+    lookups = stats.get("hits", 0) + stats.get("misses", 0)
+    return stats.get("hits", 0) / lookups if lookups else None
@@ -0,0 +1,222 @@
+import atexit
+import contextlib
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.core.tracing")
+
+ENV_TRACE_FILE = "MARK_I_TRACE_FILE"
+ENV_TRACE_SAMPLE_RATE = "MARK_I_TRACE_SAMPLE_RATE"
+DEFAULT_TRACE_SAMPLE_RATE = 1.0
+DEFAULT_TRACE_MAX_EVENTS = 200_000  # Oldest events are dropped beyond this (about 40 MB of JSON)
+
+
+class _NoOpSpan:
+    """Returned by span() when tracing is off or the cycle is not sampled: entering it costs one method call."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoOpSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def set_arg(self, key: str, value: Any) -> None:
+        return None
+
+
+_NO_OP_SPAN = _NoOpSpan()
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_category", "_args", "_start_ns")
+
+    def __init__(self, tracer: "ChromeTracer", name: str, category: str, args: Dict[str, Any]):
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+        self._start_ns = 0
+
+    def __enter__(self) -> "_Span":
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self._args["error"] = exc_type.__name__
+        self._tracer._record_complete(self._name, self._category, self._start_ns, end_ns, self._args)
+
+    def set_arg(self, key: str, value: Any) -> None:
+        """Attaches a result to the span (e.g. whether a condition matched)."""
+        self._args[key] = value
+
+
+class ChromeTracer:
+    """
+    Records spans as Chrome Trace Event "complete" events, viewable in Perfetto or chrome://tracing.
+
+    Sampling is per monitoring cycle: `begin_cycle()` decides whether the cycle running on
+    the calling thread is recorded. The decision is thread-local, so profiles cycling on
+    their own threads never switch tracing on or off for each other; a worker thread doing
+    part of a cycle adopts its decision with `in_cycle()`. Work outside cycles (warm-up,
+    queued actions) is always recorded. When tracing is disabled or the cycle is not
+    sampled, `span()` returns a shared no-op context manager.
+    """
+
+    def __init__(self, sample_rate: float = DEFAULT_TRACE_SAMPLE_RATE, max_events: int = DEFAULT_TRACE_MAX_EVENTS, enabled: bool = True):
+        self.enabled = enabled
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max(1, int(max_events)))
+        self._cycle_state = threading.local()  # .sampled: this thread's cycle decision (None outside cycles)
+        self._pid = os.getpid()
+        self._origin_ns = time.perf_counter_ns()
+        self._named_threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.cycles_seen = 0
+        self.cycles_sampled = 0
+
+    @property
+    def recording(self) -> bool:
+        """Whether spans on the calling thread are recorded right now."""
+        sampled = getattr(self._cycle_state, "sampled", None)
+        return self.enabled if sampled is None else sampled
+
+    def span(self, name: str, category: str = "mark_i", **args: Any) -> Any:
+        if not self.recording:
+            return _NO_OP_SPAN
+        return _Span(self, name, category, args)
+
+    def begin_cycle(self) -> bool:
+        """Starts a monitoring cycle on the calling thread; returns whether it is sampled."""
+        if not self.enabled:
+            return False
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        with self._lock:
+            self.cycles_seen += 1
+            self.cycles_sampled += int(sampled)
+        self._cycle_state.sampled = sampled
+        return sampled
+
+    def end_cycle(self) -> None:
+        self._cycle_state.sampled = None
+
+    @contextlib.contextmanager
+    def in_cycle(self, sampled: bool) -> Iterator[None]:
+        """Applies a cycle's sampling decision (from `recording` on the cycle's thread) to the calling worker thread."""
+        previous = getattr(self._cycle_state, "sampled", None)
+        self._cycle_state.sampled = sampled and self.enabled
+        try:
+            yield
+        finally:
+            self._cycle_state.sampled = previous
+
+    def _record_complete(self, name: str, category: str, start_ns: int, end_ns: int, args: Dict[str, Any]) -> None:
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - self._origin_ns) / 1000.0,
+            "dur": (end_ns - start_ns) / 1000.0,
+            "pid": self._pid,
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+            if thread.ident not in self._named_threads:
+                self._named_threads[thread.ident] = thread.name  # type: ignore[index]
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Recorded events plus thread-name metadata events, in Trace Event format."""
+        with self._lock:
+            events = list(self._events)
+            named_threads = dict(self._named_threads)
+        metadata = [{"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0, "args": {"name": "Mark-I"}}]
+        metadata += [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": thread_name}} for tid, thread_name in named_threads.items()]
+        return metadata + events
+
+    def write(self, path: str) -> int:
+        """Writes the trace as Chrome Trace Event JSON. Returns the number of span events written."""
+        events = self.events()
+        trace_dir = os.path.dirname(path)
+        if trace_dir:
+            os.makedirs(trace_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"cycles_seen": self.cycles_seen, "cycles_sampled": self.cycles_sampled}}, f, default=str)
+        span_count = sum(1 for event in events if event["ph"] == "X")
+        logger.info(f"ChromeTracer: Wrote {span_count} spans ({self.cycles_sampled}/{self.cycles_seen} cycles sampled) to '{path}'.")
+        return span_count
+
+
+_DISABLED_TRACER = ChromeTracer(enabled=False)
+_default_tracer: ChromeTracer = _DISABLED_TRACER
+_default_trace_configured = False
+
+
+def configure_default_tracer(trace_file: Optional[str], sample_rate: float = DEFAULT_TRACE_SAMPLE_RATE, max_events: int = DEFAULT_TRACE_MAX_EVENTS) -> ChromeTracer:
+    """Enables tracing for the whole process, writing `trace_file` at exit. Pass None to disable."""
+    global _default_tracer, _default_trace_configured
+    _default_trace_configured = True
+    if not trace_file:
+        _default_tracer = _DISABLED_TRACER
+        return _default_tracer
+    tracer = ChromeTracer(sample_rate=sample_rate, max_events=max_events)
+    _default_tracer = tracer
+    atexit.register(_write_at_exit, tracer, trace_file)
+    logger.info(f"Tracing enabled: spans are written to '{trace_file}' at exit (cycle sample rate {tracer.sample_rate:g}).")
+    return tracer
+
+
+def _write_at_exit(tracer: ChromeTracer, trace_file: str) -> None:
+    try:
+        tracer.write(trace_file)
+    except Exception as e:
+        logger.error(f"ChromeTracer: Could not write trace file '{trace_file}': {e}")
+
+
+def get_tracer() -> ChromeTracer:
+    """The process-wide tracer; falls back to the MARK_I_TRACE_FILE / MARK_I_TRACE_SAMPLE_RATE environment variables."""
+    if not _default_trace_configured:
+        env_trace_file = os.getenv(ENV_TRACE_FILE)
+        configure_default_tracer(env_trace_file, sample_rate=float(os.getenv(ENV_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE)))
+    return _default_tracer
+
+
+def trace_span(name: str, category: str = "mark_i", **args: Any) -> Any:
+    """`with trace_span("ocr", "analysis", region=...):` records a span on the process-wide tracer."""
+    tracer = _default_tracer if _default_trace_configured else get_tracer()
+    return tracer.span(name, category, **args)
+
+
+def traced(name: str, category: str = "mark_i", span_args: Optional[Callable[..., Dict[str, Any]]] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator form of trace_span for whole methods. `span_args`, called with the method's
+    arguments only while recording, returns the span's args (e.g. the region name).
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            tracer = _default_tracer if _default_trace_configured else get_tracer()
+            if not tracer.recording:
+                return func(*args, **kwargs)
+            with tracer.span(name, category, **(span_args(*args, **kwargs) if span_args else {})):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,456 @@
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import re
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+from mark_i.core.metrics import PrometheusTextBuilder, cache_hit_ratio
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.daemon")
+
+DEFAULT_CONTROL_HOST = "127.0.0.1"
+DEFAULT_CONTROL_PORT = 8765
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_MAX_REQUEST_BODY_BYTES = 64 * 1024
+ENV_CONTROL_TOKEN = "MARK_I_CONTROL_TOKEN"  # Bearer token of the control API (required to listen on a non-loopback address)
+_WILDCARD_HOSTS = {"", "0.0.0.0", "::"}
+
+# Builds a controller for a resolved profile path. MainController(profile_path, use_compiled_profile=...) by default.
+ControllerFactory = Callable[[str], Any]
+
+
+class DaemonError(Exception):
+    """A control request that cannot be carried out. `http_status` is the status to answer with."""
+
+    def __init__(self, message: str, http_status: int = 400):
+        super().__init__(message)
+        self.http_status = http_status
+
+
+def _default_controller_factory(use_compiled_profile: bool = True) -> ControllerFactory:
+    def _factory(profile_path: str) -> Any:
+        from mark_i.main_controller import MainController  # Local import: the daemon module itself stays light
+
+        return MainController(profile_name_or_path=profile_path, use_compiled_profile=use_compiled_profile)
+
+    return _factory
+
+
+class _HostedProfile:
+    __slots__ = ("name", "profile_path", "controller", "loaded_at", "started_at", "last_error")
+
+    def __init__(self, name: str, profile_path: str, controller: Any):
+        self.name = name
+        self.profile_path = profile_path
+        self.controller = controller
+        self.loaded_at = time.time()
+        self.started_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class ProfileDaemon:
+    """
+    Hosts bot profiles for `mark_i serve`: each loaded profile has its own MainController,
+    addressed by a name (the profile file's base name unless given). All methods are
+    thread-safe; they are called from the control server's request threads.
+    """
+
+    def __init__(
+        self,
+        controller_factory: Optional[ControllerFactory] = None,
+        profile_path_resolver: Optional[Callable[[str], Optional[str]]] = None,
+        use_compiled_profile: bool = True,
+    ):
+        self._controller_factory = controller_factory or _default_controller_factory(use_compiled_profile)
+        self._resolve_profile_path = profile_path_resolver or (lambda profile: os.path.abspath(profile) if os.path.isfile(profile) else None)
+        self._profiles: Dict[str, _HostedProfile] = {}
+        self._lock = threading.RLock()
+        self.started_at = time.time()
+        self.shutdown_requested = threading.Event()
+
+    @staticmethod
+    def _default_name(profile_path: str) -> str:
+        return os.path.splitext(os.path.basename(profile_path))[0]
+
+    def _get(self, name: str) -> _HostedProfile:
+        hosted = self._profiles.get(name)
+        if hosted is None:
+            raise DaemonError(f"No profile named '{name}' is loaded.", http_status=404)
+        return hosted
+
+    def load_profile(self, profile: str, name: Optional[str] = None, start: bool = False) -> Dict[str, Any]:
+        profile_path = self._resolve_profile_path(profile)
+        if not profile_path:
+            raise DaemonError(f"Profile '{profile}' not found.", http_status=404)
+        name = name or self._default_name(profile_path)
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", name):
+            raise DaemonError(f"Invalid profile name '{name}' (letters, digits, '_', '.' and '-' only).")
+        if name in self.profile_names():
+            raise DaemonError(f"A profile named '{name}' is already loaded.", http_status=409)
+        try:
+            controller = self._controller_factory(profile_path)  # Outside the lock: status and metrics requests keep being served
+        except Exception as e:
+            logger.error(f"ProfileDaemon: Could not load profile '{profile_path}': {e}", exc_info=True)
+            raise DaemonError(f"Could not load profile '{profile_path}': {e}", http_status=422) from e
+        with self._lock:
+            if name in self._profiles:
+                raise DaemonError(f"A profile named '{name}' is already loaded.", http_status=409)
+            self._profiles[name] = _HostedProfile(name, profile_path, controller)
+            logger.info(f"ProfileDaemon: Loaded profile '{name}' from '{profile_path}'.")
+            if start:
+                self.start_profile(name)
+            return self.profile_status(name)
+
+    def start_profile(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            hosted = self._get(name)
+            if not hosted.controller.is_running():
+                hosted.controller.start()
+                hosted.started_at = time.time()
+                logger.info(f"ProfileDaemon: Started profile '{name}'.")
+            return self.profile_status(name)
+
+    def stop_profile(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            hosted = self._get(name)
+            if hosted.controller.is_running():
+                hosted.controller.stop()
+                hosted.started_at = None
+                logger.info(f"ProfileDaemon: Stopped profile '{name}'.")
+            return self.profile_status(name)
+
+    def reload_profile(self, name: str) -> Dict[str, Any]:
+        """Rebuilds the profile's controller from disk (so restart-only settings apply too) and restarts it if it was running."""
+        with self._lock:
+            hosted = self._get(name)
+        try:
+            new_controller = self._controller_factory(hosted.profile_path)
+        except Exception as e:
+            hosted.last_error = f"Reload failed: {e}"
+            logger.error(f"ProfileDaemon: Reload of '{name}' failed. Keeping the running profile.", exc_info=True)
+            raise DaemonError(f"Could not reload profile '{name}': {e}", http_status=422) from e
+        with self._lock:
+            hosted = self._get(name)
+            was_running = hosted.controller.is_running()
+            if was_running:
+                hosted.controller.stop()
+            hosted.controller, hosted.last_error, hosted.loaded_at = new_controller, None, time.time()
+            if was_running:
+                new_controller.start()
+                hosted.started_at = time.time()
+            logger.info(f"ProfileDaemon: Reloaded profile '{name}'{' and restarted it' if was_running else ''}.")
+            return self.profile_status(name)
+
+    def dump_flight_recorder(self, name: str) -> Dict[str, Any]:
+        """Writes the profile's flight recorder (its recent cycles) to disk and returns the dump path."""
+        with self._lock:
+            flight_recorder = getattr(self._get(name).controller, "flight_recorder", None)
+        if flight_recorder is None:
+            raise DaemonError(f"The flight recorder of profile '{name}' is disabled ('flight_recorder_enabled').", http_status=409)
+        dump_path = flight_recorder.dump("control-api")
+        if dump_path is None:
+            raise DaemonError(f"Could not write the flight recorder dump of profile '{name}'. See the log.", http_status=500)
+        return {"name": name, "dump_path": dump_path}
+
+    def unload_profile(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            status = self.stop_profile(name)
+            del self._profiles[name]
+            logger.info(f"ProfileDaemon: Unloaded profile '{name}'.")
+            status["loaded"] = False
+            return status
+
+    def profile_names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._profiles)
+
+    def profile_status(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            hosted = self._get(name)
+            controller = hosted.controller
+        cycle_stats = controller.get_cycle_stats()
+        return {
+            "name": hosted.name,
+            "profile_path": hosted.profile_path,
+            "loaded": True,
+            "running": controller.is_running(),
+            "ready": controller.ready_event.is_set(),
+            "loaded_at": hosted.loaded_at,
+            "started_at": hosted.started_at,
+            "last_cycle_completed_at": controller.last_cycle_completed_at,
+            "cycles": cycle_stats.get("cycles", 0),
+            "overruns": cycle_stats.get("overruns", 0),
+            "budget_shed_level": (controller.get_budget_stats() or {}).get("shed_level"),
+            "last_error": hosted.last_error,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {"uptime_sec": time.time() - self.started_at, "profiles": [self.profile_status(name) for name in self.profile_names()]}
+
+    def stop_all(self) -> None:
+        for name in self.profile_names():
+            try:
+                self.stop_profile(name)
+            except Exception:
+                logger.error(f"ProfileDaemon: Error while stopping profile '{name}'.", exc_info=True)
+
+    def render_metrics(self) -> str:
+        """All hosted profiles' metrics in Prometheus text format, labelled by profile name."""
+        builder = PrometheusTextBuilder()
+        builder.add_gauge("daemon_uptime_seconds", "Seconds since the daemon started.", time.time() - self.started_at)
+        builder.add_gauge("daemon_profiles_loaded", "Number of loaded profiles.", len(self.profile_names()))
+        for name in self.profile_names():
+            try:
+                with self._lock:
+                    controller = self._get(name).controller
+                add_controller_metrics(builder, controller.get_metrics_snapshot(), {"profile": name})
+            except DaemonError:
+                continue  # Unloaded meanwhile
+            except Exception:
+                logger.error(f"ProfileDaemon: Could not collect metrics of profile '{name}'.", exc_info=True)
+        return builder.render()
+
+
+def add_controller_metrics(builder: PrometheusTextBuilder, snapshot: Dict[str, Any], labels: Dict[str, Any]) -> None:
+    """Adds one MainController.get_metrics_snapshot() to `builder`."""
+    builder.add_gauge("profile_running", "1 if the profile's monitoring loop is running.", int(bool(snapshot.get("running"))), labels)
+    builder.add_gauge("profile_ready", "1 once the profile's startup warm-up has finished.", int(bool(snapshot.get("ready"))), labels)
+    builder.add_gauge("last_cycle_completed_timestamp_seconds", "Unix time the last monitoring cycle finished.", snapshot.get("last_cycle_completed_at"), labels)
+    builder.add_histogram("cycle_duration_seconds", "Monitoring cycle duration.", snapshot["cycle_duration_histogram"], labels)
+
+    cycle_stats = snapshot.get("cycles") or {}
+    builder.add_counter("cycles_total", "Monitoring cycles started.", cycle_stats.get("cycles"), labels)
+    builder.add_counter("cycle_overruns_total", "Cycles that ran past the next cycle's deadline.", cycle_stats.get("overruns"), labels)
+    builder.add_counter("cycle_missed_ticks_total", "Scheduled cycles dropped after overruns.", cycle_stats.get("missed_ticks"), labels)
+    builder.add_counter("cycle_degraded_total", "Cycles run in degraded mode.", cycle_stats.get("degraded_cycles"), labels)
+    builder.add_gauge("cycle_start_lateness_max_seconds", "Largest start delay of a cycle behind its deadline.", _ms_to_sec(cycle_stats.get("max_lateness_ms")), labels)
+
+    budget_stats = snapshot.get("budget")
+    if budget_stats:
+        builder.add_gauge("cycle_budget_shed_level", "Budget governor shed level (0: nothing deferred, 1: low priority, 2: low and normal).", budget_stats.get("shed_level"), labels)
+        builder.add_counter("cycle_budget_over_total", "Cycles that exceeded the time budget.", budget_stats.get("over_budget_cycles"), labels)
+        builder.add_counter("cycle_budget_deferred_total", "Analyses and rules deferred by the budget governor.", budget_stats.get("deferred_total"), labels)
+
+    for rule_name, rule_stats in sorted((snapshot.get("rules") or {}).items()):
+        rule_labels = {**labels, "rule": rule_name}
+        builder.add_counter("rule_evaluations_total", "Rule condition evaluations.", rule_stats.get("evaluations"), rule_labels)
+        builder.add_counter("rule_matches_total", "Rule condition evaluations that matched.", rule_stats.get("matches"), rule_labels)
+        builder.add_counter("rule_evaluation_seconds_total", "Time spent evaluating the rule's condition.", rule_stats.get("evaluation_seconds"), rule_labels)
+
+    for action_counter, action_count in sorted((snapshot.get("actions") or {}).items()):
+        builder.add_counter("actions_total", "Actions by outcome in the asynchronous dispatcher.", action_count, {**labels, "outcome": action_counter})
+
+    for cache_name, cache_stats in sorted((snapshot.get("caches") or {}).items()):
+        cache_labels = {**labels, "cache": cache_name}
+        builder.add_counter("cache_hits_total", "Cache hits.", cache_stats.get("hits"), cache_labels)
+        builder.add_counter("cache_misses_total", "Cache misses.", cache_stats.get("misses"), cache_labels)
+        builder.add_gauge("cache_hit_ratio", "Cache hits / lookups since startup.", cache_hit_ratio(cache_stats), cache_labels)
+
+    for client_name, gemini_metrics in sorted((snapshot.get("gemini") or {}).items()):
+        client_labels = {**labels, "client": client_name}
+        builder.add_histogram("gemini_request_duration_seconds", "Gemini request latency, retries included.", gemini_metrics["latency_histogram"], client_labels)
+        for status, status_count in sorted(gemini_metrics.get("status_counts", {}).items()):
+            builder.add_counter("gemini_requests_total", "Gemini requests by result status.", status_count, {**client_labels, "status": status})
+        builder.add_counter("gemini_retries_total", "Gemini request retries.", gemini_metrics.get("retries_total"), client_labels)
+        builder.add_counter("gemini_short_circuited_total", "Gemini requests refused by the open circuit breaker.", gemini_metrics.get("short_circuited_total"), client_labels)
+        circuit = gemini_metrics.get("circuit") or {}
+        builder.add_gauge("gemini_circuit_open", "1 while the Gemini circuit breaker is open.", int(circuit.get("state") == "open"), client_labels)
+
+
+def _ms_to_sec(value_ms: Optional[float]) -> Optional[float]:
+    return value_ms / 1000.0 if value_ms is not None else None
+
+
+def is_loopback_host(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def _allowed_host_headers(host: str, port: int) -> Optional[Set[str]]:
+    """Host header values a request to host:port may carry, or None (any) for a wildcard bind address."""
+    if host in _WILDCARD_HOSTS:
+        return None
+    names = {"localhost", "127.0.0.1", "[::1]"} if is_loopback_host(host) else set()
+    names.add(f"[{host}]" if ":" in host else host)
+    return {name.lower() for name in names} | {f"{name}:{port}".lower() for name in names}
+
+
+def remove_stale_unix_socket(unix_socket_path: str) -> None:
+    """Removes a socket file left behind by a previous run. Refuses to remove anything that is not a socket."""
+    try:
+        path_mode = os.lstat(unix_socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(path_mode):
+        raise FileExistsError(f"'{unix_socket_path}' exists and is not a socket. Not removing it.")
+    os.unlink(unix_socket_path)
+
+
+class ControlRequestHandler(BaseHTTPRequestHandler):
+    """
+    Control API of `mark_i serve` (JSON in and out, except /metrics):
+
+        GET    /health                   liveness
+        GET    /profiles                 status of every loaded profile
+        POST   /profiles                 load {"profile": path, "name"?: str, "start"?: bool}
+        GET    /profiles/<name>          status of one profile
+        POST   /profiles/<name>/start    start its monitoring loop
+        POST   /profiles/<name>/stop     stop its monitoring loop
+        POST   /profiles/<name>/reload   reload it from disk (restarts it if running)
+        POST   /profiles/<name>/flight-recorder   dump its recent cycles to disk
+        DELETE /profiles/<name>          stop and unload
+        GET    /metrics                  Prometheus text format
+        POST   /shutdown                 stop every profile and exit
+
+    A browser must not be able to drive it: POST requests need `Content-Type: application/json`
+    (so cross-origin pages cannot send them without a CORS preflight, which is never granted),
+    TCP requests need a Host header naming the bind address (against DNS rebinding), and when
+    the server has a token every request except /health needs `Authorization: Bearer <token>`.
+    """
+
+    server_version = "MarkIControl/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def daemon(self) -> ProfileDaemon:
+        return self.server.profile_daemon  # type: ignore[attr-defined]
+
+    def address_string(self) -> str:
+        return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else "unix-socket"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"ControlServer: {self.address_string()} {format % args}")
+
+    def _send(self, http_status: int, body: bytes, content_type: str) -> None:
+        self.send_response(http_status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, http_status: int, payload: Any) -> None:
+        self._send(http_status, json.dumps(payload, default=str).encode("utf-8"), "application/json")
+
+    def _read_json_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > _MAX_REQUEST_BODY_BYTES:
+            raise DaemonError("Request body too large.", http_status=413)
+        if not length:
+            return {}
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise DaemonError(f"Request body is not valid JSON: {e}") from e
+        if not isinstance(payload, dict):
+            raise DaemonError("Request body must be a JSON object.")
+        return payload
+
+    def _check_request_allowed(self, method: str, path_parts: List[str]) -> None:
+        allowed_hosts = getattr(self.server, "allowed_host_headers", None)
+        if allowed_hosts is not None and (self.headers.get("Host") or "").strip().lower() not in allowed_hosts:
+            raise DaemonError(f"Host '{self.headers.get('Host')}' is not allowed.", http_status=403)
+        auth_token = getattr(self.server, "auth_token", None)
+        if auth_token and path_parts != ["health"]:
+            scheme, _, supplied_token = (self.headers.get("Authorization") or "").partition(" ")
+            if scheme.lower() != "bearer" or not hmac.compare_digest(supplied_token.strip().encode("utf-8"), auth_token.encode("utf-8")):
+                raise DaemonError("Missing or invalid bearer token.", http_status=401)
+        if method == "POST":
+            content_type = (self.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+            if content_type != "application/json":
+                raise DaemonError("POST requests must have 'Content-Type: application/json'.", http_status=415)
+
+    def _route(self, method: str) -> Tuple[int, Any]:
+        path_parts = [part for part in self.path.split("?", 1)[0].split("/") if part]
+        self._check_request_allowed(method, path_parts)
+        daemon = self.daemon
+        if method == "GET" and path_parts == ["health"]:
+            return 200, {"status": "ok"}
+        if method == "GET" and path_parts == ["metrics"]:
+            return 200, daemon.render_metrics()
+        if method == "POST" and path_parts == ["shutdown"]:
+            daemon.shutdown_requested.set()
+            return 202, {"status": "shutting down"}
+        if path_parts[:1] == ["profiles"]:
+            if len(path_parts) == 1 and method == "GET":
+                return 200, daemon.status()
+            if len(path_parts) == 1 and method == "POST":
+                body = self._read_json_body()
+                if not isinstance(body.get("profile"), str):
+                    raise DaemonError("'profile' (path or name of the profile JSON) is required.")
+                return 201, daemon.load_profile(body["profile"], name=body.get("name"), start=bool(body.get("start", False)))
+            if len(path_parts) == 2 and method == "GET":
+                return 200, daemon.profile_status(path_parts[1])
+            if len(path_parts) == 2 and method == "DELETE":
+                return 200, daemon.unload_profile(path_parts[1])
+            if len(path_parts) == 3 and method == "POST":
+                operations = {"start": daemon.start_profile, "stop": daemon.stop_profile, "reload": daemon.reload_profile, "flight-recorder": daemon.dump_flight_recorder}
+                if path_parts[2] in operations:
+                    return 200, operations[path_parts[2]](path_parts[1])
+        raise DaemonError(f"No route for {method} {self.path}.", http_status=404)
+
+    def _handle(self, method: str) -> None:
+        try:
+            http_status, payload = self._route(method)
+        except DaemonError as e:
+            http_status, payload = e.http_status, {"error": str(e)}
+            self.close_connection = True  # An unread request body must not be parsed as the next request
+        except Exception as e:
+            logger.error(f"ControlServer: Unexpected error handling {method} {self.path}.", exc_info=True)
+            http_status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        if isinstance(payload, str):
+            self._send(http_status, payload.encode("utf-8"), PROMETHEUS_CONTENT_TYPE)
+        else:
+            self._send_json(http_status, payload)
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def create_control_server(
+    profile_daemon: ProfileDaemon,
+    host: str = DEFAULT_CONTROL_HOST,
+    port: int = DEFAULT_CONTROL_PORT,
+    unix_socket_path: Optional[str] = None,
+    auth_token: Optional[str] = None,
+) -> socketserver.BaseServer:
+    """
+    HTTP control server bound to host:port, or to a Unix socket if `unix_socket_path` is given. Call serve_forever() on it.
+    Raises ValueError for a non-loopback `host` without `auth_token`.
+    """
+    if unix_socket_path:
+        remove_stale_unix_socket(unix_socket_path)
+        server: socketserver.BaseServer = _ThreadingUnixHTTPServer(unix_socket_path, ControlRequestHandler)
+        os.chmod(unix_socket_path, 0o600)
+        server.allowed_host_headers = None  # type: ignore[attr-defined]  # Browsers cannot reach a Unix socket
+    else:
+        if not auth_token and not is_loopback_host(host):
+            raise ValueError(f"Refusing to serve the control API on non-loopback address '{host}' without a token (set {ENV_CONTROL_TOKEN} or --auth-token).")
+        server = ThreadingHTTPServer((host, port), ControlRequestHandler)
+        server.allowed_host_headers = _allowed_host_headers(host, server.server_address[1])  # type: ignore[attr-defined]
+    server.profile_daemon = profile_daemon  # type: ignore[attr-defined]
+    server.auth_token = auth_token or None  # type: ignore[attr-defined]
+    return server
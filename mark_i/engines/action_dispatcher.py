@@ -0,0 +1,185 @@
+import json
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, Deque
+
+from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.input_backends import InputFailSafeError
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.action_dispatcher")
+
+DEFAULT_MAX_PENDING_ACTIONS = 32
+
+
+class ActionTicket:
+    """Handle for a dispatched action. `wait()` blocks until it has run (or was dropped)."""
+
+    STATUS_PENDING = "pending"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_DROPPED = "dropped"
+
+    def __init__(self, action_spec: Dict[str, Any], coalesce_key: str):
+        self.action_spec = action_spec
+        self.coalesce_key = coalesce_key
+        self.status = self.STATUS_PENDING
+        self.error: Optional[BaseException] = None
+        self.coalesced_count = 0  # Identical submissions merged into this ticket while it was pending
+        self._done_event = threading.Event()
+
+    def _finish(self, status: str, error: Optional[BaseException] = None) -> None:
+        self.status = status
+        self.error = error
+        self._done_event.set()
+
+    def done(self) -> bool:
+        return self._done_event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for completion. Returns True if the action finished (in any status) within the timeout."""
+        return self._done_event.wait(timeout)
+
+
+class ActionDispatcher:
+    """
+    Runs ActionExecutor actions on a dedicated worker thread so the monitoring loop never
+    blocks on pauses, clicks or long `type_text` actions.
+
+    - Bounded queue: when `max_pending` actions are waiting, new submissions are dropped
+      (with a warning) instead of stalling the caller.
+    - Serialisation: a single worker drives the mouse/keyboard, so actions run strictly in
+      submission order and never interleave, for any target.
+    - Coalescing: submitting an action identical (spec and context) to one that is still
+      pending returns the pending ticket instead of queueing a duplicate. This absorbs
+      rules that fire again on every cycle while the previous action has not run yet.
+    - `submit(..., await_completion=True)` blocks until the action has run, for rules that
+      depend on ordering with later work in the same cycle.
+    """
+
+    def __init__(self, action_executor: ActionExecutor, max_pending: int = DEFAULT_MAX_PENDING_ACTIONS):
+        self.action_executor = action_executor
+        self.max_pending = max(1, int(max_pending))
+        self._pending: Deque[ActionTicket] = deque()
+        self._pending_by_key: Dict[str, ActionTicket] = {}
+        self._condition = threading.Condition()
+        self._running_ticket: Optional[ActionTicket] = None
+        self._stop_requested = False
+        self._worker_thread: Optional[threading.Thread] = None
+        self.stats: Dict[str, int] = {"submitted": 0, "executed": 0, "coalesced": 0, "dropped": 0, "failed": 0}
+
+    @staticmethod
+    def _make_coalesce_key(action_spec: Dict[str, Any]) -> str:
+        return json.dumps(action_spec, sort_keys=True, default=str)
+
+    def start(self) -> None:
+        with self._condition:
+            if self._worker_thread and self._worker_thread.is_alive():
+                return
+            self._stop_requested = False
+            self._worker_thread = threading.Thread(target=self._worker_loop, name="ActionDispatcherThread", daemon=True)
+            self._worker_thread.start()
+        logger.info(f"ActionDispatcher started (Max pending: {self.max_pending}).")
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = 10.0) -> None:
+        """Stops the worker. With `drain`, pending actions run first; otherwise they are dropped."""
+        with self._condition:
+            if not drain:
+                self._drop_all_pending_locked("dispatcher stopping")
+            self._stop_requested = True
+            self._condition.notify_all()
+            worker = self._worker_thread
+        if worker:
+            worker.join(timeout=timeout)
+            if worker.is_alive():
+                logger.warning(f"ActionDispatcher: Worker did not stop within {timeout}s.")
+        self._worker_thread = None
+        logger.info(f"ActionDispatcher stopped. Stats: {self.stats}")
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._worker_thread and self._worker_thread.is_alive())
+
+    def submit(self, full_action_spec_with_context: Dict[str, Any], await_completion: bool = False, timeout: Optional[float] = None) -> ActionTicket:
+        """Queues an action for the worker and returns its ticket. Runs inline if the worker is not started."""
+        coalesce_key = self._make_coalesce_key(full_action_spec_with_context)
+        rule_name = full_action_spec_with_context.get("context", {}).get("rule_name", "UnknownRuleOrTask")
+        with self._condition:
+            self.stats["submitted"] += 1
+            existing_ticket = self._pending_by_key.get(coalesce_key)
+            if existing_ticket is not None:
+                existing_ticket.coalesced_count += 1
+                self.stats["coalesced"] += 1
+                logger.debug(f"ActionDispatcher: R '{rule_name}' action '{full_action_spec_with_context.get('type')}' coalesced with identical pending action.")
+                ticket = existing_ticket
+            else:
+                ticket = ActionTicket(full_action_spec_with_context, coalesce_key)
+                if not self.is_running:
+                    run_inline = True
+                elif len(self._pending) >= self.max_pending:
+                    self.stats["dropped"] += 1
+                    logger.warning(f"ActionDispatcher: Queue full ({self.max_pending} pending). R '{rule_name}' action '{full_action_spec_with_context.get('type')}' dropped.")
+                    ticket._finish(ActionTicket.STATUS_DROPPED)
+                    return ticket
+                else:
+                    run_inline = False
+                    self._pending.append(ticket)
+                    self._pending_by_key[coalesce_key] = ticket
+                    self._condition.notify_all()
+        if existing_ticket is None and run_inline:
+            self._run_ticket(ticket)
+        elif await_completion:
+            ticket.wait(timeout)
+        return ticket
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until no action is pending or running. Returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and self._running_ticket is None, timeout=timeout)
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _drop_all_pending_locked(self, reason: str) -> None:
+        while self._pending:
+            dropped_ticket = self._pending.popleft()
+            self._pending_by_key.pop(dropped_ticket.coalesce_key, None)
+            self.stats["dropped"] += 1
+            dropped_ticket._finish(ActionTicket.STATUS_DROPPED)
+        logger.debug(f"ActionDispatcher: Pending actions dropped ({reason}).")
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stop_requested)
+                if not self._pending:
+                    return  # Stop requested and nothing left to drain
+                ticket = self._pending.popleft()
+                self._pending_by_key.pop(ticket.coalesce_key, None)
+                self._running_ticket = ticket
+            try:
+                self._run_ticket(ticket)
+            finally:
+                with self._condition:
+                    self._running_ticket = None
+                    self._condition.notify_all()
+
+    def _run_ticket(self, ticket: ActionTicket) -> None:
+        try:
+            self.action_executor.execute_action(ticket.action_spec)
+            with self._condition:
+                self.stats["executed"] += 1
+            ticket._finish(ActionTicket.STATUS_DONE)
+        except InputFailSafeError as e_failsafe:
+            # The user slammed the mouse into a corner: abandon everything still queued.
+            ticket._finish(ActionTicket.STATUS_FAILED, e_failsafe)
+            with self._condition:
+                self.stats["failed"] += 1
+                self._drop_all_pending_locked("input fail-safe triggered")
+        except Exception as e_exec:
+            with self._condition:
+                self.stats["failed"] += 1
+            logger.error(f"ActionDispatcher: Action '{ticket.action_spec.get('type')}' failed: {e_exec}", exc_info=True)
+            ticket._finish(ActionTicket.STATUS_FAILED, e_exec)
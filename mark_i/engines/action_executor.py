@@ -3,21 +3,21 @@ import os
 import time  # For explicit pauses if not using pyautogui.PAUSE
 from typing import Dict, Any, Optional, List, Union, Tuple  # Added Tuple
 
-import pyautogui  # type: ignore # PyAutoGUI often has type hinting issues
-
 # ConfigManager is needed to resolve region configurations by name
 from mark_i.core.config_manager import ConfigManager
+from mark_i.engines.input_backends import InputBackend, InputFailSafeError, ClipboardUnavailableError, MOUSE_BUTTONS, get_default_input_backend
 
 # Use the application's root logger name for consistency
 from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+from mark_i.core.tracing import traced
 
 logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.action_executor")
 
-# Valid special keys for PyAutoGUI's press/hotkey functions.
-# This list helps validate user input for 'press_key' actions.
-# It's not exhaustive but covers common and safe keys.
-# Users can refer to PyAutoGUI documentation for the full list.
-VALID_PYAUTOGUI_KEYS = pyautogui.KEYBOARD_KEYS  # Use PyAutoGUI's own list directly
+TEXT_INPUT_METHOD_TYPE = "type"
+TEXT_INPUT_METHOD_PASTE = "paste"
+TEXT_INPUT_METHOD_AUTO = "auto"
+TEXT_INPUT_METHODS = [TEXT_INPUT_METHOD_TYPE, TEXT_INPUT_METHOD_PASTE, TEXT_INPUT_METHOD_AUTO]
+DEFAULT_PASTE_INPUT_MIN_LENGTH = 40  # 'auto' pastes texts at least this long; shorter ones are typed
 
 
 class ActionExecutor:
@@ -26,15 +26,18 @@ class ActionExecutor:
     Handles parameter validation, type conversion for substituted variables from rule context,
     and calculates target coordinates for various targeting relations, including those
     derived from Gemini AI analysis (v4.0.0 Phase 1.5+).
+    Mouse/keyboard events are delivered through a pluggable InputBackend (PyAutoGUI by default).
     """
 
-    def __init__(self, config_manager_instance: ConfigManager):
+    def __init__(self, config_manager_instance: ConfigManager, input_backend: Optional[InputBackend] = None):
         """
         Initializes the ActionExecutor.
 
         Args:
             config_manager_instance: An instance of ConfigManager, used to resolve
                                      region configurations by name for coordinate calculations.
+            input_backend: Optional. The InputBackend that performs clicks and key presses.
+                           Defaults to the process-wide backend (see `mark_i run --input-backend`).
         """
         if not isinstance(config_manager_instance, ConfigManager):
             # This is a critical dependency for resolving region coordinates.
@@ -42,11 +45,8 @@ class ActionExecutor:
             raise ValueError("A valid ConfigManager instance is required for ActionExecutor.")
         self.config_manager = config_manager_instance
 
-        # PyAutoGUI Global Settings
-        pyautogui.FAILSAFE = True  # Move mouse to top-left (0,0) to abort PyAutoGUI actions.
-        # pyautogui.PAUSE = 0.0 # Default global pause between PyAutoGUI calls.
-        # We prefer explicit pauses via 'pyautogui_pause_before' in action specs.
-        logger.info(f"ActionExecutor initialized. PyAutoGUI FAILSAFE is ON. PyAutoGUI Default PAUSE: {pyautogui.PAUSE}s.")
+        self.input_backend = input_backend or get_default_input_backend()
+        logger.info(f"ActionExecutor initialized. Input backend: '{self.input_backend.name}'.")
 
     def _validate_and_convert_numeric_param(
         self,
@@ -249,6 +249,33 @@ class ActionExecutor:
         logger.error(f"{log_prefix}: Unknown or unsupported target_relation '{target_relation}'. Cannot determine coordinates.")
         return None
 
+    def _resolve_text_input_method(self, requested_method: Any, text: str, rule_name: str) -> str:
+        """
+        Returns 'type' or 'paste' for a type_text action. The action's 'input_method' wins over
+        the profile setting 'type_text_input_method'; 'auto' pastes texts of at least
+        'paste_input_min_length' characters, where per-character typing gets slow.
+        """
+        method = str(requested_method).strip().lower() if requested_method else ""
+        if method not in TEXT_INPUT_METHODS:
+            if method:
+                logger.warning(f"R '{rule_name}', Action 'type_text': Unknown input_method '{requested_method}'. Using profile default.")
+            method = str(self.config_manager.get_setting("type_text_input_method", TEXT_INPUT_METHOD_TYPE)).strip().lower()
+            if method not in TEXT_INPUT_METHODS:
+                method = TEXT_INPUT_METHOD_TYPE
+        if method == TEXT_INPUT_METHOD_AUTO:
+            min_length = self._validate_and_convert_numeric_param(
+                self.config_manager.get_setting("paste_input_min_length", DEFAULT_PASTE_INPUT_MIN_LENGTH),
+                "paste_input_min_length",
+                int,
+                "type_text",
+                rule_name,
+                DEFAULT_PASTE_INPUT_MIN_LENGTH,
+                min_val=1,
+            )
+            method = TEXT_INPUT_METHOD_PASTE if len(text) >= (min_length or DEFAULT_PASTE_INPUT_MIN_LENGTH) else TEXT_INPUT_METHOD_TYPE
+        return method
+
+    @traced("action", "action", span_args=lambda self, spec, *args, **kwargs: {"type": spec.get("type"), "rule": (spec.get("context") or {}).get("rule_name")})
     def execute_action(self, full_action_spec_with_context: Dict[str, Any]):
         """
         Executes a single action based on its full specification which includes the
@@ -286,7 +313,7 @@ class ActionExecutor:
                 if coords_tuple:
                     x, y = coords_tuple
                     button_val = str(action_spec_params.get("button", "left")).lower()
-                    if button_val not in pyautogui.PRIMARY_BUTTONS:  # PyAutoGUI constant for mouse buttons
+                    if button_val not in MOUSE_BUTTONS:
                         logger.warning(f"{log_prefix}: Invalid click button '{button_val}'. Defaulting to 'left'.")
                         button_val = "left"
 
@@ -299,7 +326,7 @@ class ActionExecutor:
                         interval_s = 0.0
 
                     logger.info(f"{log_prefix}: Simulating {button_val} click ({clicks_val}x, interval {interval_s:.3f}s) at ({x},{y}).")
-                    pyautogui.click(x=x, y=y, clicks=clicks_val, interval=interval_s, button=button_val)
+                    self.input_backend.click(x, y, clicks=clicks_val, interval=interval_s, button=button_val)
                 else:
                     logger.error(f"{log_prefix}: Could not determine target coordinates. Click action skipped.")
 
@@ -313,8 +340,17 @@ class ActionExecutor:
 
                 if text_val:  # Only type if text is not empty
                     log_snippet = text_val[:50].replace("\n", "\\n").replace("\r", "\\r") + ("..." if len(text_val) > 50 else "")
-                    logger.info(f"{log_prefix}: Typing text (len: {len(text_val)}): '{log_snippet}' with char interval {interval_s_type:.3f}s.")
-                    pyautogui.typewrite(text_val, interval=interval_s_type)
+                    input_method = self._resolve_text_input_method(action_spec_params.get("input_method"), text_val, rule_name)
+                    if input_method == TEXT_INPUT_METHOD_PASTE:
+                        logger.info(f"{log_prefix}: Pasting text via clipboard (len: {len(text_val)}): '{log_snippet}'.")
+                        try:
+                            self.input_backend.paste_text(text_val)
+                        except ClipboardUnavailableError as e_clipboard:
+                            logger.warning(f"{log_prefix}: Clipboard unavailable ({e_clipboard}). Falling back to typing.")
+                            input_method = TEXT_INPUT_METHOD_TYPE
+                    if input_method == TEXT_INPUT_METHOD_TYPE:
+                        logger.info(f"{log_prefix}: Typing text (len: {len(text_val)}): '{log_snippet}' with char interval {interval_s_type:.3f}s.")
+                        self.input_backend.type_text(text_val, interval=interval_s_type)
                 else:
                     logger.info(f"{log_prefix}: No text provided to type (text parameter is empty). Action skipped.")
 
@@ -330,19 +366,19 @@ class ActionExecutor:
                     logger.warning(f"{log_prefix}: No valid key(s) in 'key' param: '{key_param}'. Skipped.")
                     return
 
-                valid_keys_for_pyautogui = [k for k in keys_to_press if k in VALID_PYAUTOGUI_KEYS]
+                valid_keys_for_pyautogui = [k for k in keys_to_press if self.input_backend.is_valid_key(k)]
                 if not valid_keys_for_pyautogui:
-                    logger.error(f"{log_prefix}: All specified keys {keys_to_press} are invalid for PyAutoGUI. Action skipped.")
+                    logger.error(f"{log_prefix}: All specified keys {keys_to_press} are invalid for input backend '{self.input_backend.name}'. Action skipped.")
                     return
                 if len(valid_keys_for_pyautogui) < len(keys_to_press):
                     logger.warning(f"{log_prefix}: Some specified keys were invalid and ignored. Using: {valid_keys_for_pyautogui}")
 
                 if len(valid_keys_for_pyautogui) == 1:
                     logger.info(f"{log_prefix}: Pressing single key: '{valid_keys_for_pyautogui[0]}'.")
-                    pyautogui.press(valid_keys_for_pyautogui[0])
+                    self.input_backend.press(valid_keys_for_pyautogui[0])
                 else:  # Multiple valid keys, treat as hotkey sequence
                     logger.info(f"{log_prefix}: Pressing hotkey sequence: {valid_keys_for_pyautogui}.")
-                    pyautogui.hotkey(*valid_keys_for_pyautogui)
+                    self.input_backend.hotkey(*valid_keys_for_pyautogui)
 
             elif action_type == "log_message":
                 message_val = str(action_spec_params.get("message", "Default log_message action from rule."))
@@ -369,8 +405,8 @@ class ActionExecutor:
             else:
                 logger.error(f"{log_prefix}: Unknown action type '{action_type}'. Action skipped.")
 
-        except pyautogui.FailSafeException:
-            logger.critical(f"{log_prefix}: PyAutoGUI FAILSAFE triggered! Mouse moved to a screen corner. Automation halted by user.")
+        except InputFailSafeError:
+            logger.critical(f"{log_prefix}: Input FAILSAFE triggered! Mouse moved to a screen corner. Automation halted by user.")
             # This is a critical user-initiated stop, re-raise to halt further execution by this bot instance.
             raise
         except Exception as e:  # Catch any other unexpected error during PyAutoGUI calls or action logic
@@ -4,12 +4,14 @@ import os  # Used for os.linesep in log formatting
 
 import cv2  # OpenCV for image processing tasks
 import numpy as np
-import pytesseract  # For OCR
-from pytesseract import Output  # For structured OCR data
 
-# Standardized logger for this module
-from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+from mark_i.core.lazy_imports import lazy_import
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME, hot_path_log_enabled
+from mark_i.core.tracing import traced
+
+pytesseract = lazy_import("pytesseract")  # For OCR; imported on the first OCR call
 
+# Standardized logger for this module
 logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.analysis_engine")
 
 
@@ -29,18 +31,20 @@ class AnalysisEngine:
             ocr_config: Optional. Additional Tesseract configuration string (e.g., '--psm 6').
         """
         self.ocr_command = ocr_command
+        self._ocr_command_applied = False  # Set on pytesseract with the first OCR call, so pytesseract is only imported when needed
         if self.ocr_command:
-            try:
-                pytesseract.pytesseract.tesseract_cmd = self.ocr_command
-                logger.info(f"Tesseract executable path explicitly set to: '{self.ocr_command}'")
-            except Exception as e:  # pragma: no cover
-                logger.error(f"Error attempting to set tesseract_cmd to '{self.ocr_command}': {e}. Pytesseract will rely on PATH.", exc_info=True)
+            logger.info(f"Tesseract executable path explicitly set to: '{self.ocr_command}'")
         else:
             logger.info("Tesseract executable path not specified; pytesseract will search in PATH.")
 
         self.ocr_config = ocr_config
         logger.info(f"AnalysisEngine initialized. Tesseract OCR custom config: '{self.ocr_config if self.ocr_config else 'None (using pytesseract defaults)'}'.")
 
+    def warm_up_ocr(self) -> bool:
+        """Runs OCR once on a small blank image so the first real OCR call does not pay for the first Tesseract start. Returns False if OCR is unavailable."""
+        return self.ocr_extract_text(np.full((32, 96, 3), 255, dtype=np.uint8), region_name_context="warm-up") is not None
+
+    @traced("pixel_color", "analysis", span_args=lambda *args, **kwargs: {"region": kwargs.get("region_name_context")})
     def analyze_pixel_color(self, image_data: np.ndarray, x: int, y: int, expected_bgr: List[int], tolerance: int = 0, region_name_context: str = "UnnamedRegion") -> bool:
         """
         Checks the color of a specific pixel against an expected BGR color.
@@ -89,6 +93,7 @@ class AnalysisEngine:
         logger.log(log_level, f"{log_prefix}: {'MATCHED' if match else 'MISMATCH'}. Actual: {actual_bgr.tolist()}, Expected: {expected_bgr}, Tol: {tolerance}.")
         return match
 
+    @traced("average_color", "analysis", span_args=lambda *args, **kwargs: {"region": kwargs.get("region_name_context")})
     def analyze_average_color(self, image_data: np.ndarray, region_name_context: str = "UnnamedRegion") -> Optional[List[int]]:
         """
         Calculates the average BGR color of an image.
@@ -113,12 +118,13 @@ class AnalysisEngine:
         try:
             avg_bgr_float = np.mean(image_data, axis=(0, 1))
             avg_bgr_int = [int(round(c)) for c in avg_bgr_float]
-            logger.info(f"{log_prefix}: Average BGR color calculated: {avg_bgr_int} for image shape {image_data.shape}.")
+            logger.info("%s: Average BGR color calculated: %s for image shape %s.", log_prefix, avg_bgr_int, image_data.shape)
             return avg_bgr_int
         except Exception as e:  # pragma: no cover
             logger.error(f"{log_prefix}: Error calculating average color: {e}", exc_info=True)
             return None
 
+    @traced("template_match", "analysis", span_args=lambda *args, **kwargs: {"region": kwargs.get("region_name_context"), "template": kwargs.get("template_name_context")})
     def match_template(
         self, image_data: np.ndarray, template_image: np.ndarray, threshold: float = 0.8, region_name_context: str = "UnnamedRegion", template_name_context: str = "UnnamedTemplate"
     ) -> Optional[Dict[str, Any]]:
@@ -171,10 +177,10 @@ class AnalysisEngine:
                     "width": int(tpl_w),
                     "height": int(tpl_h),
                 }
-                logger.info(f"{log_prefix}: TEMPLATE MATCHED. Confidence: {confidence_score:.4f} at ({match_details['location_x']},{match_details['location_y']}). Size: {tpl_w}x{tpl_h}.")
+                logger.info("%s: TEMPLATE MATCHED. Confidence: %.4f at (%d,%d). Size: %dx%d.", log_prefix, confidence_score, match_details["location_x"], match_details["location_y"], tpl_w, tpl_h)
                 return match_details
             else:
-                logger.info(f"{log_prefix}: Template NOT matched (Max confidence {confidence_score:.4f} < Threshold {threshold:.4f}).")
+                logger.info("%s: Template NOT matched (Max confidence %.4f < Threshold %.4f).", log_prefix, confidence_score, threshold)
                 return None
         except cv2.error as e_cv2:  # pragma: no cover
             logger.error(f"{log_prefix}: OpenCV error during template matching: {e_cv2}. Check image/template dimensions and types.", exc_info=True)
@@ -183,6 +189,7 @@ class AnalysisEngine:
             logger.exception(f"{log_prefix}: Unexpected error during template matching: {e}")
             return None
 
+    @traced("ocr", "analysis", span_args=lambda *args, **kwargs: {"region": kwargs.get("region_name_context")})
     def ocr_extract_text(self, image_data: np.ndarray, region_name_context: str = "UnnamedRegion") -> Optional[Dict[str, Any]]:
         """
         Extracts text from an image using Tesseract OCR and calculates average word confidence.
@@ -196,12 +203,19 @@ class AnalysisEngine:
             logger.warning(f"{log_prefix}: image_data not BGR. Shape: {image_data.shape}.")
             return None
 
+        if self.ocr_command and not self._ocr_command_applied:
+            try:
+                pytesseract.pytesseract.tesseract_cmd = self.ocr_command
+            except Exception as e:  # pragma: no cover
+                logger.error(f"Error attempting to set tesseract_cmd to '{self.ocr_command}': {e}. Pytesseract will rely on PATH.", exc_info=True)
+            self._ocr_command_applied = True
+
         try:
-            ocr_data_dict = pytesseract.image_to_data(image_data, lang="eng", config=self.ocr_config, output_type=Output.DICT)
+            ocr_data_dict = pytesseract.image_to_data(image_data, lang="eng", config=self.ocr_config, output_type=pytesseract.Output.DICT)
 
-            if logger.isEnabledFor(logging.DEBUG):  # pragma: no cover
+            if hot_path_log_enabled(logger, logging.DEBUG):  # pragma: no cover
                 summary_raw_data = {k: (v_list[:5] + ["..."] if isinstance(v_list, list) and len(v_list) > 5 else v_list) for k, v_list in ocr_data_dict.items()}
-                logger.debug(f"{log_prefix}: Raw Tesseract data (summary): {summary_raw_data}")
+                logger.debug("%s: Raw Tesseract data (summary): %s", log_prefix, summary_raw_data)
 
             extracted_words: List[str] = []
             confidences: List[float] = []
@@ -220,8 +234,9 @@ class AnalysisEngine:
 
             full_text = " ".join(extracted_words)
             average_confidence = (sum(confidences) / len(confidences)) if confidences else 0.0
-            text_snippet = full_text[:70].replace(os.linesep, " ") + ("..." if len(full_text) > 70 else "")
-            logger.info(f"{log_prefix}: Extracted (len {len(full_text)}): '{text_snippet}'. Avg Word Conf: {average_confidence:.1f}% ({len(confidences)} words).")
+            if hot_path_log_enabled(logger, logging.INFO):
+                text_snippet = full_text[:70].replace(os.linesep, " ") + ("..." if len(full_text) > 70 else "")
+                logger.info("%s: Extracted (len %d): '%s'. Avg Word Conf: %.1f%% (%d words).", log_prefix, len(full_text), text_snippet, average_confidence, len(confidences))
             return {"text": full_text, "average_confidence": average_confidence, "raw_data": ocr_data_dict}
         except pytesseract.TesseractNotFoundError:  # pragma: no cover
             logger.error("Tesseract OCR engine not installed or not in PATH. OCR unavailable.")
@@ -233,6 +248,7 @@ class AnalysisEngine:
             logger.exception(f"{log_prefix}: Unexpected error during OCR: {e}")
             return None
 
+    @traced("dominant_colors", "analysis", span_args=lambda *args, **kwargs: {"region": kwargs.get("region_name_context"), "k": kwargs.get("num_colors")})
     def analyze_dominant_colors(self, image_data: np.ndarray, num_colors: int = 3, region_name_context: str = "UnnamedRegion") -> Optional[List[Dict[str, Any]]]:
         """
         Finds N dominant colors in an image using K-Means clustering.
@@ -294,8 +310,9 @@ class AnalysisEngine:
                 logger.warning(f"{log_prefix}: No dominant colors resolved despite K-Means run.")
                 return []
 
-            log_summary = [f"BGR:{d['bgr_color']}({d['percentage']:.1f}%)" for d in dominant_colors_list]
-            logger.info(f"{log_prefix}: Found {len(dominant_colors_list)} colors: [{'; '.join(log_summary)}]")
+            if hot_path_log_enabled(logger, logging.INFO):
+                log_summary = [f"BGR:{d['bgr_color']}({d['percentage']:.1f}%)" for d in dominant_colors_list]
+                logger.info("%s: Found %d colors: [%s]", log_prefix, len(dominant_colors_list), "; ".join(log_summary))
             return dominant_colors_list
         except cv2.error as e_cv2:  # pragma: no cover
             logger.error(f"{log_prefix}: OpenCV error during K-Means: {e_cv2}. Check if image is too small or k is too large for unique colors.", exc_info=True)
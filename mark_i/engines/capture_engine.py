@@ -8,6 +8,7 @@ import cv2  # OpenCV for color conversion (RGB/RGBA from PIL to BGR for internal
 
 # Standardized logger for this module
 from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+from mark_i.core.tracing import traced
 
 logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.capture_engine")
 
@@ -45,7 +46,8 @@ class CaptureEngine:
         else:
             logger.warning(f"Capture method: Pillow ImageGrab.grab() for unrecognized OS '{self.system}'. Capture behavior may vary.")
 
-    def capture_region(self, region_spec: Dict[str, Any]) -> Optional[np.ndarray]:
+    @traced("capture_region", "capture", span_args=lambda self, region_spec, *args, **kwargs: {"region": region_spec.get("name")})
+    def capture_region(self, region_spec: Dict[str, Any], out_buffer: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
         """
         Captures the specified screen region defined by its coordinates and dimensions.
 
@@ -57,9 +59,14 @@ class CaptureEngine:
             region_spec: A dictionary defining the region. Example:
                          {"name": "my_region", "x": 100, "y": 100, "width": 200, "height": 150}
 
+            out_buffer: Optional. A previously returned BGR array to reuse for the result when
+                        its shape matches the region (height, width, 3) and dtype is uint8.
+                        Avoids allocating a new output array for repeated captures.
+
         Returns:
             A NumPy array representing the captured image in BGR format (OpenCV standard),
             or None if the capture fails, region_spec is invalid, or dimensions are non-positive.
+            When `out_buffer` was usable, the returned array is `out_buffer` itself.
         """
         region_name = region_spec.get("name", "UnnamedRegion")
         log_prefix = f"Rgn '{region_name}', Capture"
@@ -92,7 +99,7 @@ class CaptureEngine:
         # Construct the bounding box tuple
         bbox_to_capture = (left, top, right, bottom)
 
-        logger.debug(f"{log_prefix}: Attempting capture with BoundingBox (L,T,R,B): {bbox_to_capture}")
+        logger.debug("%s: Attempting capture with BoundingBox (L,T,R,B): %s", log_prefix, bbox_to_capture)
 
         try:
             # `all_screens=True` is crucial for multi-monitor setups to ensure coordinates
@@ -103,21 +110,24 @@ class CaptureEngine:
                 logger.error(f"{log_prefix}: Capture FAILED. Pillow ImageGrab.grab() returned None for BBox {bbox_to_capture}. This might indicate coordinates are off-screen or an OS-level issue.")
                 return None
 
-            logger.debug(f"{log_prefix}: Pillow capture successful. PIL Mode: {captured_pil_image.mode}, Size: {captured_pil_image.size}. Commencing conversion to OpenCV BGR format.")
+            logger.debug("%s: Pillow capture successful. PIL Mode: %s, Size: %s. Commencing conversion to OpenCV BGR format.", log_prefix, captured_pil_image.mode, captured_pil_image.size)
 
             # Convert PIL Image (which can be in various modes like RGB, RGBA, L, P)
             # to an OpenCV NumPy array in BGR format.
             img_np_intermediate: np.ndarray = np.array(captured_pil_image)
             img_cv_bgr: Optional[np.ndarray] = None
 
+            # Reuse the caller's buffer for the common RGB/RGBA paths when it fits the captured frame
+            dst_buffer = out_buffer if isinstance(out_buffer, np.ndarray) and out_buffer.dtype == np.uint8 and out_buffer.shape == img_np_intermediate.shape[:2] + (3,) else None
+
             if captured_pil_image.mode == "RGB":
-                img_cv_bgr = cv2.cvtColor(img_np_intermediate, cv2.COLOR_RGB2BGR)
+                img_cv_bgr = cv2.cvtColor(img_np_intermediate, cv2.COLOR_RGB2BGR, dst=dst_buffer)
             elif captured_pil_image.mode == "RGBA":
-                img_cv_bgr = cv2.cvtColor(img_np_intermediate, cv2.COLOR_RGBA2BGR)  # Discards alpha
-                logger.debug(f"{log_prefix}: RGBA image captured, converted to BGR (alpha channel discarded).")
+                img_cv_bgr = cv2.cvtColor(img_np_intermediate, cv2.COLOR_RGBA2BGR, dst=dst_buffer)  # Discards alpha
+                logger.debug("%s: RGBA image captured, converted to BGR (alpha channel discarded).", log_prefix)
             elif captured_pil_image.mode == "L":  # Grayscale
                 img_cv_bgr = cv2.cvtColor(img_np_intermediate, cv2.COLOR_GRAY2BGR)  # Convert grayscale to BGR
-                logger.debug(f"{log_prefix}: Grayscale (L mode) image captured, converted to BGR.")
+                logger.debug("%s: Grayscale (L mode) image captured, converted to BGR.", log_prefix)
             elif captured_pil_image.mode == "P":  # Palette-based
                 logger.warning(f"{log_prefix}: Palette-based (P mode) image captured. Converting to RGB first, then to BGR. Colors might not be perfectly preserved if original palette was limited.")
                 pil_rgb_converted = captured_pil_image.convert("RGB")  # Convert to RGB to resolve palette
@@ -125,20 +135,20 @@ class CaptureEngine:
                 img_cv_bgr = cv2.cvtColor(img_np_rgb_converted, cv2.COLOR_RGB2BGR)
             elif len(img_np_intermediate.shape) == 2:  # Grayscale without explicit L mode (e.g. some BMPs)
                 img_cv_bgr = cv2.cvtColor(img_np_intermediate, cv2.COLOR_GRAY2BGR)
-                logger.debug(f"{log_prefix}: Implicitly grayscale image (2D NumPy array) captured, converted to BGR.")
+                logger.debug("%s: Implicitly grayscale image (2D NumPy array) captured, converted to BGR.", log_prefix)
             elif img_np_intermediate.shape[2] == 4:  # Assume RGBA if 4 channels but mode wasn't RGBA
                 img_cv_bgr = cv2.cvtColor(img_np_intermediate, cv2.COLOR_RGBA2BGR)
-                logger.debug(f"{log_prefix}: 4-channel image (assumed RGBA) captured, converted to BGR.")
+                logger.debug("%s: 4-channel image (assumed RGBA) captured, converted to BGR.", log_prefix)
             elif img_np_intermediate.shape[2] == 3:  # Assume RGB if 3 channels and not already handled
                 # This could be an issue if it's already BGR from some backend, but Pillow usually gives RGB
                 img_cv_bgr = cv2.cvtColor(img_np_intermediate, cv2.COLOR_RGB2BGR)
-                logger.debug(f"{log_prefix}: 3-channel image (assumed RGB based on shape) captured, converted to BGR.")
+                logger.debug("%s: 3-channel image (assumed RGB based on shape) captured, converted to BGR.", log_prefix)
             else:
                 # Fallback for other unexpected modes or channel counts
                 logger.error(f"{log_prefix}: Captured image in unexpected PIL mode '{captured_pil_image.mode}' or NumPy shape '{img_np_intermediate.shape}'. Cannot reliably convert to BGR.")
                 return None
 
-            logger.info(f"{log_prefix}: Capture and conversion to BGR successful. Final shape: {img_cv_bgr.shape if img_cv_bgr is not None else 'Error'}")
+            logger.info("%s: Capture and conversion to BGR successful. Final shape: %s", log_prefix, img_cv_bgr.shape if img_cv_bgr is not None else "Error")
             return img_cv_bgr
 
         except UnidentifiedImageError as e_uie:  # Pillow specific error
@@ -155,3 +165,26 @@ class CaptureEngine:
                     f"{log_prefix}: Critical capture failure: No display server (X11/XWayland) found or accessible. Mark-I cannot capture screen in headless or misconfigured display environments."
                 )
             return None
+
+
+class FrameBufferRing:
+    """
+    Small per-region pool of capture buffers, handed out round-robin to CaptureEngine.capture_region(out_buffer=...).
+
+    A frame stays valid until `size` further frames have been captured into the ring, so
+    with the default size of 4 a caller can keep the last context image, the previous
+    frame and the current frame alive while re-capturing at high frequency.
+    """
+
+    def __init__(self, size: int = 4):
+        self._buffers: list = [None] * max(2, int(size))
+        self._next_index = 0
+
+    def next_buffer(self) -> Optional[np.ndarray]:
+        """Returns the buffer that the next capture may overwrite (None until the slot has been filled once)."""
+        return self._buffers[self._next_index]
+
+    def commit(self, frame: np.ndarray) -> None:
+        """Records `frame` (the capture result) in the current slot and advances the ring."""
+        self._buffers[self._next_index] = frame
+        self._next_index = (self._next_index + 1) % len(self._buffers)
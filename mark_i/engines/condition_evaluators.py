@@ -1,16 +1,45 @@
 import logging
 import abc
-from typing import Dict, List, Any, Optional, Tuple, Callable
+import json
+import threading
+import time
+from typing import Dict, List, Any, Optional, Set, Tuple, Callable
 
 import numpy as np
 import cv2  # For template loading if needed by an evaluator directly
 
 from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
 from mark_i.engines.analysis_engine import AnalysisEngine
-from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer, scale_box_to_original
 
 logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.condition_evaluators")
 
+# Freshness modes for 'gemini_vision_query' conditions
+FRESHNESS_ALWAYS_FRESH = "always_fresh"
+FRESHNESS_STALE_WHILE_REVALIDATE = "stale_while_revalidate"
+DEFAULT_MAX_STALENESS_SECONDS = 5.0
+
+# Packet key under which RulesEngine stores batched Gemini answers for a region
+GEMINI_BATCHED_RESPONSES_KEY = "gemini_batched_responses"
+
+
+def gemini_query_batch_key(spec: Dict[str, Any]) -> Tuple[str, str]:
+    """Key identifying one batched 'gemini_vision_query' question: (model override or "", prompt)."""
+    return (spec.get("model_name") or "", spec.get("prompt") or "")
+
+
+def box_in_region_coordinates(value: Any, image_scale: Optional[float]) -> Any:
+    """
+    Returns a captured Gemini value whose 'box' is mapped from the uploaded (possibly downscaled)
+    image back to region pixels, which is what element-targeted clicks expect. Other values are returned as-is.
+    """
+    if not image_scale or image_scale == 1.0 or not isinstance(value, dict):
+        return value
+    box = value.get("box")
+    if not isinstance(box, list) or len(box) != 4 or not all(isinstance(n, (int, float)) and not isinstance(n, bool) for n in box):
+        return value
+    return {**value, "box": scale_box_to_original(box, image_scale)}
+
 
 class ConditionEvaluationResult:
     def __init__(self, met: bool, captured_value: Optional[Any] = None, template_match_info: Optional[Dict[str, Any]] = None):
@@ -49,7 +78,7 @@ class ConditionEvaluator(abc.ABC):
         # If data is None (not pre-analyzed), perform on-demand analysis.
         # The analysis_func should be able to handle None image_np_bgr if that's a valid input for it.
         # args_for_analysis_func should contain the image (which might be None).
-        logger.debug(f"{log_prefix}: Data for '{data_key_name}' not pre-analyzed. Performing on-demand analysis.")
+        logger.debug("%s: Data for '%s' not pre-analyzed. Performing on-demand analysis.", log_prefix, data_key_name)
         try:
             data = analysis_func(*args_for_analysis_func)
         except Exception as e_analysis: # pragma: no cover
@@ -102,7 +131,7 @@ class AverageColorEvaluator(ConditionEvaluator):
         if avg_color_data is not None and exp_bgr is not None:
             if isinstance(exp_bgr, list) and len(exp_bgr) == 3 and all(isinstance(c, int) for c in exp_bgr) and isinstance(tol, int):
                 condition_met = bool(np.all(np.abs(np.array(avg_color_data) - np.array(exp_bgr)) <= tol)) # Ensure Python bool
-                logger.log(logging.INFO if condition_met else logging.DEBUG, f"{log_prefix}: Result={condition_met}. ActualAvg={avg_color_data}, Expected={exp_bgr}, Tol={tol}")
+                logger.log(logging.INFO if condition_met else logging.DEBUG, "%s: Result=%s. ActualAvg=%s, Expected=%s, Tol=%s", log_prefix, condition_met, avg_color_data, exp_bgr, tol)
             else: # pragma: no cover
                 logger.warning(f"{log_prefix}: Invalid 'expected_bgr' or 'tolerance' in spec: {spec}")
         return ConditionEvaluationResult(met=condition_met)
@@ -178,11 +207,11 @@ class OcrContainsTextEvaluator(ConditionEvaluator):
                     condition_met = True
                     if spec.get("capture_as"):
                         captured_value = {"value": ocr_text, "_source_region_for_capture_": region_name}
-                    logger.info(f"{log_prefix}: MATCHED. Text '{texts_to_find_list}' found. OCR Conf: {ocr_confidence:.1f}%.")
+                    logger.info("%s: MATCHED. Text '%s' found. OCR Conf: %.1f%%.", log_prefix, texts_to_find_list, ocr_confidence)
                 elif text_match_found:  # Confidence condition failed
-                    logger.debug(f"{log_prefix}: Text found, but OCR confidence {ocr_confidence:.1f}% < min {min_ocr_conf_float}%.")
+                    logger.debug("%s: Text found, but OCR confidence %.1f%% < min %s%%.", log_prefix, ocr_confidence, min_ocr_conf_float)
                 else:  # Text not found
-                    logger.debug(f"{log_prefix}: Text '{texts_to_find_list}' NOT found in OCR output.")
+                    logger.debug("%s: Text '%s' NOT found in OCR output.", log_prefix, texts_to_find_list)
             else:
                 logger.warning(f"{log_prefix}: 'text_to_find' is empty or contains only whitespace after processing. Condition fails.")
         elif ocr_analysis_data is None and image_np_bgr is not None: # pragma: no cover
@@ -219,10 +248,10 @@ class DominantColorEvaluator(ConditionEvaluator):
                         and dom_color_info.get("percentage", 0.0) >= min_perc
                     ):
                         condition_met = True
-                        logger.info(f"{log_prefix}: MATCHED. Dominant BGR {dom_color_info['bgr_color']} (Perc: {dom_color_info.get('percentage',0):.1f}%) matches {exp_bgr} within tolerance {tol}.")
+                        logger.info("%s: MATCHED. Dominant BGR %s (Perc: %.1f%%) matches %s within tolerance %s.", log_prefix, dom_color_info["bgr_color"], dom_color_info.get("percentage", 0), exp_bgr, tol)
                         break
                 if not condition_met: # pragma: no cover
-                    logger.debug(f"{log_prefix}: No dominant color within top {top_n} matched {exp_bgr} (Tol: {tol}, MinPerc: {min_perc}%). All dom colors: {dominant_colors_data}")
+                    logger.debug("%s: No dominant color within top %s matched %s (Tol: %s, MinPerc: %s%%). All dom colors: %s", log_prefix, top_n, exp_bgr, tol, min_perc, dominant_colors_data)
             else: # pragma: no cover
                 logger.warning(f"{log_prefix}: Invalid 'expected_bgr' spec: {exp_bgr}")
         elif dominant_colors_data is None and image_np_bgr is not None: # pragma: no cover
@@ -234,18 +263,123 @@ class DominantColorEvaluator(ConditionEvaluator):
 
 
 class GeminiVisionQueryEvaluator(ConditionEvaluator):
+    """
+    Evaluates a condition by asking Gemini a question about the region image.
+
+    With `freshness: "stale_while_revalidate"` the last successful result for the
+    same rule/region/spec is returned immediately (captured value included) while a
+    background refresh runs on the current frame. The evaluation only blocks on
+    Gemini when no result exists yet or the cached one is older than
+    `max_staleness_seconds`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # Cache key -> (monotonic time the producing query started, result)
+        self._swr_results: Dict[Tuple[str, str, str], Tuple[float, ConditionEvaluationResult]] = {}
+        self._swr_refreshes_in_flight: Set[Tuple[str, str, str]] = set()
+        self._swr_lock = threading.Lock()
+
     def evaluate(self, spec: Dict, region_name: str, region_data_packet: Dict, rule_name_for_context: str) -> ConditionEvaluationResult:
         log_prefix = f"R '{rule_name_for_context}', Rgn '{region_name}', Cond 'gemini_vision_query' (Eval)"
         image_np_bgr = region_data_packet.get("image")
+        freshness = spec.get("freshness") or FRESHNESS_ALWAYS_FRESH
+        if freshness == FRESHNESS_STALE_WHILE_REVALIDATE:
+            return self._evaluate_stale_while_revalidate(spec, region_name, image_np_bgr, rule_name_for_context, log_prefix)
+        if freshness != FRESHNESS_ALWAYS_FRESH:  # pragma: no cover
+            logger.warning(f"{log_prefix}: Unknown freshness mode '{freshness}'. Using '{FRESHNESS_ALWAYS_FRESH}'.")
+        prefetched_response = (region_data_packet.get(GEMINI_BATCHED_RESPONSES_KEY) or {}).get(gemini_query_batch_key(spec))
+        result, _ = self._query_and_interpret(spec, region_name, image_np_bgr, log_prefix, prefetched_response)
+        return result
+
+    def _evaluate_stale_while_revalidate(
+        self, spec: Dict, region_name: str, image_np_bgr: Optional[np.ndarray], rule_name_for_context: str, log_prefix: str
+    ) -> ConditionEvaluationResult:
+        try:
+            max_staleness_sec = float(spec.get("max_staleness_seconds", DEFAULT_MAX_STALENESS_SECONDS))
+        except (TypeError, ValueError):  # pragma: no cover
+            logger.warning(f"{log_prefix}: Invalid 'max_staleness_seconds' {spec.get('max_staleness_seconds')!r}. Using {DEFAULT_MAX_STALENESS_SECONDS}s.")
+            max_staleness_sec = DEFAULT_MAX_STALENESS_SECONDS
+        cache_key = (rule_name_for_context, region_name, json.dumps(spec, sort_keys=True, default=str))
+
+        start_refresh = False
+        with self._swr_lock:
+            cached_entry = self._swr_results.get(cache_key)
+            if cached_entry is not None and (time.monotonic() - cached_entry[0]) <= max_staleness_sec:
+                start_refresh = image_np_bgr is not None and cache_key not in self._swr_refreshes_in_flight
+                if start_refresh:
+                    self._swr_refreshes_in_flight.add(cache_key)
+            else:
+                cached_entry = None
+
+        if cached_entry is not None:
+            result_age_sec = time.monotonic() - cached_entry[0]
+            if start_refresh:
+                # Copy the frame: the capture buffer may be reused by the next cycle.
+                refresh_thread = threading.Thread(
+                    target=self._refresh_in_background,
+                    args=(cache_key, spec, region_name, image_np_bgr.copy(), log_prefix),  # type: ignore[union-attr]
+                    name=f"GeminiSWRRefresh-{rule_name_for_context}",
+                    daemon=True,
+                )
+                refresh_thread.start()
+            logger.debug("%s: Serving cached result (age %.2fs <= %.2fs). Refresh started: %s.", log_prefix, result_age_sec, max_staleness_sec, start_refresh)
+            return cached_entry[1]
+
+        logger.debug("%s: No result within max staleness (%.2fs). Querying synchronously.", log_prefix, max_staleness_sec)
+        query_started_at = time.monotonic()
+        result, query_succeeded = self._query_and_interpret(spec, region_name, image_np_bgr, log_prefix)
+        if query_succeeded:
+            self._store_swr_result(cache_key, query_started_at, result)
+        return result
+
+    def _refresh_in_background(self, cache_key: Tuple[str, str, str], spec: Dict, region_name: str, image_np_bgr: np.ndarray, log_prefix: str) -> None:
+        try:
+            query_started_at = time.monotonic()
+            result, query_succeeded = self._query_and_interpret(spec, region_name, image_np_bgr, f"{log_prefix} [bg refresh]")
+            if query_succeeded:
+                self._store_swr_result(cache_key, query_started_at, result)
+        except Exception as e_refresh:  # pragma: no cover
+            logger.error(f"{log_prefix}: Background refresh failed: {e_refresh}", exc_info=True)
+        finally:
+            with self._swr_lock:
+                self._swr_refreshes_in_flight.discard(cache_key)
+
+    def discard_cached_results(self, rule_names: Set[str]) -> None:
+        """Forgets stale-while-revalidate results of the given rules (e.g. after they were edited or removed)."""
+        with self._swr_lock:
+            for cache_key in [k for k in self._swr_results if k[0] in rule_names]:
+                del self._swr_results[cache_key]
+
+    def _store_swr_result(self, cache_key: Tuple[str, str, str], query_started_at: float, result: ConditionEvaluationResult) -> None:
+        with self._swr_lock:
+            existing_entry = self._swr_results.get(cache_key)
+            # Never let a slow, older query overwrite a result from a newer frame.
+            if existing_entry is None or existing_entry[0] <= query_started_at:
+                self._swr_results[cache_key] = (query_started_at, result)
+
+    def _query_and_interpret(
+        self, spec: Dict, region_name: str, image_np_bgr: Optional[np.ndarray], log_prefix: str, prefetched_response: Optional[Dict[str, Any]] = None
+    ) -> Tuple[ConditionEvaluationResult, bool]:
+        """
+        Runs the Gemini query (or uses a response already fetched by a batched request
+        for this cycle) and applies the spec's checks. Returns (result, query_succeeded).
+        """
         condition_met = False
         captured_value = None
+        query_succeeded = False
 
         if self.gemini_analyzer_for_query and image_np_bgr is not None:
             prompt_str = spec.get("prompt")
             model_override = spec.get("model_name")
             if prompt_str:
-                gemini_response = self.gemini_analyzer_for_query.query_vision_model(prompt=prompt_str, image_data=image_np_bgr, model_name_override=model_override)
+                if prefetched_response is not None:
+                    logger.debug("%s: Using answer from this cycle's batched Gemini request.", log_prefix)
+                    gemini_response = prefetched_response
+                else:
+                    gemini_response = self.gemini_analyzer_for_query.query_vision_model(prompt=prompt_str, image_data=image_np_bgr, model_name_override=model_override)
                 if gemini_response["status"] == "success":
+                    query_succeeded = True
                     resp_text_content = gemini_response.get("text_content", "") or ""
                     resp_json_content = gemini_response.get("json_content")
 
@@ -293,16 +427,17 @@ class GeminiVisionQueryEvaluator(ConditionEvaluator):
                     if text_condition_part_met and json_condition_part_met:
                         condition_met = True
                         if spec.get("capture_as"):
+                            image_scale = gemini_response.get("image_scale")
                             if json_path_str and extracted_json_value_for_capture is not None:
-                                captured_value = {"value": extracted_json_value_for_capture, "_source_region_for_capture_": region_name}
+                                captured_value = {"value": box_in_region_coordinates(extracted_json_value_for_capture, image_scale), "_source_region_for_capture_": region_name}
                             elif resp_json_content is not None:
-                                captured_value = {"value": resp_json_content, "_source_region_for_capture_": region_name}
+                                captured_value = {"value": box_in_region_coordinates(resp_json_content, image_scale), "_source_region_for_capture_": region_name}
                             else:
                                 captured_value = {"value": resp_text_content, "_source_region_for_capture_": region_name}
-                        logger.info(f"{log_prefix}: MATCHED. TextCondMet={text_condition_part_met}, JsonCondMet={json_condition_part_met}. Resp snippet: '{resp_text_content[:70]}...'")
+                        logger.info("%s: MATCHED. TextCondMet=%s, JsonCondMet=%s. Resp snippet: '%.70s...'", log_prefix, text_condition_part_met, json_condition_part_met, resp_text_content)
                     else: # pragma: no cover
                         logger.debug(
-                            f"{log_prefix}: Gemini query conditions NOT MET. TextCondMet={text_condition_part_met}, JsonCondMet={json_condition_part_met}. Resp snippet: '{resp_text_content[:70]}...'"
+                            "%s: Gemini query conditions NOT MET. TextCondMet=%s, JsonCondMet=%s. Resp snippet: '%.70s...'", log_prefix, text_condition_part_met, json_condition_part_met, resp_text_content
                         )
 
                 else:  # Gemini query failed # pragma: no cover
@@ -315,11 +450,11 @@ class GeminiVisionQueryEvaluator(ConditionEvaluator):
             if image_np_bgr is None:
                 logger.warning(f"{log_prefix}: Image data missing for region.")
 
-        return ConditionEvaluationResult(met=condition_met, captured_value=captured_value)
+        return ConditionEvaluationResult(met=condition_met, captured_value=captured_value), query_succeeded
 
 
 class AlwaysTrueEvaluator(ConditionEvaluator):
     def evaluate(self, spec: Dict, region_name: str, region_data_packet: Dict, rule_name_for_context: str) -> ConditionEvaluationResult:
         log_prefix = f"R '{rule_name_for_context}', Rgn '{region_name}', Cond 'always_true' (Eval)"
-        logger.debug(f"{log_prefix}: Condition is 'always_true', returning True.")
+        logger.debug("%s: Condition is 'always_true', returning True.", log_prefix)
         return ConditionEvaluationResult(met=True)
\ No newline at end of file
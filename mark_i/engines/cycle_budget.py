@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.cycle_budget")
+
+# Rule priorities (a rule's optional "priority" key). High-priority work is never deferred.
+PRIORITY_LOW = "low"
+PRIORITY_NORMAL = "normal"
+PRIORITY_HIGH = "high"
+RULE_PRIORITIES = (PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH)
+DEFAULT_RULE_PRIORITY = PRIORITY_NORMAL
+_PRIORITY_RANK = {PRIORITY_LOW: 0, PRIORITY_NORMAL: 1, PRIORITY_HIGH: 2}
+
+DEFAULT_BUDGET_INTERVAL_FRACTION = 0.8  # Budget when none is configured: this share of the monitoring interval
+DEFAULT_HEADROOM_FRACTION = 0.6  # Cycles below this share of the budget count towards restoring deferred work
+DEFAULT_RESTORE_AFTER_CYCLES = 3
+DEFAULT_MAX_DEFERRED_CYCLES = 5  # Deferred work runs anyway after this many consecutive deferrals
+DEFAULT_COST_EWMA_ALPHA = 0.3
+_MAX_SHED_LEVEL = 2  # 0: nothing shed, 1: low-priority work shed, 2: low and normal shed
+
+
+def rule_priority(rule_config: Dict[str, Any]) -> str:
+    """The rule's 'priority' ("low", "normal" or "high"), defaulting to "normal"."""
+    priority = str(rule_config.get("priority") or DEFAULT_RULE_PRIORITY).lower() if isinstance(rule_config, dict) else DEFAULT_RULE_PRIORITY
+    return priority if priority in _PRIORITY_RANK else DEFAULT_RULE_PRIORITY
+
+
+def higher_priority(first: str, second: str) -> str:
+    return first if _PRIORITY_RANK.get(first, 1) >= _PRIORITY_RANK.get(second, 1) else second
+
+
+class CycleBudgetGovernor:
+    """
+    Keeps monitoring cycles within a time budget by deferring expensive, lower-priority work.
+
+    Work items (an OCR or k-means pass on a region, an expensive rule) are identified by a
+    hashable key. Before running one, the caller asks `allow(key, priority)`; afterwards it
+    reports the measured cost with `record_cost`. Work that is not governed itself (cheap rules)
+    is announced with `note_work(priority)`. Deferring only helps if it frees time for something
+    more important, so an item is only ever deferred while work of a higher priority was seen in
+    this or the previous cycle. A profile whose slow work is all of one priority is never throttled.
+    Otherwise an item is deferred when:
+    - its priority is below the current shed level (raised after a cycle overran the budget,
+      lowered again after `restore_after_cycles` cycles with headroom), or
+    - while shedding (shed level above 0), its estimated cost (EWMA of past runs) would push
+      the current cycle past the budget. Cycles within budget never defer on cost alone, so
+      a slow rule on a healthy profile keeps running every cycle.
+    High-priority work is never deferred, and any item deferred `max_deferred_cycles` times in
+    a row runs anyway, so low-priority rules are slowed down rather than starved.
+    """
+
+    def __init__(
+        self,
+        headroom_fraction: float = DEFAULT_HEADROOM_FRACTION,
+        restore_after_cycles: int = DEFAULT_RESTORE_AFTER_CYCLES,
+        max_deferred_cycles: int = DEFAULT_MAX_DEFERRED_CYCLES,
+        cost_ewma_alpha: float = DEFAULT_COST_EWMA_ALPHA,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.headroom_fraction = min(1.0, max(0.0, float(headroom_fraction)))
+        self.restore_after_cycles = max(1, int(restore_after_cycles))
+        self.max_deferred_cycles = max(1, int(max_deferred_cycles))
+        self.cost_ewma_alpha = min(1.0, max(0.01, float(cost_ewma_alpha)))
+        self._clock = clock
+        self.shed_level = 0
+        self.budget_sec: Optional[float] = None
+        self._cycle_start: Optional[float] = None
+        self._cycles_with_headroom = 0
+        self._cost_estimates: Dict[Hashable, float] = {}
+        self._deferred_streaks: Dict[Hashable, int] = defaultdict(int)
+        self._top_rank_this_cycle = -1  # Highest priority rank of work seen this cycle (-1: none yet)
+        self._top_rank_last_cycle = -1
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"cycles": 0, "over_budget_cycles": 0, "deferred_total": 0, "forced_after_deferral_total": 0}
+
+    def begin_cycle(self, budget_sec: Optional[float]) -> None:
+        """Starts timing a cycle. A missing or non-positive budget disables deferral for this cycle."""
+        self.budget_sec = float(budget_sec) if isinstance(budget_sec, (int, float)) and budget_sec > 0 else None
+        self._cycle_start = self._clock()
+
+    def elapsed_sec(self) -> float:
+        return self._clock() - self._cycle_start if self._cycle_start is not None else 0.0
+
+    def note_work(self, priority: str = DEFAULT_RULE_PRIORITY) -> None:
+        """Records that work of `priority` runs this cycle, so lower-priority work may be deferred in its favour."""
+        with self._lock:
+            self._top_rank_this_cycle = max(self._top_rank_this_cycle, _PRIORITY_RANK.get(priority, 1))
+
+    def allow(self, work_key: Hashable, priority: str = DEFAULT_RULE_PRIORITY) -> bool:
+        """Whether to run `work_key` now. A False answer counts as one deferral of that item."""
+        self.note_work(priority)
+        if self.budget_sec is None or priority == PRIORITY_HIGH:
+            return True
+        with self._lock:
+            protects_higher_priority = _PRIORITY_RANK.get(priority, 1) < max(self._top_rank_this_cycle, self._top_rank_last_cycle)
+            shed_by_level = protects_higher_priority and _PRIORITY_RANK.get(priority, 1) < self.shed_level
+            would_overrun = protects_higher_priority and self.shed_level > 0 and self.elapsed_sec() + self._cost_estimates.get(work_key, 0.0) > self.budget_sec
+            if not (shed_by_level or would_overrun):
+                self._deferred_streaks.pop(work_key, None)
+                return True
+            if self._deferred_streaks[work_key] >= self.max_deferred_cycles:
+                self._deferred_streaks.pop(work_key, None)
+                self._stats["forced_after_deferral_total"] += 1
+                return True
+            self._deferred_streaks[work_key] += 1
+            self._stats["deferred_total"] += 1
+        logger.debug(f"CycleBudgetGovernor: Deferred {work_key} (priority '{priority}', shed level {self.shed_level}, {'over budget' if would_overrun else 'shed'}).")
+        return False
+
+    def record_cost(self, work_key: Hashable, cost_sec: float) -> None:
+        with self._lock:
+            previous = self._cost_estimates.get(work_key)
+            self._cost_estimates[work_key] = cost_sec if previous is None else previous + self.cost_ewma_alpha * (cost_sec - previous)
+
+    def end_cycle(self) -> float:
+        """Adjusts the shed level from this cycle's duration. Returns the duration in seconds."""
+        cycle_sec = self.elapsed_sec()
+        self._cycle_start = None
+        with self._lock:
+            self._stats["cycles"] += 1
+            self._top_rank_last_cycle, self._top_rank_this_cycle = self._top_rank_this_cycle, -1
+            if self.budget_sec is None:
+                return cycle_sec
+            if cycle_sec > self.budget_sec:
+                self._stats["over_budget_cycles"] += 1
+                self._cycles_with_headroom = 0
+                if self.shed_level < _MAX_SHED_LEVEL:
+                    self.shed_level += 1
+                    logger.warning(f"CycleBudgetGovernor: Cycle took {cycle_sec * 1000.0:.0f}ms (budget {self.budget_sec * 1000.0:.0f}ms). Shed level raised to {self.shed_level}.")
+            elif cycle_sec < self.budget_sec * self.headroom_fraction:
+                self._cycles_with_headroom += 1
+                if self.shed_level > 0 and self._cycles_with_headroom >= self.restore_after_cycles:
+                    self.shed_level -= 1
+                    self._cycles_with_headroom = 0
+                    logger.info(f"CycleBudgetGovernor: Headroom is back. Shed level lowered to {self.shed_level}.")
+            else:
+                self._cycles_with_headroom = 0
+        return cycle_sec
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "shed_level": self.shed_level, "budget_ms": self.budget_sec * 1000.0 if self.budget_sec else None, "currently_deferred": len(self._deferred_streaks)}
@@ -0,0 +1,141 @@
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.cycle_scheduler")
+
+# What to do when a cycle runs past the deadline of the next one
+OVERRUN_POLICY_SKIP = "skip"  # Drop the missed ticks and resume at the next deadline on the grid
+OVERRUN_POLICY_CATCH_UP = "catch_up"  # Run missed ticks back to back (at most max_catch_up_ticks of them)
+OVERRUN_POLICY_DEGRADE = "degrade"  # Like skip, and mark the following cycles degraded until one finishes in time
+OVERRUN_POLICIES = (OVERRUN_POLICY_SKIP, OVERRUN_POLICY_CATCH_UP, OVERRUN_POLICY_DEGRADE)
+DEFAULT_OVERRUN_POLICY = OVERRUN_POLICY_SKIP
+DEFAULT_MAX_CATCH_UP_TICKS = 3
+
+
+class CycleTick:
+    """One scheduled cycle: its deadline on the grid and how late it actually started."""
+
+    __slots__ = ("index", "deadline", "started_at", "lateness_sec", "missed_ticks", "degraded")
+
+    def __init__(self, index: int, deadline: float, started_at: float, missed_ticks: int = 0, degraded: bool = False):
+        self.index = index
+        self.deadline = deadline
+        self.started_at = started_at
+        self.lateness_sec = max(0.0, started_at - deadline)
+        self.missed_ticks = missed_ticks  # Ticks dropped right before this one
+        self.degraded = degraded  # The caller should skip expensive work in this cycle
+
+
+class FixedRateScheduler:
+    """
+    Schedules cycles at absolute deadlines `anchor + n * interval` on a monotonic clock.
+
+    Unlike sleeping `interval - elapsed` after each cycle, the rate does not drift with cycle
+    duration or sleep jitter, and an overrun is handled by an explicit policy instead of
+    starting the next cycle immediately every time. Usage:
+
+        scheduler.start()
+        while (tick := scheduler.wait_for_next_tick(stop_event)) is not None:
+            run_cycle(degraded=tick.degraded)
+            scheduler.cycle_finished(tick)
+    """
+
+    def __init__(
+        self,
+        interval_sec: float,
+        overrun_policy: str = DEFAULT_OVERRUN_POLICY,
+        max_catch_up_ticks: int = DEFAULT_MAX_CATCH_UP_TICKS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if overrun_policy not in OVERRUN_POLICIES:
+            logger.warning(f"FixedRateScheduler: Unknown overrun policy '{overrun_policy}'. Using '{DEFAULT_OVERRUN_POLICY}'.")
+            overrun_policy = DEFAULT_OVERRUN_POLICY
+        self.interval_sec = float(interval_sec)
+        self.overrun_policy = overrun_policy
+        self.max_catch_up_ticks = max(0, int(max_catch_up_ticks))
+        self._clock = clock
+        self._anchor_time = 0.0
+        self._anchor_index = 0
+        self._next_index = 0
+        self._pending_missed_ticks = 0
+        self._degrade_next = False
+        self._pending_interval_sec: Optional[float] = None
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Any] = {}
+
+    def start(self) -> None:
+        """Anchors the grid at the current time; the first tick is due immediately."""
+        self._anchor_time, self._anchor_index, self._next_index = self._clock(), 0, 0
+        self._pending_missed_ticks, self._degrade_next = 0, False
+        with self._stats_lock:
+            self._stats = {"cycles": 0, "overruns": 0, "missed_ticks": 0, "degraded_cycles": 0, "last_lateness_ms": None, "max_lateness_ms": 0.0, "total_lateness_ms": 0.0}
+
+    def set_interval(self, interval_sec: float) -> None:
+        """Changes the interval from the end of the current cycle on (the grid is re-anchored there)."""
+        self._pending_interval_sec = float(interval_sec)
+
+    def _deadline(self, tick_index: int) -> float:
+        return self._anchor_time + (tick_index - self._anchor_index) * self.interval_sec
+
+    def wait_for_next_tick(self, stop_event: threading.Event) -> Optional[CycleTick]:
+        """Sleeps until the next deadline. Returns None if `stop_event` was set meanwhile."""
+        deadline = self._deadline(self._next_index)
+        now = self._clock()
+        if deadline > now:
+            if stop_event.wait(timeout=deadline - now):
+                return None
+            now = self._clock()
+        elif stop_event.is_set():
+            return None
+        tick = CycleTick(self._next_index, deadline, now, missed_ticks=self._pending_missed_ticks, degraded=self._degrade_next)
+        self._pending_missed_ticks = 0
+        with self._stats_lock:
+            lateness_ms = tick.lateness_sec * 1000.0
+            self._stats["cycles"] += 1
+            self._stats["last_lateness_ms"] = lateness_ms
+            self._stats["max_lateness_ms"] = max(self._stats["max_lateness_ms"], lateness_ms)
+            self._stats["total_lateness_ms"] += lateness_ms
+            self._stats["degraded_cycles"] += int(tick.degraded)
+        return tick
+
+    def cycle_finished(self, tick: CycleTick) -> None:
+        """Picks the next tick according to the overrun policy."""
+        if self._pending_interval_sec is not None:
+            self._anchor_time, self._anchor_index = tick.deadline, tick.index
+            self.interval_sec, self._pending_interval_sec = self._pending_interval_sec, None
+        next_index = tick.index + 1
+        now = self._clock()
+        if now <= self._deadline(next_index):
+            self._next_index, self._degrade_next = next_index, False
+            return
+
+        # Overrun: every tick from next_index up to (excluding) first_future_index is already due
+        first_future_index = self._anchor_index + math.floor((now - self._anchor_time) / self.interval_sec) + 1
+        if self.overrun_policy == OVERRUN_POLICY_CATCH_UP:
+            self._next_index = max(next_index, first_future_index - self.max_catch_up_ticks)
+        else:
+            self._next_index = first_future_index
+            self._degrade_next = self.overrun_policy == OVERRUN_POLICY_DEGRADE
+        self._pending_missed_ticks = self._next_index - next_index
+        with self._stats_lock:
+            self._stats["overruns"] += 1
+            self._stats["missed_ticks"] += self._pending_missed_ticks
+        logger.warning(
+            f"FixedRateScheduler: Cycle #{tick.index} overran its slot (took {(now - tick.started_at) * 1000.0:.0f}ms, interval {self.interval_sec * 1000.0:.0f}ms). "
+            f"Policy '{self.overrun_policy}': {self._pending_missed_ticks} tick(s) dropped{', next cycle degraded' if self._degrade_next else ''}."
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cycle count, overruns, dropped ticks and start lateness (ms) since `start()`."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total_lateness_ms = stats.pop("total_lateness_ms", 0.0)
+        stats["mean_lateness_ms"] = total_lateness_ms / stats["cycles"] if stats.get("cycles") else None
+        stats["overrun_policy"] = self.overrun_policy
+        stats["interval_sec"] = self.interval_sec
+        return stats
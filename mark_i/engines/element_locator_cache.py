@@ -0,0 +1,118 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from mark_i.engines.analysis_engine import AnalysisEngine
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.element_locator_cache")
+
+DEFAULT_MATCH_THRESHOLD = 0.9
+DEFAULT_SEARCH_MARGIN_PX = 40  # How far around the last known box the local search extends
+DEFAULT_MAX_ENTRIES = 128
+MIN_TEMPLATE_SIDE_PX = 4  # Crops smaller than this are too ambiguous to match reliably
+
+
+class ElementLocatorCache:
+    """
+    Learned element locations: Gemini-refined bounding boxes promoted to local templates.
+
+    After Gemini locates a described element, the box is cropped from the context image
+    and kept as an auto-generated template keyed by (region name, target description).
+    Later lookups run AnalysisEngine.match_template in a window around the last known
+    box. The caller only goes back to Gemini when that local verification fails, at
+    which point the stale entry is dropped and replaced by the fresh refinement.
+    Entries live in memory for the lifetime of the module (bounded LRU).
+    """
+
+    def __init__(
+        self, analysis_engine: AnalysisEngine, match_threshold: float = DEFAULT_MATCH_THRESHOLD, search_margin_px: int = DEFAULT_SEARCH_MARGIN_PX, max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.analysis_engine = analysis_engine
+        self.match_threshold = float(match_threshold)
+        self.search_margin_px = max(0, int(search_margin_px))
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stored": 0}
+
+    @staticmethod
+    def _make_key(region_name: str, target_description: str) -> Tuple[str, str]:
+        return region_name, " ".join(target_description.lower().split())
+
+    def store(self, region_name: str, target_description: str, context_image: np.ndarray, box: List[int]) -> bool:
+        """Crops `box` ([x,y,w,h] relative to `context_image`) and stores it as the learned template. Returns False if the crop is unusable."""
+        if not isinstance(context_image, np.ndarray) or context_image.ndim != 3:
+            return False
+        img_h, img_w = context_image.shape[:2]
+        x, y, w, h = (int(v) for v in box)
+        x0, y0, x1, y1 = max(0, x), max(0, y), min(img_w, x + w), min(img_h, y + h)
+        if x1 - x0 < MIN_TEMPLATE_SIDE_PX or y1 - y0 < MIN_TEMPLATE_SIDE_PX:
+            logger.debug(f"ElementLocatorCache: Box {box} for '{target_description}' in '{region_name}' too small or outside image; not stored.")
+            return False
+        cache_key = self._make_key(region_name, target_description)
+        with self._lock:
+            self._entries[cache_key] = {"template": context_image[y0:y1, x0:x1].copy(), "box": [x0, y0, x1 - x0, y1 - y0]}
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stats["stored"] += 1
+        logger.debug(f"ElementLocatorCache: Learned template for '{target_description}' in '{region_name}' at {[x0, y0, x1 - x0, y1 - y0]}.")
+        return True
+
+    def locate(self, region_name: str, target_description: str, context_image: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Verifies the learned template near its last known location.
+
+        Returns {"box": [x,y,w,h], "confidence": float} relative to `context_image` on a match,
+        or None if there is no entry or local verification failed (the entry is then dropped).
+        """
+        cache_key = self._make_key(region_name, target_description)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+        if entry is None or not isinstance(context_image, np.ndarray) or context_image.ndim != 3:
+            return None
+
+        img_h, img_w = context_image.shape[:2]
+        last_x, last_y, tpl_w, tpl_h = entry["box"]
+        win_x0, win_y0 = max(0, last_x - self.search_margin_px), max(0, last_y - self.search_margin_px)
+        win_x1, win_y1 = min(img_w, last_x + tpl_w + self.search_margin_px), min(img_h, last_y + tpl_h + self.search_margin_px)
+        match = None
+        if win_x1 - win_x0 >= tpl_w and win_y1 - win_y0 >= tpl_h:
+            match = self.analysis_engine.match_template(
+                context_image[win_y0:win_y1, win_x0:win_x1], entry["template"], threshold=self.match_threshold, region_name_context=region_name, template_name_context=f"learned:{target_description}"
+            )
+        if not match:
+            with self._lock:
+                if self._entries.get(cache_key) is entry:
+                    del self._entries[cache_key]
+                self.stats["misses"] += 1
+            logger.info(f"ElementLocatorCache: Learned template for '{target_description}' in '{region_name}' no longer matches. Dropped.")
+            return None
+
+        box = [win_x0 + match["location_x"], win_y0 + match["location_y"], match["width"], match["height"]]
+        with self._lock:
+            entry["box"] = box
+            self.stats["hits"] += 1
+        return {"box": box, "confidence": match["confidence"]}
+
+    def invalidate(self, region_name: str, target_description: str) -> None:
+        with self._lock:
+            self._entries.pop(self._make_key(region_name, target_description), None)
+
+    def invalidate_region(self, region_name: str) -> int:
+        """Drops every learned element of a region (e.g. after its geometry changed). Returns how many were dropped."""
+        with self._lock:
+            stale_keys = [cache_key for cache_key in self._entries if cache_key[0] == region_name]
+            for cache_key in stale_keys:
+                del self._entries[cache_key]
+        return len(stale_keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -1,50 +1,222 @@
+import io
 import logging
+import math
+import random
+import threading
 import time
 import json
-from typing import Optional, Dict, Any, Union, List, Tuple
+from typing import Optional, Dict, Any, Union, List, Tuple, Callable
 import os
 
-import google.generativeai as genai
-from google.generativeai.types import GenerationConfig, HarmCategory, HarmBlockThreshold
-from google.generativeai.types import BlockedPromptException, StopCandidateException
-from google.api_core import exceptions as google_api_exceptions
 
 from PIL import Image
 import cv2
 import numpy as np
 
+from mark_i.core.lazy_imports import lazy_import
+from mark_i.core.metrics import LatencyHistogram
+from mark_i.core.tracing import traced
 from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+from mark_i.engines.gemini_cassette import GeminiCassette, get_default_cassette, request_fingerprints
 logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.gemini_analyzer")
 
-# Fallback for SDK types if specific import paths change or fail
-try:
-    from google.generativeai.types import Content, Part
-    logger.debug("Imported 'Content' and 'Part' from 'google.generativeai.types'")
-except ImportError:
-    try:
-        from google.generativeai import Content, Part # Try from top level
-        logger.debug("Imported 'Content' and 'Part' from 'google.generativeai'")
-    except ImportError:
-        logger.warning("'Content' and/or 'Part' types not found. Using 'Any' for type hints.")
-        Content = Any
-        Part = Any
+# The Gemini SDK takes most of Mark-I's startup time to import, so it is only loaded once a
+# GeminiAnalyzer actually talks to the API (profiles without Gemini rules never load it).
+genai = lazy_import("google.generativeai")
+genai_types = lazy_import("google.generativeai.types")
+google_api_exceptions = lazy_import("google.api_core.exceptions")
 
 
+# HarmCategory / HarmBlockThreshold member names, resolved when the SDK client is configured.
 DEFAULT_SAFETY_SETTINGS_DATA: List[Dict[str, Any]] = [
-    {"category": HarmCategory.HARM_CATEGORY_HARASSMENT, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
-    {"category": HarmCategory.HARM_CATEGORY_HATE_SPEECH, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
-    {"category": HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
-    {"category": HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
 ]
-DEFAULT_GENERATION_CONFIG = GenerationConfig()
 
 # Default model names, now housed here as GeminiAnalyzer is the direct user.
 DEFAULT_NLU_PLANNING_MODEL = "gemini-1.5-flash-latest"
 DEFAULT_VISUAL_REFINE_MODEL = "gemini-1.5-flash-latest"
 
+# Image upload budget. Images larger than the budget are downscaled before upload;
+# lossy formats are re-encoded in-process and sent as inline blobs.
+IMAGE_UPLOAD_FORMATS: Dict[str, Optional[str]] = {"png": None, "jpeg": "image/jpeg", "webp": "image/webp"}  # None: SDK encodes the PIL image itself
+DEFAULT_IMAGE_UPLOAD_FORMAT = "png"
+DEFAULT_IMAGE_UPLOAD_QUALITY = 85
+
+# Batched vision queries: one request, one structured answer per question.
+BATCH_ANSWERS_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "answers": {
+            "type": "array",
+            "items": {"type": "object", "properties": {"id": {"type": "string"}, "answer": {"type": "string"}}, "required": ["id", "answer"]},
+        }
+    },
+    "required": ["answers"],
+}
+
+
+# Call policy: per-attempt deadline, jittered exponential backoff for transient errors bounded
+# by an overall time budget (queries run on the monitoring thread), and a circuit breaker that
+# fails fast for a cooldown period after repeated failures.
+DEFAULT_REQUEST_TIMEOUT_SECONDS = 10.0
+DEFAULT_MAX_RETRIES = 1
+DEFAULT_RETRY_BASE_DELAY_SECONDS = 1.0
+DEFAULT_RETRY_MAX_DELAY_SECONDS = 4.0
+DEFAULT_RETRY_BUDGET_SECONDS = 15.0  # Wall time across all attempts and backoff sleeps of one query
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 3
+DEFAULT_CIRCUIT_COOLDOWN_SECONDS = 60.0
+
+
+def retryable_api_exceptions() -> Tuple[type, ...]:
+    """Transient API errors worth retrying. Only called once an SDK call failed, so the SDK is loaded by then."""
+    return (
+        google_api_exceptions.TooManyRequests,  # 429, includes ResourceExhausted
+        google_api_exceptions.ServiceUnavailable,  # 503
+        google_api_exceptions.DeadlineExceeded,  # 504 / client-side deadline
+        google_api_exceptions.InternalServerError,  # 500
+        TimeoutError,
+        ConnectionError,
+    )
+
+
+def gemini_analyzer_options_from_settings(get_setting: Callable[[str, Any], Any]) -> Dict[str, Any]:
+    """
+    Builds the image-budget and call-policy keyword arguments for `GeminiAnalyzer` from profile settings.
+
+    Args:
+        get_setting: A `(key, default) -> value` getter, e.g. `ConfigManager.get_setting`.
+    """
+    return {
+        "image_max_long_edge": get_setting("gemini_image_max_long_edge", None),
+        "image_max_pixels": get_setting("gemini_image_max_pixels", None),
+        "image_format": get_setting("gemini_image_format", DEFAULT_IMAGE_UPLOAD_FORMAT),
+        "image_quality": get_setting("gemini_image_quality", DEFAULT_IMAGE_UPLOAD_QUALITY),
+        "image_grayscale": get_setting("gemini_image_grayscale", False),
+        "request_timeout_sec": get_setting("gemini_request_timeout_seconds", DEFAULT_REQUEST_TIMEOUT_SECONDS),
+        "max_retries": get_setting("gemini_max_retries", DEFAULT_MAX_RETRIES),
+        "retry_base_delay_sec": get_setting("gemini_retry_base_delay_seconds", DEFAULT_RETRY_BASE_DELAY_SECONDS),
+        "retry_max_delay_sec": get_setting("gemini_retry_max_delay_seconds", DEFAULT_RETRY_MAX_DELAY_SECONDS),
+        "retry_budget_sec": get_setting("gemini_retry_budget_seconds", DEFAULT_RETRY_BUDGET_SECONDS),
+        "circuit_failure_threshold": get_setting("gemini_circuit_failure_threshold", DEFAULT_CIRCUIT_FAILURE_THRESHOLD),
+        "circuit_cooldown_sec": get_setting("gemini_circuit_cooldown_seconds", DEFAULT_CIRCUIT_COOLDOWN_SECONDS),
+    }
+
+
+def parse_json_from_response_text(text: Optional[str]) -> Optional[Any]:
+    """Parses a (possibly ```json fenced) response text as JSON. Returns None if it is not valid JSON."""
+    if not text:
+        return None
+    text_for_json = text.strip()
+    if text_for_json.startswith("```json"): text_for_json = text_for_json[7:]
+    elif text_for_json.startswith("```"): text_for_json = text_for_json[3:]
+    if text_for_json.endswith("```"): text_for_json = text_for_json[:-3]
+    try:
+        return json.loads(text_for_json.strip())
+    except json.JSONDecodeError:
+        return None
+
+
+def scale_box_to_original(box: List[Union[int, float]], image_scale: float) -> List[int]:
+    """
+    Maps an [x, y, w, h] box reported on an uploaded (possibly downscaled) image back
+    to the coordinate space of the original image, using the `image_scale` returned by
+    `GeminiAnalyzer.query_vision_model`.
+    """
+    if not image_scale or image_scale == 1.0:
+        return [int(round(n)) for n in box]
+    return [int(round(n / image_scale)) for n in box]
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker for remote calls.
+
+    closed: calls pass through; consecutive failures are counted.
+    open: calls are rejected until `cooldown_sec` has elapsed since the circuit opened.
+    half_open: a single trial call is let through; success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD, cooldown_sec: float = DEFAULT_CIRCUIT_COOLDOWN_SECONDS, name: str = "circuit"):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_sec = max(0.0, float(cooldown_sec))
+        self.name = name
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown_sec:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+                logger.info(f"CircuitBreaker '{self.name}': Cooldown elapsed. Half-open; allowing a trial call.")
+            if self._trial_in_flight:  # HALF_OPEN with a trial already running
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"CircuitBreaker '{self.name}': Trial call succeeded. Circuit closed.")
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or (self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._times_opened += 1
+                logger.warning(f"CircuitBreaker '{self.name}': OPEN after {self._consecutive_failures} consecutive failures. Failing fast for {self.cooldown_sec:.1f}s.")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            open_remaining = max(0.0, self.cooldown_sec - (time.monotonic() - self._opened_at)) if self._state == self.OPEN else 0.0
+            return {"state": self._state, "consecutive_failures": self._consecutive_failures, "times_opened": self._times_opened, "open_remaining_sec": round(open_remaining, 3)}
+
 
 class GeminiAnalyzer:
-    def __init__(self, api_key: str, default_model_name: str = "gemini-1.5-flash-latest"): # This default_model_name is for generic queries
+    def __init__(
+        self,
+        api_key: str,
+        default_model_name: str = "gemini-1.5-flash-latest", # This default_model_name is for generic queries
+        image_max_long_edge: Optional[int] = None,
+        image_max_pixels: Optional[int] = None,
+        image_format: str = DEFAULT_IMAGE_UPLOAD_FORMAT,
+        image_quality: int = DEFAULT_IMAGE_UPLOAD_QUALITY,
+        image_grayscale: bool = False,
+        request_timeout_sec: Optional[float] = DEFAULT_REQUEST_TIMEOUT_SECONDS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        retry_base_delay_sec: float = DEFAULT_RETRY_BASE_DELAY_SECONDS,
+        retry_max_delay_sec: float = DEFAULT_RETRY_MAX_DELAY_SECONDS,
+        retry_budget_sec: Optional[float] = DEFAULT_RETRY_BUDGET_SECONDS,
+        circuit_failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+        circuit_cooldown_sec: float = DEFAULT_CIRCUIT_COOLDOWN_SECONDS,
+        cassette: Optional[GeminiCassette] = None,  # Record/replay store; defaults to the process-wide cassette if one is configured
+    ):
         self.api_key = api_key
         # default_model_name passed to __init__ is for general vision queries by RulesEngine.
         # Specific tasks like NLU planning or visual refinement might use their own defaults defined above.
@@ -52,111 +224,264 @@ class GeminiAnalyzer:
         self.client_initialized = False
         self.safety_settings_data = DEFAULT_SAFETY_SETTINGS_DATA
         self.safety_settings: Optional[List[Any]] = None
-        self.generation_config = DEFAULT_GENERATION_CONFIG
+        self.generation_config: Optional[Any] = None  # SDK GenerationConfig, created with the client
+        self._sdk_configured = False
+        self._sdk_lock = threading.Lock()
+        self._configure_image_budget(image_max_long_edge, image_max_pixels, image_format, image_quality, image_grayscale)
+        # Non-positive or missing timeout means "no client-side deadline".
+        self.request_timeout_sec = float(request_timeout_sec) if isinstance(request_timeout_sec, (int, float)) and request_timeout_sec > 0 else None
+        self.max_retries = max(0, int(max_retries)) if isinstance(max_retries, (int, float)) else DEFAULT_MAX_RETRIES
+        self.retry_base_delay_sec = max(0.0, float(retry_base_delay_sec)) if isinstance(retry_base_delay_sec, (int, float)) else DEFAULT_RETRY_BASE_DELAY_SECONDS
+        self.retry_max_delay_sec = max(self.retry_base_delay_sec, float(retry_max_delay_sec)) if isinstance(retry_max_delay_sec, (int, float)) else DEFAULT_RETRY_MAX_DELAY_SECONDS
+        # Non-positive or missing budget means retries are bounded only by max_retries.
+        self.retry_budget_sec = float(retry_budget_sec) if isinstance(retry_budget_sec, (int, float)) and retry_budget_sec > 0 else None
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=circuit_failure_threshold if isinstance(circuit_failure_threshold, (int, float)) else DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+            cooldown_sec=circuit_cooldown_sec if isinstance(circuit_cooldown_sec, (int, float)) else DEFAULT_CIRCUIT_COOLDOWN_SECONDS,
+            name="gemini",
+        )
+        self._metrics: Dict[str, Any] = {"requests_total": 0, "retries_total": 0, "short_circuited_total": 0, "status_counts": {}, "last_latency_ms": None}
+        self._metrics_lock = threading.Lock()
+        self._latency_histogram = LatencyHistogram()
+        self.cassette = cassette if cassette is not None else get_default_cassette()
 
+        if self.cassette is not None and self.cassette.is_replay:
+            # Offline: responses come from the cassette, no API client is needed.
+            self.client_initialized = True
+            logger.info(f"GeminiAnalyzer initialized in cassette REPLAY mode from '{self.cassette.path}'. No API calls will be made.")
+            return
         if not self.api_key or not isinstance(self.api_key, str):
             logger.critical("GeminiAnalyzer CRITICAL ERROR: API key is missing or invalid.")
             return
-        try:
-            genai.configure(api_key=self.api_key)
-            self.safety_settings = []
-            if hasattr(genai, "SafetySetting"):
-                SafetySettingClass = genai.SafetySetting
-                for ss_data in self.safety_settings_data:
-                    self.safety_settings.append(
-                        SafetySettingClass(harm_category=ss_data["category"], threshold=ss_data["threshold"])
-                    )
-                logger.debug("Constructed SafetySetting objects.")
-            else:
-                logger.error("'SafetySetting' class not found. Safety settings may not be applied.")
-            self.client_initialized = True
-            logger.info(f"GeminiAnalyzer initialized. Default query model: '{self.default_model_name}'. Client configured.")
-            if self.safety_settings:
-                # Make safety settings logging more robust
-                log_ss = []
-                for s_obj in self.safety_settings:
-                    cat_name = getattr(getattr(s_obj, 'harm_category', None), 'name', str(getattr(s_obj, 'harm_category', 'UnknownCategory')))
-                    thr_name = getattr(getattr(s_obj, 'threshold', None), 'name', str(getattr(s_obj, 'threshold', 'UnknownThreshold')))
-                    log_ss.append((cat_name, thr_name))
-                logger.debug(f"Using safety settings: {log_ss}")
-            else: logger.warning("Default safety settings list is empty or None.")
-            logger.debug(f"Using default generation config: {self.generation_config}")
-        except Exception as e:
-            self.client_initialized = False
-            logger.critical(f"GeminiAnalyzer CRITICAL FAILURE: Could not configure API client: {e}.", exc_info=True)
+        # The SDK itself is imported and configured on the first API call (see _ensure_sdk_client).
+        self.client_initialized = True
+        logger.info(f"GeminiAnalyzer initialized. Default query model: '{self.default_model_name}'. Client will be configured on first use.")
+
+    def _ensure_sdk_client(self) -> bool:
+        """Imports and configures the Gemini SDK once. Returns False (and marks the client uninitialized) if that fails."""
+        if self._sdk_configured:
+            return True
+        with self._sdk_lock:
+            if self._sdk_configured:
+                return True
+            try:
+                genai.configure(api_key=self.api_key)
+                self.safety_settings = []
+                if hasattr(genai, "SafetySetting"):
+                    SafetySettingClass = genai.SafetySetting
+                    for ss_data in self.safety_settings_data:
+                        self.safety_settings.append(
+                            SafetySettingClass(harm_category=genai_types.HarmCategory[ss_data["category"]], threshold=genai_types.HarmBlockThreshold[ss_data["threshold"]])
+                        )
+                    logger.debug("Constructed SafetySetting objects.")
+                else:
+                    logger.error("'SafetySetting' class not found. Safety settings may not be applied.")
+                if self.generation_config is None:
+                    self.generation_config = genai_types.GenerationConfig()
+                self._sdk_configured = True
+                logger.info(f"GeminiAnalyzer: SDK client configured. Default query model: '{self.default_model_name}'.")
+                if self.safety_settings:
+                    # Make safety settings logging more robust
+                    log_ss = []
+                    for s_obj in self.safety_settings:
+                        cat_name = getattr(getattr(s_obj, 'harm_category', None), 'name', str(getattr(s_obj, 'harm_category', 'UnknownCategory')))
+                        thr_name = getattr(getattr(s_obj, 'threshold', None), 'name', str(getattr(s_obj, 'threshold', 'UnknownThreshold')))
+                        log_ss.append((cat_name, thr_name))
+                    logger.debug(f"Using safety settings: {log_ss}")
+                else: logger.warning("Default safety settings list is empty or None.")
+                logger.debug(f"Using default generation config: {self.generation_config}")
+            except Exception as e:
+                self.client_initialized = False
+                logger.critical(f"GeminiAnalyzer CRITICAL FAILURE: Could not configure API client: {e}.", exc_info=True)
+        return self._sdk_configured
+
+    def warm_up(self, model_call: bool = False) -> str:
+        """
+        Startup warm-up: imports and configures the SDK so the first real query does not. With
+        `model_call`, also sends one tiny text-only query, which pays for model setup and the TLS
+        handshake up front (it is a billable request). Raises RuntimeError if the client is unusable.
+        """
+        if not self.client_initialized:
+            raise RuntimeError("client not initialized (missing API key?)")
+        if self.cassette is not None:
+            return f"cassette {self.cassette.mode}; nothing to warm up"
+        if not self._ensure_sdk_client():
+            raise RuntimeError("Gemini API client could not be configured")
+        if not model_call:
+            return "SDK configured"
+        warmup_result = self.query_vision_model(prompt="Reply with the single word OK.")
+        if warmup_result["status"] != "success":
+            raise RuntimeError(f"warm-up query failed with status '{warmup_result['status']}': {warmup_result.get('error_message')}")
+        return f"SDK configured, model call {warmup_result['latency_ms']}ms"
+
+    def _configure_image_budget(
+        self, max_long_edge: Optional[int], max_pixels: Optional[int], image_format: str, quality: int, grayscale: bool
+    ) -> None:
+        # Non-positive or missing limits mean "no limit".
+        self.image_max_long_edge = int(max_long_edge) if isinstance(max_long_edge, (int, float)) and max_long_edge > 0 else None
+        self.image_max_pixels = int(max_pixels) if isinstance(max_pixels, (int, float)) and max_pixels > 0 else None
+        format_key = str(image_format or DEFAULT_IMAGE_UPLOAD_FORMAT).lower().replace("jpg", "jpeg")
+        if format_key not in IMAGE_UPLOAD_FORMATS:
+            logger.warning(f"GeminiAnalyzer: Unsupported image upload format '{image_format}'. Using '{DEFAULT_IMAGE_UPLOAD_FORMAT}'.")
+            format_key = DEFAULT_IMAGE_UPLOAD_FORMAT
+        self.image_format = format_key
+        self.image_quality = min(100, max(1, int(quality))) if isinstance(quality, (int, float)) else DEFAULT_IMAGE_UPLOAD_QUALITY
+        self.image_grayscale = bool(grayscale)
+        logger.debug(
+            f"GeminiAnalyzer: Image budget: MaxLongEdge={self.image_max_long_edge}, MaxPixels={self.image_max_pixels}, "
+            f"Format={self.image_format}, Quality={self.image_quality}, Grayscale={self.image_grayscale}."
+        )
+
+    def _compute_image_scale(self, width: int, height: int) -> float:
+        """Returns the downscale factor (<= 1.0) needed to fit a width x height image into the budget."""
+        scale = 1.0
+        if self.image_max_long_edge and max(width, height) > self.image_max_long_edge:
+            scale = min(scale, self.image_max_long_edge / float(max(width, height)))
+        if self.image_max_pixels and width * height > self.image_max_pixels:
+            scale = min(scale, math.sqrt(self.image_max_pixels / float(width * height)))
+        return scale
+
+    def _prepare_image_for_upload(self, image_data: np.ndarray, log_prefix: str) -> Tuple[Union[Image.Image, Dict[str, Any]], float]:
+        """
+        Applies the image budget to a BGR image. Returns the SDK-ready image (a PIL image,
+        or an inline {"mime_type", "data"} blob for lossy formats) and the applied scale factor.
+        """
+        orig_h, orig_w = image_data.shape[:2]
+        scale = self._compute_image_scale(orig_w, orig_h)
+        image_for_upload = image_data
+        if scale < 1.0:
+            new_w, new_h = max(1, int(round(orig_w * scale))), max(1, int(round(orig_h * scale)))
+            image_for_upload = cv2.resize(image_data, (new_w, new_h), interpolation=cv2.INTER_AREA)
+            scale = new_w / float(orig_w)  # Effective scale after rounding
+        if self.image_grayscale:
+            pil_image = Image.fromarray(cv2.cvtColor(image_for_upload, cv2.COLOR_BGR2GRAY))
+        else:
+            pil_image = Image.fromarray(cv2.cvtColor(image_for_upload, cv2.COLOR_BGR2RGB))
+
+        mime_type = IMAGE_UPLOAD_FORMATS[self.image_format]
+        if mime_type is None:
+            logger.debug(f"{log_prefix}: Prepared image ({orig_w}x{orig_h} -> {pil_image.width}x{pil_image.height}, Scale: {scale:.3f}) for API call.")
+            return pil_image, scale
+        encoded_buffer = io.BytesIO()
+        pil_image.save(encoded_buffer, format=self.image_format.upper(), quality=self.image_quality)
+        encoded_bytes = encoded_buffer.getvalue()
+        logger.debug(
+            f"{log_prefix}: Prepared image ({orig_w}x{orig_h} -> {pil_image.width}x{pil_image.height}, Scale: {scale:.3f}) "
+            f"as {mime_type} ({len(encoded_bytes)} bytes, Q={self.image_quality}) for API call."
+        )
+        return {"mime_type": mime_type, "data": encoded_bytes}, scale
 
     def _validate_and_prepare_api_input(
         self, prompt: str, image_data: Optional[np.ndarray], log_prefix: str
-    ) -> Tuple[Optional[List[Union[str, Image.Image]]], Optional[Dict[str, Any]]]:
+    ) -> Tuple[Optional[List[Union[str, Image.Image, Dict[str, Any]]]], Optional[Dict[str, Any]], float]:
         if not prompt or not isinstance(prompt, str) or not prompt.strip():
             error_msg = "Input error: Prompt cannot be empty or just whitespace."
             logger.error(f"{log_prefix}: {error_msg}")
-            return None, {"status": "error_input", "error_message": error_msg}
+            return None, {"status": "error_input", "error_message": error_msg}, 1.0
 
-        pil_image_for_sdk: Optional[Image.Image] = None
+        image_for_sdk: Optional[Union[Image.Image, Dict[str, Any]]] = None
+        image_scale = 1.0
         if image_data is not None:
             if not isinstance(image_data, np.ndarray) or image_data.size == 0:
                 error_msg = "Input error: Provided image_data is invalid (empty or not NumPy array)."
                 logger.error(f"{log_prefix}: {error_msg}")
-                return None, {"status": "error_input", "error_message": error_msg}
+                return None, {"status": "error_input", "error_message": error_msg}, 1.0
             if image_data.ndim != 3 or image_data.shape[2] != 3:
                 error_msg = f"Input error: Provided image_data is not a 3-channel (BGR) image. Shape: {image_data.shape}"
                 logger.error(f"{log_prefix}: {error_msg}")
-                return None, {"status": "error_input", "error_message": error_msg}
+                return None, {"status": "error_input", "error_message": error_msg}, 1.0
             try:
-                img_rgb = cv2.cvtColor(image_data, cv2.COLOR_BGR2RGB)
-                pil_image_for_sdk = Image.fromarray(img_rgb)
-                logger.debug(f"{log_prefix}: Prepared image (Size: {pil_image_for_sdk.width}x{pil_image_for_sdk.height}) for API call.")
+                image_for_sdk, image_scale = self._prepare_image_for_upload(image_data, log_prefix)
             except Exception as e_img_prep:
                 error_msg = f"Error preparing image for Gemini: {e_img_prep}"
                 logger.error(f"{log_prefix}: {error_msg}", exc_info=True)
-                return None, {"status": "error_input", "error_message": error_msg}
+                return None, {"status": "error_input", "error_message": error_msg}, 1.0
+
+        api_contents: List[Union[str, Image.Image, Dict[str, Any]]] = [prompt]
+        if image_for_sdk is not None:
+            api_contents.append(image_for_sdk)
+        return api_contents, None, image_scale
 
-        api_contents: List[Union[str, Image.Image]] = [prompt]
-        if pil_image_for_sdk:
-            api_contents.append(pil_image_for_sdk)
-        return api_contents, None
+    def _compute_backoff_delay(self, retry_index: int) -> float:
+        """Full-jitter exponential backoff: uniform(0, min(max_delay, base * 2**retry_index))."""
+        return random.uniform(0.0, min(self.retry_max_delay_sec, self.retry_base_delay_sec * (2 ** retry_index)))
 
     def _execute_sdk_call(
-        self, model_instance: genai.GenerativeModel, api_contents: List[Union[str, Image.Image]], log_prefix: str
-    ) -> Tuple[Optional[Content], Optional[Dict[str, Any]]]: # Using Content as Any
-        try:
-            api_sdk_response: Content = model_instance.generate_content(api_contents, stream=False) # type: ignore
-            return api_sdk_response, None
-        except BlockedPromptException as e_bp:
-            error_msg = f"Gemini SDK: Prompt blocked. {e_bp}"
+        self, model_instance: Any, api_contents: List[Union[str, Image.Image, Dict[str, Any]]], log_prefix: str
+    ) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+        request_options = {"timeout": self.request_timeout_sec} if self.request_timeout_sec else None
+        budget_deadline = time.monotonic() + self.retry_budget_sec if self.retry_budget_sec else None
+        retry_index = 0
+        while True:
+            try:
+                api_sdk_response = model_instance.generate_content(api_contents, stream=False, request_options=request_options) # type: ignore
+                self.circuit_breaker.record_success()
+                return api_sdk_response, None
+            except retryable_api_exceptions() as e_transient:
+                delay_sec = self._compute_backoff_delay(retry_index) if retry_index < self.max_retries else 0.0
+                remaining_sec = budget_deadline - time.monotonic() - delay_sec if budget_deadline is not None else None
+                if retry_index < self.max_retries and (remaining_sec is None or remaining_sec > 0):
+                    if remaining_sec is not None:
+                        # The retry gets whatever is left of the budget, so one query never blocks the monitoring loop for long.
+                        request_options = {"timeout": min(self.request_timeout_sec, remaining_sec) if self.request_timeout_sec else remaining_sec}
+                    retry_index += 1
+                    self._increment_metric("retries_total")
+                    logger.warning(f"{log_prefix}: Transient API error ({type(e_transient).__name__}): {e_transient}. Retry {retry_index}/{self.max_retries} in {delay_sec:.2f}s.")
+                    time.sleep(delay_sec)
+                    continue
+                self.circuit_breaker.record_failure()
+                return None, self._sdk_exception_to_error_result(e_transient, log_prefix)
+            except Exception as e_sdk:
+                if isinstance(e_sdk, (genai_types.BlockedPromptException, genai_types.StopCandidateException, google_api_exceptions.InvalidArgument, google_api_exceptions.PermissionDenied)):
+                    self.circuit_breaker.record_success()  # The service answered; the request itself was the problem
+                else:
+                    self.circuit_breaker.record_failure()
+                return None, self._sdk_exception_to_error_result(e_sdk, log_prefix)
+
+    def _sdk_exception_to_error_result(self, exc: Exception, log_prefix: str) -> Dict[str, Any]:
+        if isinstance(exc, genai_types.BlockedPromptException):
+            error_msg = f"Gemini SDK: Prompt blocked. {exc}"
             logger.warning(f"{log_prefix}: {error_msg}")
-            return None, {"status": "blocked_prompt", "error_message": error_msg, "raw_gemini_response": str(e_bp)}
-        except StopCandidateException as e_sc:
-            error_msg = f"Gemini SDK: Candidate generation stopped (likely due to safety settings). {e_sc}"
+            return {"status": "blocked_prompt", "error_message": error_msg, "raw_gemini_response": str(exc)}
+        if isinstance(exc, genai_types.StopCandidateException):
+            error_msg = f"Gemini SDK: Candidate generation stopped (likely due to safety settings). {exc}"
             logger.warning(f"{log_prefix}: {error_msg}")
-            return None, {"status": "blocked_response", "error_message": error_msg, "raw_gemini_response": str(e_sc)}
-        except google_api_exceptions.PermissionDenied as e_perm:
-            error_msg = f"Gemini API Permission Denied: {e_perm}. Check API key and project IAM permissions."
-            logger.error(f"{log_prefix}: {error_msg}", exc_info=True)
-            return None, {"status": "error_api", "error_message": error_msg, "raw_gemini_response": str(e_perm)}
-        except google_api_exceptions.ResourceExhausted as e_quota:
-            error_msg = f"Gemini API Resource Exhausted (Quota likely): {e_quota}."
-            logger.error(f"{log_prefix}: {error_msg}", exc_info=True)
-            return None, {"status": "error_api", "error_message": error_msg, "raw_gemini_response": str(e_quota)}
-        except google_api_exceptions.DeadlineExceeded as e_timeout:
-            error_msg = f"Gemini API Deadline Exceeded (Timeout): {e_timeout}."
-            logger.error(f"{log_prefix}: {error_msg}", exc_info=True)
-            return None, {"status": "error_api", "error_message": error_msg, "raw_gemini_response": str(e_timeout)}
-        except google_api_exceptions.ServiceUnavailable as e_service:
-            error_msg = f"Gemini API Service Unavailable: {e_service}. Try again later."
-            logger.error(f"{log_prefix}: {error_msg}", exc_info=True)
-            return None, {"status": "error_api", "error_message": error_msg, "raw_gemini_response": str(e_service)}
-        except google_api_exceptions.InvalidArgument as e_invalid_arg:
-            error_msg = f"Gemini API Invalid Argument: {e_invalid_arg}. Check model name, prompt/image format, or other parameters."
-            logger.error(f"{log_prefix}: {error_msg}", exc_info=True)
-            return None, {"status": "error_api", "error_message": error_msg, "raw_gemini_response": str(e_invalid_arg)}
-        except Exception as e_general_api:
-            error_msg = f"Gemini API call failed ({type(e_general_api).__name__}): {e_general_api}"
-            logger.error(f"{log_prefix}: API call failed. Error: {error_msg}", exc_info=True)
-            return None, {"status": "error_api", "error_message": error_msg, "raw_gemini_response": str(e_general_api)}
-
-    def _process_sdk_response(self, api_sdk_response: Optional[Content], log_prefix: str) -> Dict[str, Any]: # Using Content as Any
+            return {"status": "blocked_response", "error_message": error_msg, "raw_gemini_response": str(exc)}
+        if isinstance(exc, google_api_exceptions.PermissionDenied):
+            error_msg = f"Gemini API Permission Denied: {exc}. Check API key and project IAM permissions."
+        elif isinstance(exc, google_api_exceptions.ResourceExhausted):
+            error_msg = f"Gemini API Resource Exhausted (Quota likely): {exc}."
+        elif isinstance(exc, (google_api_exceptions.DeadlineExceeded, TimeoutError)):
+            error_msg = f"Gemini API Deadline Exceeded (Timeout): {exc}."
+        elif isinstance(exc, google_api_exceptions.ServiceUnavailable):
+            error_msg = f"Gemini API Service Unavailable: {exc}. Try again later."
+        elif isinstance(exc, google_api_exceptions.InvalidArgument):
+            error_msg = f"Gemini API Invalid Argument: {exc}. Check model name, prompt/image format, or other parameters."
+        else:
+            error_msg = f"Gemini API call failed ({type(exc).__name__}): {exc}"
+        logger.error(f"{log_prefix}: {error_msg}", exc_info=True)
+        return {"status": "error_api", "error_message": error_msg, "raw_gemini_response": str(exc)}
+
+    def _increment_metric(self, metric_name: str, amount: int = 1) -> None:
+        with self._metrics_lock:
+            self._metrics[metric_name] = self._metrics.get(metric_name, 0) + amount
+
+    def _record_query_outcome(self, status: str, latency_ms: int) -> None:
+        with self._metrics_lock:
+            self._metrics["requests_total"] += 1
+            self._metrics["status_counts"][status] = self._metrics["status_counts"].get(status, 0) + 1
+            self._metrics["last_latency_ms"] = latency_ms
+        self._latency_histogram.observe(latency_ms)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Returns a snapshot of call counters and circuit breaker state."""
+        with self._metrics_lock:
+            metrics_snapshot = {**self._metrics, "status_counts": dict(self._metrics["status_counts"])}
+        metrics_snapshot["circuit"] = self.circuit_breaker.snapshot()
+        metrics_snapshot["latency_histogram"] = self._latency_histogram.snapshot()
+        return metrics_snapshot
+
+    def _process_sdk_response(self, api_sdk_response: Optional[Any], log_prefix: str) -> Dict[str, Any]:
         processed_result: Dict[str, Any] = {
             "status": "error_api", "text_content": None, "json_content": None,
             "error_message": "Failed to process SDK response or response was None.",
@@ -189,31 +514,42 @@ class GeminiAnalyzer:
         else: processed_result["text_content"] = ""; logger.info(f"{log_prefix}: Successful response (STOP) but no text parts.") if is_normal_stop else None
 
         if processed_result["text_content"]:
-            text_for_json = processed_result["text_content"]
-            if text_for_json.startswith("```json"): text_for_json = text_for_json[7:]
-            elif text_for_json.startswith("```"): text_for_json = text_for_json[3:]
-            if text_for_json.endswith("```"): text_for_json = text_for_json[:-3]
-            text_for_json = text_for_json.strip()
-            try: processed_result["json_content"] = json.loads(text_for_json); logger.debug(f"{log_prefix}: Response parsed as JSON.")
-            except json.JSONDecodeError: logger.debug(f"{log_prefix}: Response not valid JSON. Snippet: '{processed_result['text_content'][:150].replace(os.linesep, ' ')}...'"); processed_result["json_content"] = None
+            processed_result["json_content"] = parse_json_from_response_text(processed_result["text_content"])
+            if processed_result["json_content"] is not None: logger.debug(f"{log_prefix}: Response parsed as JSON.")
+            else: logger.debug(f"{log_prefix}: Response not valid JSON. Snippet: '{processed_result['text_content'][:150].replace(os.linesep, ' ')}...'")
         else: processed_result["json_content"] = None
         if processed_result["status"] == "success": logger.info(f"{log_prefix}: Query processing successful. Text snippet: '{str(processed_result['text_content'])[:100].replace(os.linesep, ' ')}...'. JSON: {processed_result['json_content'] is not None}.")
         return processed_result
 
+    @traced("gemini_query", "gemini", span_args=lambda self, prompt, *args, **kwargs: {"model": kwargs.get("model_name_override") or self.default_model_name})
     def query_vision_model(
         self, prompt: str, image_data: Optional[np.ndarray] = None, model_name_override: Optional[str] = None,
-        custom_generation_config: Optional[GenerationConfig] = None, custom_safety_settings: Optional[List[Any]] = None,
+        custom_generation_config: Optional[Any] = None, custom_safety_settings: Optional[List[Any]] = None,
     ) -> Dict[str, Any]:
         start_time = time.perf_counter(); model_to_use = model_name_override if model_name_override else self.default_model_name
         log_prefix = f"GeminiQuery (Model: '{model_to_use}')"
-        result: Dict[str, Any] = {"status": "error_client", "text_content": None, "json_content": None, "error_message": "Client not initialized.", "model_used": model_to_use, "latency_ms": 0, "raw_gemini_response": None}
+        # image_scale: uploaded/original size ratio; use scale_box_to_original() to map returned coordinates back.
+        result: Dict[str, Any] = {"status": "error_client", "text_content": None, "json_content": None, "error_message": "Client not initialized.", "model_used": model_to_use, "latency_ms": 0, "raw_gemini_response": None, "image_scale": 1.0}
         if not self.client_initialized: logger.error(f"{log_prefix}: {result['error_message']}"); result["latency_ms"] = int((time.perf_counter() - start_time) * 1000); return result
 
-        api_contents, input_error_result = self._validate_and_prepare_api_input(prompt, image_data, log_prefix)
+        api_contents, input_error_result, result["image_scale"] = self._validate_and_prepare_api_input(prompt, image_data, log_prefix)
         if input_error_result: result.update(input_error_result); result["latency_ms"] = int((time.perf_counter() - start_time) * 1000); return result
+        cassette_fingerprints = request_fingerprints(model_to_use, prompt, image_data, custom_generation_config) if self.cassette is not None else None
+        if self.cassette is not None and self.cassette.is_replay:
+            return self._replay_from_cassette(result, cassette_fingerprints, start_time, log_prefix)  # type: ignore[arg-type]
+        if not self.circuit_breaker.allow_request():
+            self._increment_metric("short_circuited_total")
+            result.update({"status": "error_circuit_open", "error_message": "Gemini circuit breaker is open after repeated failures; failing fast until cooldown ends."})
+            logger.warning(f"{log_prefix}: {result['error_message']}")
+            result["latency_ms"] = int((time.perf_counter() - start_time) * 1000); self._record_query_outcome(result["status"], result["latency_ms"]); return result
 
         prompt_summary = (prompt[:150].replace(os.linesep, " ") + "...") if len(prompt) > 153 else prompt.replace(os.linesep, " ")
         logger.info(f"{log_prefix}: Sending query. Prompt: '{prompt_summary}'. Image: {image_data is not None}.")
+        if not self._ensure_sdk_client():
+            # allow_request() may have handed out the half-open trial; settle it so the breaker can recover later.
+            self.circuit_breaker.record_failure()
+            result["error_message"] = "Gemini API client could not be configured."
+            result["latency_ms"] = int((time.perf_counter() - start_time) * 1000); self._record_query_outcome(result["status"], result["latency_ms"]); return result
         effective_gen_config = custom_generation_config if custom_generation_config else self.generation_config
         effective_safety_settings = custom_safety_settings if custom_safety_settings is not None else self.safety_settings
         if effective_safety_settings is None: logger.warning(f"{log_prefix}: No safety settings; API defaults apply."); effective_safety_settings = []
@@ -222,5 +558,66 @@ class GeminiAnalyzer:
         if sdk_error_result: result.update(sdk_error_result)
         else: result.update(self._process_sdk_response(sdk_response, log_prefix))
         result["latency_ms"] = int((time.perf_counter() - start_time) * 1000)
+        self._record_query_outcome(result["status"], result["latency_ms"])
+        if self.cassette is not None and self.cassette.is_record:
+            self.cassette.record(cassette_fingerprints, model_to_use, result, result["latency_ms"])  # type: ignore[arg-type]
         logger.info(f"{log_prefix}: Query finished. Status: '{result['status']}'. Latency: {result['latency_ms']}ms.")
-        return result
\ No newline at end of file
+        return result
+
+    def _replay_from_cassette(self, result: Dict[str, Any], fingerprints: Tuple[str, str], start_time: float, log_prefix: str) -> Dict[str, Any]:
+        replayed_response = self.cassette.replay(fingerprints)  # type: ignore[union-attr]
+        if replayed_response is None:
+            result.update({"status": "error_cassette_miss", "error_message": f"No recorded response in cassette '{self.cassette.path}' for this request."})  # type: ignore[union-attr]
+            logger.warning(f"{log_prefix}: {result['error_message']}")
+        else:
+            result.update(replayed_response)
+        result["latency_ms"] = int((time.perf_counter() - start_time) * 1000)
+        self._record_query_outcome(result["status"], result["latency_ms"])
+        logger.info(f"{log_prefix}: Query replayed from cassette. Status: '{result['status']}'. Latency: {result['latency_ms']}ms.")
+        return result
+
+    @traced("gemini_query_batch", "gemini", span_args=lambda self, prompts, *args, **kwargs: {"prompts": len(prompts), "model": kwargs.get("model_name_override") or self.default_model_name})
+    def query_vision_model_batch(
+        self, prompts: List[str], image_data: Optional[np.ndarray] = None, model_name_override: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Asks several independent questions about one image in a single request.
+
+        The model is constrained to a JSON schema with one answer per question. Each
+        answer is returned as its own response dict (same keys as `query_vision_model`)
+        in `responses`, aligned with `prompts`. An entry is None if the model did not
+        answer that question. The overall status is that of the underlying request.
+        """
+        log_prefix = f"GeminiBatchQuery (Model: '{model_name_override or self.default_model_name}', Questions: {len(prompts)})"
+        questions = [{"id": f"q{i + 1}", "question": prompt_text} for i, prompt_text in enumerate(prompts)]
+        batch_prompt = (
+            f"You will answer {len(questions)} independent questions about the provided image. "
+            f"Answer each question exactly as you would if it had been asked on its own about this image; do not let questions influence each other. "
+            f"If a question asks for a JSON response, put that JSON, serialized as a string, in its 'answer' field.\n"
+            f'Respond ONLY with JSON of the form {{"answers": [{{"id": "<question id>", "answer": "<answer>"}}]}}, with exactly one entry per question id.\n\n'
+            f"Questions:\n{json.dumps(questions, indent=2)}"
+        )
+        # A plain mapping (accepted by the SDK wherever a GenerationConfig is) so replays and open-circuit fast paths never import the SDK.
+        batch_generation_config = {"response_mime_type": "application/json", "response_schema": BATCH_ANSWERS_RESPONSE_SCHEMA}
+        batch_result = self.query_vision_model(prompt=batch_prompt, image_data=image_data, model_name_override=model_name_override, custom_generation_config=batch_generation_config)
+
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+        answers_json = batch_result.get("json_content")
+        if batch_result["status"] == "success" and isinstance(answers_json, dict) and isinstance(answers_json.get("answers"), list):
+            question_index_by_id = {q["id"]: i for i, q in enumerate(questions)}
+            for answer_item in answers_json["answers"]:
+                if not isinstance(answer_item, dict) or answer_item.get("id") not in question_index_by_id:
+                    logger.warning(f"{log_prefix}: Ignoring malformed or unknown answer entry: {str(answer_item)[:100]}")
+                    continue
+                answer_text = str(answer_item.get("answer", "")).strip()
+                responses[question_index_by_id[answer_item["id"]]] = {
+                    "status": "success", "text_content": answer_text, "json_content": parse_json_from_response_text(answer_text), "error_message": None,
+                    "model_used": batch_result["model_used"], "latency_ms": batch_result["latency_ms"], "raw_gemini_response": None, "image_scale": batch_result["image_scale"],
+                }
+            missing_count = sum(1 for r in responses if r is None)
+            if missing_count:
+                logger.warning(f"{log_prefix}: {missing_count} of {len(prompts)} questions were not answered.")
+        elif batch_result["status"] == "success":
+            batch_result = {**batch_result, "status": "error_response_format", "error_message": "Batch response did not contain an 'answers' list."}
+            logger.warning(f"{log_prefix}: {batch_result['error_message']}")
+        return {**batch_result, "responses": responses}
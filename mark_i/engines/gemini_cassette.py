@@ -0,0 +1,237 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.gemini_cassette")
+
+CASSETTE_MODE_RECORD = "record"
+CASSETTE_MODE_REPLAY = "replay"
+CASSETTE_MODES: List[str] = [CASSETTE_MODE_RECORD, CASSETTE_MODE_REPLAY]
+
+LATENCY_MODE_NONE = "none"  # Serve replayed responses immediately
+LATENCY_MODE_RECORDED = "recorded"  # Sleep for each response's own recorded latency
+LATENCY_MODE_DISTRIBUTION = "distribution"  # Sleep for a latency sampled from the recorded distribution
+LATENCY_MODES: List[str] = [LATENCY_MODE_NONE, LATENCY_MODE_RECORDED, LATENCY_MODE_DISTRIBUTION]
+
+# Environment variables used when no cassette is configured explicitly (e.g. via CLI flags)
+ENV_CASSETTE_PATH = "MARK_I_GEMINI_CASSETTE"
+ENV_CASSETTE_MODE = "MARK_I_GEMINI_CASSETTE_MODE"
+ENV_CASSETTE_LATENCY = "MARK_I_GEMINI_CASSETTE_LATENCY"
+
+# Response keys that are per-call bookkeeping rather than part of the recorded answer
+_NON_RECORDED_RESPONSE_KEYS = ("latency_ms",)
+
+
+def image_digest(image_data: Optional[np.ndarray]) -> Optional[str]:
+    """Stable content hash of an image array (shape, dtype and pixels)."""
+    if image_data is None:
+        return None
+    hasher = hashlib.sha256()
+    hasher.update(f"{image_data.shape}|{image_data.dtype}".encode("utf-8"))
+    hasher.update(np.ascontiguousarray(image_data).tobytes())
+    return hasher.hexdigest()
+
+
+def request_fingerprints(model_name: str, prompt: str, image_data: Optional[np.ndarray], generation_config: Optional[Any] = None) -> Tuple[str, str]:
+    """
+    Returns (exact, loose) fingerprints for a Gemini request.
+
+    The exact fingerprint covers model, prompt, generation config and image content.
+    The loose one ignores the image, so replays can still be served when live frames
+    differ slightly from the recorded ones.
+    """
+    loose_payload = {"model": model_name, "prompt": prompt, "generation_config": str(generation_config) if generation_config is not None else None}
+    loose_fp = hashlib.sha256(json.dumps(loose_payload, sort_keys=True).encode("utf-8")).hexdigest()
+    exact_fp = hashlib.sha256(f"{loose_fp}|{image_digest(image_data)}".encode("utf-8")).hexdigest()
+    return exact_fp, loose_fp
+
+
+def _invalid_entry_reason(entry: Any) -> Optional[str]:
+    """Why a decoded cassette line cannot be replayed, or None if it is a usable entry."""
+    if not isinstance(entry, dict):
+        return f"expected a JSON object, got {type(entry).__name__}"
+    for fingerprint_key in ("exact_fingerprint", "loose_fingerprint"):
+        if not isinstance(entry.get(fingerprint_key), str):
+            return f"missing or invalid '{fingerprint_key}'"
+    if not isinstance(entry.get("response"), dict):
+        return "missing or invalid 'response'"
+    latency_ms = entry.get("latency_ms")
+    if latency_ms is not None and (isinstance(latency_ms, bool) or not isinstance(latency_ms, (int, float))):
+        return "invalid 'latency_ms'"
+    return None
+
+
+class GeminiCassette:
+    """
+    Record/replay store for processed Gemini responses, persisted as JSON Lines.
+
+    In record mode every completed query is appended as
+    {exact_fingerprint, loose_fingerprint, model, response, latency_ms, recorded_at}.
+    In replay mode responses are served offline by fingerprint. Repeated requests
+    cycle through the recordings made for them in order. An exact match is preferred,
+    then (unless `strict`) a match on model/prompt/config ignoring the image.
+    Latency can optionally be injected to reproduce the recorded timing.
+    """
+
+    _registry: Dict[Tuple[str, str], "GeminiCassette"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str, mode: str = CASSETTE_MODE_REPLAY, latency_mode: str = LATENCY_MODE_NONE, strict: bool = False, seed: Optional[int] = 0):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Invalid cassette mode '{mode}'. Expected one of {CASSETTE_MODES}.")
+        if latency_mode not in LATENCY_MODES:
+            raise ValueError(f"Invalid cassette latency mode '{latency_mode}'. Expected one of {LATENCY_MODES}.")
+        self.path = os.path.abspath(path)
+        self.mode = mode
+        self.latency_mode = latency_mode
+        self.strict = strict
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._entries_by_exact_fp: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._entries_by_loose_fp: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._replay_cursors: Dict[str, int] = defaultdict(int)
+        self._recorded_latencies_ms: List[float] = []
+        self.stats: Dict[str, int] = {"recorded": 0, "replayed_exact": 0, "replayed_loose": 0, "misses": 0}
+
+        if self.mode == CASSETTE_MODE_REPLAY:
+            self._load()
+        else:
+            cassette_dir = os.path.dirname(self.path)
+            if cassette_dir:
+                os.makedirs(cassette_dir, exist_ok=True)
+        logger.info(f"GeminiCassette: '{self.path}' opened in {self.mode} mode (Latency: {self.latency_mode}, Strict: {self.strict}).")
+
+    @classmethod
+    def open(cls, path: str, mode: str = CASSETTE_MODE_REPLAY, latency_mode: str = LATENCY_MODE_NONE, strict: bool = False) -> "GeminiCassette":
+        """Returns the shared cassette for (path, mode), so all analyzers in a process record to / replay from one store."""
+        registry_key = (os.path.abspath(path), mode)
+        with cls._registry_lock:
+            cassette = cls._registry.get(registry_key)
+            if cassette is None:
+                cassette = cls(path, mode=mode, latency_mode=latency_mode, strict=strict)
+                cls._registry[registry_key] = cassette
+            return cassette
+
+    @property
+    def is_replay(self) -> bool:
+        return self.mode == CASSETTE_MODE_REPLAY
+
+    @property
+    def is_record(self) -> bool:
+        return self.mode == CASSETTE_MODE_RECORD
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            logger.warning(f"GeminiCassette: Replay file '{self.path}' not found. Every request will miss.")
+            return
+        loaded_count = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError as e_json:
+                    logger.warning(f"GeminiCassette: Skipping invalid line {line_no} in '{self.path}': {e_json}")
+                    continue
+                invalid_reason = _invalid_entry_reason(entry)
+                if invalid_reason:
+                    logger.warning(f"GeminiCassette: Skipping invalid line {line_no} in '{self.path}': {invalid_reason}.")
+                    continue
+                self._entries_by_exact_fp[entry["exact_fingerprint"]].append(entry)
+                self._entries_by_loose_fp[entry["loose_fingerprint"]].append(entry)
+                if isinstance(entry.get("latency_ms"), (int, float)):
+                    self._recorded_latencies_ms.append(float(entry["latency_ms"]))
+                loaded_count += 1
+        logger.info(f"GeminiCassette: Loaded {loaded_count} recorded responses from '{self.path}'.")
+
+    def record(self, fingerprints: Tuple[str, str], model_name: str, response: Dict[str, Any], latency_ms: float) -> None:
+        exact_fp, loose_fp = fingerprints
+        entry = {
+            "exact_fingerprint": exact_fp,
+            "loose_fingerprint": loose_fp,
+            "model": model_name,
+            "response": {k: v for k, v in response.items() if k not in _NON_RECORDED_RESPONSE_KEYS},
+            "latency_ms": latency_ms,
+            "recorded_at": time.time(),
+        }
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.stats["recorded"] += 1
+
+    def replay(self, fingerprints: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the recorded response for the request (with injected latency
+        applied), or None on a miss.
+        """
+        exact_fp, loose_fp = fingerprints
+        with self._lock:
+            entry = self._next_entry(exact_fp, self._entries_by_exact_fp)
+            if entry is not None:
+                self.stats["replayed_exact"] += 1
+            elif not self.strict:
+                entry = self._next_entry(f"loose:{loose_fp}", self._entries_by_loose_fp, loose_fp)
+                if entry is not None:
+                    self.stats["replayed_loose"] += 1
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            delay_ms = self._injected_latency_ms(entry)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+        return json.loads(json.dumps(entry["response"]))  # Deep copy; callers may mutate the result
+
+    def _next_entry(self, cursor_key: str, index: Dict[str, List[Dict[str, Any]]], index_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        candidates = index.get(index_key or cursor_key)
+        if not candidates:
+            return None
+        cursor = self._replay_cursors[cursor_key]
+        self._replay_cursors[cursor_key] = cursor + 1
+        return candidates[cursor % len(candidates)]
+
+    def _injected_latency_ms(self, entry: Dict[str, Any]) -> float:
+        if self.latency_mode == LATENCY_MODE_RECORDED:
+            return float(entry.get("latency_ms") or 0.0)
+        if self.latency_mode == LATENCY_MODE_DISTRIBUTION and self._recorded_latencies_ms:
+            return self._rng.choice(self._recorded_latencies_ms)
+        return 0.0
+
+
+_default_cassette: Optional[GeminiCassette] = None
+_default_cassette_configured = False
+
+
+def configure_default_cassette(path: Optional[str], mode: str = CASSETTE_MODE_REPLAY, latency_mode: str = LATENCY_MODE_NONE, strict: bool = False) -> Optional[GeminiCassette]:
+    """Sets the cassette picked up by every GeminiAnalyzer created without an explicit one. Pass None to disable."""
+    global _default_cassette, _default_cassette_configured
+    _default_cassette = GeminiCassette.open(path, mode=mode, latency_mode=latency_mode, strict=strict) if path else None
+    _default_cassette_configured = True
+    return _default_cassette
+
+
+def get_default_cassette() -> Optional[GeminiCassette]:
+    """Returns the configured default cassette, falling back to the MARK_I_GEMINI_CASSETTE* environment variables."""
+    if _default_cassette_configured:
+        return _default_cassette
+    env_path = os.getenv(ENV_CASSETTE_PATH)
+    if not env_path:
+        return None
+    return configure_default_cassette(env_path, mode=os.getenv(ENV_CASSETTE_MODE, CASSETTE_MODE_REPLAY), latency_mode=os.getenv(ENV_CASSETTE_LATENCY, LATENCY_MODE_NONE))
+
+
+def gemini_replay_active() -> bool:
+    """True if Gemini responses are being replayed from a cassette, i.e. no API key or network is needed."""
+    cassette = get_default_cassette()
+    return cassette is not None and cassette.is_replay
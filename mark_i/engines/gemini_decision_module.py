@@ -7,8 +7,13 @@ import os
 import numpy as np
 
 # Constants are now imported from gemini_analyzer
-from mark_i.engines.gemini_analyzer import GeminiAnalyzer, DEFAULT_NLU_PLANNING_MODEL, DEFAULT_VISUAL_REFINE_MODEL
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer, DEFAULT_NLU_PLANNING_MODEL, DEFAULT_VISUAL_REFINE_MODEL, scale_box_to_original
 from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.nlu_plan_cache import NluPlanCache, default_nlu_plan_cache_path, prompt_template_version
+from mark_i.engines.element_locator_cache import ElementLocatorCache, DEFAULT_MATCH_THRESHOLD
+from mark_i.engines.analysis_engine import AnalysisEngine
+from mark_i.engines.capture_engine import CaptureEngine, FrameBufferRing
+from mark_i.engines.visual_settle import wait_for_visual_settle, DEFAULT_SETTLE_TIMEOUT_SEC
 from mark_i.core.config_manager import ConfigManager
 
 from mark_i.engines.primitive_executors import (
@@ -24,6 +29,9 @@ from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
 
 logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.gemini_decision_module")
 
+# Sub-actions that change the screen; only these trigger a re-capture of the context before the next step
+SCREEN_CHANGING_SUB_ACTIONS = {"CLICK_DESCRIBED_ELEMENT", "TYPE_IN_DESCRIBED_FIELD", "PRESS_KEY_SIMPLE"}
+
 PREDEFINED_ALLOWED_SUB_ACTIONS: Dict[str, Dict[str, Any]] = {
     "CLICK_DESCRIBED_ELEMENT": {"description": "Clicks an element described textually.", "executor_class": ClickDescribedElementExecutor},
     "TYPE_IN_DESCRIBED_FIELD": {"description": "Types text into an element described textually.", "executor_class": TypeInDescribedFieldExecutor},
@@ -32,12 +40,21 @@ PREDEFINED_ALLOWED_SUB_ACTIONS: Dict[str, Dict[str, Any]] = {
 }
 
 
+def _regions_overlap(region_a: Dict[str, Any], region_b: Dict[str, Any]) -> bool:
+    try:
+        return region_a["x"] < region_b["x"] + region_b["width"] and region_b["x"] < region_a["x"] + region_a["width"] and region_a["y"] < region_b["y"] + region_b["height"] and region_b["y"] < region_a["y"] + region_a["height"]
+    except (KeyError, TypeError):
+        return True  # Unknown geometry: assume it may have been affected
+
+
 class GeminiDecisionModule:
     def __init__(
         self,
         gemini_analyzer: GeminiAnalyzer,
         action_executor: ActionExecutor,
         config_manager: ConfigManager,
+        analysis_engine: Optional[AnalysisEngine] = None,  # Enables the learned element locator cache
+        capture_engine: Optional[CaptureEngine] = None,  # Enables visual-settle waits between steps instead of fixed sleeps
     ):
         if not isinstance(gemini_analyzer, GeminiAnalyzer) or not gemini_analyzer.client_initialized:
             logger.critical("GDM CRITICAL: Invalid GeminiAnalyzer.")
@@ -53,9 +70,13 @@ class GeminiDecisionModule:
             logger.critical("GDM CRITICAL: Invalid ConfigManager.")
             raise ValueError("ConfigManager instance is required.")
         self.config_manager = config_manager
+        self.capture_engine = capture_engine
+        self._frame_buffer_rings: Dict[str, FrameBufferRing] = {}  # Pooled capture buffers per context region
 
         self._primitive_executors: Dict[str, PrimitiveSubActionExecutorBase] = self._initialize_primitive_executors()
         self._executed_steps_log_during_task: List[str] = []
+        self.nlu_plan_cache: Optional[NluPlanCache] = self._initialize_nlu_plan_cache()
+        self.element_locator_cache: Optional[ElementLocatorCache] = self._initialize_element_locator_cache(analysis_engine)
 
         logger.info("GeminiDecisionModule (NLU Task Orchestrator & Goal Executor) initialized.")
 
@@ -65,6 +86,7 @@ class GeminiDecisionModule:
             "action_executor_instance": self.action_executor,
             "gemini_analyzer_instance": self.gemini_analyzer,
             "target_refiner_func": self._refine_target_description_to_bbox,
+            "visual_settle_func": self._wait_for_region_to_settle,
         }
         for action_type, meta in PREDEFINED_ALLOWED_SUB_ACTIONS.items():
             executor_class = meta.get("executor_class")
@@ -78,6 +100,97 @@ class GeminiDecisionModule:
         logger.debug(f"GDM: Initialized {len(executors)} primitive sub-action executors.")
         return executors
 
+    def _initialize_nlu_plan_cache(self) -> Optional[NluPlanCache]:
+        if not self.config_manager.get_setting("gemini_nlu_plan_cache_enabled", True):
+            logger.info("GDM: NLU plan cache disabled by profile setting.")
+            return None
+        project_root = getattr(self.config_manager, "project_root", None)
+        if not project_root:
+            logger.warning("GDM: Project root unknown; NLU plan cache disabled.")
+            return None
+        # The template rendered with a fixed marker in place of the command: any edit to the prompt changes this version.
+        nlu_prompt_version = prompt_template_version(self._construct_nlu_parse_prompt("{natural_language_command}"))
+        try:
+            return NluPlanCache(default_nlu_plan_cache_path(project_root), prompt_version=nlu_prompt_version)
+        except Exception as e_cache:
+            logger.error(f"GDM: Failed to initialize NLU plan cache: {e_cache}. Continuing without it.", exc_info=True)
+            return None
+
+    def _wait_for_region_to_settle(
+        self, region_name: str, baseline_image: Optional[np.ndarray], task_parameters: Dict[str, Any], fallback_delay_sec: float, log_prefix: str
+    ) -> Optional[np.ndarray]:
+        """
+        Waits until the region stops changing after an action and returns the latest capture.
+        Falls back to sleeping `fallback_delay_sec` (returning None) when the region cannot be
+        re-captured or visual settling is disabled.
+        """
+        region_spec = self.config_manager.get_region_config(region_name) if self.capture_engine is not None and region_name else None
+        settle_enabled = task_parameters.get("visual_settle", self.config_manager.get_setting("visual_settle_enabled", True))
+        if not region_spec or not settle_enabled:
+            time.sleep(fallback_delay_sec)
+            return None
+        timeout_sec = task_parameters.get("visual_settle_timeout_sec", self.config_manager.get_setting("visual_settle_timeout_seconds", DEFAULT_SETTLE_TIMEOUT_SEC))
+        try:
+            timeout_sec = float(timeout_sec)
+        except (TypeError, ValueError):
+            logger.warning(f"{log_prefix}: Invalid visual settle timeout '{timeout_sec}'. Using {DEFAULT_SETTLE_TIMEOUT_SEC}s.")
+            timeout_sec = DEFAULT_SETTLE_TIMEOUT_SEC
+        settle_result = wait_for_visual_settle(lambda: self._capture_context_region(region_spec), timeout_sec=timeout_sec, baseline_image=baseline_image, log_prefix=f"{log_prefix} VisualSettle")
+        logger.debug(f"{log_prefix}: Visual settle for '{region_name}': Settled={settle_result.settled}, Changed={settle_result.changed}, Elapsed={settle_result.elapsed_sec:.3f}s.")
+        return settle_result.last_image
+
+    def _capture_context_region(self, region_spec: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Captures a context region into its pooled buffer ring, reusing an old frame's memory when possible."""
+        ring = self._frame_buffer_rings.setdefault(region_spec.get("name", ""), FrameBufferRing())
+        frame = self.capture_engine.capture_region(region_spec, out_buffer=ring.next_buffer())
+        if frame is not None:
+            ring.commit(frame)
+        return frame
+
+    def _refresh_context_after_step(
+        self, instruction_details: Dict[str, Any], current_images: Dict[str, np.ndarray], primary_rgn_name: str, task_parameters: Dict[str, Any], log_prefix: str
+    ) -> None:
+        """
+        Brings `current_images` (updated in place) up to date after a step changed the screen.
+
+        Only regions the step can have affected are re-captured: the primary region, once it
+        has visually settled, and any other context region overlapping it on screen. Steps that
+        only inspect the screen (e.g. CHECK_VISUAL_STATE) keep the current frames and need no wait.
+        """
+        if self._map_nlu_intent_to_allowed_sub_action(instruction_details.get("intent_verb")) not in SCREEN_CHANGING_SUB_ACTIONS:
+            return
+        settled_image = self._wait_for_region_to_settle(primary_rgn_name, current_images.get(primary_rgn_name), task_parameters, float(task_parameters.get("delay_between_nlu_steps_sec", 0.3)), log_prefix)
+        if settled_image is None:
+            return
+        # Captures live in a reused buffer ring; the next step's settle polls would overwrite a
+        # pooled frame that is still in use as its baseline, so context images get their own copy.
+        current_images[primary_rgn_name] = settled_image.copy()
+        primary_spec = self.config_manager.get_region_config(primary_rgn_name)
+        refreshed_names = [primary_rgn_name]
+        for other_rgn_name in list(current_images.keys()):
+            if other_rgn_name == primary_rgn_name:
+                continue
+            other_spec = self.config_manager.get_region_config(other_rgn_name)
+            if primary_spec and other_spec and _regions_overlap(primary_spec, other_spec):
+                other_image = self._capture_context_region(other_spec)
+                if other_image is not None:
+                    current_images[other_rgn_name] = other_image.copy()
+                    refreshed_names.append(other_rgn_name)
+        logger.debug(f"{log_prefix}: Refreshed context regions {refreshed_names}; kept {[n for n in current_images if n not in refreshed_names]}.")
+
+    def _initialize_element_locator_cache(self, analysis_engine: Optional[AnalysisEngine]) -> Optional[ElementLocatorCache]:
+        if analysis_engine is None:
+            logger.info("GDM: No AnalysisEngine provided; learned element locator cache disabled.")
+            return None
+        if not self.config_manager.get_setting("gemini_element_locator_cache_enabled", True):
+            logger.info("GDM: Learned element locator cache disabled by profile setting.")
+            return None
+        match_threshold = self.config_manager.get_setting("element_locator_match_threshold", DEFAULT_MATCH_THRESHOLD)
+        if not isinstance(match_threshold, (int, float)) or not (0.0 < match_threshold <= 1.0):
+            logger.warning(f"GDM: Invalid 'element_locator_match_threshold' ({match_threshold}). Using {DEFAULT_MATCH_THRESHOLD}.")
+            match_threshold = DEFAULT_MATCH_THRESHOLD
+        return ElementLocatorCache(analysis_engine, match_threshold=float(match_threshold))
+
     def _construct_nlu_parse_prompt(self, natural_language_command: str) -> str:
         nlu_schema_description = """
 You are an NLU (Natural Language Understanding) parser for a desktop automation tool named Mark-I.
@@ -138,6 +251,11 @@ Expected "parsed_task" for example:
     def _refine_target_description_to_bbox(self, target_description: str, context_image_np: np.ndarray, context_image_region_name: str, task_rule_name_for_log: str) -> Optional[Dict[str, Any]]:
         log_prefix = f"R '{task_rule_name_for_log}', NLU Task TargetRefine"
         logger.info(f"{log_prefix}: Refining target: '{target_description}' in rgn '{context_image_region_name}'")
+        if self.element_locator_cache is not None:
+            learned_match = self.element_locator_cache.locate(context_image_region_name, target_description, context_image_np)
+            if learned_match:
+                logger.info(f"{log_prefix}: Target '{target_description}' verified locally from learned template at bbox: {learned_match['box']}. Confidence: {learned_match['confidence']:.4f}")
+                return {"value": {"box": learned_match["box"], "found": True, "element_label": target_description, "confidence": learned_match["confidence"]}, "_source_region_for_capture_": context_image_region_name}
         prompt = (
             f"Precise visual element locator. In the provided image of region '{context_image_region_name}', find the element best described as: \"{target_description}\".\n"
             f'If found, respond ONLY with JSON: {{"found": true, "box": [x,y,w,h], "element_label": "{target_description}", "confidence_score": 0.0_to_1.0}}. The box coordinates [x,y,w,h] must be integers relative to the top-left of the provided image. Ensure width and height are positive.\n'
@@ -148,8 +266,10 @@ Expected "parsed_task" for example:
             data = response["json_content"]
             if isinstance(data, dict) and "found" in data:
                 if data["found"] and isinstance(data.get("box"), list) and len(data["box"]) == 4 and all(isinstance(n, (int, float)) for n in data["box"]) and data["box"][2] > 0 and data["box"][3] > 0:
-                    box = [int(round(n)) for n in data["box"]]
+                    box = scale_box_to_original(data["box"], response.get("image_scale", 1.0))
                     logger.info(f"{log_prefix}: Target '{target_description}' refined to bbox: {box}. Confidence: {data.get('confidence_score', 'N/A')}")
+                    if self.element_locator_cache is not None:
+                        self.element_locator_cache.store(context_image_region_name, target_description, context_image_np, box)
                     return {"value": {"box": box, "found": True, "element_label": data.get("element_label", target_description), "confidence": data.get("confidence_score", 1.0)}, "_source_region_for_capture_": context_image_region_name}
                 elif not data["found"]: logger.info(f"{log_prefix}: Target '{target_description}' not found by Gemini. Reasoning: {data.get('reasoning', 'N/A')}")
                 else: logger.warning(f"{log_prefix}: Refined box data for '{target_description}' invalid. Data: {data}")
@@ -204,11 +324,12 @@ Expected "parsed_task" for example:
                 self._executed_steps_log_during_task.append(f"{branch_prefix}SeqStep{i+1}: FormatFAIL (Invalid data)"); return False
             instr_details = step_item_data["instruction_details"]; step_num = step_item_data.get("step_number", i + 1)
             logger.info(f"{log_prefix_task}: {branch_prefix}SeqStep {step_num}/{len(steps_list)}: Intent='{instr_details.get('intent_verb')}' Target='{instr_details.get('target_description')}'")
-            current_images_for_step = current_images
+            current_images_for_step = dict(current_images)  # Snapshot; current_images is refreshed in place after the step
             exec_result = self._execute_primitive_sub_action(instr_details, current_images_for_step, primary_rgn_name, f"{task_rule_name}_{branch_prefix}SeqStep{step_num}", task_parameters)
             self._executed_steps_log_during_task.append(f"{branch_prefix}SeqStep{step_num} '{instr_details.get('intent_verb')}': {'OK' if exec_result.success else 'FAIL'}")
             if not exec_result.success: return False
-            time.sleep(float(task_parameters.get("delay_between_nlu_steps_sec", 0.3)))
+            if i + 1 < min(len(steps_list), max_s):  # Later steps (and branches) must see the post-action screen
+                self._refresh_context_after_step(instr_details, current_images, primary_rgn_name, task_parameters, f"{log_prefix_task}: {branch_prefix}SeqStep {step_num}")
         return True
 
     def _handle_conditional_instruction_node(
@@ -264,24 +385,30 @@ Expected "parsed_task" for example:
         logger.info(f"{log_prefix_task}: Starting execution.")
         if not self.gemini_analyzer or not self.gemini_analyzer.client_initialized:
             overall_task_result["message"] = "GeminiAnalyzer not available."; logger.error(f"{log_prefix_task}: {overall_task_result['message']}"); return overall_task_result
-        nlu_parse_prompt = self._construct_nlu_parse_prompt(natural_language_command)
-        nlu_context_image_for_parsing = next(iter(initial_context_images.values()), None) if initial_context_images else None
-        nlu_response = self.gemini_analyzer.query_vision_model(prompt=nlu_parse_prompt, image_data=nlu_context_image_for_parsing, model_name_override=task_parameters.get("nlu_model_override", DEFAULT_NLU_PLANNING_MODEL))
-        if nlu_response["status"] != "success" or not nlu_response["json_content"]:
-            overall_task_result["message"] = f"NLU parsing query failed. Status: {nlu_response['status']}, Err: {nlu_response.get('error_message', 'No JSON')}"
-            logger.error(f"{log_prefix_task}: {overall_task_result['message']}. Raw NLU Response Text: {nlu_response.get('text_content')}"); return overall_task_result
-        parsed_task_plan_from_nlu: Optional[Dict[str, Any]] = None
-        try:
-            json_response_content = nlu_response["json_content"]
-            if not isinstance(json_response_content, dict) or "parsed_task" not in json_response_content: raise ValueError("NLU JSON missing 'parsed_task'")
-            parsed_task_plan_from_nlu = json_response_content["parsed_task"]
-            if not isinstance(parsed_task_plan_from_nlu, dict): raise ValueError("'parsed_task' not a dict.")
-            logger.info(f"{log_prefix_task}: NLU parsed. Plan Type: {parsed_task_plan_from_nlu.get('command_type')}")
-            logger.debug(f"{log_prefix_task}: Full NLU parsed plan: {json.dumps(parsed_task_plan_from_nlu, indent=2)}")
-        except Exception as e_nlu_parse:
-            overall_task_result["message"] = f"Error processing NLU JSON: {e_nlu_parse}. Resp: {nlu_response['json_content']}"
-            logger.error(f"{log_prefix_task}: {overall_task_result['message']}", exc_info=True); return overall_task_result
-        current_visual_context_for_steps = initial_context_images; primary_context_region_name_for_steps = ""
+        nlu_model_name = task_parameters.get("nlu_model_override") or DEFAULT_NLU_PLANNING_MODEL
+        parsed_task_plan_from_nlu: Optional[Dict[str, Any]] = self.nlu_plan_cache.get(natural_language_command, nlu_model_name) if self.nlu_plan_cache is not None else None
+        if parsed_task_plan_from_nlu is not None:
+            logger.info(f"{log_prefix_task}: Using cached NLU plan (Model: '{nlu_model_name}'). Plan Type: {parsed_task_plan_from_nlu.get('command_type')}")
+        else:
+            nlu_parse_prompt = self._construct_nlu_parse_prompt(natural_language_command)
+            nlu_context_image_for_parsing = next(iter(initial_context_images.values()), None) if initial_context_images else None
+            nlu_response = self.gemini_analyzer.query_vision_model(prompt=nlu_parse_prompt, image_data=nlu_context_image_for_parsing, model_name_override=nlu_model_name)
+            if nlu_response["status"] != "success" or not nlu_response["json_content"]:
+                overall_task_result["message"] = f"NLU parsing query failed. Status: {nlu_response['status']}, Err: {nlu_response.get('error_message', 'No JSON')}"
+                logger.error(f"{log_prefix_task}: {overall_task_result['message']}. Raw NLU Response Text: {nlu_response.get('text_content')}"); return overall_task_result
+            try:
+                json_response_content = nlu_response["json_content"]
+                if not isinstance(json_response_content, dict) or "parsed_task" not in json_response_content: raise ValueError("NLU JSON missing 'parsed_task'")
+                parsed_task_plan_from_nlu = json_response_content["parsed_task"]
+                if not isinstance(parsed_task_plan_from_nlu, dict): raise ValueError("'parsed_task' not a dict.")
+                logger.info(f"{log_prefix_task}: NLU parsed. Plan Type: {parsed_task_plan_from_nlu.get('command_type')}")
+                logger.debug(f"{log_prefix_task}: Full NLU parsed plan: {json.dumps(parsed_task_plan_from_nlu, indent=2)}")
+            except Exception as e_nlu_parse:
+                overall_task_result["message"] = f"Error processing NLU JSON: {e_nlu_parse}. Resp: {nlu_response['json_content']}"
+                logger.error(f"{log_prefix_task}: {overall_task_result['message']}", exc_info=True); return overall_task_result
+            if self.nlu_plan_cache is not None and parsed_task_plan_from_nlu.get("command_type"):
+                self.nlu_plan_cache.put(natural_language_command, nlu_model_name, parsed_task_plan_from_nlu)
+        current_visual_context_for_steps = dict(initial_context_images); primary_context_region_name_for_steps = ""  # Task-local copy, refreshed in place between steps
         if task_parameters.get("context_region_names") and isinstance(task_parameters["context_region_names"], list) and task_parameters["context_region_names"]:
             primary_context_region_name_for_steps = task_parameters["context_region_names"][0]
             if primary_context_region_name_for_steps not in current_visual_context_for_steps: logger.warning(f"{log_prefix_task}: Specified primary context region '{primary_context_region_name_for_steps}' not in images. Will try first available."); primary_context_region_name_for_steps = ""
@@ -289,7 +416,13 @@ Expected "parsed_task" for example:
         if not primary_context_region_name_for_steps:
             overall_task_result["message"] = "NLU Task: No primary context region image available."; logger.error(f"{log_prefix_task}: {overall_task_result['message']}"); return overall_task_result
         logger.info(f"{log_prefix_task}: Primary context region for steps: '{primary_context_region_name_for_steps}'.")
-        final_success = self._recursive_execute_plan_node(parsed_task_plan_from_nlu, current_visual_context_for_steps, primary_context_region_name_for_steps, depth=0, branch_prefix="", task_rule_name=task_rule_name, task_parameters=task_parameters)
+        final_success = False
+        try:
+            final_success = self._recursive_execute_plan_node(parsed_task_plan_from_nlu, current_visual_context_for_steps, primary_context_region_name_for_steps, depth=0, branch_prefix="", task_rule_name=task_rule_name, task_parameters=task_parameters)
+        finally:
+            if not final_success and self.nlu_plan_cache is not None:  # Failed or aborted: re-plan next time instead of replaying this plan
+                logger.info(f"{log_prefix_task}: Task did not succeed. Dropping its cached NLU plan.")
+                self.nlu_plan_cache.invalidate(natural_language_command, nlu_model_name)
         overall_task_result["status"] = "success" if final_success else "failure"
         overall_task_result["message"] = ("NLU task executed all steps successfully." if final_success else (overall_task_result.get("message") if overall_task_result.get("message") != "NLU task initiated." else "NLU task failed at one or more steps."))
         logger.info(f"{log_prefix_task}: Final NLU task status: {overall_task_result['status']}. Msg: {overall_task_result['message']}")
@@ -0,0 +1,364 @@
+import abc
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.input_backends")
+
+INPUT_BACKEND_PYAUTOGUI = "pyautogui"
+INPUT_BACKEND_XTEST = "xtest"
+INPUT_BACKEND_DRYRUN = "dryrun"
+INPUT_BACKEND_RECORD = "record"
+INPUT_BACKEND_NAMES: List[str] = [INPUT_BACKEND_PYAUTOGUI, INPUT_BACKEND_XTEST, INPUT_BACKEND_DRYRUN, INPUT_BACKEND_RECORD]
+
+# Environment variables used when no backend is configured explicitly (e.g. via `mark_i run --input-backend`)
+ENV_INPUT_BACKEND = "MARK_I_INPUT_BACKEND"
+ENV_INPUT_RECORD_FILE = "MARK_I_INPUT_RECORD_FILE"
+
+MOUSE_BUTTONS: Tuple[str, ...] = ("left", "middle", "right", "primary", "secondary")
+
+PASTE_HOTKEY: Tuple[str, ...] = ("command", "v") if platform.system() == "Darwin" else ("ctrl", "v")
+# Target applications read the clipboard asynchronously after the paste keystroke;
+# restoring the previous clipboard sooner can make them paste the old content.
+DEFAULT_CLIPBOARD_RESTORE_DELAY_SEC = 0.15
+
+
+class InputFailSafeError(Exception):
+    """Raised by a backend when the user triggered the fail-safe (mouse slammed into a screen corner)."""
+
+
+class ClipboardUnavailableError(Exception):
+    """Raised by paste_text when the system clipboard cannot be used; callers fall back to typing."""
+
+
+class InputBackend(abc.ABC):
+    """
+    Low-level mouse/keyboard driver used by ActionExecutor.
+
+    Coordinates are absolute screen pixels. Key names follow PyAutoGUI's naming
+    ('enter', 'ctrl', 'f5', 'a', ...). Implementations raise InputFailSafeError when the
+    user aborts automation via the fail-safe.
+    """
+
+    name = "abstract"
+
+    @abc.abstractmethod
+    def click(self, x: int, y: int, clicks: int = 1, interval: float = 0.0, button: str = "left") -> None:
+        pass
+
+    @abc.abstractmethod
+    def type_text(self, text: str, interval: float = 0.0) -> None:
+        pass
+
+    @abc.abstractmethod
+    def press(self, key: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def hotkey(self, *keys: str) -> None:
+        pass
+
+    def paste_text(self, text: str, restore_clipboard: bool = True, restore_delay_sec: float = DEFAULT_CLIPBOARD_RESTORE_DELAY_SEC) -> None:
+        """
+        Enters `text` in one go: puts it on the clipboard, sends the paste hotkey and then
+        restores the previous clipboard content, also if the hotkey fails (e.g. fail-safe).
+        Raises ClipboardUnavailableError if the clipboard cannot be accessed (e.g. no clipboard
+        tool on Linux).
+        """
+        try:
+            import pyperclip  # type: ignore
+
+            previous_clipboard = pyperclip.paste() if restore_clipboard else None
+            pyperclip.copy(text)
+        except Exception as e_clipboard:  # pyperclip.PyperclipException, or ImportError
+            raise ClipboardUnavailableError(str(e_clipboard)) from e_clipboard
+        pasted = False
+        try:
+            self.hotkey(*PASTE_HOTKEY)
+            pasted = True
+        finally:
+            if previous_clipboard is not None:
+                if pasted:
+                    time.sleep(restore_delay_sec)  # Let the target application read the clipboard first
+                try:
+                    pyperclip.copy(previous_clipboard)
+                except Exception as e_restore:
+                    logger.warning(f"{self.__class__.__name__}: Could not restore previous clipboard content: {e_restore}")
+
+    def is_valid_key(self, key: str) -> bool:
+        return bool(key)
+
+    def close(self) -> None:
+        """Releases resources / flushes recordings. Safe to call more than once."""
+
+
+class PyAutoGUIInputBackend(InputBackend):
+    """Drives input through PyAutoGUI (the default). PyAutoGUI is imported on first use, so other backends work headless."""
+
+    name = INPUT_BACKEND_PYAUTOGUI
+
+    def __init__(self):
+        import pyautogui  # type: ignore # Deferred: importing PyAutoGUI requires a display on Linux
+
+        self._pyautogui = pyautogui
+        pyautogui.FAILSAFE = True  # Move mouse to top-left (0,0) to abort PyAutoGUI actions.
+        # pyautogui.PAUSE = 0.0 # Default global pause between PyAutoGUI calls.
+        # We prefer explicit pauses via 'pyautogui_pause_before' in action specs.
+        self._valid_keys = set(pyautogui.KEYBOARD_KEYS)
+        logger.info(f"PyAutoGUIInputBackend initialized. PyAutoGUI FAILSAFE is ON. PyAutoGUI Default PAUSE: {pyautogui.PAUSE}s.")
+
+    def _call(self, func_name: str, *args, **kwargs) -> None:
+        try:
+            getattr(self._pyautogui, func_name)(*args, **kwargs)
+        except self._pyautogui.FailSafeException as e_failsafe:
+            raise InputFailSafeError(str(e_failsafe)) from e_failsafe
+
+    def click(self, x: int, y: int, clicks: int = 1, interval: float = 0.0, button: str = "left") -> None:
+        self._call("click", x=x, y=y, clicks=clicks, interval=interval, button=button)
+
+    def type_text(self, text: str, interval: float = 0.0) -> None:
+        self._call("typewrite", text, interval=interval)
+
+    def press(self, key: str) -> None:
+        self._call("press", key)
+
+    def hotkey(self, *keys: str) -> None:
+        self._call("hotkey", *keys)
+
+    def is_valid_key(self, key: str) -> bool:
+        return key in self._valid_keys
+
+
+# PyAutoGUI key names -> X keysym names, for keys whose names differ
+_XTEST_KEYSYM_NAMES: Dict[str, str] = {
+    "enter": "Return", "return": "Return", "\n": "Return", "tab": "Tab", "\t": "Tab", "esc": "Escape", "escape": "Escape",
+    "backspace": "BackSpace", "delete": "Delete", "del": "Delete", "insert": "Insert", "space": "space", " ": "space",
+    "up": "Up", "down": "Down", "left": "Left", "right": "Right", "home": "Home", "end": "End",
+    "pageup": "Prior", "pgup": "Prior", "pagedown": "Next", "pgdn": "Next", "capslock": "Caps_Lock", "printscreen": "Print",
+    "ctrl": "Control_L", "ctrlleft": "Control_L", "ctrlright": "Control_R", "shift": "Shift_L", "shiftleft": "Shift_L", "shiftright": "Shift_R",
+    "alt": "Alt_L", "altleft": "Alt_L", "altright": "Alt_R", "win": "Super_L", "winleft": "Super_L", "winright": "Super_R", "command": "Super_L", "super": "Super_L",
+    **{f"f{n}": f"F{n}" for n in range(1, 25)},
+}
+_XTEST_BUTTONS: Dict[str, int] = {"left": 1, "primary": 1, "middle": 2, "right": 3, "secondary": 3}
+
+
+class XTestInputBackend(InputBackend):
+    """
+    Sends synthetic events straight to the X server through the XTEST extension (python-xlib).
+
+    Each event is a single protocol request with no per-call pauses or screen-size
+    bookkeeping, which is much cheaper than PyAutoGUI. Only available on X11 (including
+    XWayland). Mirrors PyAutoGUI's fail-safe: the pointer resting in a screen corner aborts.
+    """
+
+    name = INPUT_BACKEND_XTEST
+
+    def __init__(self, display_name: Optional[str] = None, failsafe: bool = True):
+        try:
+            from Xlib import X, XK, display as xlib_display  # type: ignore
+            from Xlib.ext import xtest  # type: ignore
+        except ImportError as e_import:
+            raise RuntimeError("The 'xtest' input backend requires python-xlib (pip install python-xlib).") from e_import
+        self._X, self._XK, self._xtest = X, XK, xtest
+        self._display = xlib_display.Display(display_name)
+        if not self._display.has_extension("XTEST"):
+            raise RuntimeError("X server does not support the XTEST extension.")
+        screen = self._display.screen()
+        self._root = screen.root
+        self._corners = {(0, 0), (screen.width_in_pixels - 1, 0), (0, screen.height_in_pixels - 1), (screen.width_in_pixels - 1, screen.height_in_pixels - 1)}
+        self.failsafe = failsafe
+        self._lock = threading.Lock()
+        logger.info(f"XTestInputBackend initialized on display '{self._display.get_display_name()}'. Fail-safe: {failsafe}.")
+
+    def _check_failsafe(self) -> None:
+        if self.failsafe:
+            pointer = self._root.query_pointer()
+            if (pointer.root_x, pointer.root_y) in self._corners:
+                raise InputFailSafeError(f"Fail-safe triggered: pointer at screen corner ({pointer.root_x},{pointer.root_y}).")
+
+    def _keysym_for(self, key: str) -> int:
+        keysym_name = _XTEST_KEYSYM_NAMES.get(key) or _XTEST_KEYSYM_NAMES.get(key.lower())
+        if keysym_name:
+            return self._XK.string_to_keysym(keysym_name)
+        if len(key) == 1:
+            code_point = ord(key)
+            return code_point if code_point < 0x100 else 0x01000000 + code_point  # Latin-1 keysyms equal their code point
+        return self._XK.string_to_keysym(key)
+
+    def _keycode_for(self, key: str) -> Tuple[int, bool]:
+        """Returns (keycode, needs_shift). A keycode of 0 means the key is not on the current keyboard map."""
+        keysym = self._keysym_for(key)
+        keycode = self._display.keysym_to_keycode(keysym) if keysym else 0
+        needs_shift = bool(keycode) and self._display.keycode_to_keysym(keycode, 0) != keysym and self._display.keycode_to_keysym(keycode, 1) == keysym
+        return keycode, needs_shift
+
+    def _send_key(self, keycode: int, is_press: bool) -> None:
+        self._xtest.fake_input(self._display, self._X.KeyPress if is_press else self._X.KeyRelease, keycode)
+
+    def click(self, x: int, y: int, clicks: int = 1, interval: float = 0.0, button: str = "left") -> None:
+        button_number = _XTEST_BUTTONS.get(button, 1)
+        with self._lock:
+            self._check_failsafe()
+            self._xtest.fake_input(self._display, self._X.MotionNotify, x=int(x), y=int(y))
+            for click_index in range(max(1, clicks)):
+                if click_index and interval > 0:
+                    self._display.sync()
+                    time.sleep(interval)
+                self._xtest.fake_input(self._display, self._X.ButtonPress, button_number)
+                self._xtest.fake_input(self._display, self._X.ButtonRelease, button_number)
+            self._display.sync()
+
+    def type_text(self, text: str, interval: float = 0.0) -> None:
+        shift_keycode = self._display.keysym_to_keycode(self._XK.string_to_keysym("Shift_L"))
+        with self._lock:
+            self._check_failsafe()
+            for char in text:
+                keycode, needs_shift = self._keycode_for(char)
+                if not keycode:
+                    logger.warning(f"XTestInputBackend: Character {char!r} has no keycode in the current keymap. Skipped.")
+                    continue
+                if needs_shift:
+                    self._send_key(shift_keycode, True)
+                self._send_key(keycode, True)
+                self._send_key(keycode, False)
+                if needs_shift:
+                    self._send_key(shift_keycode, False)
+                if interval > 0:
+                    self._display.sync()
+                    time.sleep(interval)
+            self._display.sync()
+
+    def press(self, key: str) -> None:
+        self.hotkey(key)
+
+    def hotkey(self, *keys: str) -> None:
+        keycodes = [self._keycode_for(k)[0] for k in keys]
+        if not all(keycodes):
+            raise ValueError(f"Key(s) not available in the current X keymap: {[k for k, code in zip(keys, keycodes) if not code]}")
+        with self._lock:
+            self._check_failsafe()
+            for keycode in keycodes:
+                self._send_key(keycode, True)
+            for keycode in reversed(keycodes):
+                self._send_key(keycode, False)
+            self._display.sync()
+
+    def is_valid_key(self, key: str) -> bool:
+        return bool(key) and (key in _XTEST_KEYSYM_NAMES or len(key) == 1 or self._XK.string_to_keysym(key) != 0)
+
+    def close(self) -> None:
+        try:
+            self._display.close()
+        except Exception:  # pragma: no cover
+            pass
+
+
+class DryRunInputBackend(InputBackend):
+    """Performs no input at all; only counts events. Lets profiles run headless (e.g. throughput testing)."""
+
+    name = INPUT_BACKEND_DRYRUN
+
+    def __init__(self, honor_intervals: bool = False):
+        self.honor_intervals = honor_intervals  # Sleep for click/typing intervals like a real backend would
+        self._lock = threading.Lock()
+        self._start_time = time.perf_counter()
+        self.event_counts: Dict[str, int] = {"click": 0, "type_text": 0, "paste_text": 0, "press": 0, "hotkey": 0}
+
+    def _record(self, kind: str, params: Dict[str, Any]) -> None:
+        with self._lock:
+            self.event_counts[kind] += 1
+        logger.debug(f"{self.__class__.__name__}: {kind} {params}")
+
+    def _maybe_sleep(self, duration: float) -> None:
+        if self.honor_intervals and duration > 0:
+            time.sleep(duration)
+
+    def click(self, x: int, y: int, clicks: int = 1, interval: float = 0.0, button: str = "left") -> None:
+        self._maybe_sleep(interval * max(0, clicks - 1))
+        self._record("click", {"x": int(x), "y": int(y), "clicks": clicks, "interval": interval, "button": button})
+
+    def type_text(self, text: str, interval: float = 0.0) -> None:
+        self._maybe_sleep(interval * len(text))
+        self._record("type_text", {"text": text, "interval": interval})
+
+    def paste_text(self, text: str, restore_clipboard: bool = True, restore_delay_sec: float = DEFAULT_CLIPBOARD_RESTORE_DELAY_SEC) -> None:
+        self._record("paste_text", {"text": text})  # The real clipboard is left untouched
+
+    def press(self, key: str) -> None:
+        self._record("press", {"key": key})
+
+    def hotkey(self, *keys: str) -> None:
+        self._record("hotkey", {"keys": list(keys)})
+
+
+class RecordingInputBackend(DryRunInputBackend):
+    """
+    Dry-run backend that also keeps every event with a timestamp (seconds since the backend
+    was created), for assertions and benchmarks. With `record_path`, events are written as
+    JSON Lines when the backend is closed.
+    """
+
+    name = INPUT_BACKEND_RECORD
+
+    def __init__(self, record_path: Optional[str] = None, honor_intervals: bool = False):
+        super().__init__(honor_intervals=honor_intervals)
+        self.record_path = record_path
+        self.events: List[Dict[str, Any]] = []
+
+    def _record(self, kind: str, params: Dict[str, Any]) -> None:
+        event = {"t": time.perf_counter() - self._start_time, "kind": kind, **params}
+        with self._lock:
+            self.event_counts[kind] += 1
+            self.events.append(event)
+
+    def close(self) -> None:
+        if not self.record_path:
+            return
+        with self._lock:
+            events_to_write = list(self.events)
+        record_dir = os.path.dirname(os.path.abspath(self.record_path))
+        os.makedirs(record_dir, exist_ok=True)
+        with open(self.record_path, "w", encoding="utf-8") as f:
+            for event in events_to_write:
+                f.write(json.dumps(event) + "\n")
+        logger.info(f"RecordingInputBackend: Wrote {len(events_to_write)} input events to '{self.record_path}'.")
+
+
+def create_input_backend(name: str = INPUT_BACKEND_PYAUTOGUI, record_path: Optional[str] = None) -> InputBackend:
+    if name == INPUT_BACKEND_PYAUTOGUI:
+        return PyAutoGUIInputBackend()
+    if name == INPUT_BACKEND_XTEST:
+        return XTestInputBackend()
+    if name == INPUT_BACKEND_DRYRUN:
+        return DryRunInputBackend()
+    if name == INPUT_BACKEND_RECORD:
+        return RecordingInputBackend(record_path=record_path)
+    raise ValueError(f"Invalid input backend '{name}'. Expected one of {INPUT_BACKEND_NAMES}.")
+
+
+_default_input_backend: Optional[InputBackend] = None
+_default_input_backend_lock = threading.Lock()
+
+
+def configure_default_input_backend(name: str, record_path: Optional[str] = None) -> InputBackend:
+    """Sets the backend used by every ActionExecutor created without an explicit one."""
+    global _default_input_backend
+    with _default_input_backend_lock:
+        _default_input_backend = create_input_backend(name, record_path=record_path)
+        logger.info(f"Default input backend set to '{_default_input_backend.name}'.")
+        return _default_input_backend
+
+
+def get_default_input_backend() -> InputBackend:
+    """Returns the configured default backend, creating it from MARK_I_INPUT_BACKEND (default: pyautogui) on first use."""
+    with _default_input_backend_lock:
+        backend = _default_input_backend
+    if backend is not None:
+        return backend
+    return configure_default_input_backend(os.getenv(ENV_INPUT_BACKEND, INPUT_BACKEND_PYAUTOGUI), record_path=os.getenv(ENV_INPUT_RECORD_FILE))
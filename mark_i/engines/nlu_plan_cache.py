@@ -0,0 +1,116 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.nlu_plan_cache")
+
+CACHE_DIR_NAME = "cache"  # Under the project root, next to 'profiles'
+NLU_PLAN_CACHE_FILENAME = "nlu_plan_cache.json"
+DEFAULT_MAX_ENTRIES = 256
+_CACHE_FILE_FORMAT_VERSION = 1
+
+
+def prompt_template_version(prompt_template: str) -> str:
+    """Short content hash of an NLU prompt template. Any change to the template yields a new version."""
+    return hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()[:16]
+
+
+class NluPlanCache:
+    """
+    Persistent LRU cache of NLU-parsed task plans ('parsed_task' dicts).
+
+    Plans are keyed by (command text after variable substitution, planning model,
+    prompt template version). Entries for any other prompt version are dropped at load
+    time, so editing the NLU prompt invalidates the cache automatically. The cache is
+    stored as JSON and rewritten atomically on every update.
+    """
+
+    def __init__(self, cache_file_path: str, prompt_version: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_file_path = cache_file_path
+        self.prompt_version = prompt_version
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _make_key(command: str, model_name: str, prompt_version: str) -> str:
+        return hashlib.sha256(json.dumps([command, model_name, prompt_version]).encode("utf-8")).hexdigest()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.cache_file_path):
+            logger.debug(f"NluPlanCache: No cache file at '{self.cache_file_path}'. Starting empty.")
+            return
+        try:
+            with open(self.cache_file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e_load:
+            logger.warning(f"NluPlanCache: Could not read '{self.cache_file_path}' ({e_load}). Starting empty.")
+            return
+        if not isinstance(data, dict) or data.get("format_version") != _CACHE_FILE_FORMAT_VERSION:
+            logger.info(f"NluPlanCache: Cache file '{self.cache_file_path}' has an unknown format. Starting empty.")
+            return
+        dropped_count = 0
+        for entry in data.get("entries", []):
+            if not isinstance(entry, dict) or entry.get("prompt_version") != self.prompt_version or not isinstance(entry.get("plan"), dict):
+                dropped_count += 1
+                continue
+            self._entries[self._make_key(entry["command"], entry["model"], entry["prompt_version"])] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        logger.info(f"NluPlanCache: Loaded {len(self._entries)} cached plans (prompt version {self.prompt_version}); dropped {dropped_count} stale entries.")
+
+    def _save_locked(self) -> None:
+        tmp_path = f"{self.cache_file_path}.tmp"
+        try:
+            cache_dir = os.path.dirname(self.cache_file_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"format_version": _CACHE_FILE_FORMAT_VERSION, "entries": list(self._entries.values())}, f, indent=2)
+            os.replace(tmp_path, self.cache_file_path)
+        except OSError as e_save:
+            logger.warning(f"NluPlanCache: Could not persist cache to '{self.cache_file_path}': {e_save}")
+
+    def get(self, command: str, model_name: str) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the cached plan for the command/model at the current prompt version, or None."""
+        cache_key = self._make_key(command, model_name, self.prompt_version)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self._entries.move_to_end(cache_key)
+            return copy.deepcopy(entry["plan"])
+
+    def put(self, command: str, model_name: str, plan: Dict[str, Any]) -> None:
+        cache_key = self._make_key(command, model_name, self.prompt_version)
+        with self._lock:
+            self._entries[cache_key] = {"command": command, "model": model_name, "prompt_version": self.prompt_version, "plan": copy.deepcopy(plan)}
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save_locked()
+
+    def invalidate(self, command: str, model_name: str) -> None:
+        with self._lock:
+            if self._entries.pop(self._make_key(command, model_name, self.prompt_version), None) is not None:
+                self._save_locked()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def default_nlu_plan_cache_path(project_root: str) -> str:
+    return os.path.join(project_root, CACHE_DIR_NAME, NLU_PLAN_CACHE_FILENAME)
+
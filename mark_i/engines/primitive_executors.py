@@ -32,10 +32,12 @@ class PrimitiveSubActionExecutorBase(abc.ABC):
         action_executor_instance: ActionExecutor,
         gemini_analyzer_instance: GeminiAnalyzer,
         target_refiner_func: Callable[[str, np.ndarray, str, str], Optional[Dict[str, Any]]],
+        visual_settle_func: Optional[Callable[[str, Optional[np.ndarray], Dict[str, Any], float, str], Optional[np.ndarray]]] = None,
     ):
         self.action_executor = action_executor_instance
         self.gemini_analyzer = gemini_analyzer_instance
         self._refine_target_description_to_bbox = target_refiner_func
+        self._visual_settle_func = visual_settle_func
 
     @abc.abstractmethod
     def execute(
@@ -49,6 +51,15 @@ class PrimitiveSubActionExecutorBase(abc.ABC):
     ) -> PrimitiveSubActionExecuteResult:
         pass
 
+    def _wait_for_visual_settle(
+        self, region_name: str, baseline_image: Optional[np.ndarray], task_parameters: Dict[str, Any], fallback_delay_sec: float, log_prefix: str
+    ) -> Optional[np.ndarray]:
+        """Waits for the region to settle after an action. Falls back to a fixed sleep when no settle function is available."""
+        if self._visual_settle_func is None:
+            time.sleep(fallback_delay_sec)
+            return None
+        return self._visual_settle_func(region_name, baseline_image, task_parameters, fallback_delay_sec, log_prefix)
+
     def _confirm_action_if_needed(
         self,
         action_description_for_confirm: str,
@@ -144,11 +155,13 @@ class TypeInDescribedFieldExecutor(PrimitiveSubActionExecutorBase):
             "type": "click", "target_relation": "center_of_gemini_element", "gemini_element_variable": click_var_name, "button": "left", "clicks": 1,
             "pyautogui_pause_before": 0.15, "context": {"rule_name": f"{task_rule_name_for_log}_NLU_ClickFieldForType", "variables": {click_var_name: refined_field_data}, "condition_region": primary_context_region_name}
         }
-        try: logger.info(f"{log_prefix}: Executing pre-type click on field '{target_desc}'"); self.action_executor.execute_action(click_spec); time.sleep(0.2)
+        try: logger.info(f"{log_prefix}: Executing pre-type click on field '{target_desc}'"); self.action_executor.execute_action(click_spec)
         except Exception as e_click_field: logger.error(f"{log_prefix}: Failed to execute pre-type click on field '{target_desc}': {e_click_field}", exc_info=True); return PrimitiveSubActionExecuteResult(success=False)
+        self._wait_for_visual_settle(primary_context_region_name, current_step_image_np, task_parameters_from_rule, 0.2, f"{log_prefix} PostClickSettle")
 
         type_spec = {
             "type": "type_text", "text": text_to_type, "interval": float(params_from_nlu.get("typing_interval", 0.01)),
+            "input_method": task_parameters_from_rule.get("input_method") or params_from_nlu.get("input_method"),  # None -> profile default
             "pyautogui_pause_before": task_parameters_from_rule.get("pyautogui_pause_before", 0.1),
             "context": {"rule_name": f"{task_rule_name_for_log}_NLU_TypeText", "condition_region": primary_context_region_name}
         }
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Any, Optional
+
+import cv2
+import numpy as np
+
+from mark_i.core.config_manager import ConfigManager, TEMPLATES_SUBDIR_NAME
+from mark_i.core.frozen_config import thaw_config
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+from mark_i.engines.rules_engine import build_rule_analysis_plan, referenced_template_filenames
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.profile_compiler")
+
+COMPILED_PROFILE_SUFFIX = ".compiled"  # Sidecar next to the profile: my_bot.json -> my_bot.compiled
+COMPILED_PROFILE_FORMAT_VERSION = 2
+ENV_DISABLE_PROFILE_CACHE = "MARK_I_NO_PROFILE_CACHE"
+
+# File layout: MAGIC | u64 header length | JSON header | padding | template arrays (each 64-byte aligned).
+# The header holds the merged profile, the rule plan and where each template array lives, so a
+# load is one mmap plus one JSON parse; template images are zero-copy views into the mapping.
+_MAGIC = b"MARKIPC1"
+_HEADER_LENGTH_FORMAT = "<Q"
+_ARRAY_ALIGNMENT = 64
+
+
+class CompiledProfile:
+    """A validated, merged profile with its rule plan and decoded template images."""
+
+    __slots__ = ("profile_path", "cache_key", "profile_data", "rule_plan", "templates")
+
+    def __init__(self, profile_path: str, cache_key: str, profile_data: Dict[str, Any], rule_plan: Dict[str, Any], templates: Dict[str, np.ndarray]):
+        self.profile_path = profile_path
+        self.cache_key = cache_key
+        self.profile_data = profile_data
+        self.rule_plan = rule_plan
+        self.templates = templates  # Template filename -> BGR image (read-only when memory-mapped)
+
+
+def compiled_profile_path_for(profile_path: str) -> str:
+    return os.path.splitext(profile_path)[0] + COMPILED_PROFILE_SUFFIX
+
+
+def profile_cache_disabled() -> bool:
+    return os.getenv(ENV_DISABLE_PROFILE_CACHE, "").strip().lower() in ("1", "true", "yes")
+
+
+def compute_profile_cache_key(profile_path: str) -> str:
+    """
+    Content hash of everything a compiled profile depends on: the profile JSON, the files in
+    its templates/ directory, the default profile structure it is merged with and the format version.
+    """
+    from mark_i.ui.gui.gui_config import DEFAULT_PROFILE_STRUCTURE  # Local import, as in ConfigManager
+
+    hasher = hashlib.sha256()
+    hasher.update(f"v{COMPILED_PROFILE_FORMAT_VERSION}".encode("utf-8"))
+    hasher.update(json.dumps(DEFAULT_PROFILE_STRUCTURE, sort_keys=True, default=str).encode("utf-8"))
+    with open(profile_path, "rb") as f:
+        hasher.update(f.read())
+    templates_dir = os.path.join(os.path.dirname(profile_path), TEMPLATES_SUBDIR_NAME)
+    if os.path.isdir(templates_dir):
+        for template_filename in sorted(os.listdir(templates_dir)):
+            template_path = os.path.join(templates_dir, template_filename)
+            if os.path.isfile(template_path):
+                hasher.update(template_filename.encode("utf-8"))
+                with open(template_path, "rb") as f:
+                    hasher.update(hashlib.sha256(f.read()).digest())
+    return hasher.hexdigest()
+
+
+def compile_profile(profile_path: str) -> CompiledProfile:
+    """Loads, validates and merges the profile, plans its rules and decodes its template images."""
+    cache_key = compute_profile_cache_key(profile_path)
+    config_manager = ConfigManager(profile_path, create_if_missing=False)
+    profile_data = thaw_config(config_manager.get_profile_data())
+    rule_plan = build_rule_analysis_plan(profile_data.get("rules", []))
+    templates: Dict[str, np.ndarray] = {}
+    templates_dir = os.path.join(os.path.dirname(profile_path), TEMPLATES_SUBDIR_NAME)
+    for template_filename in referenced_template_filenames(profile_data):
+        template_path = os.path.join(templates_dir, template_filename)
+        template_image = cv2.imread(template_path, cv2.IMREAD_COLOR) if os.path.exists(template_path) else None
+        if template_image is None:
+            logger.warning(f"ProfileCompiler: Template '{template_filename}' could not be read from '{template_path}'. It will be loaded lazily at runtime.")
+            continue
+        templates[template_filename] = np.ascontiguousarray(template_image)
+    return CompiledProfile(profile_path, cache_key, profile_data, rule_plan, templates)
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ARRAY_ALIGNMENT - 1) // _ARRAY_ALIGNMENT * _ARRAY_ALIGNMENT
+
+
+def write_compiled_profile(compiled: CompiledProfile, output_path: Optional[str] = None) -> str:
+    """Writes the compiled profile to its sidecar file (atomically) and returns the path."""
+    output_path = output_path or compiled_profile_path_for(compiled.profile_path)
+    template_layout: Dict[str, Dict[str, Any]] = {}
+    relative_offset = 0
+    for template_filename, template_image in compiled.templates.items():
+        relative_offset = _aligned(relative_offset)
+        template_layout[template_filename] = {"offset": relative_offset, "shape": list(template_image.shape), "dtype": template_image.dtype.str}
+        relative_offset += template_image.nbytes
+
+    header = {
+        "format_version": COMPILED_PROFILE_FORMAT_VERSION,
+        "cache_key": compiled.cache_key,
+        "compiled_at": time.time(),
+        "profile_data": compiled.profile_data,
+        "rule_plan": compiled.rule_plan,
+        "templates": template_layout,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_start = _aligned(len(_MAGIC) + struct.calcsize(_HEADER_LENGTH_FORMAT) + len(header_bytes))
+
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack(_HEADER_LENGTH_FORMAT, len(header_bytes)))
+        f.write(header_bytes)
+        for template_filename, template_image in compiled.templates.items():
+            f.seek(data_start + template_layout[template_filename]["offset"])
+            f.write(template_image.tobytes())
+    os.replace(temp_path, output_path)
+    logger.info(f"ProfileCompiler: Wrote compiled profile '{output_path}' ({len(compiled.templates)} templates).")
+    return output_path
+
+
+def load_compiled_profile(profile_path: str, expected_cache_key: Optional[str] = None) -> Optional[CompiledProfile]:
+    """
+    Memory-maps the sidecar of `profile_path`. Returns None if it is missing, unreadable or
+    stale (its cache key does not match the profile's current content).
+    """
+    compiled_path = compiled_profile_path_for(profile_path)
+    if not os.path.exists(compiled_path):
+        return None
+    try:
+        expected_cache_key = expected_cache_key or compute_profile_cache_key(profile_path)
+        with open(compiled_path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[: len(_MAGIC)] != _MAGIC:
+            raise ValueError("not a compiled Mark-I profile")
+        length_offset = len(_MAGIC)
+        (header_length,) = struct.unpack_from(_HEADER_LENGTH_FORMAT, mapped, length_offset)
+        header_start = length_offset + struct.calcsize(_HEADER_LENGTH_FORMAT)
+        header = json.loads(mapped[header_start : header_start + header_length].decode("utf-8"))
+        if header.get("format_version") != COMPILED_PROFILE_FORMAT_VERSION or header.get("cache_key") != expected_cache_key:
+            logger.info(f"ProfileCompiler: Compiled profile '{compiled_path}' is stale. Ignoring it.")
+            return None
+        data_start = _aligned(header_start + header_length)
+        templates = {
+            template_filename: np.ndarray(tuple(layout["shape"]), dtype=np.dtype(layout["dtype"]), buffer=mapped, offset=data_start + layout["offset"])
+            for template_filename, layout in header.get("templates", {}).items()
+        }  # The arrays keep the mapping alive
+    except Exception as e:
+        logger.warning(f"ProfileCompiler: Could not load compiled profile '{compiled_path}': {e}. Falling back to the JSON profile.")
+        return None
+    logger.info(f"ProfileCompiler: Loaded compiled profile '{compiled_path}' ({len(templates)} templates).")
+    return CompiledProfile(profile_path, expected_cache_key, header["profile_data"], header.get("rule_plan", {}), templates)
+
+
+def load_or_compile_profile(profile_path: str) -> CompiledProfile:
+    """Returns the up-to-date compiled profile, (re)building the sidecar if needed. Sidecar write failures are not fatal."""
+    cache_key = compute_profile_cache_key(profile_path)
+    compiled = load_compiled_profile(profile_path, expected_cache_key=cache_key)
+    if compiled is not None:
+        return compiled
+    compiled = compile_profile(profile_path)
+    try:
+        write_compiled_profile(compiled)
+    except OSError as e_write:
+        logger.warning(f"ProfileCompiler: Could not write compiled profile next to '{profile_path}': {e_write}")
+    return compiled
@@ -0,0 +1,138 @@
+import logging
+import os
+import time
+from typing import Dict, Any, Optional, Set, Tuple
+
+from mark_i.core.config_manager import TEMPLATES_SUBDIR_NAME
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.profile_reloader")
+
+DEFAULT_HOT_RELOAD_POLL_INTERVAL_SEC = 1.0
+
+# Stat signature of a file: (size, mtime_ns). Cheap to collect every poll, no extra dependency.
+FileSignature = Tuple[int, int]
+
+
+class ProfileDiff:
+    """Names of the profile entries that differ between two profile snapshots."""
+
+    __slots__ = ("settings_changed", "regions_added", "regions_removed", "regions_changed", "templates_added", "templates_removed", "templates_changed", "rules_added", "rules_removed", "rules_changed", "other_changed")
+
+    def __init__(self):
+        self.settings_changed: Set[str] = set()
+        self.regions_added: Set[str] = set()
+        self.regions_removed: Set[str] = set()
+        self.regions_changed: Set[str] = set()
+        self.templates_added: Set[str] = set()  # Template filenames
+        self.templates_removed: Set[str] = set()
+        self.templates_changed: Set[str] = set()  # Entry edited, or image file changed on disk
+        self.rules_added: Set[str] = set()
+        self.rules_removed: Set[str] = set()
+        self.rules_changed: Set[str] = set()
+        self.other_changed: Set[str] = set()  # Other top-level keys, e.g. profile_description
+
+    @property
+    def rules_affected(self) -> Set[str]:
+        return self.rules_added | self.rules_removed | self.rules_changed
+
+    @property
+    def regions_affected(self) -> Set[str]:
+        return self.regions_added | self.regions_removed | self.regions_changed
+
+    def is_empty(self) -> bool:
+        return not any(getattr(self, field) for field in self.__slots__)
+
+    def summary(self) -> str:
+        parts = []
+        for field in self.__slots__:
+            names = getattr(self, field)
+            if names:
+                parts.append(f"{field}={sorted(names)}")
+        return ", ".join(parts) or "no changes"
+
+
+def _index_by_key(items: Any, key: str) -> Dict[str, Any]:
+    index: Dict[str, Any] = {}
+    for i, item in enumerate(items or []):
+        if isinstance(item, dict):
+            index.setdefault(str(item.get(key) or f"#{i}"), item)
+    return index
+
+
+def _diff_named(old_items: Any, new_items: Any, key: str) -> Tuple[Set[str], Set[str], Set[str]]:
+    old_index, new_index = _index_by_key(old_items, key), _index_by_key(new_items, key)
+    added = set(new_index) - set(old_index)
+    removed = set(old_index) - set(new_index)
+    changed = {name for name in set(old_index) & set(new_index) if old_index[name] != new_index[name]}
+    return added, removed, changed
+
+
+def diff_profiles(old_profile: Dict[str, Any], new_profile: Dict[str, Any], changed_template_files: Optional[Set[str]] = None) -> ProfileDiff:
+    """Compares two profiles entry by entry. Regions and rules are matched by name, templates by filename."""
+    diff = ProfileDiff()
+    old_settings, new_settings = old_profile.get("settings", {}) or {}, new_profile.get("settings", {}) or {}
+    diff.settings_changed = {key for key in set(old_settings) | set(new_settings) if old_settings.get(key) != new_settings.get(key)}
+    diff.regions_added, diff.regions_removed, diff.regions_changed = _diff_named(old_profile.get("regions"), new_profile.get("regions"), "name")
+    diff.templates_added, diff.templates_removed, diff.templates_changed = _diff_named(old_profile.get("templates"), new_profile.get("templates"), "filename")
+    diff.rules_added, diff.rules_removed, diff.rules_changed = _diff_named(old_profile.get("rules"), new_profile.get("rules"), "name")
+    if changed_template_files:
+        # Files replaced on disk under an unchanged profile entry (or referenced directly by rules)
+        diff.templates_changed |= set(changed_template_files) - diff.templates_added - diff.templates_removed
+    diff.other_changed = {
+        key for key in (set(old_profile) | set(new_profile)) - {"settings", "regions", "templates", "rules"} if old_profile.get(key) != new_profile.get(key)
+    }
+    return diff
+
+
+class ProfileFileWatcher:
+    """
+    Polls the stat signatures of a profile JSON file and the files in its templates/ folder.
+
+    `poll()` reports a change only once the new signatures have been seen on two consecutive
+    polls, so a file that an editor is still writing is not picked up half-saved.
+    """
+
+    def __init__(self, profile_path: str, poll_interval_sec: float = DEFAULT_HOT_RELOAD_POLL_INTERVAL_SEC):
+        self.profile_path = profile_path
+        self.templates_dir = os.path.join(os.path.dirname(profile_path), TEMPLATES_SUBDIR_NAME)
+        self.poll_interval_sec = max(0.0, float(poll_interval_sec))
+        self._applied_signatures = self._collect_signatures()
+        self._pending_signatures: Optional[Dict[str, Optional[FileSignature]]] = None
+        self._last_poll_time = time.monotonic()
+        self.changed_template_files: Set[str] = set()  # Set by poll() when it reports a change
+
+    def _collect_signatures(self) -> Dict[str, Optional[FileSignature]]:
+        signatures: Dict[str, Optional[FileSignature]] = {"": self._signature(self.profile_path)}
+        if os.path.isdir(self.templates_dir):
+            for template_filename in os.listdir(self.templates_dir):
+                signatures[template_filename] = self._signature(os.path.join(self.templates_dir, template_filename))
+        return signatures
+
+    @staticmethod
+    def _signature(path: str) -> Optional[FileSignature]:
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return None
+        return (stat_result.st_size, stat_result.st_mtime_ns)
+
+    def poll(self, force: bool = False) -> bool:
+        """Returns True when the profile or a template file changed and has since stopped changing."""
+        now = time.monotonic()
+        if not force and now - self._last_poll_time < self.poll_interval_sec:
+            return False
+        self._last_poll_time = now
+        current_signatures = self._collect_signatures()
+        if current_signatures == self._applied_signatures:
+            self._pending_signatures = None
+            return False
+        if current_signatures != self._pending_signatures:
+            self._pending_signatures = current_signatures  # Wait one more poll for the write to finish
+            return False
+        self.changed_template_files = {
+            name for name in set(current_signatures) | set(self._applied_signatures) if name and current_signatures.get(name) != self._applied_signatures.get(name)
+        }
+        self._applied_signatures, self._pending_signatures = current_signatures, None
+        return True
+
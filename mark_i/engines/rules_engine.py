@@ -1,6 +1,9 @@
+import json  # For placeholder detection in whole condition specs
 import logging
 import os  # For os.linesep in log formatting and path joining
 import re  # For variable substitution regex
+import threading  # For the per-rule statistics lock
+import time  # For timing governed rule evaluations
 from typing import Dict, List, Any, Optional, Tuple, Set, Callable  # Standard typing imports
 from collections import defaultdict  # For _analysis_requirements_per_region
 
@@ -8,11 +11,17 @@ import cv2  # For image operations if any (e.g. loading templates)
 import numpy as np  # For image data type
 
 from mark_i.core.config_manager import ConfigManager
-from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+from mark_i.core.flight_recorder import FlightRecorder
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME, hot_path_log_enabled
+from mark_i.core.tracing import trace_span
 from mark_i.engines.analysis_engine import AnalysisEngine
 from mark_i.engines.action_executor import ActionExecutor
-from mark_i.engines.gemini_analyzer import GeminiAnalyzer  # For gemini_vision_query (via evaluator)
+from mark_i.engines.action_dispatcher import ActionDispatcher
+from mark_i.engines.cycle_budget import CycleBudgetGovernor, DEFAULT_RULE_PRIORITY, higher_priority, rule_priority
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer, gemini_analyzer_options_from_settings  # For gemini_vision_query (via evaluator)
+from mark_i.engines.gemini_cassette import gemini_replay_active
 from mark_i.engines.gemini_decision_module import GeminiDecisionModule  # For gemini_perform_task
+from mark_i.engines.profile_reloader import ProfileDiff
 
 # Import new evaluator classes
 from mark_i.engines.condition_evaluators import (
@@ -25,6 +34,9 @@ from mark_i.engines.condition_evaluators import (
     GeminiVisionQueryEvaluator,
     AlwaysTrueEvaluator,
     ConditionEvaluationResult,  # Import the result class
+    FRESHNESS_STALE_WHILE_REVALIDATE,
+    GEMINI_BATCHED_RESPONSES_KEY,
+    gemini_query_batch_key,
 )
 
 
@@ -36,6 +48,113 @@ logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.rules_engine")
 PLACEHOLDER_REGEX = re.compile(r"\{([\w_]+)((?:\.[\w\d_]+)*)\}")
 TEMPLATES_SUBDIR_NAME = "templates"  # Standard subdirectory for template images
 
+# Condition types whose local analysis MainController pre-computes once per region per cycle
+LOCAL_ANALYSIS_FOR_CONDITION_TYPE: Dict[str, str] = {"ocr_contains_text": "ocr", "dominant_color_matches": "dominant_color", "average_color_is": "average_color"}
+
+# Condition types skipped in degraded cycles (see FixedRateScheduler's "degrade" overrun policy)
+EXPENSIVE_CONDITION_TYPES = frozenset({"ocr_contains_text", "dominant_color_matches", "gemini_vision_query"})
+
+
+def rule_condition_types(rule_config: Dict[str, Any]) -> Set[str]:
+    """Condition types a rule uses, including those of its sub-conditions."""
+    condition = rule_config.get("condition") if isinstance(rule_config, dict) else None
+    if not isinstance(condition, dict):
+        return set()
+    cond_specs = [condition] + [c for c in condition.get("sub_conditions", []) if isinstance(c, dict)]
+    return {str(c["type"]) for c in cond_specs if c.get("type")}
+
+
+def build_analysis_priorities(rules: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """Region -> local analysis -> highest priority among the rules that need it (see CycleBudgetGovernor)."""
+    priorities: Dict[str, Dict[str, str]] = defaultdict(dict)
+    for rule in rules:
+        if not isinstance(rule, dict) or not isinstance(rule.get("condition"), dict):
+            continue
+        priority = rule_priority(rule)
+        condition = rule["condition"]
+        for cond_spec in [condition] + [c for c in condition.get("sub_conditions", []) if isinstance(c, dict)]:
+            analysis = LOCAL_ANALYSIS_FOR_CONDITION_TYPE.get(cond_spec.get("type"))
+            region_name = cond_spec.get("region", rule.get("region"))
+            if analysis and isinstance(region_name, str):
+                priorities[region_name][analysis] = higher_priority(priorities[region_name].get(analysis, priority), priority)
+    return dict(priorities)
+
+
+def referenced_template_filenames(profile_data: Dict[str, Any]) -> List[str]:
+    """Template files named in the 'templates' list or directly by template_match_found conditions."""
+    filenames: List[str] = []
+    for template in profile_data.get("templates", []):
+        if isinstance(template, dict) and template.get("filename"):
+            filenames.append(str(template["filename"]))
+    for rule in profile_data.get("rules", []):
+        condition = rule.get("condition") if isinstance(rule, dict) else None
+        if not isinstance(condition, dict):
+            continue
+        for cond_spec in [condition] + [c for c in condition.get("sub_conditions", []) if isinstance(c, dict)]:
+            if cond_spec.get("type") == "template_match_found" and cond_spec.get("template_filename"):
+                filenames.append(str(cond_spec["template_filename"]))
+    return list(dict.fromkeys(filenames))  # Unique, in first-seen order
+
+
+def build_rule_analysis_plan(rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Walks the rules once and returns the JSON-serialisable "rule plan":
+    - 'analysis_requirements': region -> sorted local analyses ('ocr', 'dominant_color',
+      'average_color') to pre-compute each cycle.
+    - 'batchable_gemini_prompts': region -> model override ("" = default) -> static
+      `gemini_vision_query` prompt -> names of the rules asking it. Only questions every
+      evaluation of the rule reaches are listed (the whole condition, or the first
+      sub-condition), so a batch never pays for a question an AND/OR would short-circuit.
+    """
+    analysis_requirements: Dict[str, Set[str]] = defaultdict(set)
+    batchable_gemini_prompts: Dict[str, Dict[str, Dict[str, List[str]]]] = defaultdict(dict)
+
+    for i, rule in enumerate(rules or []):
+        rule_name = rule.get("name", f"RuleIdx{i}")
+        default_rule_region = rule.get("region")
+        condition_spec_outer = rule.get("condition")
+        if not isinstance(condition_spec_outer, dict):
+            continue
+
+        # (spec, region, always reached): later sub-conditions may be short-circuited by the AND/OR
+        conditions_to_parse: List[Tuple[Dict[str, Any], Optional[str], bool]] = []
+        if "logical_operator" in condition_spec_outer and isinstance(condition_spec_outer.get("sub_conditions"), list):
+            for sub_cond_index, sub_cond in enumerate(condition_spec_outer["sub_conditions"]):
+                if isinstance(sub_cond, dict):
+                    sub_cond_region = sub_cond.get("region", default_rule_region)
+                    conditions_to_parse.append((sub_cond, sub_cond_region, sub_cond_index == 0))
+        elif "type" in condition_spec_outer:
+            single_cond_region = condition_spec_outer.get("region", default_rule_region)
+            conditions_to_parse.append((condition_spec_outer, single_cond_region, True))
+
+        for cond_spec, target_rgn, always_reached in conditions_to_parse:
+            if not target_rgn or not isinstance(target_rgn, str):
+                continue
+            cond_type = cond_spec.get("type")
+            local_analysis_needed = LOCAL_ANALYSIS_FOR_CONDITION_TYPE.get(cond_type)
+            if local_analysis_needed:
+                analysis_requirements[target_rgn].add(local_analysis_needed)
+            if cond_type == "gemini_vision_query":
+                # Only specs fully known before the cycle starts can be batched: placeholders depend on
+                # variables captured during evaluation, and stale-while-revalidate specs refresh on their own schedule.
+                if not cond_spec.get("prompt") or cond_spec.get("freshness") == FRESHNESS_STALE_WHILE_REVALIDATE:
+                    continue
+                if not always_reached:
+                    logger.debug(f"R '{rule_name}': gemini_vision_query is gated by earlier sub-conditions; it will be queried on its own if reached, not batched.")
+                    continue
+                if PLACEHOLDER_REGEX.search(json.dumps(cond_spec, default=str)):
+                    logger.debug(f"R '{rule_name}': gemini_vision_query uses placeholders; it will be queried on its own, not batched.")
+                    continue
+                model_key, prompt_str = gemini_query_batch_key(cond_spec)
+                rules_asking = batchable_gemini_prompts[target_rgn].setdefault(model_key, {}).setdefault(prompt_str, [])
+                if rule_name not in rules_asking:
+                    rules_asking.append(rule_name)
+
+    return {
+        "analysis_requirements": {region_name: sorted(analyses) for region_name, analyses in analysis_requirements.items()},
+        "batchable_gemini_prompts": dict(batchable_gemini_prompts),
+    }
+
 
 class RulesEngine:
     """
@@ -51,7 +170,14 @@ class RulesEngine:
     """
 
     def __init__(
-        self, config_manager: ConfigManager, analysis_engine: AnalysisEngine, action_executor: ActionExecutor, gemini_decision_module: Optional[GeminiDecisionModule] = None  # For NLU tasks
+        self,
+        config_manager: ConfigManager,
+        analysis_engine: AnalysisEngine,
+        action_executor: ActionExecutor,
+        gemini_decision_module: Optional[GeminiDecisionModule] = None,  # For NLU tasks
+        action_dispatcher: Optional[ActionDispatcher] = None,  # Runs standard actions off the monitoring thread
+        rule_plan: Optional[Dict[str, Any]] = None,  # Precomputed build_rule_analysis_plan() output
+        preloaded_templates: Optional[Dict[str, np.ndarray]] = None,  # Template filename -> decoded image
     ):
         """
         Initializes the RulesEngine.
@@ -62,6 +188,12 @@ class RulesEngine:
             action_executor: Instance of ActionExecutor for performing standard actions.
             gemini_decision_module: Optional instance of GeminiDecisionModule for
                                     handling 'gemini_perform_task' actions.
+            action_dispatcher: Optional ActionDispatcher. When given, standard actions are
+                               queued to its worker thread instead of run inline.
+            rule_plan: Optional. A plan from `build_rule_analysis_plan` (e.g. from a compiled
+                       profile), so the rules are not walked again at startup.
+            preloaded_templates: Optional. Already decoded template images keyed by filename,
+                                 so the first matches do not read and decode image files.
         """
         if not isinstance(config_manager, ConfigManager):  # pragma: no cover
             raise ValueError("RulesEngine requires a valid ConfigManager instance.")
@@ -74,20 +206,34 @@ class RulesEngine:
         self.analysis_engine = analysis_engine
         self.action_executor = action_executor
         self.gemini_decision_module = gemini_decision_module  # Store instance
+        self.action_dispatcher = action_dispatcher
 
-        self.profile_data = self.config_manager.get_profile_data()  # Get a copy
+        self.profile_data = self.config_manager.get_profile_data()  # Read-only snapshot
         self.rules: List[Dict[str, Any]] = self.profile_data.get("rules", [])
 
+        self._rule_plan = rule_plan
         self._loaded_templates: Dict[Tuple[str, str], Optional[np.ndarray]] = {}
+        profile_base_for_templates = self.config_manager.get_profile_base_path()
+        if preloaded_templates and profile_base_for_templates:
+            for template_filename, template_image in preloaded_templates.items():
+                self._loaded_templates[(profile_base_for_templates, template_filename)] = template_image
         self._last_template_match_info: Dict[str, Any] = {"found": False}
         self._analysis_requirements_per_region: Dict[str, Set[str]] = defaultdict(set)
+        # Region -> model override ("" = default) -> static prompt that can share one Gemini request per cycle -> rules asking it
+        self._batchable_gemini_prompts_per_region: Dict[str, Dict[str, Dict[str, List[str]]]] = defaultdict(dict)
         self._parse_rule_analysis_dependencies()
+        self._analysis_priorities = build_analysis_priorities(self.rules)
+        # Rule name -> {"evaluations", "matches", "evaluation_seconds"}, read by the metrics endpoint of 'mark_i serve'
+        self._rule_stats: Dict[str, Dict[str, float]] = {}
+        self._rule_stats_lock = threading.Lock()
 
         gemini_api_key_from_env = os.getenv("GEMINI_API_KEY")
         default_gemini_model_from_settings = self.config_manager.get_setting("gemini_default_model_name", "gemini-1.5-flash-latest")
         self.gemini_analyzer_for_query: Optional[GeminiAnalyzer] = None
-        if gemini_api_key_from_env:  # pragma: no branch
-            self.gemini_analyzer_for_query = GeminiAnalyzer(api_key=gemini_api_key_from_env, default_model_name=default_gemini_model_from_settings)
+        if gemini_api_key_from_env or gemini_replay_active():  # pragma: no branch
+            self.gemini_analyzer_for_query = GeminiAnalyzer(
+                api_key=gemini_api_key_from_env, default_model_name=default_gemini_model_from_settings, **gemini_analyzer_options_from_settings(self.config_manager.get_setting)
+            )
             if not self.gemini_analyzer_for_query.client_initialized:  # pragma: no cover
                 logger.warning("RulesEngine: GeminiAnalyzer (for query conditions) failed API client initialization. `gemini_vision_query` conditions will likely fail.")
                 self.gemini_analyzer_for_query = None
@@ -139,42 +285,125 @@ class RulesEngine:
 
     def _parse_rule_analysis_dependencies(self):  # pragma: no cover
         logger.debug("RulesEngine: Parsing rule analysis dependencies for pre-emptive local analyses...")
-        if not self.rules:
-            return
+        if self._rule_plan is not None:
+            rule_plan = self._rule_plan  # Precomputed by `mark_i compile` (see profile_compiler)
+        else:
+            rule_plan = build_rule_analysis_plan(self.rules)
+        for region_name, analyses in rule_plan.get("analysis_requirements", {}).items():
+            self._analysis_requirements_per_region[region_name].update(analyses)
+        for region_name, prompts_per_model in rule_plan.get("batchable_gemini_prompts", {}).items():
+            for model_key, rules_per_prompt in prompts_per_model.items():
+                prompts_for_model = self._batchable_gemini_prompts_per_region[region_name].setdefault(model_key, {})
+                for prompt_str, rule_names in rules_per_prompt.items():
+                    rules_asking = prompts_for_model.setdefault(prompt_str, [])
+                    rules_asking.extend(r for r in rule_names if r not in rules_asking)
+
+    def apply_profile_update(self, profile_diff: ProfileDiff) -> None:
+        """
+        Switches to the ConfigManager's current profile snapshot after a hot reload, between
+        monitoring cycles. Only state tied to what changed is rebuilt: the rule plan when rules
+        changed, cached template images whose entry or file changed, and cached Gemini results
+        of edited/removed rules. Everything else (other templates, evaluator and Gemini clients)
+        stays warm.
+        """
+        self.profile_data = self.config_manager.get_profile_data()
+        self.rules = self.profile_data.get("rules", [])
+
+        stale_template_filenames = profile_diff.templates_changed | profile_diff.templates_removed
+        for cache_key in [k for k in self._loaded_templates if k[1] in stale_template_filenames]:
+            del self._loaded_templates[cache_key]
+
+        if profile_diff.rules_affected:
+            self._rule_plan = None  # A compiled plan no longer matches the rules
+            self._analysis_requirements_per_region.clear()
+            self._batchable_gemini_prompts_per_region.clear()
+            self._parse_rule_analysis_dependencies()
+            self._analysis_priorities = build_analysis_priorities(self.rules)
+            stale_rule_names = profile_diff.rules_changed | profile_diff.rules_removed
+            with self._rule_stats_lock:
+                for removed_rule_name in profile_diff.rules_removed:
+                    self._rule_stats.pop(removed_rule_name, None)
+            for evaluator in self._condition_evaluators.values():
+                if isinstance(evaluator, GeminiVisionQueryEvaluator):
+                    evaluator.discard_cached_results(stale_rule_names)
+        logger.info(f"RulesEngine: Profile update applied ({len(self.rules)} rules). Templates reloaded lazily: {sorted(stale_template_filenames) or 'none'}.")
+
+    def preload_templates(self, should_stop: Optional[Callable[[], bool]] = None) -> Tuple[int, int]:
+        """
+        Loads every template the profile references into the template cache (startup warm-up).
+        Stops early once `should_stop()` is true. Returns (loaded, unavailable).
+        """
+        loaded_count, unavailable_count = 0, 0
+        for template_filename in referenced_template_filenames(self.profile_data):
+            if should_stop is not None and should_stop():
+                break
+            if self._load_template_image_for_rule(template_filename, "warm-up") is not None:
+                loaded_count += 1
+            else:
+                unavailable_count += 1
+        return loaded_count, unavailable_count
 
-        for i, rule in enumerate(self.rules):
-            rule_name = rule.get("name", f"RuleIdx{i}")
-            default_rule_region = rule.get("region")
-            condition_spec_outer = rule.get("condition")
-            if not isinstance(condition_spec_outer, dict):
+    def _prefetch_batched_gemini_queries(self, all_region_data: Dict[str, Dict[str, Any]], rule_will_run: Optional[Callable[[str], bool]] = None):
+        """
+        Sends one Gemini request per region (and model) for the static `gemini_vision_query`
+        questions about that region that this cycle will evaluate, storing each answer in the
+        region's data packet so the evaluators can use their own slice instead of making
+        separate calls. A question is only included if `rule_will_run` accepts one of the rules
+        asking it. Questions that were not answered fall back to an individual query at
+        evaluation time.
+        """
+        if not self.gemini_analyzer_for_query or not self._batchable_gemini_prompts_per_region:
+            return
+        if not self.config_manager.get_setting("gemini_batch_vision_queries", True):
+            return
+        for region_name, prompts_per_model in self._batchable_gemini_prompts_per_region.items():
+            region_data_packet = all_region_data.get(region_name)
+            if not region_data_packet or region_data_packet.get("image") is None:
                 continue
-
-            conditions_to_parse: List[Tuple[Dict[str, Any], Optional[str]]] = []
-            if "logical_operator" in condition_spec_outer and isinstance(condition_spec_outer.get("sub_conditions"), list):
-                for sub_cond in condition_spec_outer["sub_conditions"]:
-                    if isinstance(sub_cond, dict):
-                        sub_cond_region = sub_cond.get("region", default_rule_region)
-                        conditions_to_parse.append((sub_cond, sub_cond_region))
-            elif "type" in condition_spec_outer:
-                single_cond_region = condition_spec_outer.get("region", default_rule_region)
-                conditions_to_parse.append((condition_spec_outer, single_cond_region))
-
-            for cond_spec, target_rgn in conditions_to_parse:
-                cond_type = cond_spec.get("type")
-                local_analysis_needed: Optional[str] = None
-                if cond_type == "ocr_contains_text":
-                    local_analysis_needed = "ocr"
-                elif cond_type == "dominant_color_matches":
-                    local_analysis_needed = "dominant_color"
-                elif cond_type == "average_color_is":
-                    local_analysis_needed = "average_color"
-
-                if local_analysis_needed and target_rgn and isinstance(target_rgn, str):
-                    self._analysis_requirements_per_region[target_rgn].add(local_analysis_needed)
+            for model_key, rules_per_prompt in prompts_per_model.items():
+                prompts = [p for p, rule_names in rules_per_prompt.items() if rule_will_run is None or any(rule_will_run(r) for r in rule_names)]
+                if len(prompts) < 2:  # A single question gains nothing from batching
+                    continue
+                logger.info(f"RulesEngine: Batching {len(prompts)} Gemini questions for region '{region_name}' (Model: '{model_key or 'default'}') into one request.")
+                batch_result = self.gemini_analyzer_for_query.query_vision_model_batch(prompts, region_data_packet["image"], model_name_override=model_key or None)
+                if batch_result.get("status") != "success":
+                    logger.warning(f"RulesEngine: Batched Gemini request for region '{region_name}' failed ({batch_result.get('status')}). Conditions will be queried individually.")
+                    continue
+                batched_responses = region_data_packet.setdefault(GEMINI_BATCHED_RESPONSES_KEY, {})
+                for prompt_str, response in zip(prompts, batch_result.get("responses", [])):
+                    if response is not None:
+                        batched_responses[(model_key, prompt_str)] = response
 
     def get_analysis_requirements_for_region(self, region_name: str) -> Set[str]:  # pragma: no cover
         return self._analysis_requirements_per_region.get(region_name, set())
 
+    def get_analysis_priority(self, region_name: str, analysis_name: str) -> str:
+        """Priority of a pre-emptive analysis: the highest priority among the rules that need it."""
+        return self._analysis_priorities.get(region_name, {}).get(analysis_name, DEFAULT_RULE_PRIORITY)
+
+    @staticmethod
+    def _uses_deferred_analysis(rule_config: Dict[str, Any], all_region_data: Dict[str, Dict[str, Any]]) -> bool:
+        """True if a condition of the rule needs a local analysis the budget governor deferred this cycle."""
+        condition = rule_config.get("condition")
+        for cond_spec in [condition] + [c for c in condition.get("sub_conditions", []) if isinstance(c, dict)]:
+            analysis = LOCAL_ANALYSIS_FOR_CONDITION_TYPE.get(cond_spec.get("type"))
+            region_packet = all_region_data.get(cond_spec.get("region", rule_config.get("region")), None) if analysis else None
+            if isinstance(region_packet, dict) and analysis in region_packet.get("deferred_analyses", ()):
+                return True
+        return False
+
+    def _record_rule_evaluation(self, rule_name: str, condition_is_met: bool, duration_sec: float) -> None:
+        with self._rule_stats_lock:
+            rule_stats = self._rule_stats.setdefault(rule_name, {"evaluations": 0, "matches": 0, "evaluation_seconds": 0.0})
+            rule_stats["evaluations"] += 1
+            rule_stats["matches"] += int(bool(condition_is_met))
+            rule_stats["evaluation_seconds"] += duration_sec
+
+    def get_rule_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-rule evaluation count, match count and total condition evaluation time since startup."""
+        with self._rule_stats_lock:
+            return {rule_name: dict(rule_stats) for rule_name, rule_stats in self._rule_stats.items()}
+
     def _load_template_image_for_rule(self, template_filename: str, rule_name_for_context: str) -> Optional[np.ndarray]:  # pragma: no cover
         profile_base = self.config_manager.get_profile_base_path()
         if not profile_base:
@@ -272,7 +501,9 @@ class RulesEngine:
             return False
 
         try:
-            eval_result: ConditionEvaluationResult = evaluator.evaluate(single_condition_spec, region_name, region_data_packet, rule_name_for_context)
+            with trace_span(condition_type, "condition", rule=rule_name_for_context, region=region_name) as condition_span:
+                eval_result: ConditionEvaluationResult = evaluator.evaluate(single_condition_spec, region_name, region_data_packet, rule_name_for_context)
+                condition_span.set_arg("met", eval_result.met)
             condition_met = eval_result.met
             captured_value_for_context = eval_result.captured_value
             if eval_result.template_match_info is not None:
@@ -328,16 +559,64 @@ class RulesEngine:
                 return False
             return self._evaluate_single_condition_logic(condition_spec_substituted, target_region_for_single_cond, all_region_data[target_region_for_single_cond], rule_name, variable_context)
 
-    def evaluate_rules(self, all_region_data: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:  # pragma: no cover
+    def evaluate_rules(
+        self,
+        all_region_data: Dict[str, Dict[str, Any]],
+        skip_condition_types: Optional[Set[str]] = None,
+        budget_governor: Optional[CycleBudgetGovernor] = None,
+        flight_recorder: Optional[FlightRecorder] = None,
+    ) -> List[Dict[str, Any]]:  # pragma: no cover
+        """
+        Evaluates all rules against this cycle's region data and runs the actions of those that match.
+
+        Args:
+            all_region_data: Region name -> data packet (image and pre-emptive analyses).
+            skip_condition_types: Optional. Rules using any of these condition types are not
+                                  evaluated this cycle (degraded cycles skip EXPENSIVE_CONDITION_TYPES).
+            budget_governor: Optional. Rules with expensive conditions are only evaluated if the
+                             governor allows it, and rules whose local analysis it deferred are skipped.
+            flight_recorder: Optional. Receives each rule's condition outcome, captured variables
+                             and action; a rule with "flight_recorder_dump": true makes it write a dump.
+        """
         explicitly_executed_standard_actions: List[Dict[str, Any]] = []
         if not self.rules:
             logger.debug("RulesEngine: No rules in profile to evaluate.")
             return explicitly_executed_standard_actions
 
-        logger.info(f"RulesEngine: Evaluating {len(self.rules)} rules for current cycle.")
+        logger.info("RulesEngine: Evaluating %d rules for current cycle.", len(self.rules))
+        # Rule name -> the governor's answer for this cycle. Rules in the Gemini batch are decided
+        # before it is sent, so a deferred rule's question is not paid for.
+        governor_decisions: Dict[str, bool] = {}
+
+        def _governor_allows(rule_name: str, rule_config: Dict[str, Any]) -> bool:
+            if budget_governor is None or not rule_condition_types(rule_config) & EXPENSIVE_CONDITION_TYPES:
+                return True
+            if rule_name not in governor_decisions:
+                governor_decisions[rule_name] = budget_governor.allow(("rule", rule_name), rule_priority(rule_config))
+            return governor_decisions[rule_name]
+
+        if budget_governor is not None:
+            for rule_config in self.rules:
+                if not (skip_condition_types and rule_condition_types(rule_config) & skip_condition_types):
+                    budget_governor.note_work(rule_priority(rule_config))
+        if not skip_condition_types or "gemini_vision_query" not in skip_condition_types:
+            rules_by_name = {rule_config.get("name", f"RuleIdx{rule_idx}"): rule_config for rule_idx, rule_config in enumerate(self.rules)}
+
+            def _rule_will_run(rule_name: str) -> bool:
+                rule_config = rules_by_name.get(rule_name)
+                if rule_config is None or (skip_condition_types and rule_condition_types(rule_config) & skip_condition_types):
+                    return False
+                if budget_governor is not None and self._uses_deferred_analysis(rule_config, all_region_data):
+                    return False
+                return _governor_allows(rule_name, rule_config)
+
+            self._prefetch_batched_gemini_queries(all_region_data, _rule_will_run)
         for rule_idx, rule_config in enumerate(self.rules):
             rule_name = rule_config.get("name", f"RuleIdx{rule_idx}")
             log_prefix_reval = f"R '{rule_name}'"
+            if skip_condition_types and rule_condition_types(rule_config) & skip_condition_types:
+                logger.debug("%s: Skipped this cycle (uses %s).", log_prefix_reval, sorted(rule_condition_types(rule_config) & skip_condition_types))
+                continue
             original_condition_spec = rule_config.get("condition")
             original_action_spec = rule_config.get("action")
             default_rule_region_name = rule_config.get("region")
@@ -345,18 +624,43 @@ class RulesEngine:
             if not (isinstance(original_condition_spec, dict) and isinstance(original_action_spec, dict)):
                 logger.warning(f"{log_prefix_reval}: Invalid or missing condition/action spec. Skipping rule.")
                 continue
+            governed_rule_key = None
+            if budget_governor is not None:
+                if self._uses_deferred_analysis(rule_config, all_region_data):
+                    logger.debug("%s: Deferred this cycle (its analysis was deferred by the cycle budget governor).", log_prefix_reval)
+                    continue
+                if rule_condition_types(rule_config) & EXPENSIVE_CONDITION_TYPES:
+                    governed_rule_key = ("rule", rule_name)
+                    if not _governor_allows(rule_name, rule_config):
+                        logger.debug("%s: Deferred this cycle by the cycle budget governor.", log_prefix_reval)
+                        continue
 
             self._last_template_match_info = {"found": False}
             rule_variable_context: Dict[str, Any] = {}
 
             try:
+                condition_start_time = time.perf_counter()
                 condition_is_met = self._check_condition(rule_name, original_condition_spec, default_rule_region_name, all_region_data, rule_variable_context)
+                condition_duration_sec = time.perf_counter() - condition_start_time
+                self._record_rule_evaluation(rule_name, condition_is_met, condition_duration_sec)
+                if flight_recorder is not None:
+                    flight_recorder.record("condition", rule_name, condition_is_met, condition_duration_sec * 1000.0)
+                    if condition_is_met and rule_variable_context:
+                        flight_recorder.record("variables", rule_name, dict(rule_variable_context))
+                    if condition_is_met and rule_config.get("flight_recorder_dump"):
+                        flight_recorder.record("marker", rule_name)
+                        flight_recorder.request_dump(f"rule-{rule_name}")
+                if governed_rule_key is not None:
+                    budget_governor.record_cost(governed_rule_key, condition_duration_sec)  # type: ignore[union-attr]
                 if condition_is_met:
                     action_type_from_spec_orig = original_action_spec.get("type")
-                    logger.info(f"{log_prefix_reval}: Condition MET. Preparing action of type '{action_type_from_spec_orig}'.")
+                    logger.info("%s: Condition MET. Preparing action of type '%s'.", log_prefix_reval, action_type_from_spec_orig)
                     action_spec_substituted = self._substitute_variables(original_action_spec, rule_variable_context, f"{rule_name}/ActionSubst")
                     final_action_type = action_spec_substituted.get("type")
-                    logger.debug(f"{log_prefix_reval}, Action Prep: Substituted spec: {action_spec_substituted}. Variables captured: {rule_variable_context}")
+                    if flight_recorder is not None:
+                        flight_recorder.record("action", rule_name, final_action_type, action_spec_substituted)
+                    if hot_path_log_enabled(logger, logging.DEBUG):
+                        logger.debug("%s, Action Prep: Substituted spec: %s. Variables captured: %s", log_prefix_reval, action_spec_substituted, rule_variable_context)
 
                     if final_action_type == "gemini_perform_task":
                         if self.gemini_decision_module and self.gemini_decision_module.gemini_analyzer and self.gemini_decision_module.gemini_analyzer.client_initialized:
@@ -396,6 +700,8 @@ class RulesEngine:
                                         logger.error(f"{log_prefix_reval}, NLU Task: No valid images for context regions. Task fails.")
                                         can_run_nlu_task = False
                             if can_run_nlu_task:
+                                if self.action_dispatcher:  # NLU steps drive the mouse/keyboard directly; let queued actions finish first
+                                    self.action_dispatcher.wait_until_idle()
                                 logger.info(f"{log_prefix_reval}: Invoking GeminiDecisionModule for NLU command: '{nl_command[:70].replace(os.linesep, ' ')}...'")
                                 task_execution_result = self.gemini_decision_module.execute_nlu_task(
                                     task_rule_name=rule_name, natural_language_command=nl_command, initial_context_images=task_context_images, task_parameters=task_params_for_gdm
@@ -411,10 +717,18 @@ class RulesEngine:
                             "variables": rule_variable_context.copy(),
                         }
                         full_action_spec_for_executor = {**action_spec_substituted, "context": action_execution_context}
-                        logger.info(f"{log_prefix_reval}: Directly executing standard action type '{final_action_type}'.")
-                        self.action_executor.execute_action(full_action_spec_for_executor)
+                        if self.action_dispatcher:
+                            await_completion = bool(action_spec_substituted.get("await_completion", False))
+                            logger.info("%s: Dispatching standard action type '%s' (Await completion: %s).", log_prefix_reval, final_action_type, await_completion)
+                            self.action_dispatcher.submit(full_action_spec_for_executor, await_completion=await_completion)
+                        else:
+                            logger.info("%s: Directly executing standard action type '%s'.", log_prefix_reval, final_action_type)
+                            self.action_executor.execute_action(full_action_spec_for_executor)
                         explicitly_executed_standard_actions.append(full_action_spec_for_executor)
             except Exception as e_rule_eval:
                 logger.exception(f"{log_prefix_reval}: Unexpected error during rule evaluation or action dispatch: {e_rule_eval}")
-        logger.info(f"RulesEngine: Cycle finished. {len(explicitly_executed_standard_actions)} standard actions dispatched.")
+                if flight_recorder is not None:
+                    flight_recorder.record("error", rule_name, repr(e_rule_eval))
+                    flight_recorder.request_dump("exception")
+        logger.info("RulesEngine: Cycle finished. %d standard actions dispatched.", len(explicitly_executed_standard_actions))
         return explicitly_executed_standard_actions
\ No newline at end of file
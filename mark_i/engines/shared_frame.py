@@ -0,0 +1,119 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+from mark_i.engines.capture_engine import CaptureEngine
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.shared_frame")
+
+RegionGeometry = Tuple[int, int, int, int]  # x, y, width, height
+
+
+def region_geometry(region_spec: Dict[str, Any]) -> Optional[RegionGeometry]:
+    """(x, y, width, height) of a region spec, or None if it is not a valid capture rectangle."""
+    geometry = tuple(region_spec.get(key) for key in ("x", "y", "width", "height"))
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in geometry) or geometry[2] <= 0 or geometry[3] <= 0:
+        return None
+    return geometry  # type: ignore[return-value]
+
+
+def union_geometry(geometries: Iterable[RegionGeometry]) -> Optional[RegionGeometry]:
+    geometries = list(geometries)
+    if not geometries:
+        return None
+    left = min(g[0] for g in geometries)
+    top = min(g[1] for g in geometries)
+    right = max(g[0] + g[2] for g in geometries)
+    bottom = max(g[1] + g[3] for g in geometries)
+    return left, top, right - left, bottom - top
+
+
+class SharedTick:
+    """
+    The screen state of one supervisor tick, shared by every profile evaluated in it.
+
+    `capture_region` crops regions out of a single grab covering all of them, and
+    `analysis` computes each (region geometry, analysis) pair once per tick however many
+    profiles ask for it; concurrent requests for the same pair wait for the first one.
+    Crops are read-only, so no profile can alter what another one sees.
+    """
+
+    def __init__(self, frame: Optional[np.ndarray], frame_geometry: Optional[RegionGeometry], capture_engine: CaptureEngine):
+        self._frame = frame
+        self._frame_geometry = frame_geometry
+        self._capture_engine = capture_engine  # Fallback when the shared grab failed or a region lies outside it
+        self._crops: Dict[RegionGeometry, Optional[np.ndarray]] = {}
+        self._analyses: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"crops": 0, "crops_reused": 0, "analyses": 0, "analyses_reused": 0}
+
+    def _crop(self, geometry: RegionGeometry, region_spec: Dict[str, Any]) -> Optional[np.ndarray]:
+        if self._frame is not None and self._frame_geometry is not None:
+            frame_x, frame_y, frame_width, frame_height = self._frame_geometry
+            x, y, width, height = geometry
+            left, top = x - frame_x, y - frame_y
+            if left >= 0 and top >= 0 and left + width <= frame_width and top + height <= frame_height:
+                return np.ascontiguousarray(self._frame[top : top + height, left : left + width])
+        return self._capture_engine.capture_region(region_spec)
+
+    def capture_region(self, region_spec: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Same contract as CaptureEngine.capture_region, served from the shared frame."""
+        geometry = region_geometry(region_spec)
+        if geometry is None:
+            return self._capture_engine.capture_region(region_spec)  # Logs why the spec is invalid
+        with self._lock:
+            if geometry in self._crops:
+                self.stats["crops_reused"] += 1
+                return self._crops[geometry]
+        crop = self._crop(geometry, region_spec)
+        if crop is not None:
+            crop.flags.writeable = False
+        with self._lock:
+            crop = self._crops.setdefault(geometry, crop)
+            self.stats["crops"] += 1
+        return crop
+
+    def analysis(self, region_spec: Dict[str, Any], analysis_key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Result of `compute()` for this region geometry and `analysis_key` (which must include
+        every parameter the result depends on, e.g. the OCR config or k). Computed once per tick.
+        """
+        geometry = region_geometry(region_spec)
+        if geometry is None:
+            return compute()
+        memo_key = (geometry, analysis_key)
+        with self._lock:
+            future = self._analyses.get(memo_key)
+            is_owner = future is None
+            if is_owner:
+                future = self._analyses[memo_key] = Future()
+                self.stats["analyses"] += 1
+            else:
+                self.stats["analyses_reused"] += 1
+        if is_owner:
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+
+class SharedFrameCapture:
+    """Grabs one frame per tick covering the given regions and wraps it in a SharedTick."""
+
+    def __init__(self, capture_engine: Optional[CaptureEngine] = None):
+        self.capture_engine = capture_engine or CaptureEngine()
+
+    def grab(self, region_specs: Iterable[Dict[str, Any]]) -> SharedTick:
+        frame_geometry = union_geometry(g for g in (region_geometry(spec) for spec in region_specs) if g is not None)
+        frame = None
+        if frame_geometry is not None:
+            x, y, width, height = frame_geometry
+            frame = self.capture_engine.capture_region({"name": "shared_frame", "x": x, "y": y, "width": width, "height": height})
+            if frame is None:
+                logger.warning("SharedFrameCapture: Shared grab failed. Regions are captured one by one this tick.")
+        return SharedTick(frame, frame_geometry if frame is not None else None, self.capture_engine)
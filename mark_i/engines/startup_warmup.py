@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.startup_warmup")
+
+DEFAULT_WARMUP_TIMEOUT_SEC = 15.0
+DEFAULT_WARMUP_MAX_WORKERS = 4
+
+WARMUP_STATUS_OK = "ok"
+WARMUP_STATUS_SKIPPED = "skipped"
+WARMUP_STATUS_ERROR = "error"
+WARMUP_STATUS_TIMEOUT = "timeout"  # Not finished by the deadline: stopped early if it shares engine state, else it finishes in the background
+
+# A warm-up task returns a short detail string for the report. It raises on failure,
+# or raises WarmupSkipped when there turns out to be nothing to warm up.
+WarmupTask = Callable[[], Optional[str]]
+
+
+class WarmupSkipped(Exception):
+    """Raised by a warm-up task that has nothing to do (e.g. the profile has no OCR rules)."""
+
+
+class StartupWarmup:
+    """
+    Runs one-off initialisation tasks (template loads, first Tesseract spawn, SDK setup, first
+    screen grab) in parallel threads, so the first monitoring cycle runs at steady-state speed.
+
+    `ready` is set once every task has finished or the deadline has passed, whichever comes
+    first; `results` then holds the status and duration of each task.
+
+    Tasks added with `shares_engine_state=True` use engines the monitoring loop also uses
+    (template cache, capture). When the deadline passes, `cancelled` is set and `run()` waits
+    for those tasks to return, so they must check `cancelled` between their steps. Other tasks
+    only touch their own clients and are left to finish in the background.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WARMUP_MAX_WORKERS):
+        self.max_workers = max(1, int(max_workers))
+        self._tasks: List[Tuple[str, WarmupTask, bool]] = []
+        self.ready = threading.Event()
+        self.cancelled = threading.Event()
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.elapsed_ms: Optional[int] = None
+
+    def add_task(self, name: str, task: WarmupTask, shares_engine_state: bool = False) -> None:
+        self._tasks.append((name, task, shares_engine_state))
+
+    @property
+    def task_names(self) -> List[str]:
+        return [name for name, _, _ in self._tasks]
+
+    @staticmethod
+    def _run_task(task: WarmupTask) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        try:
+            detail = task()
+            status = WARMUP_STATUS_OK
+        except WarmupSkipped as e_skip:
+            status, detail = WARMUP_STATUS_SKIPPED, str(e_skip)
+        except Exception as e:
+            status, detail = WARMUP_STATUS_ERROR, f"{type(e).__name__}: {e}"
+        return {"status": status, "duration_ms": int((time.perf_counter() - start_time) * 1000), "detail": detail}
+
+    def run(self, timeout_sec: Optional[float] = DEFAULT_WARMUP_TIMEOUT_SEC) -> Dict[str, Dict[str, Any]]:
+        """Runs all tasks and waits for them up to `timeout_sec` (None: no deadline). Returns `results`."""
+        start_time = time.perf_counter()
+        if self._tasks:
+            executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(self._tasks)), thread_name_prefix="MarkIWarmup")
+            futures = {name: executor.submit(self._run_task, task) for name, task, _ in self._tasks}
+            wait(list(futures.values()), timeout=timeout_sec)
+            late_names = [name for name, future in futures.items() if not future.done()]
+            stopped_names = [name for name, _, shares_engine_state in self._tasks if shares_engine_state and name in late_names]
+            if late_names:
+                self.cancelled.set()
+                wait([futures[name] for name in stopped_names])  # They return at their next step; the loop must not race them
+            executor.shutdown(wait=False)  # Other tasks past the deadline keep running in the background
+            for name, future in futures.items():
+                if name in stopped_names:
+                    self.results[name] = {"status": WARMUP_STATUS_TIMEOUT, "duration_ms": None, "detail": f"stopped at the {timeout_sec}s deadline"}
+                elif name not in late_names:
+                    self.results[name] = future.result()
+                else:
+                    self.results[name] = {"status": WARMUP_STATUS_TIMEOUT, "duration_ms": None, "detail": f"not finished after {timeout_sec}s"}
+        self.elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+        self.ready.set()
+        return self.results
+
+    def format_report(self) -> str:
+        parts = []
+        for name in self.task_names:
+            result = self.results.get(name)
+            if result is None:
+                continue
+            duration = f"{result['duration_ms']}ms" if result["duration_ms"] is not None else "-"
+            detail = f" ({result['detail']})" if result.get("detail") else ""
+            parts.append(f"{name}={result['status']} {duration}{detail}")
+        return f"Warm-up finished in {self.elapsed_ms}ms: " + ("; ".join(parts) if parts else "no tasks")
@@ -0,0 +1,102 @@
+import logging
+import time
+from typing import Optional, Callable
+
+import cv2
+import numpy as np
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.visual_settle")
+
+DEFAULT_SETTLE_TIMEOUT_SEC = 2.0
+DEFAULT_POLL_INTERVAL_SEC = 0.05
+DEFAULT_STABLE_FRAMES = 2  # Consecutive unchanged frames required to call the screen settled
+# With a baseline, how long a region that still looks like the pre-action frame is given to react
+# before being accepted as settled. Keeps a slow UI from being reported settled before it starts changing.
+DEFAULT_UNCHANGED_MIN_WAIT_SEC = 0.5
+DEFAULT_PIXEL_TOLERANCE = 8  # Per-channel difference below which a pixel counts as unchanged (capture noise)
+# Fraction of pixels allowed to differ between frames while still counting as unchanged.
+# Absorbs small animations such as a blinking text caret.
+DEFAULT_CHANGED_FRACTION_THRESHOLD = 0.001
+
+
+class VisualSettleResult:
+    """Outcome of a settle wait."""
+
+    def __init__(self, settled: bool, changed: bool, elapsed_sec: float, frames_captured: int, last_image: Optional[np.ndarray]):
+        self.settled = settled  # True if the region stopped changing (or the expected change appeared) before the timeout
+        self.changed = changed  # True if any frame differed from the baseline
+        self.elapsed_sec = elapsed_sec
+        self.frames_captured = frames_captured
+        self.last_image = last_image  # Most recent capture, usable as fresh visual context
+
+
+def changed_pixel_fraction(image_a: np.ndarray, image_b: np.ndarray, pixel_tolerance: int = DEFAULT_PIXEL_TOLERANCE) -> float:
+    """Fraction of pixels whose largest per-channel difference exceeds `pixel_tolerance`. Shape mismatch counts as fully changed."""
+    if image_a.shape != image_b.shape:
+        return 1.0
+    diff = cv2.absdiff(image_a, image_b)
+    if diff.ndim == 3:
+        diff = diff.max(axis=2)
+    return float(np.count_nonzero(diff > pixel_tolerance)) / float(diff.size or 1)
+
+
+def wait_for_visual_settle(
+    capture_func: Callable[[], Optional[np.ndarray]],
+    timeout_sec: float = DEFAULT_SETTLE_TIMEOUT_SEC,
+    baseline_image: Optional[np.ndarray] = None,
+    expected_change_func: Optional[Callable[[np.ndarray], bool]] = None,
+    poll_interval_sec: float = DEFAULT_POLL_INTERVAL_SEC,
+    stable_frames: int = DEFAULT_STABLE_FRAMES,
+    pixel_tolerance: int = DEFAULT_PIXEL_TOLERANCE,
+    changed_fraction_threshold: float = DEFAULT_CHANGED_FRACTION_THRESHOLD,
+    unchanged_min_wait_sec: float = DEFAULT_UNCHANGED_MIN_WAIT_SEC,
+    log_prefix: str = "VisualSettle",
+) -> VisualSettleResult:
+    """
+    Re-captures a region at high frequency until its pixels stop changing.
+
+    Returns as soon as `stable_frames` consecutive captures match their predecessor, or
+    immediately when `expected_change_func(frame)` returns True. With a `baseline_image`
+    (typically the pre-action capture), a stable region only counts as settled once it differs
+    from the baseline or `unchanged_min_wait_sec` has passed, so an action whose effect takes a
+    moment to appear is not reported settled early. Capture failures are tolerated; on timeout
+    `settled` is False and the caller proceeds anyway.
+    """
+    start_time = time.perf_counter()
+    deadline = start_time + max(0.0, timeout_sec)
+    previous_frame: Optional[np.ndarray] = None
+    last_frame: Optional[np.ndarray] = None
+    stable_count = 0
+    frames_captured = 0
+    changed = False
+
+    while True:
+        frame = capture_func()
+        if frame is not None:
+            frames_captured += 1
+            last_frame = frame
+            if baseline_image is not None and not changed:
+                changed = changed_pixel_fraction(baseline_image, frame, pixel_tolerance) > changed_fraction_threshold
+            if expected_change_func is not None and expected_change_func(frame):
+                elapsed = time.perf_counter() - start_time
+                logger.debug(f"{log_prefix}: Expected change detected after {elapsed:.3f}s ({frames_captured} frames).")
+                return VisualSettleResult(True, True, elapsed, frames_captured, last_frame)
+            if previous_frame is not None and changed_pixel_fraction(previous_frame, frame, pixel_tolerance) <= changed_fraction_threshold:
+                stable_count += 1
+            else:
+                stable_count = 0
+            previous_frame = frame
+            elapsed = time.perf_counter() - start_time
+            may_settle_unchanged = baseline_image is None or elapsed >= unchanged_min_wait_sec
+            if stable_count >= stable_frames and expected_change_func is None and (changed or may_settle_unchanged):
+                logger.debug(f"{log_prefix}: Region settled after {elapsed:.3f}s ({frames_captured} frames, Changed: {changed}).")
+                return VisualSettleResult(True, changed, elapsed, frames_captured, last_frame)
+
+        now = time.perf_counter()
+        if now >= deadline:
+            elapsed = now - start_time
+            logger.info(f"{log_prefix}: Region did not settle within {timeout_sec:.2f}s ({frames_captured} frames). Continuing.")
+            return VisualSettleResult(False, changed, elapsed, frames_captured, last_frame)
+        time.sleep(min(poll_interval_sec, deadline - now))
@@ -8,7 +8,7 @@ import numpy as np  # For image data type hinting and saving
 from PIL import Image  # For potential image manipulations if needed by suggestions
 import cv2  # For cv2.imwrite
 
-from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer, scale_box_to_original
 from mark_i.core.config_manager import ConfigManager, TEMPLATES_SUBDIR_NAME  # Import TEMPLATES_SUBDIR_NAME
 from mark_i.generation.strategy_planner import IntermediatePlan, IntermediatePlanStep
 from mark_i.ui.gui.gui_config import CONDITION_TYPES as ALL_CONDITION_TYPES_FROM_CONFIG, ACTION_TYPES as ALL_ACTION_TYPES_FROM_CONFIG  # For validation
@@ -75,7 +75,7 @@ class ProfileGenerator:
         self.current_plan_step_index = -1  # Ready for first call to advance_to_next_plan_step
 
         self.config_manager_for_generated_profile._initialize_default_profile_data()
-        self.generated_profile_data = self.config_manager_for_generated_profile.get_profile_data()
+        self.generated_profile_data = self.config_manager_for_generated_profile.get_mutable_profile_data()
 
         self.generated_profile_data["profile_description"] = profile_description
         if initial_profile_settings and isinstance(initial_profile_settings, dict):
@@ -164,7 +164,7 @@ class ProfileGenerator:
                     and int(round(content["box"][3])) > 0
                 ):
 
-                    int_box = [int(round(n)) for n in content["box"]]
+                    int_box = scale_box_to_original(content["box"], response.get("image_scale", 1.0))
                     name_hint_raw = str(content.get("suggested_region_name_hint", f"step{plan_step.get('step_id','X')}_ai_region")).strip()
                     name_hint = "".join(c if c.isalnum() else "_" for c in name_hint_raw).lower()
 
@@ -292,7 +292,7 @@ class ProfileGenerator:
                             and elem_data["box"][3] > 0
                         ):  # w,h > 0
 
-                            box = [int(round(n)) for n in elem_data["box"]]
+                            box = scale_box_to_original(elem_data["box"], response.get("image_scale", 1.0))
                             candidates.append(
                                 {"box": box, "label_suggestion": elem_data.get("label_suggestion", element_description), "confidence": elem_data.get("confidence_score", 1.0)}  # Use confidence_score
                             )
@@ -1,21 +1,93 @@
 import logging
 import threading
 import time
-from typing import Dict, Any, Optional, Set
+from typing import Dict, Any, List, Optional, Set, Tuple
 import os
 
 from mark_i.core.config_manager import ConfigManager
 from mark_i.engines.capture_engine import CaptureEngine
 from mark_i.engines.analysis_engine import AnalysisEngine
-from mark_i.engines.rules_engine import RulesEngine
+from mark_i.engines.rules_engine import RulesEngine, EXPENSIVE_CONDITION_TYPES, rule_condition_types
 from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.action_dispatcher import ActionDispatcher, DEFAULT_MAX_PENDING_ACTIONS
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer, gemini_analyzer_options_from_settings
+from mark_i.engines.gemini_cassette import gemini_replay_active
 from mark_i.engines.gemini_decision_module import GeminiDecisionModule  # For NLU tasks
+from mark_i.engines.profile_compiler import CompiledProfile, load_or_compile_profile, profile_cache_disabled
+from mark_i.engines.profile_reloader import ProfileFileWatcher, ProfileDiff, diff_profiles, DEFAULT_HOT_RELOAD_POLL_INTERVAL_SEC
+from mark_i.engines.cycle_scheduler import FixedRateScheduler, DEFAULT_OVERRUN_POLICY, DEFAULT_MAX_CATCH_UP_TICKS
+from mark_i.engines.cycle_budget import CycleBudgetGovernor, DEFAULT_BUDGET_INTERVAL_FRACTION, DEFAULT_MAX_DEFERRED_CYCLES
+from mark_i.engines.shared_frame import SharedTick
+from mark_i.engines.startup_warmup import StartupWarmup, WarmupSkipped, DEFAULT_WARMUP_TIMEOUT_SEC
 
 # Standardized logger for this module
-from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
+from mark_i.core.flight_recorder import FlightRecorder, DEFAULT_FLIGHT_RECORDER_CYCLES, DEFAULT_MIN_DUMP_INTERVAL_SEC
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME, get_cycle_log_sampler, hot_path_log_enabled
+from mark_i.core.metrics import LatencyHistogram
+from mark_i.core.tracing import get_tracer
 
 logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.main_controller")
 
+# Settings consumed when components are constructed; a hot reload logs that they need a restart.
+# Other settings are either applied on reload below or read by the engines on each use.
+RESTART_REQUIRED_SETTINGS = frozenset(
+    {
+        "tesseract_cmd_path",
+        "tesseract_config_custom",
+        "gemini_default_model_name",
+        "gemini_image_max_long_edge",
+        "gemini_image_max_pixels",
+        "gemini_image_format",
+        "gemini_image_quality",
+        "gemini_image_grayscale",
+        "gemini_request_timeout_seconds",
+        "gemini_max_retries",
+        "gemini_retry_base_delay_seconds",
+        "gemini_retry_max_delay_seconds",
+        "gemini_retry_budget_seconds",
+        "gemini_circuit_failure_threshold",
+        "gemini_circuit_cooldown_seconds",
+        "gemini_nlu_plan_cache_enabled",
+        "gemini_element_locator_cache_enabled",
+        "element_locator_match_threshold",
+        "async_action_dispatch",
+        "action_queue_max_pending",
+        "hot_reload_enabled",
+        "monitoring_overrun_policy",
+        "monitoring_max_catch_up_cycles",
+        "cycle_budget_governor_enabled",
+        "cycle_budget_max_deferred_cycles",
+        "flight_recorder_enabled",
+        "flight_recorder_cycles",
+        "flight_recorder_dump_dir",
+        "flight_recorder_min_dump_interval_seconds",
+    }
+)
+
+
+def _elapsed_ms(start_time: float) -> float:
+    return (time.perf_counter() - start_time) * 1000.0
+
+
+def _log_sample_setting(value: Any) -> int:
+    """'log_sample_every_n_cycles' as a positive int (1, i.e. log every cycle, if invalid)."""
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 1:
+        return value
+    logger.warning(f"Invalid 'log_sample_every_n_cycles' ({value!r}). Logging every cycle.")
+    return 1
+
+
+def _condition_and_action_types(rules: List[Dict[str, Any]]) -> Tuple[Set[str], Set[str]]:
+    """Condition types (including sub-conditions) and action types used by `rules`."""
+    condition_types: Set[str] = set()
+    action_types: Set[str] = set()
+    for rule in rules:
+        condition_types |= rule_condition_types(rule)
+        action = rule.get("action") if isinstance(rule, dict) else None
+        if isinstance(action, dict) and action.get("type"):
+            action_types.add(action["type"])
+    return condition_types, action_types
+
 
 class MainController:
     """
@@ -23,17 +95,27 @@ class MainController:
     Runs the monitoring loop in a separate thread.
     """
 
-    def __init__(self, profile_name_or_path: str):
+    def __init__(self, profile_name_or_path: str, use_compiled_profile: bool = True):
         """
         Initializes the MainController.
 
         Args:
             profile_name_or_path: The name or path of the profile to load.
+            use_compiled_profile: If True (default) and a profile file path is given, start from
+                                  the compiled sidecar cache (see `mark_i compile`), building it
+                                  if it is missing or stale. Disabled by MARK_I_NO_PROFILE_CACHE=1.
         """
         logger.info(f"Initializing MainController with profile: '{profile_name_or_path}'")
 
+        compiled_profile: Optional[CompiledProfile] = None
+        if use_compiled_profile and not profile_cache_disabled() and os.path.isfile(profile_name_or_path):
+            try:
+                compiled_profile = load_or_compile_profile(os.path.abspath(profile_name_or_path))
+            except Exception as e_compile:  # Invalid profiles are reported by the regular load below
+                logger.warning(f"MainController: Compiled profile cache unavailable ({e_compile}). Loading profile JSON directly.")
+
         try:
-            self.config_manager = ConfigManager(profile_name_or_path)
+            self.config_manager = ConfigManager(profile_name_or_path, preloaded_profile_data=compiled_profile.profile_data if compiled_profile else None)
         except FileNotFoundError:
             logger.critical(f"MainController: Profile file '{profile_name_or_path}' not found. Cannot initialize.")
             raise  # Re-raise for CLI or caller to handle
@@ -57,16 +139,25 @@ class MainController:
         self.capture_engine = CaptureEngine()
         self.analysis_engine = AnalysisEngine(ocr_command=ocr_command, ocr_config=ocr_config)
         self.action_executor = ActionExecutor(self.config_manager)
+        self.action_dispatcher: Optional[ActionDispatcher] = None
+        if settings.get("async_action_dispatch", True):
+            self.action_dispatcher = ActionDispatcher(self.action_executor, max_pending=settings.get("action_queue_max_pending", DEFAULT_MAX_PENDING_ACTIONS))
 
         # Initialize GeminiDecisionModule if Gemini API key is available
         self.gemini_decision_module: Optional[GeminiDecisionModule] = None
         gemini_api_key = os.getenv("GEMINI_API_KEY")
-        if gemini_api_key:
+        if gemini_api_key or gemini_replay_active():
             # GeminiAnalyzer for GDM uses the same key and default model from settings
-            gemini_analyzer_for_gdm = GeminiAnalyzer(api_key=gemini_api_key, default_model_name=self.config_manager.get_setting("gemini_default_model_name", "gemini-1.5-flash-latest"))
+            gemini_analyzer_for_gdm = GeminiAnalyzer(
+                api_key=gemini_api_key,
+                default_model_name=self.config_manager.get_setting("gemini_default_model_name", "gemini-1.5-flash-latest"),
+                **gemini_analyzer_options_from_settings(self.config_manager.get_setting),
+            )
             if gemini_analyzer_for_gdm.client_initialized:
                 self.gemini_decision_module = GeminiDecisionModule(
-                    gemini_analyzer=gemini_analyzer_for_gdm, action_executor=self.action_executor, config_manager=self.config_manager  # GDM needs CM for region context
+                    gemini_analyzer=gemini_analyzer_for_gdm, action_executor=self.action_executor, config_manager=self.config_manager,  # GDM needs CM for region context
+                    analysis_engine=self.analysis_engine,  # For locally verifying previously refined elements
+                    capture_engine=self.capture_engine,  # For visual-settle waits between NLU steps
                 )
                 logger.info("MainController: GeminiDecisionModule initialized for NLU tasks.")
             else:
@@ -75,13 +166,42 @@ class MainController:
             logger.warning("MainController: GEMINI_API_KEY not found. GeminiDecisionModule not initialized. NLU tasks ('gemini_perform_task') will be skipped or fail.")
 
         # RulesEngine is initialized here, passing the optional GeminiDecisionModule
-        self.rules_engine = RulesEngine(self.config_manager, self.analysis_engine, self.action_executor, gemini_decision_module=self.gemini_decision_module)  # Pass it here
+        self.rules_engine = RulesEngine(
+            self.config_manager,
+            self.analysis_engine,
+            self.action_executor,
+            gemini_decision_module=self.gemini_decision_module,
+            action_dispatcher=self.action_dispatcher,
+            rule_plan=compiled_profile.rule_plan if compiled_profile else None,
+            preloaded_templates=compiled_profile.templates if compiled_profile else None,
+        )
 
         self.monitoring_interval = settings.get("monitoring_interval_seconds", 1.0)
         if not isinstance(self.monitoring_interval, (int, float)) or self.monitoring_interval <= 0:
             logger.warning(f"Invalid 'monitoring_interval_seconds' ({self.monitoring_interval}). Defaulting to 1.0s.")
             self.monitoring_interval = 1.0
 
+        self.cycle_scheduler = FixedRateScheduler(
+            self.monitoring_interval,
+            overrun_policy=settings.get("monitoring_overrun_policy", DEFAULT_OVERRUN_POLICY),
+            max_catch_up_ticks=settings.get("monitoring_max_catch_up_cycles", DEFAULT_MAX_CATCH_UP_TICKS),
+        )
+        # Budget governor: defers low-priority OCR, k-means and expensive rules when cycles run over budget
+        self.budget_governor: Optional[CycleBudgetGovernor] = None
+        if settings.get("cycle_budget_governor_enabled", True):
+            self.budget_governor = CycleBudgetGovernor(max_deferred_cycles=settings.get("cycle_budget_max_deferred_cycles", DEFAULT_MAX_DEFERRED_CYCLES))
+
+        self.log_sample_every_n_cycles = _log_sample_setting(settings.get("log_sample_every_n_cycles", 1))
+        # Flight recorder: structured events of the last cycles, written to disk on errors, rule markers or a signal
+        self.flight_recorder: Optional[FlightRecorder] = None
+        if settings.get("flight_recorder_enabled", True):
+            self.flight_recorder = FlightRecorder(
+                name=os.path.splitext(os.path.basename(self.config_manager.get_profile_path() or "profile"))[0],
+                max_cycles=settings.get("flight_recorder_cycles", DEFAULT_FLIGHT_RECORDER_CYCLES),
+                dump_dir=settings.get("flight_recorder_dump_dir"),
+                min_dump_interval_sec=settings.get("flight_recorder_min_dump_interval_seconds", DEFAULT_MIN_DUMP_INTERVAL_SEC),
+            )
+
         self.regions_to_monitor = profile_data.get("regions", [])
 
         if not self.regions_to_monitor:
@@ -89,20 +209,68 @@ class MainController:
         else:
             logger.info(f"MainController will monitor {len(self.regions_to_monitor)} regions every {self.monitoring_interval:.2f} seconds.")
 
+        # Hot reload: the monitoring thread polls the profile (and its templates) between cycles
+        self._profile_watcher: Optional[ProfileFileWatcher] = None
+        profile_path = self.config_manager.get_profile_path()
+        if settings.get("hot_reload_enabled", True) and profile_path and os.path.isfile(profile_path):
+            self._profile_watcher = ProfileFileWatcher(profile_path, poll_interval_sec=settings.get("hot_reload_poll_interval_seconds", DEFAULT_HOT_RELOAD_POLL_INTERVAL_SEC))
+
+        self.cycle_duration_histogram = LatencyHistogram()
+        self.last_cycle_completed_at: Optional[float] = None  # time.time() of the last finished cycle
+
+        # Startup warm-up runs on the monitoring thread before the first cycle; ready_event is set once it is done (or skipped)
+        self.ready_event = threading.Event()
+        self.warmup_results: Dict[str, Dict[str, Any]] = {}
+
         self._stop_event = threading.Event()
         self._monitor_thread: Optional[threading.Thread] = None
         logger.info(f"MainController initialized successfully for profile: '{self.config_manager.get_profile_path()}'.")
 
-    def _perform_monitoring_cycle(self):
+    def get_cycle_time_budget(self) -> float:
+        """The per-cycle time budget in seconds: 'cycle_time_budget_seconds', or a share of the interval when unset."""
+        budget = self.config_manager.get_setting("cycle_time_budget_seconds", 0)
+        if isinstance(budget, (int, float)) and not isinstance(budget, bool) and budget > 0:
+            return float(budget)
+        return DEFAULT_BUDGET_INTERVAL_FRACTION * self.monitoring_interval
+
+    def _run_governed_analysis(self, analysis_name: str, region_name: str, region_data_packet: Dict[str, Any], analysis_fn) -> Any:
+        """Runs one pre-emptive analysis if the budget governor allows it; otherwise records it as deferred and returns None."""
+        if self.budget_governor is None:
+            return analysis_fn()
+        work_key = (analysis_name, region_name)
+        if not self.budget_governor.allow(work_key, self.rules_engine.get_analysis_priority(region_name, analysis_name)):
+            region_data_packet.setdefault("deferred_analyses", set()).add(analysis_name)
+            logger.debug("Region '%s': '%s' analysis deferred by the cycle budget governor.", region_name, analysis_name)
+            return None
+        start_time = time.perf_counter()
+        result = analysis_fn()
+        self.budget_governor.record_cost(work_key, time.perf_counter() - start_time)
+        return result
+
+    def _shared_analysis(self, shared_tick: Optional[SharedTick], region_spec: Dict[str, Any], analysis_key: Tuple[Any, ...], analysis_fn) -> Any:
+        """Runs an analysis directly, or through the supervisor's shared tick so identical work is done once across profiles."""
+        return shared_tick.analysis(region_spec, analysis_key, analysis_fn) if shared_tick is not None else analysis_fn()
+
+    def _perform_monitoring_cycle(self, degraded: bool = False, shared_tick: Optional[SharedTick] = None):
         """
         Performs a single cycle of capturing, selectively analyzing, and rule evaluation.
+
+        Args:
+            degraded: If True (set by the "degrade" overrun policy after an overrun), OCR and
+                      dominant-color analyses and the rules that need them or Gemini are skipped.
+            shared_tick: Optional. Set by ProfileSupervisor: regions are cropped from its shared
+                         frame and pre-emptive analyses are shared with the other profiles.
         """
         if not self.regions_to_monitor:
             logger.debug("No regions configured to monitor in this cycle. Skipping.")
             return
 
         all_region_data: Dict[str, Dict[str, Any]] = {}
-        logger.info(f"----- Starting new monitoring cycle (Interval: {self.monitoring_interval:.2f}s) -----")
+        flight_recorder = self.flight_recorder
+        skipped_condition_types = EXPENSIVE_CONDITION_TYPES if degraded else None
+        logger.info("----- Starting new monitoring cycle (Interval: %.2fs%s) -----", self.monitoring_interval, ", DEGRADED" if degraded else "")
+        if self.budget_governor is not None:
+            self.budget_governor.begin_cycle(self.get_cycle_time_budget())
 
         for region_spec in self.regions_to_monitor:
             region_name = region_spec.get("name")
@@ -110,26 +278,63 @@ class MainController:
                 logger.warning(f"Skipping region due to missing name in spec: {region_spec}")
                 continue
 
-            logger.debug(f"Processing region: '{region_name}'")
-            captured_image_bgr = self.capture_engine.capture_region(region_spec)
+            logger.debug("Processing region: '%s'", region_name)
+            capture_start_time = time.perf_counter()
+            captured_image_bgr = shared_tick.capture_region(region_spec) if shared_tick is not None else self.capture_engine.capture_region(region_spec)
             region_data_packet: Dict[str, Any] = {"image": captured_image_bgr}
+            if flight_recorder is not None:
+                flight_recorder.record("capture", region_name, _elapsed_ms(capture_start_time), captured_image_bgr.shape if captured_image_bgr is not None else None)
 
             if captured_image_bgr is not None:
-                logger.debug(f"Image captured for region '{region_name}'. Shape: {captured_image_bgr.shape}")
+                logger.debug("Image captured for region '%s'. Shape: %s", region_name, captured_image_bgr.shape)
                 required_analyses: Set[str] = self.rules_engine.get_analysis_requirements_for_region(region_name)
-                logger.debug(f"Region '{region_name}': Required pre-emptive analyses: {required_analyses or 'None'}")
+                if degraded:
+                    required_analyses = required_analyses - {"ocr", "dominant_color"}
+                logger.debug("Region '%s': Required pre-emptive analyses: %s", region_name, required_analyses or "None")
 
                 if "average_color" in required_analyses:
-                    avg_color = self.analysis_engine.analyze_average_color(captured_image_bgr, region_name_context=region_name)
+                    analysis_start_time = time.perf_counter()
+                    avg_color = self._shared_analysis(
+                        shared_tick, region_spec, ("average_color",), lambda: self.analysis_engine.analyze_average_color(captured_image_bgr, region_name_context=region_name)
+                    )
                     region_data_packet["average_color"] = avg_color
+                    if flight_recorder is not None:
+                        flight_recorder.record("analysis", region_name, "average_color", avg_color, _elapsed_ms(analysis_start_time))
                     # logger.debug(f"Rgn '{region_name}': AvgColor: {avg_color}") # Logged by AnalysisEngine
                 if "ocr" in required_analyses:
-                    ocr_result = self.analysis_engine.ocr_extract_text(captured_image_bgr, region_name_context=region_name)
+                    analysis_start_time = time.perf_counter()
+                    ocr_result = self._run_governed_analysis(
+                        "ocr",
+                        region_name,
+                        region_data_packet,
+                        lambda: self._shared_analysis(
+                            shared_tick,
+                            region_spec,
+                            ("ocr", self.analysis_engine.ocr_command, self.analysis_engine.ocr_config),
+                            lambda: self.analysis_engine.ocr_extract_text(captured_image_bgr, region_name_context=region_name),
+                        ),
+                    )
                     region_data_packet["ocr_analysis_result"] = ocr_result
+                    if flight_recorder is not None:  # Without Tesseract's per-word raw data
+                        ocr_summary = {"text": ocr_result.get("text"), "average_confidence": ocr_result.get("average_confidence")} if ocr_result else None
+                        flight_recorder.record("analysis", region_name, "ocr", ocr_summary, _elapsed_ms(analysis_start_time))
                     # logger.debug(f"Rgn '{region_name}': OCR performed.") # Logged by AnalysisEngine
                 if "dominant_color" in required_analyses:
-                    dominant_colors_result = self.analysis_engine.analyze_dominant_colors(captured_image_bgr, num_colors=self.dominant_colors_k, region_name_context=region_name)
+                    analysis_start_time = time.perf_counter()
+                    dominant_colors_result = self._run_governed_analysis(
+                        "dominant_color",
+                        region_name,
+                        region_data_packet,
+                        lambda: self._shared_analysis(
+                            shared_tick,
+                            region_spec,
+                            ("dominant_color", self.dominant_colors_k),
+                            lambda: self.analysis_engine.analyze_dominant_colors(captured_image_bgr, num_colors=self.dominant_colors_k, region_name_context=region_name),
+                        ),
+                    )
                     region_data_packet["dominant_colors_result"] = dominant_colors_result
+                    if flight_recorder is not None:
+                        flight_recorder.record("analysis", region_name, "dominant_color", dominant_colors_result, _elapsed_ms(analysis_start_time))
                     # logger.debug(f"Rgn '{region_name}': DomColor (k={self.dominant_colors_k}) performed.") # Logged by AnalysisEngine
             else:
                 logger.warning(f"Image capture failed for region '{region_name}'. No analysis performed.")
@@ -138,16 +343,198 @@ class MainController:
                 region_data_packet["dominant_colors_result"] = None
 
             all_region_data[region_name] = region_data_packet
-            logger.debug(f"Data collected for rgn '{region_name}'. Keys: {list(region_data_packet.keys())}")
+            if hot_path_log_enabled(logger, logging.DEBUG):
+                logger.debug("Data collected for rgn '%s'. Keys: %s", region_name, list(region_data_packet.keys()))
 
         if all_region_data:
-            logger.debug(f"Passing data for {len(all_region_data)} region(s) to RulesEngine.")
-            self.rules_engine.evaluate_rules(all_region_data)
+            logger.debug("Passing data for %d region(s) to RulesEngine.", len(all_region_data))
+            self.rules_engine.evaluate_rules(all_region_data, skip_condition_types=skipped_condition_types, budget_governor=self.budget_governor, flight_recorder=flight_recorder)
         else:
             logger.info("No region data collected. Skipping rule evaluation.")
+        if self.budget_governor is not None:
+            self.budget_governor.end_cycle()
 
         logger.info("----- Monitoring cycle finished -----")
 
+    def reload_profile_if_changed(self, force_check: bool = False) -> Optional[ProfileDiff]:
+        """
+        Hot reload. If the profile file or a template changed on disk, loads and validates the
+        new profile, diffs it against the running one and swaps it in. Called by the monitoring
+        thread between cycles, so a cycle always sees one consistent profile. An invalid file
+        is reported and the running profile is kept. Returns the applied diff, or None.
+        """
+        if self._profile_watcher is None or not self._profile_watcher.poll(force=force_check):
+            return None
+        profile_path = self._profile_watcher.profile_path
+        try:
+            reloaded_config_manager = ConfigManager(profile_path, create_if_missing=False)
+        except (FileNotFoundError, ValueError, IOError) as e_reload:
+            logger.error(f"MainController: Hot reload of '{profile_path}' failed: {e_reload}. Keeping the running profile.")
+            return None
+
+        profile_diff = diff_profiles(self.config_manager.get_profile_data(), reloaded_config_manager.get_profile_data(), self._profile_watcher.changed_template_files)
+        if profile_diff.is_empty():
+            logger.debug("MainController: Profile files changed on disk but their content is unchanged. Nothing to reload.")
+            return None
+        logger.info(f"MainController: Hot reloading profile '{os.path.basename(profile_path)}': {profile_diff.summary()}.")
+
+        self.config_manager.profile_data = reloaded_config_manager.get_profile_data()  # Atomic snapshot swap
+        self.rules_engine.apply_profile_update(profile_diff)
+        self.regions_to_monitor = self.config_manager.get_regions()
+        if self.gemini_decision_module and self.gemini_decision_module.element_locator_cache is not None:
+            for region_name in profile_diff.regions_changed | profile_diff.regions_removed:
+                self.gemini_decision_module.element_locator_cache.invalidate_region(region_name)
+
+        new_interval = self.config_manager.get_setting("monitoring_interval_seconds", self.monitoring_interval)
+        if isinstance(new_interval, (int, float)) and new_interval > 0 and new_interval != self.monitoring_interval:
+            self.monitoring_interval = new_interval
+            self.cycle_scheduler.set_interval(new_interval)
+        new_k = self.config_manager.get_setting("analysis_dominant_colors_k", self.dominant_colors_k)
+        if isinstance(new_k, int) and new_k > 0:
+            self.dominant_colors_k = new_k
+        self.log_sample_every_n_cycles = _log_sample_setting(self.config_manager.get_setting("log_sample_every_n_cycles", 1))
+        if "hot_reload_poll_interval_seconds" in profile_diff.settings_changed:
+            self._profile_watcher.poll_interval_sec = float(self.config_manager.get_setting("hot_reload_poll_interval_seconds", DEFAULT_HOT_RELOAD_POLL_INTERVAL_SEC))
+        restart_settings = sorted(profile_diff.settings_changed & RESTART_REQUIRED_SETTINGS)
+        if restart_settings:
+            logger.warning(f"MainController: Changed settings {restart_settings} take effect after a restart.")
+        return profile_diff
+
+    def _build_startup_warmup(self) -> StartupWarmup:
+        """Warm-up tasks for the components this profile actually uses."""
+        warmup = StartupWarmup()
+        condition_types, action_types = _condition_and_action_types(self.rules_engine.rules)
+
+        def _warm_templates() -> str:
+            loaded_count, unavailable_count = self.rules_engine.preload_templates(should_stop=warmup.cancelled.is_set)
+            if not loaded_count and not unavailable_count:
+                raise WarmupSkipped("no templates")
+            return f"{loaded_count} loaded, {unavailable_count} unavailable"
+
+        def _warm_ocr() -> str:
+            if not self.analysis_engine.warm_up_ocr():
+                raise RuntimeError("Tesseract OCR unavailable")
+            return "Tesseract started"
+
+        def _warm_capture() -> str:
+            if not self.regions_to_monitor:
+                raise WarmupSkipped("no regions")
+            failed_regions = []
+            for region_spec in self.regions_to_monitor:
+                if warmup.cancelled.is_set():
+                    break
+                if self.capture_engine.capture_region(region_spec) is None:
+                    failed_regions.append(region_spec.get("name"))
+            if failed_regions:
+                raise RuntimeError(f"capture failed for regions {failed_regions}")
+            return f"{len(self.regions_to_monitor)} region(s) grabbed"
+
+        warmup.add_task("templates", _warm_templates, shares_engine_state=True)  # Fills the template cache the rules read
+        warmup.add_task("capture", _warm_capture, shares_engine_state=True)  # Grabs through the monitoring loop's CaptureEngine
+        if "ocr_contains_text" in condition_types:
+            warmup.add_task("ocr", _warm_ocr)
+        gemini_model_call = bool(self.config_manager.get_setting("startup_warmup_gemini_model_call", False))
+        if "gemini_vision_query" in condition_types and self.rules_engine.gemini_analyzer_for_query:
+            query_analyzer = self.rules_engine.gemini_analyzer_for_query
+            warmup.add_task("gemini_query", lambda: query_analyzer.warm_up(model_call=gemini_model_call))
+        if "gemini_perform_task" in action_types and self.gemini_decision_module:
+            nlu_analyzer = self.gemini_decision_module.gemini_analyzer
+            warmup.add_task("gemini_nlu", lambda: nlu_analyzer.warm_up(model_call=gemini_model_call))
+        return warmup
+
+    def run_startup_warmup(self) -> Dict[str, Dict[str, Any]]:
+        """Runs the warm-up tasks in parallel (bounded by 'startup_warmup_timeout_seconds'), logs a timing report and sets `ready_event`."""
+        try:
+            if not self.config_manager.get_setting("startup_warmup_enabled", True):
+                logger.info("MainController: Startup warm-up disabled by profile settings.")
+                return self.warmup_results
+            timeout_sec = self.config_manager.get_setting("startup_warmup_timeout_seconds", DEFAULT_WARMUP_TIMEOUT_SEC)
+            if not isinstance(timeout_sec, (int, float)) or timeout_sec <= 0:
+                logger.warning(f"Invalid 'startup_warmup_timeout_seconds' ({timeout_sec}). Defaulting to {DEFAULT_WARMUP_TIMEOUT_SEC}s.")
+                timeout_sec = DEFAULT_WARMUP_TIMEOUT_SEC
+            warmup = self._build_startup_warmup()
+            logger.info(f"MainController: Starting startup warm-up: {warmup.task_names}.")
+            self.warmup_results = warmup.run(timeout_sec=timeout_sec)
+            logger.info(f"MainController: {warmup.format_report()}")
+        except Exception:
+            logger.error("MainController: Unexpected error during startup warm-up. Continuing without it.", exc_info=True)
+        finally:
+            self.ready_event.set()
+        return self.warmup_results
+
+    def get_cycle_stats(self) -> Dict[str, Any]:
+        """Scheduler statistics for the current run: cycles, overruns, dropped ticks, start lateness."""
+        return self.cycle_scheduler.get_stats()
+
+    def get_budget_stats(self) -> Optional[Dict[str, Any]]:
+        """Budget governor statistics (shed level, deferrals, over-budget cycles), or None if the governor is disabled."""
+        return self.budget_governor.get_stats() if self.budget_governor is not None else None
+
+    def is_running(self) -> bool:
+        return bool(self._monitor_thread and self._monitor_thread.is_alive())
+
+    def get_metrics_snapshot(self) -> Dict[str, Any]:
+        """Runtime statistics of every component, as plain data (served by 'mark_i serve')."""
+        snapshot: Dict[str, Any] = {
+            "running": self.is_running(),
+            "ready": self.ready_event.is_set(),
+            "last_cycle_completed_at": self.last_cycle_completed_at,
+            "cycles": self.get_cycle_stats(),
+            "cycle_duration_histogram": self.cycle_duration_histogram.snapshot(),
+            "budget": self.get_budget_stats(),
+            "rules": self.rules_engine.get_rule_stats(),
+            "actions": dict(self.action_dispatcher.stats) if self.action_dispatcher else None,
+            "caches": {},
+            "gemini": {},
+        }
+        if self.rules_engine.gemini_analyzer_for_query is not None:
+            snapshot["gemini"]["vision_query"] = self.rules_engine.gemini_analyzer_for_query.get_metrics()
+        if self.gemini_decision_module:
+            if self.gemini_decision_module.gemini_analyzer is not None:
+                snapshot["gemini"]["nlu"] = self.gemini_decision_module.gemini_analyzer.get_metrics()
+            if self.gemini_decision_module.nlu_plan_cache is not None:
+                snapshot["caches"]["nlu_plan"] = dict(self.gemini_decision_module.nlu_plan_cache.stats)
+            if self.gemini_decision_module.element_locator_cache is not None:
+                snapshot["caches"]["element_locator"] = dict(self.gemini_decision_module.element_locator_cache.stats)
+        return snapshot
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the startup warm-up is done and the first monitoring cycle is about to run. Returns False on timeout."""
+        return self.ready_event.wait(timeout)
+
+    def run_cycle(self, degraded: bool = False, shared_tick: Optional[SharedTick] = None) -> float:
+        """Applies pending profile changes, then runs one monitoring cycle. Returns the cycle's duration in seconds."""
+        try:
+            self.reload_profile_if_changed()
+        except Exception:
+            logger.error("Monitoring loop: Unexpected error during profile hot reload. Continuing with the running profile.", exc_info=True)
+        tracer = get_tracer()
+        log_sampler = get_cycle_log_sampler()
+        if shared_tick is None:
+            tracer.begin_cycle()  # Under a supervisor, sampling is decided once per tick
+            log_sampler.begin_cycle(self.log_sample_every_n_cycles)
+        if self.flight_recorder is not None:
+            self.flight_recorder.begin_cycle(degraded=degraded)
+        cycle_start_time = time.perf_counter()
+        try:
+            with tracer.span("cycle", "cycle", profile=os.path.basename(self.config_manager.get_profile_path() or ""), degraded=degraded):
+                self._perform_monitoring_cycle(degraded=degraded, shared_tick=shared_tick)
+        except Exception as e:
+            if self.flight_recorder is not None:
+                self.flight_recorder.record("error", "monitoring_cycle", repr(e))
+                self.flight_recorder.request_dump("exception")
+            raise
+        finally:
+            if self.flight_recorder is not None:
+                self.flight_recorder.end_cycle()
+            if shared_tick is None:
+                tracer.end_cycle()
+                log_sampler.end_cycle()
+        elapsed_time = time.perf_counter() - cycle_start_time
+        self.cycle_duration_histogram.observe(elapsed_time * 1000.0)
+        self.last_cycle_completed_at = time.time()
+        return elapsed_time
+
     def run_monitoring_loop(self):
         """
         Continuously monitors regions, analyzes, and acts based on rules.
@@ -157,29 +544,18 @@ class MainController:
         logger.info(f"Monitoring loop started for profile '{profile_display_name}'. Interval: {self.monitoring_interval:.2f}s.")
         cycle_count = 0
         try:
+            self.run_startup_warmup()
+            self.cycle_scheduler.start()  # Cycles run at absolute deadlines from here on
             while not self._stop_event.is_set():
+                cycle_tick = self.cycle_scheduler.wait_for_next_tick(self._stop_event)
+                if cycle_tick is None:
+                    logger.info("Monitoring loop: Stop event received during wait.")
+                    break
                 cycle_count += 1
-                logger.debug(f"Monitoring loop - Cycle #{cycle_count} starting...")
-                cycle_start_time = time.perf_counter()
-
-                self._perform_monitoring_cycle()
-
-                cycle_end_time = time.perf_counter()
-                elapsed_time = cycle_end_time - cycle_start_time
-                logger.debug(f"Monitoring loop - Cycle #{cycle_count} completed in {elapsed_time:.3f}s.")
-
-                wait_time = self.monitoring_interval - elapsed_time
-                if wait_time > 0:
-                    logger.debug(f"Monitoring loop - Cycle #{cycle_count}: Waiting for {wait_time:.3f}s.")
-                    interrupted_during_wait = self._stop_event.wait(timeout=wait_time)
-                    if interrupted_during_wait:
-                        logger.info("Monitoring loop: Stop event received during wait.")
-                        break
-                else:
-                    logger.warning(f"Monitoring loop - Cycle #{cycle_count}: Took {elapsed_time:.3f}s (>= interval {self.monitoring_interval:.2f}s). Next cycle immediate.")
-                    if self._stop_event.is_set():
-                        logger.info("Monitoring loop: Stop event detected after long cycle.")
-                        break
+                logger.debug("Monitoring loop - Cycle #%d starting (Lateness: %.1fms, Dropped ticks before it: %d)...", cycle_count, cycle_tick.lateness_sec * 1000.0, cycle_tick.missed_ticks)
+                elapsed_time = self.run_cycle(degraded=cycle_tick.degraded)
+                logger.debug("Monitoring loop - Cycle #%d completed in %.3fs.", cycle_count, elapsed_time)
+                self.cycle_scheduler.cycle_finished(cycle_tick)
         except Exception as e:
             logger.critical("Critical error in monitoring loop. Terminating.", exc_info=True)
         finally:
@@ -192,6 +568,9 @@ class MainController:
             return
 
         self._stop_event.clear()
+        self.ready_event.clear()
+        if self.action_dispatcher:
+            self.action_dispatcher.start()
         self._monitor_thread = threading.Thread(target=self.run_monitoring_loop, daemon=True)
         self._monitor_thread.name = f"MonitoringThread-{os.path.basename(self.config_manager.get_profile_path() or 'NewProfile')}"
         logger.info(f"Starting monitoring thread: {self._monitor_thread.name}")
@@ -214,3 +593,5 @@ class MainController:
         else:
             logger.info(f"Monitoring thread {self._monitor_thread.name} successfully stopped and joined.")
         self._monitor_thread = None
+        if self.action_dispatcher:
+            self.action_dispatcher.stop(drain=False)  # Don't fire stale actions after the user asked to stop
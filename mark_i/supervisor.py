@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME, get_cycle_log_sampler
+from mark_i.core.tracing import get_tracer
+from mark_i.engines.cycle_scheduler import FixedRateScheduler, DEFAULT_OVERRUN_POLICY, DEFAULT_MAX_CATCH_UP_TICKS
+from mark_i.engines.shared_frame import SharedFrameCapture
+
+logger = logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.supervisor")
+
+_DUE_TOLERANCE_SEC = 0.001  # Absorbs float rounding between the tick grid and each profile's own grid
+
+
+class _SupervisedProfile:
+    __slots__ = ("name", "controller", "next_due")
+
+    def __init__(self, name: str, controller: Any):
+        self.name = name
+        self.controller = controller
+        self.next_due: Optional[float] = None  # Scheduler-clock time of this profile's next cycle (None: the next tick)
+
+
+class ProfileSupervisor:
+    """
+    Hosts several profiles in one process on a single monitoring thread.
+
+    Each tick grabs one shared frame covering the regions of every profile due in that
+    tick, then runs those profiles' cycles in parallel. Regions with the same geometry
+    are cropped once, and the same pre-emptive analysis (OCR with the same Tesseract
+    settings, k-means with the same k, average colour) of the same screen area is
+    computed once per tick. Rules, variables, Gemini clients and actions stay per
+    profile: each profile keeps its own MainController and only borrows the shared tick.
+
+    Ticks run at the shortest monitoring interval among the profiles; a profile with a
+    longer interval is evaluated on the ticks at or after its own next deadline.
+    """
+
+    def __init__(self, overrun_policy: str = DEFAULT_OVERRUN_POLICY, max_catch_up_ticks: int = DEFAULT_MAX_CATCH_UP_TICKS, frame_capture: Optional[SharedFrameCapture] = None):
+        self._profiles: List[_SupervisedProfile] = []
+        self._frame_capture = frame_capture or SharedFrameCapture()
+        self._overrun_policy = overrun_policy
+        self._max_catch_up_ticks = max_catch_up_ticks
+        self.cycle_scheduler: Optional[FixedRateScheduler] = None
+        self.ready_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, int] = {"ticks": 0, "profile_cycles": 0, "crops": 0, "crops_reused": 0, "analyses": 0, "analyses_reused": 0}
+
+    def add_profile(self, name: str, controller: Any) -> None:
+        """Adds a profile's MainController. Profiles are added before start()."""
+        if self.is_running():
+            raise RuntimeError("Profiles must be added before the supervisor starts.")
+        if any(profile.name == name for profile in self._profiles):
+            raise ValueError(f"A profile named '{name}' is already supervised.")
+        self._profiles.append(_SupervisedProfile(name, controller))
+
+    @property
+    def profile_names(self) -> List[str]:
+        return [profile.name for profile in self._profiles]
+
+    def get_controller(self, name: str) -> Any:
+        for profile in self._profiles:
+            if profile.name == name:
+                return profile.controller
+        raise KeyError(name)
+
+    def _tick_interval(self) -> float:
+        return min(profile.controller.monitoring_interval for profile in self._profiles)
+
+    def _run_profile_cycle(self, profile: _SupervisedProfile, degraded: bool, shared_tick: Any, trace_sampled: bool, log_sampled: bool) -> None:
+        try:
+            # Runs on a pool thread: adopt the tick's trace and log sampling decisions
+            with get_tracer().in_cycle(trace_sampled), get_cycle_log_sampler().in_cycle(log_sampled):
+                profile.controller.run_cycle(degraded=degraded, shared_tick=shared_tick)
+        except Exception:
+            logger.error(f"ProfileSupervisor: Unexpected error in a cycle of profile '{profile.name}'. Other profiles are not affected.", exc_info=True)
+
+    def run_tick(self, now: float, degraded: bool = False) -> List[str]:
+        """Runs the cycles of every profile due at scheduler time `now` on one shared frame. Returns their names."""
+        due_profiles = [profile for profile in self._profiles if profile.next_due is None or profile.next_due <= now + _DUE_TOLERANCE_SEC]
+        if not due_profiles:
+            return []
+        tracer = get_tracer()
+        tracer.begin_cycle()
+        log_sampler = get_cycle_log_sampler()
+        log_sampler.begin_cycle(min(profile.controller.log_sample_every_n_cycles for profile in due_profiles))
+        try:
+            with tracer.span("tick", "cycle", profiles=len(due_profiles)):
+                with tracer.span("shared_grab", "capture"):
+                    shared_tick = self._frame_capture.grab(spec for profile in due_profiles for spec in profile.controller.regions_to_monitor)
+                trace_sampled, log_sampled = tracer.recording, log_sampler.sampled
+                if self._executor is None or len(due_profiles) == 1:
+                    for profile in due_profiles:
+                        self._run_profile_cycle(profile, degraded, shared_tick, trace_sampled, log_sampled)
+                else:
+                    wait([self._executor.submit(self._run_profile_cycle, profile, degraded, shared_tick, trace_sampled, log_sampled) for profile in due_profiles])
+        finally:
+            tracer.end_cycle()
+            log_sampler.end_cycle()
+        for profile in due_profiles:
+            interval = profile.controller.monitoring_interval
+            profile.next_due = (profile.next_due if profile.next_due is not None else now) + interval
+            if profile.next_due <= now:  # Fell behind (stall or dropped ticks): restart the profile's grid instead of bunching up
+                profile.next_due = now + interval
+        with self._stats_lock:
+            self._stats["ticks"] += 1
+            self._stats["profile_cycles"] += len(due_profiles)
+            for stat_name, stat_value in shared_tick.stats.items():
+                self._stats[stat_name] += stat_value
+        return [profile.name for profile in due_profiles]
+
+    def run_monitoring_loop(self) -> None:
+        logger.info(f"Supervisor loop started for {len(self._profiles)} profile(s): {self.profile_names}.")
+        tick_count = 0
+        try:
+            warmup_threads = [threading.Thread(target=profile.controller.run_startup_warmup, name=f"MarkIWarmup-{profile.name}", daemon=True) for profile in self._profiles]
+            for warmup_thread in warmup_threads:
+                warmup_thread.start()
+            for warmup_thread in warmup_threads:
+                warmup_thread.join()
+            self.ready_event.set()
+
+            self.cycle_scheduler = FixedRateScheduler(self._tick_interval(), overrun_policy=self._overrun_policy, max_catch_up_ticks=self._max_catch_up_ticks)
+            self.cycle_scheduler.start()
+            for profile in self._profiles:
+                profile.next_due = None
+            while not self._stop_event.is_set():
+                cycle_tick = self.cycle_scheduler.wait_for_next_tick(self._stop_event)
+                if cycle_tick is None:
+                    break
+                tick_count += 1
+                tick_start_time = time.perf_counter()
+                ran_profiles = self.run_tick(cycle_tick.deadline, degraded=cycle_tick.degraded)
+                logger.debug("Supervisor - Tick #%d ran %s in %.3fs.", tick_count, ran_profiles or "no profiles", time.perf_counter() - tick_start_time)
+                tick_interval = self._tick_interval()
+                if tick_interval != self.cycle_scheduler.interval_sec:
+                    self.cycle_scheduler.set_interval(tick_interval)  # A profile's interval was hot-reloaded
+                self.cycle_scheduler.cycle_finished(cycle_tick)
+        except Exception:
+            logger.critical("Critical error in supervisor loop. Terminating.", exc_info=True)
+        finally:
+            self.ready_event.set()
+            logger.info(f"Supervisor loop stopped after {tick_count} tick(s).")
+
+    def is_running(self) -> bool:
+        return bool(self._monitor_thread and self._monitor_thread.is_alive())
+
+    def start(self) -> None:
+        if not self._profiles:
+            raise RuntimeError("No profiles to supervise.")
+        if self.is_running():
+            logger.warning("Supervisor already running. Start command ignored.")
+            return
+        self._stop_event.clear()
+        self.ready_event.clear()
+        for profile in self._profiles:
+            if profile.controller.action_dispatcher:
+                profile.controller.action_dispatcher.start()
+        self._executor = ThreadPoolExecutor(max_workers=len(self._profiles), thread_name_prefix="MarkIProfileCycle")
+        self._monitor_thread = threading.Thread(target=self.run_monitoring_loop, name="SupervisorThread", daemon=True)
+        self._monitor_thread.start()
+
+    def stop(self) -> None:
+        if not self.is_running():
+            return
+        self._stop_event.set()
+        join_timeout = max(profile.controller.monitoring_interval for profile in self._profiles) + 5.0
+        self._monitor_thread.join(timeout=join_timeout)  # type: ignore[union-attr]
+        if self._monitor_thread.is_alive():  # type: ignore[union-attr]
+            logger.warning(f"Supervisor thread did not stop in {join_timeout:.1f}s. May be stuck.")
+        self._monitor_thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        for profile in self._profiles:
+            if profile.controller.action_dispatcher:
+                profile.controller.action_dispatcher.stop(drain=False)
+        logger.info(f"Supervisor stopped. Stats: {self.get_stats()}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ticks and profile cycles run, and how much capture and analysis work the shared ticks saved."""
+        with self._stats_lock:
+            return {**self._stats, "profiles": len(self._profiles), "tick_interval_sec": self.cycle_scheduler.interval_sec if self.cycle_scheduler else None}
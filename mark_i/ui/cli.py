@@ -2,9 +2,14 @@ import argparse
 import logging
 import os
 import sys
+import threading  # For the control server thread of the serve command
 import time  # For simple sleep in run command
 from typing import Optional 
 
+from mark_i.core.flight_recorder import install_dump_signal_handler
+from mark_i.core.lazy_imports import report_import_trace
+from mark_i.daemon import DEFAULT_CONTROL_HOST, DEFAULT_CONTROL_PORT, ENV_CONTROL_TOKEN, DaemonError, ProfileDaemon, create_control_server, remove_stale_unix_socket
+
 # --- Placeholder Command Handlers ---
 # Logger for this module, using hierarchical naming
 from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
@@ -60,6 +65,20 @@ def _validate_profile_path(profile_path_or_name: str, for_new_edit: bool = False
         return os.path.abspath(profile_path_or_name)
 
 
+def _configure_input_backend(args):
+    """Installs the --input-backend chosen on the command line, if any. Exits on failure."""
+    if not getattr(args, "input_backend", None):
+        return None
+    try:
+        from mark_i.engines.input_backends import configure_default_input_backend
+
+        return configure_default_input_backend(args.input_backend, record_path=args.input_record_file)
+    except Exception as e:
+        logger.critical(f"Failed to initialize input backend '{args.input_backend}': {e}", exc_info=True)
+        print(f"Error: Input backend '{args.input_backend}' could not be initialized: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
 def handle_run(args):
     logger.info(f"Executing 'run' command for profile input: {args.profile}")
 
@@ -76,10 +95,14 @@ def handle_run(args):
         print(f"Error: Core components for running the bot could not be loaded: {e}", file=sys.stderr)
         sys.exit(1)
 
+    input_backend = _configure_input_backend(args)
+    install_dump_signal_handler()  # SIGUSR1 dumps the flight recorders of the running profiles
+
     try:
         logger.info(f"Initializing MainController with resolved profile: '{resolved_profile_path}'.")
-        controller = MainController(profile_name_or_path=resolved_profile_path)
+        controller = MainController(profile_name_or_path=resolved_profile_path, use_compiled_profile=not getattr(args, "no_profile_cache", False))
         logger.info("MainController initialized. Starting monitoring loop...")
+        report_import_trace()  # Startup ends here; no-op without --trace-imports
         controller.start()
 
         # Keep main thread alive while bot runs in daemon thread
@@ -109,9 +132,110 @@ def handle_run(args):
         if "controller" in locals() and controller and controller._monitor_thread and controller._monitor_thread.is_alive():
             logger.info("Ensuring bot is stopped due to 'run' command completion or error.")
             controller.stop()
+        if input_backend:
+            input_backend.close()  # Flushes recorded events, if any
         logger.info("Bot 'run' command finished.")
 
 
+def handle_supervise(args):
+    logger.info(f"Executing 'supervise' command for profiles: {args.profiles}")
+    resolved_profile_paths = [_validate_profile_path(profile, for_new_edit=False) for profile in args.profiles]
+    if not all(resolved_profile_paths):
+        sys.exit(1)  # _validate_profile_path logs error
+    profile_names = [os.path.splitext(os.path.basename(path))[0] for path in resolved_profile_paths]
+    if len(set(profile_names)) != len(profile_names):
+        print(f"Error: Profile file names must be unique to tell the profiles apart: {profile_names}", file=sys.stderr)
+        sys.exit(1)
+
+    from mark_i.main_controller import MainController
+    from mark_i.supervisor import ProfileSupervisor
+
+    input_backend = _configure_input_backend(args)
+    install_dump_signal_handler()  # SIGUSR1 dumps the flight recorders of the running profiles
+    supervisor = ProfileSupervisor(overrun_policy=args.overrun_policy)
+    try:
+        for profile_name, profile_path in zip(profile_names, resolved_profile_paths):
+            logger.info(f"Initializing MainController for supervised profile '{profile_name}': '{profile_path}'.")
+            supervisor.add_profile(profile_name, MainController(profile_name_or_path=profile_path, use_compiled_profile=not args.no_profile_cache))
+        report_import_trace()
+        supervisor.start()
+        while supervisor.is_running():
+            time.sleep(0.5)
+    except (FileNotFoundError, ValueError, IOError) as e_profile_load:
+        logger.error(f"Error loading a supervised profile: {e_profile_load}", exc_info=True)
+        print(f"Error: Could not load a profile: {e_profile_load}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.info("Ctrl+C received in CLI 'supervise' command. Stopping all profiles...")
+    finally:
+        supervisor.stop()
+        if input_backend:
+            input_backend.close()
+        logger.info(f"Bot 'supervise' command finished. Shared work: {supervisor.get_stats()}")
+
+
+def handle_compile(args):
+    logger.info(f"Executing 'compile' command for profile input: {args.profile}")
+
+    resolved_profile_path = _validate_profile_path(args.profile, for_new_edit=False)
+    if not resolved_profile_path:
+        sys.exit(1)
+
+    try:
+        from mark_i.engines.profile_compiler import compile_profile, write_compiled_profile
+
+        compiled = compile_profile(resolved_profile_path)
+        output_path = write_compiled_profile(compiled, output_path=args.output)
+    except Exception as e:
+        logger.error(f"Failed to compile profile '{resolved_profile_path}': {e}", exc_info=True)
+        print(f"Error: Could not compile profile '{resolved_profile_path}': {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Compiled '{resolved_profile_path}' -> '{output_path}' ({len(compiled.profile_data.get('rules', []))} rules, {len(compiled.templates)} templates).")
+
+
+def handle_serve(args):
+    logger.info(f"Executing 'serve' command (profiles to start: {args.profiles or 'none'}).")
+    input_backend = _configure_input_backend(args)
+    install_dump_signal_handler()  # SIGUSR1 dumps the flight recorders of the running profiles
+    profile_daemon = ProfileDaemon(profile_path_resolver=_validate_profile_path, use_compiled_profile=not args.no_profile_cache)
+    try:
+        server = create_control_server(profile_daemon, host=args.host, port=args.port, unix_socket_path=args.unix_socket, auth_token=args.auth_token or os.getenv(ENV_CONTROL_TOKEN))
+    except (OSError, ValueError) as e:
+        logger.critical(f"Could not open the control endpoint: {e}", exc_info=True)
+        print(f"Error: Could not open the control endpoint: {e}", file=sys.stderr)
+        sys.exit(1)
+    endpoint = f"unix:{args.unix_socket}" if args.unix_socket else f"http://{args.host}:{server.server_address[1]}"  # type: ignore[index]
+    server_thread = threading.Thread(target=server.serve_forever, name="MarkIControlServer", daemon=True)
+    try:
+        for profile in args.profiles:
+            try:
+                profile_daemon.load_profile(profile, start=True)
+            except DaemonError as e:
+                logger.error(f"'serve': {e}")
+                print(f"Error: {e}", file=sys.stderr)
+        report_import_trace()
+        server_thread.start()
+        print(f"Mark-I daemon listening on {endpoint} (GET /profiles, GET /metrics, POST /shutdown). Press Ctrl+C to stop.")
+        while not profile_daemon.shutdown_requested.wait(timeout=0.5):
+            pass
+        logger.info("'serve': Shutdown requested through the control API.")
+    except KeyboardInterrupt:
+        logger.info("Ctrl+C received in CLI 'serve' command. Stopping all profiles...")
+    finally:
+        profile_daemon.stop_all()
+        if server_thread.is_alive():
+            server.shutdown()
+        server.server_close()
+        if args.unix_socket:
+            try:
+                remove_stale_unix_socket(args.unix_socket)
+            except OSError as e:
+                logger.warning(f"Could not remove the control socket '{args.unix_socket}': {e}")
+        if input_backend:
+            input_backend.close()
+        logger.info("Mark-I daemon stopped.")
+
+
 def handle_edit(args):
     profile_input_for_edit = args.profile  # This can be None for a new profile
     resolved_profile_path_for_edit: Optional[str] = None
@@ -140,6 +264,7 @@ def handle_edit(args):
         logger.info(f"Initializing MainAppWindow. Profile to load: {resolved_profile_path_for_edit if resolved_profile_path_for_edit else 'New Profile'}")
         app_gui = MainAppWindow(initial_profile_path=resolved_profile_path_for_edit)
         logger.info("MainAppWindow initialized. Starting GUI main loop...")
+        report_import_trace()
         app_gui.mainloop()
         logger.info("GUI main loop finished.")
     except SystemExit: # NOSONAR
@@ -203,14 +328,64 @@ def create_parser():
     parser.add_argument("-v", "--verbose", action="store_const", const=logging.DEBUG, default=logging.INFO, help="Increase console logging verbosity to DEBUG.")
     parser.add_argument("--log-file", type=str, default=None, help="Specify a custom path for the log file for this session.")
     parser.add_argument("--no-file-logging", action="store_true", help="Disable file logging for this session.")
+    parser.add_argument(
+        "--trace-imports", action="store_true", help="Print how long each module took to import once startup is complete (before the bot or GUI starts)."
+    )
+    parser.add_argument("--trace-file", type=str, default=None, metavar="PATH", help="Record a timeline of monitoring cycles and write it to this Chrome Trace Event JSON file at exit (open it in Perfetto).")
+    parser.add_argument("--trace-sample-rate", type=float, default=1.0, metavar="FRACTION", help="With --trace-file: fraction of monitoring cycles to record (default: 1.0, every cycle).")
+    parser.add_argument("--gemini-cassette", type=str, default=None, metavar="PATH", help="Record Gemini responses to, or replay them from, this JSONL cassette file.")
+    parser.add_argument("--gemini-cassette-mode", choices=["record", "replay"], default="replay", help="Cassette mode (default: replay). Replay needs no API key or network.")
+    parser.add_argument(
+        "--gemini-cassette-latency",
+        choices=["none", "recorded", "distribution"],
+        default="none",
+        help="Latency injected when replaying: none, each response's recorded latency, or samples from the recorded distribution.",
+    )
 
     subparsers = parser.add_subparsers(dest="command", help="Available commands", required=True)
 
     # Run command
     run_parser = subparsers.add_parser("run", help="Run a bot profile.")
     run_parser.add_argument("profile", help="Path or name of the bot profile JSON file (e.g., my_bot or profiles/my_bot.json).")
+    run_parser.add_argument(
+        "--input-backend",
+        choices=["pyautogui", "xtest", "dryrun", "record"],
+        default=None,
+        help="How mouse/keyboard actions are performed: pyautogui (default), xtest (direct X11 XTEST events), dryrun (no input), or record (no input, events logged with timestamps).",
+    )
+    run_parser.add_argument("--input-record-file", type=str, default=None, metavar="PATH", help="With --input-backend record: write the recorded input events to this JSONL file on exit.")
+    run_parser.add_argument("--no-profile-cache", action="store_true", help="Load the profile JSON directly instead of its compiled sidecar cache.")
     run_parser.set_defaults(func=handle_run)
 
+    # Supervise command
+    supervise_parser = subparsers.add_parser("supervise", help="Run several profiles in one process, sharing screen captures and analyses between them.")
+    supervise_parser.add_argument("profiles", nargs="+", help="Paths or names of the bot profile JSON files.")
+    supervise_parser.add_argument("--overrun-policy", choices=["skip", "catch_up", "degrade"], default="skip", help="What to do when a tick overruns the next one (see monitoring_overrun_policy).")
+    supervise_parser.add_argument("--input-backend", choices=["pyautogui", "xtest", "dryrun", "record"], default=None, help="How mouse/keyboard actions are performed (see 'run').")
+    supervise_parser.add_argument("--input-record-file", type=str, default=None, metavar="PATH", help="With --input-backend record: write the recorded input events to this JSONL file on exit.")
+    supervise_parser.add_argument("--no-profile-cache", action="store_true", help="Load profile JSON files directly instead of their compiled sidecar caches.")
+    supervise_parser.set_defaults(func=handle_supervise)
+
+    # Compile command
+    compile_parser = subparsers.add_parser("compile", help="Pre-compile a profile (merged settings, rule plan, decoded templates) into a sidecar cache for fast startup.")
+    compile_parser.add_argument("profile", help="Path or name of the bot profile JSON file.")
+    compile_parser.add_argument("-o", "--output", type=str, default=None, metavar="PATH", help="Where to write the compiled profile (default: <profile>.compiled next to the profile; only this location is used by 'run').")
+    compile_parser.set_defaults(func=handle_compile)
+
+    # Serve command
+    serve_parser = subparsers.add_parser("serve", help="Run as a headless daemon with a local HTTP control API and Prometheus metrics.")
+    serve_parser.add_argument("profiles", nargs="*", help="Optional: profiles to load and start right away (more can be loaded through the API).")
+    serve_parser.add_argument("--host", type=str, default=DEFAULT_CONTROL_HOST, help=f"Address the control API listens on (default: {DEFAULT_CONTROL_HOST}, local only).")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_CONTROL_PORT, help=f"Port of the control API (default: {DEFAULT_CONTROL_PORT}; 0 picks a free port).")
+    serve_parser.add_argument("--unix-socket", type=str, default=None, metavar="PATH", help="Serve the control API on this Unix socket instead of TCP.")
+    serve_parser.add_argument(
+        "--auth-token", type=str, default=None, help=f"Bearer token every control request (except /health) must send. Defaults to ${ENV_CONTROL_TOKEN}; required with a non-loopback --host."
+    )
+    serve_parser.add_argument("--input-backend", choices=["pyautogui", "xtest", "dryrun", "record"], default=None, help="How mouse/keyboard actions are performed (see 'run').")
+    serve_parser.add_argument("--input-record-file", type=str, default=None, metavar="PATH", help="With --input-backend record: write the recorded input events to this JSONL file on exit.")
+    serve_parser.add_argument("--no-profile-cache", action="store_true", help="Load profile JSON files directly instead of their compiled sidecar caches.")
+    serve_parser.set_defaults(func=handle_serve)
+
     # Edit command
     edit_parser = subparsers.add_parser("edit", help="Edit or create a bot profile using the GUI.")
     edit_parser.add_argument(
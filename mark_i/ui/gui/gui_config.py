@@ -13,10 +13,47 @@ DEFAULT_PROFILE_STRUCTURE: Dict[str, Any] = { # Added type hint
     "profile_description": "New Profile",
     "settings": {
         "monitoring_interval_seconds": 1.0,
+        "monitoring_overrun_policy": "skip",  # When a cycle overruns its slot: "skip" missed cycles, "catch_up" on them, or "degrade" (skip and drop expensive rules)
+        "monitoring_max_catch_up_cycles": 3,  # With "catch_up", at most this many missed cycles are run back to back
+        "cycle_budget_governor_enabled": True,  # Defer low-priority OCR, dominant-color and Gemini work when cycles run over budget
+        "cycle_time_budget_seconds": 0,  # Per-cycle time budget; 0 means 80% of monitoring_interval_seconds
+        "cycle_budget_max_deferred_cycles": 5,  # Deferred work runs anyway after this many consecutive deferrals
+        "log_sample_every_n_cycles": 1,  # Log the DEBUG/INFO detail of only every Nth monitoring cycle (warnings and errors are always logged)
+        "flight_recorder_enabled": True,  # Keep the structured events of recent cycles in memory and dump them on errors, rule markers or SIGUSR1
+        "flight_recorder_cycles": 50,  # Number of recent cycles the flight recorder keeps
+        "flight_recorder_dump_dir": None,  # Where dumps are written (null = logs/flight_recorder)
+        "flight_recorder_min_dump_interval_seconds": 60.0,  # Error and rule-marker dumps closer together than this are dropped
         "analysis_dominant_colors_k": 3,
         "tesseract_cmd_path": None,  # Optional path to tesseract executable
         "tesseract_config_custom": "",  # Custom tesseract config string, e.g., "--psm 6"
         "gemini_default_model_name": "gemini-1.5-flash-latest",  # Default model for Gemini features
+        "gemini_image_max_long_edge": 1600,  # Downscale Gemini uploads so the longest side fits (0 or null = no limit)
+        "gemini_image_max_pixels": 0,  # Optional total pixel budget for Gemini uploads (0 or null = no limit)
+        "gemini_image_format": "png",  # Upload encoding: "png" (lossless), "jpeg" or "webp"
+        "gemini_image_quality": 85,  # Quality (1-100) for "jpeg"/"webp" uploads
+        "gemini_image_grayscale": False,  # Send Gemini uploads as grayscale
+        "gemini_batch_vision_queries": True,  # Combine the static gemini_vision_query questions a cycle will reach (whole conditions or first sub-conditions) per region into one request
+        "gemini_request_timeout_seconds": 10.0,  # Per-attempt deadline for Gemini calls (0 or null = none)
+        "gemini_max_retries": 1,  # Retries for transient Gemini errors (429/500/503/504), with jittered exponential backoff
+        "gemini_retry_base_delay_seconds": 1.0,
+        "gemini_retry_max_delay_seconds": 4.0,
+        "gemini_retry_budget_seconds": 15.0,  # Cap on one query's attempts plus backoff, which block the monitoring thread (0 or null = none)
+        "gemini_circuit_failure_threshold": 3,  # Consecutive failed calls before failing fast
+        "gemini_circuit_cooldown_seconds": 60.0,  # How long to fail fast before trying Gemini again
+        "gemini_nlu_plan_cache_enabled": True,  # Reuse parsed plans for repeated gemini_perform_task commands (stored in cache/)
+        "gemini_element_locator_cache_enabled": True,  # Verify previously refined NLU targets by local template match before asking Gemini
+        "element_locator_match_threshold": 0.9,
+        "visual_settle_enabled": True,  # Wait for the screen to stop changing after NLU steps instead of sleeping a fixed delay
+        "visual_settle_timeout_seconds": 2.0,
+        "async_action_dispatch": True,  # Run rule actions on a worker thread so long actions don't delay the next capture
+        "action_queue_max_pending": 32,  # Further actions are dropped while this many are waiting
+        "type_text_input_method": "type",  # Default for type_text actions without 'input_method': "type", "paste" or "auto"
+        "paste_input_min_length": 40,  # With "auto", texts at least this long are pasted via the clipboard
+        "hot_reload_enabled": True,  # While running, pick up saved profile/template changes between cycles without a restart
+        "hot_reload_poll_interval_seconds": 1.0,
+        "startup_warmup_enabled": True,  # Before the first cycle, load templates, start Tesseract, set up Gemini and grab each region once (in parallel)
+        "startup_warmup_timeout_seconds": 15.0,  # The loop starts after this even if some warm-up tasks are still running
+        "startup_warmup_gemini_model_call": False,  # Also send one tiny (billable) Gemini request during warm-up
     },
     "regions": [],
     "templates": [],
@@ -54,6 +91,15 @@ CLICK_BUTTONS: List[str] = ["left", "middle", "right", "primary", "secondary"]
 
 LOG_LEVELS: List[str] = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]  # For log_message action
 
+# For 'gemini_vision_query' conditions: 'always_fresh' blocks on a Gemini call every evaluation,
+# 'stale_while_revalidate' serves the last known result while refreshing it in the background.
+GEMINI_QUERY_FRESHNESS_MODES: List[str] = ["always_fresh", "stale_while_revalidate"]
+
+# For 'type_text' actions: 'paste' enters the whole text with one clipboard paste (previous
+# clipboard content is restored), 'auto' pastes only texts of at least 'paste_input_min_length' chars.
+# The empty choice leaves the action on the profile's 'type_text_input_method' setting.
+TEXT_INPUT_METHODS: List[str] = ["", "type", "paste", "auto"]
+
 # For 'gemini_perform_task' action's 'allowed_actions_override' parameter.
 # These should match the keys in GeminiDecisionModule.PREDEFINED_ALLOWED_SUB_ACTIONS.
 # This list is for UI presentation (e.g., tooltips, validation hints).
@@ -232,6 +278,26 @@ UI_PARAM_CONFIG: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
                 "allow_empty_string": True,
                 "placeholder": "e.g., gemini-1.5-flash-latest",
             },
+            {
+                "id": "freshness",
+                "label": "Result Freshness:",
+                "widget": "optionmenu_static",
+                "options_const_key": "GEMINI_QUERY_FRESHNESS_MODES",
+                "type": str,
+                "default": "always_fresh",
+                "required": False,
+            },
+            {
+                "id": "max_staleness_seconds",
+                "label": "Max Staleness (seconds):",
+                "widget": "entry",
+                "type": float,
+                "default": 5.0,
+                "required": False,
+                "min_val": 0.0,
+                "placeholder": "5.0",
+                "condition_show": {"field_id_prefix": "cond_", "field": "freshness", "values": ["stale_while_revalidate"]},
+            },
             {"id": "region", "label": "Target Region (Override):", "widget": "optionmenu_dynamic", "options_source": "regions", "type": str, "default": "", "required": False},
         ],
         "always_true": [
@@ -314,6 +380,7 @@ UI_PARAM_CONFIG: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
                 "allow_empty_string": True,
                 "placeholder": "0.0 or {var}",
             },
+            {"id": "await_completion", "label": "Wait Until Action Finishes", "widget": "checkbox", "type": bool, "default": False, "required": False},
         ],
         "type_text": [
             {
@@ -337,6 +404,7 @@ UI_PARAM_CONFIG: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
                 "allow_empty_string": True,
                 "placeholder": "0.0 or {var}",
             },  # Default 0.0, PyAutoGUI types fast if 0
+            {"id": "input_method", "label": "Input Method:", "widget": "optionmenu_static", "options_const_key": "TEXT_INPUT_METHODS", "type": str, "default": "", "required": False},
             {
                 "id": "pyautogui_pause_before",
                 "label": "Pause Before Action (s):",
@@ -347,6 +415,7 @@ UI_PARAM_CONFIG: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
                 "allow_empty_string": True,
                 "placeholder": "0.0 or {var}",
             },
+            {"id": "await_completion", "label": "Wait Until Action Finishes", "widget": "checkbox", "type": bool, "default": False, "required": False},
         ],
         "press_key": [
             {
@@ -368,6 +437,7 @@ UI_PARAM_CONFIG: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
                 "allow_empty_string": True,
                 "placeholder": "0.0 or {var}",
             },
+            {"id": "await_completion", "label": "Wait Until Action Finishes", "widget": "checkbox", "type": bool, "default": False, "required": False},
         ],
         "log_message": [
             {
@@ -448,4 +518,6 @@ OPTIONS_CONST_MAP: Dict[str, List[str]] = {
     "LOG_LEVELS": LOG_LEVELS,
     "LOGICAL_OPERATORS": LOGICAL_OPERATORS,  # Added for consistency if needed, though usually hardcoded in UI
     "GEMINI_TASK_ALLOWED_ACTION_TYPES_FOR_UI": GEMINI_TASK_ALLOWED_PRIMITIVE_ACTIONS_FOR_UI_HINT,
+    "GEMINI_QUERY_FRESHNESS_MODES": GEMINI_QUERY_FRESHNESS_MODES,
+    "TEXT_INPUT_METHODS": TEXT_INPUT_METHODS,
 }
\ No newline at end of file
@@ -17,7 +17,8 @@ from mark_i.ui.gui.gui_utils import validate_and_get_widget_value, create_clicka
 from mark_i.ui.gui.panels.details_panel import DetailsPanel
 
 from mark_i.ui.gui.generation.profile_creation_wizard import ProfileCreationWizardWindow
-from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer, gemini_analyzer_options_from_settings
+from mark_i.engines.gemini_cassette import gemini_replay_active
 
 from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME
 
@@ -79,9 +80,10 @@ class MainAppWindow(ctk.CTk):
         # AI Components
         self.gemini_analyzer_instance: Optional[GeminiAnalyzer] = None
         gemini_api_key = os.getenv("GEMINI_API_KEY")
-        if gemini_api_key:
-            default_gem_model = self.profile_data.get("settings", {}).get("gemini_default_model_name", "gemini-1.5-flash-latest")
-            self.gemini_analyzer_instance = GeminiAnalyzer(api_key=gemini_api_key, default_model_name=default_gem_model)
+        if gemini_api_key or gemini_replay_active():
+            profile_settings = self.profile_data.get("settings", {})
+            default_gem_model = profile_settings.get("gemini_default_model_name", "gemini-1.5-flash-latest")
+            self.gemini_analyzer_instance = GeminiAnalyzer(api_key=gemini_api_key, default_model_name=default_gem_model, **gemini_analyzer_options_from_settings(profile_settings.get))
             if not self.gemini_analyzer_instance.client_initialized:
                 logger.error("MainAppWindow: GeminiAnalyzer failed to initialize.")
         else:
@@ -292,7 +294,7 @@ class MainAppWindow(ctk.CTk):
         # Unchanged
         try:
             self.config_manager = ConfigManager(filepath, create_if_missing=False)
-            self.profile_data = self.config_manager.get_profile_data()
+            self.profile_data = self.config_manager.get_mutable_profile_data()  # The editor mutates its working copy in place
             self.current_profile_path = self.config_manager.get_profile_path()
             self._populate_ui_from_profile_data()
             self._set_dirty_status(False)
@@ -5,6 +5,7 @@ from unittest.mock import patch, mock_open  # Ensure mock_open is imported
 import copy
 
 from mark_i.core.config_manager import ConfigManager, PROFILES_DIR_NAME, TEMPLATES_SUBDIR_NAME
+from mark_i.core.frozen_config import FrozenConfigError
 from mark_i.ui.gui.gui_config import DEFAULT_PROFILE_STRUCTURE  # For comparison
 
 # Define a fixed project root for testing path resolution consistently
@@ -264,20 +265,49 @@ def test_getters_return_copies_and_defaults(mock_project_root_cm):
     assert cm.get_setting("monitoring_interval_seconds") == DEFAULT_PROFILE_STRUCTURE["settings"]["monitoring_interval_seconds"]
     assert cm.get_setting("non_existent_setting", "default_val") == "default_val"
 
-    regions_list = cm.get_regions()
-    assert regions_list == []
-    regions_list.append({"new_region": True})
-    assert cm.get_regions() == []  # Should be a copy
+    for getter in (cm.get_regions, cm.get_templates, cm.get_rules):
+        items_list = getter()
+        assert items_list == []
+        with pytest.raises(FrozenConfigError):  # Snapshots are shared, so in-place edits are rejected
+            items_list.append({"new_item": True})
+        assert getter() == []
 
-    templates_list = cm.get_templates()
-    assert templates_list == []
-    templates_list.append({"new_template": True})
-    assert cm.get_templates() == []
+    mutable_profile = cm.get_mutable_profile_data()
+    mutable_profile["regions"].append({"name": "r_new"})
+    assert cm.get_regions() == []  # A mutable copy never leaks into the snapshot
 
-    rules_list = cm.get_rules()
-    assert rules_list == []
-    rules_list.append({"new_rule": True})
-    assert cm.get_rules() == []
+
+def test_region_lookup_uses_index_without_copying(mock_project_root_cm):
+    cm = ConfigManager(None, create_if_missing=True)
+    cm.update_profile_data({"regions": [{"name": "r1", "x": 1, "y": 2, "width": 3, "height": 4}, {"name": "r1", "x": 99}], "templates": [{"name": "t1", "filename": "t1.png"}]})
+    region = cm.get_region_config("r1")
+    assert region["x"] == 1  # First definition wins, as with the previous linear scan
+    assert cm.get_region_config("r1") is region
+    assert isinstance(region, dict) and json.loads(json.dumps(region))["width"] == 3
+    with pytest.raises(FrozenConfigError):
+        region["x"] = 5
+    assert cm.get_region_config("missing") is None
+    assert cm.get_template_config("t1")["filename"] == "t1.png"
+    assert list(cm.get_all_region_configs()) == ["r1"]
+
+
+def test_edit_profile_is_copy_on_write(mock_project_root_cm):
+    cm = ConfigManager(None, create_if_missing=True)
+    snapshot_before = cm.get_profile_data()
+    version_before = cm.snapshot_version
+    with cm.edit_profile() as profile:
+        profile["regions"].append({"name": "r1", "x": 0, "y": 0, "width": 10, "height": 10})
+    assert cm.get_region_config("r1")["width"] == 10
+    assert snapshot_before["regions"] == []  # Readers holding the old snapshot are unaffected
+    assert cm.snapshot_version > version_before
+
+    cm.set_setting("monitoring_interval_seconds", 0.25)
+    assert cm.get_setting("monitoring_interval_seconds") == 0.25
+    assert cm.get_region_config("r1")["width"] == 10
+
+    edited_copy = copy.deepcopy(cm.get_region_config("r1"))
+    edited_copy["width"] = 20  # deepcopy of a snapshot yields a plain mutable dict
+    assert cm.get_region_config("r1")["width"] == 10
 
 
 def test_update_profile_data_merges_correctly(mock_project_root_cm):
@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+
+from mark_i.core import flight_recorder as flight_recorder_module
+from mark_i.core.flight_recorder import FlightRecorder, dump_all_flight_recorders
+
+
+def _run_cycle(recorder, cycle_number, met=False):
+    recorder.begin_cycle(degraded=False)
+    recorder.record("capture", "chat", 1.5, (40, 80, 3))
+    recorder.record("analysis", "chat", "ocr", {"text": f"hp {cycle_number}", "average_confidence": 91.0}, 12.0)
+    recorder.record("condition", "low_hp", met, 0.2)
+    return recorder.end_cycle()
+
+
+def test_keeps_only_the_last_cycles_and_decodes_events():
+    recorder = FlightRecorder(name="bot", max_cycles=3)
+    for cycle_number in range(1, 6):
+        assert _run_cycle(recorder, cycle_number) is None  # No dump requested
+
+    cycles = recorder.snapshot()
+    assert [cycle["cycle"] for cycle in cycles] == [3, 4, 5]
+    capture, ocr, condition = cycles[-1]["events"]
+    assert capture["kind"] == "capture" and capture["region"] == "chat" and capture["shape"] == (40, 80, 3)
+    assert ocr["analysis"] == "ocr" and ocr["result"]["text"] == "hp 5"
+    assert condition == {"t_ms": condition["t_ms"], "kind": "condition", "rule": "low_hp", "met": False, "duration_ms": 0.2}
+    assert cycles[-1]["degraded"] is False and cycles[-1]["duration_ms"] >= 0
+
+
+def test_requested_dump_is_written_after_the_cycle_and_rate_limited(tmp_path):
+    recorder = FlightRecorder(name="bot", dump_dir=str(tmp_path), min_dump_interval_sec=3600)
+    _run_cycle(recorder, 1)
+    recorder.begin_cycle()
+    recorder.record("marker", "low_hp")
+    recorder.record("analysis", "chat", "average_color", np.array([1, 2, 3], dtype=np.uint8), np.float64(0.5))
+    recorder.request_dump("rule-low_hp")
+    recorder.end_cycle().join(timeout=5)
+
+    dump_files = list(tmp_path.glob("flight_*_bot_rule-low_hp.json"))
+    assert len(dump_files) == 1
+    dump = json.loads(dump_files[0].read_text(encoding="utf-8"))
+    assert dump["reason"] == "rule-low_hp" and [cycle["cycle"] for cycle in dump["cycles"]] == [1, 2]
+    assert dump["cycles"][1]["events"][1]["result"] == "<ndarray shape=(3,) dtype=uint8>" and dump["cycles"][1]["events"][1]["duration_ms"] == 0.5
+
+    recorder.begin_cycle()
+    recorder.request_dump("exception")
+    assert recorder.end_cycle() is None and recorder.dumps_suppressed == 1
+
+
+def test_on_demand_dump_includes_the_running_cycle(tmp_path, monkeypatch):
+    monkeypatch.setattr(flight_recorder_module, "_live_recorders", flight_recorder_module.weakref.WeakSet())
+    recorder = FlightRecorder(name="bot", dump_dir=str(tmp_path))
+    recorder.begin_cycle()
+    recorder.record("error", "monitoring_cycle", "RuntimeError('boom')")
+
+    (dump_path,) = dump_all_flight_recorders("signal")
+    running_cycle = json.loads(open(dump_path, encoding="utf-8").read())["cycles"][0]
+    assert running_cycle["duration_ms"] is None and running_cycle["events"][0]["error"] == "RuntimeError('boom')"
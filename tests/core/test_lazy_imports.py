@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from mark_i.core.lazy_imports import ImportTimeTracer, lazy_import
+
+# Import-time budget for what `mark_i run` loads before the monitoring loop starts. Override with
+# MARK_I_IMPORT_BUDGET_MS on slow CI machines.
+DEFAULT_RUN_IMPORT_BUDGET_MS = 1000.0
+HEAVY_OPTIONAL_MODULES = ["google.generativeai", "google.api_core.exceptions", "pytesseract", "pyautogui", "customtkinter"]
+
+_STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import mark_i.ui.cli, mark_i.main_controller
+elapsed_ms = (time.perf_counter() - start) * 1000.0
+from mark_i.engines.analysis_engine import AnalysisEngine
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+AnalysisEngine(ocr_command="/opt/tesseract/bin/tesseract")
+GeminiAnalyzer(api_key="test-key")
+print(json.dumps({"elapsed_ms": elapsed_ms, "loaded": [m for m in sys.argv[1:] if m in sys.modules]}))
+"""
+
+
+@pytest.fixture(scope="module")
+def startup_probe():
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    completed = subprocess.run(
+        [sys.executable, "-c", _STARTUP_PROBE, *HEAVY_OPTIONAL_MODULES], cwd=project_root, capture_output=True, text=True, timeout=120, env={**os.environ, "PYTHONPATH": project_root}
+    )
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_run_startup_does_not_import_optional_heavy_dependencies(startup_probe):
+    assert startup_probe["loaded"] == []
+
+
+def test_run_startup_import_time_is_within_budget(startup_probe):
+    budget_ms = float(os.getenv("MARK_I_IMPORT_BUDGET_MS", DEFAULT_RUN_IMPORT_BUDGET_MS))
+    assert startup_probe["elapsed_ms"] <= budget_ms, f"Importing the 'run' command took {startup_probe['elapsed_ms']:.0f} ms (budget {budget_ms:.0f} ms)."
+
+
+def test_lazy_module_imports_on_first_attribute_access():
+    lazy_colorsys = lazy_import("colorsys")
+    assert "not loaded" in repr(lazy_colorsys)
+    assert lazy_colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "(loaded)" in repr(lazy_colorsys)
+
+
+def test_import_time_tracer_records_nested_imports():
+    sys.modules.pop("xml.dom.minidom", None)
+    tracer = ImportTimeTracer().install()
+    try:
+        import xml.dom.minidom  # noqa: F401
+    finally:
+        tracer.uninstall()
+    timing = tracer.timings["xml.dom.minidom"]
+    assert timing["cumulative_ms"] >= timing["self_ms"] >= 0.0
+    assert "xml.dom.minidom" in tracer.format_report()
@@ -0,0 +1,109 @@
+import logging
+import logging.handlers
+import sys
+import threading
+
+import pytest
+
+from mark_i.core import logging_setup
+from mark_i.core.logging_setup import APP_ROOT_LOGGER_NAME, CycleLogSampler, DeferredFormatQueueHandler, setup_logging
+
+
+@pytest.fixture
+def restore_app_logger():
+    app_logger = logging.getLogger(APP_ROOT_LOGGER_NAME)
+    saved = (list(app_logger.handlers), app_logger.level, app_logger.propagate)
+    yield app_logger
+    logging_setup._stop_queue_listener()
+    app_logger.handlers[:] = saved[0]
+    app_logger.setLevel(saved[1])
+    app_logger.propagate = saved[2]
+
+
+def _record(name, level, msg, args=None, exc_info=None):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, exc_info)
+
+
+def test_cycle_log_sampler_drops_hot_path_detail_of_unsampled_cycles():
+    sampler = CycleLogSampler()
+    hot_info = _record(f"{APP_ROOT_LOGGER_NAME}.engines.capture_engine", logging.INFO, "captured")
+    hot_warning = _record(f"{APP_ROOT_LOGGER_NAME}.engines.capture_engine", logging.WARNING, "capture failed")
+    other_info = _record(f"{APP_ROOT_LOGGER_NAME}.engines.action_executor", logging.INFO, "clicked")
+
+    sampled_cycles = []
+    for _ in range(6):
+        sampled_cycles.append(sampler.begin_cycle(every_n_cycles=3))
+        sampler.end_cycle()
+    assert sampled_cycles == [True, False, False, True, False, False]
+
+    sampler.begin_cycle(every_n_cycles=3)  # Cycle 7: sampled
+    assert sampler.filter(hot_info)
+    sampler.end_cycle()
+    sampler.begin_cycle(every_n_cycles=3)  # Cycle 8: not sampled
+    assert not sampler.filter(hot_info)
+    assert sampler.filter(hot_warning) and sampler.filter(other_info)
+    sampler.end_cycle()
+    assert sampler.filter(hot_info)  # Between cycles everything passes
+    assert sampler.suppressed_count == 1
+
+
+def test_cycle_log_sampler_decides_per_thread():
+    sampler = CycleLogSampler()
+    hot_info = _record(f"{APP_ROOT_LOGGER_NAME}.engines.rules_engine", logging.INFO, "evaluating")
+    sampler.begin_cycle(every_n_cycles=2)
+    sampler.end_cycle()
+    sampler.begin_cycle(every_n_cycles=2)  # This thread's cycle 2: not sampled
+    other_profile = []
+
+    def other_profile_cycle():
+        other_profile.append(sampler.begin_cycle(every_n_cycles=2))  # Its own cycle 1: sampled
+        other_profile.append(sampler.filter(hot_info))
+        with sampler.in_cycle(False):
+            other_profile.append(sampler.filter(hot_info))
+        sampler.end_cycle()
+
+    worker = threading.Thread(target=other_profile_cycle)
+    worker.start()
+    worker.join()
+    assert other_profile == [True, True, False]
+    assert not sampler.filter(hot_info)  # Not switched back on by the other thread
+    sampler.end_cycle()
+    assert sampler.suppressed_count == 2
+
+
+def test_queue_handler_defers_formatting_of_scalar_arguments_only():
+    handler = DeferredFormatQueueHandler(None)
+    lazy = handler.prepare(_record("mark_i.x", logging.INFO, "%s took %.1fms", ("ocr", 12.5)))
+    assert lazy.msg == "%s took %.1fms" and lazy.args == ("ocr", 12.5)
+    assert lazy.getMessage() == "ocr took 12.5ms"
+
+    packet_keys = ["image"]
+    eager = handler.prepare(_record("mark_i.x", logging.DEBUG, "Keys: %s", (packet_keys,)))
+    packet_keys.append("ocr_analysis_result")  # Mutated after the call: the queued message must not change
+    assert eager.getMessage() == "Keys: ['image']" and eager.args is None
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        with_traceback = handler.prepare(_record("mark_i.x", logging.ERROR, "failed", exc_info=sys.exc_info()))
+    assert with_traceback.exc_info is None and "ValueError: boom" in with_traceback.exc_text
+
+
+def test_async_setup_writes_through_a_background_listener(tmp_path, monkeypatch, restore_app_logger):
+    monkeypatch.setenv("APP_ENV", "production")
+    log_file = tmp_path / "run.log"
+    setup_logging(log_file_path_override=str(log_file), async_logging=True)
+    assert [type(handler) for handler in restore_app_logger.handlers] == [DeferredFormatQueueHandler]
+    assert restore_app_logger.level == logging.INFO  # Nothing accepts DEBUG outside development, so DEBUG records are never built
+    assert not logging_setup.hot_path_log_enabled(logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.rules_engine"))
+
+    logging.getLogger(f"{APP_ROOT_LOGGER_NAME}.engines.rules_engine").info("RulesEngine: Evaluating %d rules for current cycle.", 4)
+    logging_setup._stop_queue_listener()  # What atexit does: drains the queue into the handlers
+    assert "RulesEngine: Evaluating 4 rules for current cycle." in log_file.read_text(encoding="utf-8")
+
+
+def test_sync_setup_keeps_handlers_on_the_logger(tmp_path, restore_app_logger):
+    setup_logging(log_file_path_override=str(tmp_path / "run.log"), async_logging=False)
+    handler_types = {type(handler) for handler in restore_app_logger.handlers}
+    assert logging.handlers.TimedRotatingFileHandler in handler_types and DeferredFormatQueueHandler not in handler_types
+    assert logging_setup._queue_listener is None
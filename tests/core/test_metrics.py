@@ -0,0 +1,38 @@
+from mark_i.core.metrics import LatencyHistogram, PrometheusTextBuilder, cache_hit_ratio
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = LatencyHistogram(buckets_ms=(10, 100))
+    for value_ms in (5, 10, 50, 500):
+        histogram.observe(value_ms)
+    snapshot = histogram.snapshot()
+    assert [count for _, count in snapshot["buckets"]] == [2, 3, 4]
+    assert snapshot["count"] == 4 and snapshot["sum_ms"] == 565
+
+
+def test_prometheus_text_groups_samples_by_metric():
+    histogram = LatencyHistogram(buckets_ms=(100,))
+    histogram.observe(250)
+    builder = PrometheusTextBuilder()
+    builder.add_counter("rule_evaluations_total", "Rule condition evaluations.", 3, {"profile": "a", "rule": 'say "hi"'})
+    builder.add_counter("rule_evaluations_total", "Rule condition evaluations.", 4, {"profile": "b", "rule": "x"})
+    builder.add_gauge("cache_hit_ratio", "Cache hits / lookups since startup.", None)
+    builder.add_histogram("cycle_duration_seconds", "Monitoring cycle duration.", histogram.snapshot(), {"profile": "a"})
+
+    assert builder.render().splitlines() == [
+        "# HELP mark_i_rule_evaluations_total Rule condition evaluations.",
+        "# TYPE mark_i_rule_evaluations_total counter",
+        'mark_i_rule_evaluations_total{profile="a",rule="say \\"hi\\""} 3',
+        'mark_i_rule_evaluations_total{profile="b",rule="x"} 4',
+        "# HELP mark_i_cycle_duration_seconds Monitoring cycle duration.",
+        "# TYPE mark_i_cycle_duration_seconds histogram",
+        'mark_i_cycle_duration_seconds_bucket{profile="a",le="0.1"} 0',
+        'mark_i_cycle_duration_seconds_bucket{profile="a",le="+Inf"} 1',
+        'mark_i_cycle_duration_seconds_sum{profile="a"} 0.25',
+        'mark_i_cycle_duration_seconds_count{profile="a"} 1',
+    ]
+
+
+def test_cache_hit_ratio():
+    assert cache_hit_ratio({"hits": 3, "misses": 1}) == 0.75
+    assert cache_hit_ratio({"hits": 0, "misses": 0}) is None
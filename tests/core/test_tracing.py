@@ -0,0 +1,80 @@
+import json
+import threading
+
+from mark_i.core import tracing
+from mark_i.core.tracing import ChromeTracer, traced
+
+
+def test_spans_are_written_as_chrome_trace_events(tmp_path):
+    tracer = ChromeTracer()
+    tracer.begin_cycle()
+    with tracer.span("cycle", "cycle"):
+        with tracer.span("ocr_contains_text", "condition", rule="r1") as condition_span:
+            condition_span.set_arg("met", True)
+        worker = threading.Thread(target=lambda: tracer.span("action", "action").__enter__().__exit__(None, None, None), name="ActionWorker")
+        worker.start()
+        worker.join()
+    tracer.end_cycle()
+
+    trace_path = tmp_path / "trace.json"
+    assert tracer.write(str(trace_path)) == 3
+    trace = json.loads(trace_path.read_text())
+    spans = {event["name"]: event for event in trace["traceEvents"] if event["ph"] == "X"}
+    assert spans["ocr_contains_text"]["args"] == {"rule": "r1", "met": True}
+    assert spans["cycle"]["ts"] <= spans["ocr_contains_text"]["ts"] and spans["cycle"]["dur"] >= spans["ocr_contains_text"]["dur"]
+    thread_names = {event["args"]["name"] for event in trace["traceEvents"] if event["name"] == "thread_name"}
+    assert "ActionWorker" in thread_names
+
+
+def test_sampling_decisions_are_per_thread():
+    tracer = ChromeTracer(sample_rate=0.0)
+    tracer.begin_cycle()  # Unsampled cycle on this thread...
+    other_thread_recording = []
+
+    def other_profile_cycle():
+        tracer.sample_rate = 1.0
+        tracer.begin_cycle()  # ...while another profile's sampled cycle runs
+        other_thread_recording.append(tracer.recording)
+        with tracer.in_cycle(False):  # A worker adopting an unsampled cycle
+            other_thread_recording.append(tracer.recording)
+        other_thread_recording.append(tracer.recording)
+        tracer.end_cycle()
+
+    worker = threading.Thread(target=other_profile_cycle)
+    worker.start()
+    worker.join()
+    assert other_thread_recording == [True, False, True]
+    assert tracer.recording is False
+    tracer.end_cycle()
+    assert tracer.recording is True and tracer.cycles_seen == 2 and tracer.cycles_sampled == 1
+
+
+def test_unsampled_cycles_and_disabled_tracer_record_nothing():
+    tracer = ChromeTracer(sample_rate=0.0)
+    assert tracer.begin_cycle() is False
+    with tracer.span("capture_region", "capture"):
+        pass
+    tracer.end_cycle()
+    assert tracer.events()[1:] == [] and tracer.cycles_seen == 1 and tracer.cycles_sampled == 0
+
+    disabled = ChromeTracer(enabled=False)
+    disabled.begin_cycle()
+    assert disabled.span("x") is disabled.span("y")  # The shared no-op span
+
+
+def test_traced_decorator_uses_the_process_wide_tracer(monkeypatch):
+    tracer = ChromeTracer()
+    monkeypatch.setattr(tracing, "_default_tracer", tracer)
+    monkeypatch.setattr(tracing, "_default_trace_configured", True)
+    span_args_calls = []
+
+    @traced("ocr", "analysis", span_args=lambda image, region_name_context=None: span_args_calls.append(1) or {"region": region_name_context})
+    def ocr(image, region_name_context=None):
+        return "text"
+
+    assert ocr("img", region_name_context="chat") == "text"
+    assert [e["args"] for e in tracer.events() if e["ph"] == "X"] == [{"region": "chat"}]
+
+    monkeypatch.setattr(tracing, "_default_tracer", ChromeTracer(enabled=False))
+    assert ocr("img", region_name_context="chat") == "text"
+    assert span_args_calls == [1]  # Span args are not even computed when tracing is off
@@ -0,0 +1,102 @@
+import threading
+from unittest.mock import create_autospec
+
+import pytest
+
+from mark_i.engines.action_dispatcher import ActionDispatcher, ActionTicket
+from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.input_backends import InputFailSafeError
+
+
+def make_action(text: str, rule_name: str = "Rule1") -> dict:
+    return {"type": "type_text", "text": text, "context": {"rule_name": rule_name, "variables": {}}}
+
+
+@pytest.fixture
+def blocking_executor():
+    """ActionExecutor mock whose actions block until `release` is set, recording execution order."""
+    executor = create_autospec(ActionExecutor, instance=True)
+    release = threading.Event()
+    executed = []
+
+    def run(spec):
+        release.wait(5)
+        executed.append(spec["text"])
+
+    executor.execute_action.side_effect = run
+    return executor, release, executed
+
+
+class TestActionDispatcher:
+    def test_submit_returns_immediately_and_runs_in_order(self, blocking_executor):
+        executor, release, executed = blocking_executor
+        dispatcher = ActionDispatcher(executor)
+        dispatcher.start()
+        tickets = [dispatcher.submit(make_action(t)) for t in ("a", "b", "c")]
+        assert not any(ticket.done() for ticket in tickets)  # Caller was not blocked
+        release.set()
+        assert dispatcher.wait_until_idle(timeout=5)
+        assert executed == ["a", "b", "c"]
+        assert all(ticket.status == ActionTicket.STATUS_DONE for ticket in tickets)
+        dispatcher.stop()
+
+    def test_identical_pending_actions_are_coalesced(self, blocking_executor):
+        executor, release, executed = blocking_executor
+        dispatcher = ActionDispatcher(executor)
+        dispatcher.start()
+        dispatcher.submit(make_action("first"))  # Occupies the worker
+        assert dispatcher.wait_until_idle(timeout=0.05) is False
+        pending_ticket = dispatcher.submit(make_action("again"))
+        assert dispatcher.submit(make_action("again")) is pending_ticket
+        release.set()
+        dispatcher.stop()
+        assert executed == ["first", "again"]
+        assert pending_ticket.coalesced_count == 1
+        assert dispatcher.stats["coalesced"] == 1
+
+    def test_full_queue_drops_new_actions(self, blocking_executor):
+        executor, release, executed = blocking_executor
+        dispatcher = ActionDispatcher(executor, max_pending=1)
+        dispatcher.start()
+        dispatcher.submit(make_action("running"))
+        dispatcher.wait_until_idle(timeout=0.05)  # Give the worker time to take the first action
+        dispatcher.submit(make_action("queued"))
+        dropped_ticket = dispatcher.submit(make_action("overflow"))
+        assert dropped_ticket.status == ActionTicket.STATUS_DROPPED and dropped_ticket.done()
+        release.set()
+        dispatcher.stop()
+        assert executed == ["running", "queued"]
+
+    def test_await_completion_blocks_until_executed(self, blocking_executor):
+        executor, release, executed = blocking_executor
+        release.set()
+        dispatcher = ActionDispatcher(executor)
+        dispatcher.start()
+        ticket = dispatcher.submit(make_action("ordered"), await_completion=True)
+        assert ticket.done() and executed == ["ordered"]
+        dispatcher.stop()
+
+    def test_runs_inline_when_not_started(self):
+        executor = create_autospec(ActionExecutor, instance=True)
+        ticket = ActionDispatcher(executor).submit(make_action("inline"))
+        assert ticket.status == ActionTicket.STATUS_DONE
+        executor.execute_action.assert_called_once()
+
+    def test_failsafe_drops_remaining_actions(self):
+        executor = create_autospec(ActionExecutor, instance=True)
+        gate = threading.Event()
+
+        def run(spec):
+            gate.wait(5)
+            if spec["text"] == "abort":
+                raise InputFailSafeError("corner")
+
+        executor.execute_action.side_effect = run
+        dispatcher = ActionDispatcher(executor)
+        dispatcher.start()
+        aborting_ticket = dispatcher.submit(make_action("abort"))
+        later_ticket = dispatcher.submit(make_action("later"))
+        gate.set()
+        dispatcher.stop()
+        assert aborting_ticket.status == ActionTicket.STATUS_FAILED
+        assert later_ticket.status == ActionTicket.STATUS_DROPPED
@@ -0,0 +1,40 @@
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+from mark_i.engines.capture_engine import CaptureEngine, FrameBufferRing
+
+region_spec = {"name": "r1", "x": 0, "y": 0, "width": 4, "height": 3}
+
+
+def fake_grab(**_kwargs):
+    return Image.new("RGB", (4, 3), (10, 20, 30))
+
+
+@patch("mark_i.engines.capture_engine.ImageGrab.grab", side_effect=fake_grab)
+def test_capture_region_returns_bgr(_mock_grab):
+    frame = CaptureEngine().capture_region(region_spec)
+    assert frame.shape == (3, 4, 3)
+    assert frame[0, 0].tolist() == [30, 20, 10]
+
+
+@patch("mark_i.engines.capture_engine.ImageGrab.grab", side_effect=fake_grab)
+def test_capture_region_reuses_matching_out_buffer(_mock_grab):
+    engine = CaptureEngine()
+    buffer = np.zeros((3, 4, 3), dtype=np.uint8)
+    frame = engine.capture_region(region_spec, out_buffer=buffer)
+    assert frame is buffer
+    assert buffer[0, 0].tolist() == [30, 20, 10]
+
+    mismatched_buffer = np.zeros((5, 5, 3), dtype=np.uint8)
+    assert engine.capture_region(region_spec, out_buffer=mismatched_buffer) is not mismatched_buffer
+
+
+def test_frame_buffer_ring_round_robin():
+    ring = FrameBufferRing(size=2)
+    assert ring.next_buffer() is None
+    frame_a, frame_b = np.zeros((1, 1, 3), np.uint8), np.ones((1, 1, 3), np.uint8)
+    ring.commit(frame_a)
+    ring.commit(frame_b)
+    assert ring.next_buffer() is frame_a
@@ -1,3 +1,6 @@
+import threading
+import time
+
 import pytest
 from unittest.mock import MagicMock, patch, create_autospec
 
@@ -5,12 +8,15 @@ import numpy as np
 import cv2 # For cv2.error
 import pytesseract # For pytesseract.TesseractNotFoundError, TesseractError
 
+from mark_i.core.config_manager import ConfigManager
+from mark_i.engines.action_executor import ActionExecutor
 from mark_i.engines.analysis_engine import AnalysisEngine
 from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+from mark_i.engines.input_backends import RecordingInputBackend
 from mark_i.engines.condition_evaluators import (
     PixelColorEvaluator, AverageColorEvaluator, TemplateMatchEvaluator,
     OcrContainsTextEvaluator, DominantColorEvaluator, GeminiVisionQueryEvaluator,
-    AlwaysTrueEvaluator, ConditionEvaluationResult
+    AlwaysTrueEvaluator
 )
 
 # --- Mock Fixtures ---
@@ -232,6 +238,30 @@ class TestGeminiVisionQueryEvaluator:
         assert result.met is True
         assert result.captured_value == {"value": full_json, "_source_region_for_capture_": "test_rgn"}
 
+    def test_captured_box_from_downscaled_upload_is_clicked_in_region_pixels(self, mock_analysis_engine, mock_template_loader, mock_config_settings_getter):
+        region_config = {"name": "screen", "x": 100, "y": 200, "width": 1920, "height": 1080}
+        analyzer = GeminiAnalyzer(api_key=None, image_max_long_edge=960)  # Uploads the 1920px frame at half size
+        analyzer.client_initialized = True
+        element_json = {"found": True, "box": [400, 300, 40, 20], "element_label": "OK button"}  # In upload pixels
+        processed_response = {"status": "success", "text_content": "", "json_content": element_json, "error_message": None}
+        with patch.object(analyzer, "_ensure_sdk_client", return_value=True), patch("mark_i.engines.gemini_analyzer.genai"), patch.object(
+            analyzer, "_execute_sdk_call", return_value=(MagicMock(), None)
+        ), patch.object(analyzer, "_process_sdk_response", return_value=processed_response):
+            evaluator = GeminiVisionQueryEvaluator(mock_analysis_engine, mock_template_loader, analyzer, mock_config_settings_getter)
+            spec = {"prompt": "Find the OK button", "capture_as": "ok_button"}
+            result = evaluator.evaluate(spec, "screen", {"image": np.zeros((1080, 1920, 3), dtype=np.uint8)}, "test_rule")
+        assert result.met is True
+        assert result.captured_value["value"]["box"] == [800, 600, 80, 40]
+
+        mock_cm = create_autospec(ConfigManager, instance=True)
+        mock_cm.get_region_config.return_value = region_config
+        backend = RecordingInputBackend()
+        ActionExecutor(mock_cm, input_backend=backend).execute_action(
+            {"type": "click", "target_relation": "center_of_gemini_element", "gemini_element_variable": "ok_button", "context": {"rule_name": "test_rule", "variables": {"ok_button": result.captured_value}}}
+        )
+        click_event = next(event for event in backend.events if event["kind"] == "click")
+        assert (click_event["x"], click_event["y"]) == (100 + 800 + 40, 200 + 600 + 20)
+
     def test_evaluate_text_capture_if_no_json(self, mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter):
         text_content = "Analysis complete. Result is positive."
         gemini_response = {"status": "success", "text_content": text_content, "json_content": None}
@@ -257,6 +287,82 @@ class TestGeminiVisionQueryEvaluator:
         assert result.met is False
         mock_gemini_analyzer.query_vision_model.assert_not_called()
 
+    def test_swr_first_evaluation_blocks_and_caches(self, mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter):
+        mock_gemini_analyzer.query_vision_model.return_value = {"status": "success", "text_content": "Door is open", "json_content": None}
+        evaluator = GeminiVisionQueryEvaluator(mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter)
+        spec = {"prompt": "Is the door open?", "expected_response_contains": "open", "capture_as": "door", "freshness": "stale_while_revalidate"}
+        result = evaluator.evaluate(spec, "test_rgn", dummy_region_data_packet_with_image, "test_rule")
+        assert result.met is True
+        assert result.captured_value == {"value": "Door is open", "_source_region_for_capture_": "test_rgn"}
+        assert mock_gemini_analyzer.query_vision_model.call_count == 1
+
+    def test_swr_serves_cached_result_and_refreshes_in_background(self, mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter):
+        mock_gemini_analyzer.query_vision_model.return_value = {"status": "success", "text_content": "Door is open", "json_content": None}
+        evaluator = GeminiVisionQueryEvaluator(mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter)
+        spec = {"prompt": "Is the door open?", "expected_response_contains": "open", "capture_as": "door", "freshness": "stale_while_revalidate", "max_staleness_seconds": 60}
+        first_result = evaluator.evaluate(spec, "test_rgn", dummy_region_data_packet_with_image, "test_rule")
+
+        refresh_started = threading.Event()
+        release_refresh = threading.Event()
+
+        def slow_query(*args, **kwargs):
+            refresh_started.set()
+            release_refresh.wait(timeout=5)
+            return {"status": "success", "text_content": "Door is closed", "json_content": None}
+
+        mock_gemini_analyzer.query_vision_model.side_effect = slow_query
+        second_result = evaluator.evaluate(spec, "test_rgn", dummy_region_data_packet_with_image, "test_rule")
+        assert second_result is first_result  # Served from cache without waiting on Gemini
+        assert refresh_started.wait(timeout=5)
+
+        release_refresh.set()
+        _wait_for_swr_refreshes(evaluator)
+        third_result = evaluator.evaluate(spec, "test_rgn", dummy_region_data_packet_with_image, "test_rule")
+        assert third_result.met is False  # Refreshed result no longer contains "open"
+
+    def test_swr_blocks_when_result_too_stale(self, mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter):
+        mock_gemini_analyzer.query_vision_model.return_value = {"status": "success", "text_content": "yes", "json_content": None}
+        evaluator = GeminiVisionQueryEvaluator(mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter)
+        spec = {"prompt": "Visible?", "freshness": "stale_while_revalidate", "max_staleness_seconds": 2.0}
+        with patch("mark_i.engines.condition_evaluators.time.monotonic", return_value=100.0):
+            evaluator.evaluate(spec, "test_rgn", dummy_region_data_packet_with_image, "test_rule")
+        with patch("mark_i.engines.condition_evaluators.time.monotonic", return_value=103.0):
+            evaluator.evaluate(spec, "test_rgn", dummy_region_data_packet_with_image, "test_rule")
+        assert mock_gemini_analyzer.query_vision_model.call_count == 2  # Both synchronous, no background refresh
+        assert not evaluator._swr_refreshes_in_flight
+
+    def test_swr_failed_query_is_not_cached(self, mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter):
+        mock_gemini_analyzer.query_vision_model.return_value = {"status": "error_api", "error_message": "quota"}
+        evaluator = GeminiVisionQueryEvaluator(mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter)
+        spec = {"prompt": "Visible?", "freshness": "stale_while_revalidate"}
+        assert evaluator.evaluate(spec, "test_rgn", dummy_region_data_packet_with_image, "test_rule").met is False
+        assert evaluator.evaluate(spec, "test_rgn", dummy_region_data_packet_with_image, "test_rule").met is False
+        assert mock_gemini_analyzer.query_vision_model.call_count == 2
+
+    def test_evaluate_uses_batched_response_from_packet(self, mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter):
+        evaluator = GeminiVisionQueryEvaluator(mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter)
+        spec = {"prompt": "Is it ready?", "expected_response_contains": "ready", "capture_as": "state"}
+        packet = {**dummy_region_data_packet_with_image, "gemini_batched_responses": {("", "Is it ready?"): {"status": "success", "text_content": "It is ready", "json_content": None}}}
+        result = evaluator.evaluate(spec, "test_rgn", packet, "test_rule")
+        assert result.met is True
+        assert result.captured_value == {"value": "It is ready", "_source_region_for_capture_": "test_rgn"}
+        mock_gemini_analyzer.query_vision_model.assert_not_called()
+
+    def test_evaluate_falls_back_when_question_not_in_batch(self, mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter):
+        mock_gemini_analyzer.query_vision_model.return_value = {"status": "success", "text_content": "ready", "json_content": None}
+        evaluator = GeminiVisionQueryEvaluator(mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter)
+        packet = {**dummy_region_data_packet_with_image, "gemini_batched_responses": {("", "Other question"): {"status": "success", "text_content": "no"}}}
+        result = evaluator.evaluate({"prompt": "Is it ready?", "expected_response_contains": "ready"}, "test_rgn", packet, "test_rule")
+        assert result.met is True
+        mock_gemini_analyzer.query_vision_model.assert_called_once()
+
+
+def _wait_for_swr_refreshes(evaluator: GeminiVisionQueryEvaluator, timeout_sec: float = 5.0):
+    deadline = time.monotonic() + timeout_sec
+    while evaluator._swr_refreshes_in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not evaluator._swr_refreshes_in_flight
+
 
 class TestAlwaysTrueEvaluator:
     def test_evaluate_always_returns_true(self, mock_analysis_engine, mock_template_loader, mock_gemini_analyzer, mock_config_settings_getter):
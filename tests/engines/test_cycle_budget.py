@@ -0,0 +1,131 @@
+from mark_i.engines.cycle_budget import CycleBudgetGovernor, rule_priority
+from mark_i.engines.rules_engine import build_analysis_priorities
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_cycle(governor, clock, duration, budget=1.0):
+    governor.begin_cycle(budget)
+    clock.now += duration
+    return governor.end_cycle()
+
+
+def test_overruns_shed_low_then_normal_priority_and_headroom_restores_them():
+    clock = FakeClock()
+    governor = CycleBudgetGovernor(restore_after_cycles=2, clock=clock)
+
+    run_cycle(governor, clock, 1.5)
+    governor.begin_cycle(1.0)
+    governor.note_work("high")
+    assert governor.allow(("ocr", "status"), "low") is False
+    assert governor.allow(("ocr", "status"), "normal") is True
+    governor.end_cycle()
+
+    run_cycle(governor, clock, 1.5)
+    assert governor.shed_level == 2
+    governor.begin_cycle(1.0)
+    governor.note_work("high")
+    assert governor.allow(("rule", "ask_gemini"), "normal") is False
+    assert governor.allow(("rule", "critical"), "high") is True
+    governor.end_cycle()
+
+    for _ in range(4):
+        run_cycle(governor, clock, 0.1)
+    assert governor.shed_level == 0
+    stats = governor.get_stats()
+    assert stats["over_budget_cycles"] == 2 and stats["deferred_total"] == 2
+
+
+def test_work_that_would_not_fit_the_remaining_budget_is_deferred_only_while_shedding():
+    clock = FakeClock()
+    governor = CycleBudgetGovernor(clock=clock)
+    governor.record_cost(("dominant_color", "map"), 0.5)
+
+    governor.begin_cycle(1.0)
+    clock.now += 0.7
+    assert governor.allow(("dominant_color", "map"), "normal") is True  # Cycles have been within budget: no cost-based deferral
+    governor.end_cycle()
+
+    governor.shed_level = 1
+    governor.begin_cycle(1.0)
+    governor.note_work("high")
+    clock.now += 0.7
+    assert governor.allow(("dominant_color", "map"), "normal") is False
+    assert governor.allow(("ocr", "map"), "normal") is True  # No cost estimate yet
+
+
+def test_deferred_work_runs_after_max_deferred_cycles():
+    clock = FakeClock()
+    governor = CycleBudgetGovernor(max_deferred_cycles=2, clock=clock)
+    governor.shed_level = 1
+
+    answers = []
+    for _ in range(3):
+        governor.begin_cycle(1.0)
+        governor.note_work("normal")
+        answers.append(governor.allow(("ocr", "chat"), "low"))
+        governor.end_cycle()
+    assert answers == [False, False, True]
+    assert governor.get_stats()["forced_after_deferral_total"] == 1
+
+
+def test_single_slow_rule_is_not_throttled_without_higher_priority_work():
+    clock = FakeClock()
+    governor = CycleBudgetGovernor(clock=clock)
+    ran = []
+    for _ in range(12):
+        governor.begin_cycle(0.8)
+        governor.note_work("normal")  # Cheap rules of the same priority do not make deferral worthwhile
+        allowed = governor.allow(("rule", "ask_gemini"), "normal")
+        ran.append(int(allowed))
+        if allowed:
+            clock.now += 1.5
+            governor.record_cost(("rule", "ask_gemini"), 1.5)
+        governor.end_cycle()
+    assert ran == [1] * 12
+    assert governor.get_stats()["deferred_total"] == 0
+
+
+def test_slow_rule_is_deferred_in_favour_of_higher_priority_work():
+    clock = FakeClock()
+    governor = CycleBudgetGovernor(clock=clock)
+    ran = []
+    for _ in range(4):
+        governor.begin_cycle(0.8)
+        governor.note_work("high")
+        allowed = governor.allow(("rule", "ask_gemini"), "normal")
+        ran.append(int(allowed))
+        if allowed:
+            clock.now += 1.5
+            governor.record_cost(("rule", "ask_gemini"), 1.5)
+        governor.end_cycle()
+    assert ran == [1, 0, 0, 0]
+
+
+def test_no_budget_never_defers():
+    governor = CycleBudgetGovernor(clock=FakeClock())
+    governor.shed_level = 2
+    governor.begin_cycle(None)
+    assert governor.allow(("ocr", "chat"), "low") is True
+
+
+def test_analysis_priority_is_the_highest_among_rules_needing_it():
+    rules = [
+        {"name": "a", "region": "chat", "priority": "low", "condition": {"type": "ocr_contains_text", "text": "hi"}},
+        {"name": "b", "region": "chat", "priority": "HIGH", "condition": {"type": "ocr_contains_text", "text": "bye"}},
+        {
+            "name": "c",
+            "region": "chat",
+            "priority": "low",
+            "condition": {"logical_operator": "AND", "sub_conditions": [{"type": "dominant_color_matches", "region": "map", "expected_bgr": [0, 0, 0]}]},
+        },
+    ]
+    priorities = build_analysis_priorities(rules)
+    assert priorities == {"chat": {"ocr": "high"}, "map": {"dominant_color": "low"}}
+    assert rule_priority({"priority": "urgent"}) == "normal"
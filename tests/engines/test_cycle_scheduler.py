@@ -0,0 +1,93 @@
+import pytest
+
+from mark_i.engines.cycle_scheduler import FixedRateScheduler
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the test (or a wait) advances it."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeStopEvent:
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.waits = []
+
+    def wait(self, timeout=None) -> bool:
+        self.waits.append(timeout)
+        self.clock.now += timeout
+        return False
+
+    def is_set(self) -> bool:
+        return False
+
+
+def run_cycles(scheduler, clock, cycle_durations):
+    stop_event = FakeStopEvent(clock)
+    scheduler.start()
+    ticks = []
+    for duration in cycle_durations:
+        tick = scheduler.wait_for_next_tick(stop_event)
+        ticks.append(tick)
+        clock.now += duration
+        scheduler.cycle_finished(tick)
+    return ticks
+
+
+def test_cycles_start_on_absolute_deadlines_regardless_of_duration():
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(1.0, clock=clock)
+    ticks = run_cycles(scheduler, clock, [0.3, 0.7, 0.1, 0.95])
+    assert [t.deadline - 100.0 for t in ticks] == [0.0, 1.0, 2.0, 3.0]
+    assert all(t.lateness_sec == 0.0 for t in ticks)
+    assert scheduler.get_stats()["overruns"] == 0
+
+
+def test_skip_policy_drops_missed_ticks_and_stays_on_the_grid():
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(1.0, overrun_policy="skip", clock=clock)
+    ticks = run_cycles(scheduler, clock, [2.5, 0.1, 0.1])
+    assert [t.deadline - 100.0 for t in ticks] == [0.0, 3.0, 4.0]
+    assert ticks[1].missed_ticks == 2
+    stats = scheduler.get_stats()
+    assert stats["overruns"] == 1 and stats["missed_ticks"] == 2
+
+
+def test_catch_up_policy_runs_missed_ticks_back_to_back_up_to_the_limit():
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(1.0, overrun_policy="catch_up", max_catch_up_ticks=2, clock=clock)
+    ticks = run_cycles(scheduler, clock, [4.5, 0.1, 0.1, 0.1])
+    # Due at 4.5: ticks 1-4. Only the last two are caught up; the first runs late, the next on time.
+    assert [t.index for t in ticks] == [0, 3, 4, 5]
+    assert ticks[1].missed_ticks == 2
+    assert ticks[1].lateness_sec == pytest.approx(1.5)
+    assert ticks[2].lateness_sec == pytest.approx(0.6)
+
+
+def test_degrade_policy_marks_cycles_degraded_until_one_finishes_in_time():
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(1.0, overrun_policy="degrade", clock=clock)
+    ticks = run_cycles(scheduler, clock, [1.5, 1.2, 0.2, 0.2])
+    assert [t.degraded for t in ticks] == [False, True, True, False]
+    assert scheduler.get_stats()["degraded_cycles"] == 2
+
+
+def test_interval_change_reanchors_the_grid_after_the_current_cycle():
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(1.0, clock=clock)
+    stop_event = FakeStopEvent(clock)
+    scheduler.start()
+    first_tick = scheduler.wait_for_next_tick(stop_event)
+    scheduler.set_interval(0.5)
+    scheduler.cycle_finished(first_tick)
+    second_tick = scheduler.wait_for_next_tick(stop_event)
+    assert second_tick.deadline - first_tick.deadline == pytest.approx(0.5)
+
+
+def test_unknown_policy_falls_back_to_skip():
+    assert FixedRateScheduler(1.0, overrun_policy="bogus").overrun_policy == "skip"
@@ -0,0 +1,66 @@
+from unittest.mock import create_autospec
+
+import pytest
+import numpy as np
+
+from mark_i.core.config_manager import ConfigManager
+from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.analysis_engine import AnalysisEngine
+from mark_i.engines.element_locator_cache import ElementLocatorCache
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+from mark_i.engines.gemini_decision_module import GeminiDecisionModule
+
+
+def make_screen(button_x: int, button_y: int) -> np.ndarray:
+    """Dark 200x300 screen with a distinctive 30x20 'button' drawn at (button_x, button_y)."""
+    screen = np.full((200, 300, 3), 30, dtype=np.uint8)
+    screen[button_y : button_y + 20, button_x : button_x + 30] = (40, 180, 240)
+    screen[button_y + 8 : button_y + 12, button_x + 5 : button_x + 25] = (255, 255, 255)
+    return screen
+
+
+@pytest.fixture
+def locator_cache():
+    return ElementLocatorCache(AnalysisEngine(), match_threshold=0.9, search_margin_px=20)
+
+
+class TestElementLocatorCache:
+    def test_learned_template_is_found_after_small_move(self, locator_cache):
+        assert locator_cache.store("main", "the Send button", make_screen(100, 50), [100, 50, 30, 20])
+        match = locator_cache.locate("main", "The  send BUTTON", make_screen(110, 55))
+        assert match is not None
+        assert match["box"] == [110, 55, 30, 20]
+        assert locator_cache.stats["hits"] == 1
+
+    def test_failed_verification_drops_entry(self, locator_cache):
+        locator_cache.store("main", "the Send button", make_screen(100, 50), [100, 50, 30, 20])
+        assert locator_cache.locate("main", "the Send button", make_screen(250, 170)) is None  # Moved outside search window
+        assert len(locator_cache) == 0
+
+    def test_key_includes_region(self, locator_cache):
+        locator_cache.store("main", "the Send button", make_screen(100, 50), [100, 50, 30, 20])
+        assert locator_cache.locate("sidebar", "the Send button", make_screen(100, 50)) is None
+
+    def test_tiny_or_out_of_bounds_box_is_not_stored(self, locator_cache):
+        assert not locator_cache.store("main", "dot", make_screen(100, 50), [10, 10, 2, 2])
+        assert not locator_cache.store("main", "offscreen", make_screen(100, 50), [400, 400, 30, 20])
+        assert len(locator_cache) == 0
+
+
+class TestGeminiDecisionModuleLearnedLocator:
+    def test_second_refinement_skips_gemini(self):
+        mock_ga = create_autospec(GeminiAnalyzer, instance=True)
+        mock_ga.client_initialized = True
+        mock_ga.query_vision_model.return_value = {"status": "success", "json_content": {"found": True, "box": [100, 50, 30, 20], "confidence_score": 0.95}, "image_scale": 1.0}
+        mock_cm = create_autospec(ConfigManager, instance=True)
+        mock_cm.get_setting.side_effect = lambda key, default: False if key == "gemini_nlu_plan_cache_enabled" else default
+        gdm = GeminiDecisionModule(mock_ga, create_autospec(ActionExecutor, instance=True), mock_cm, analysis_engine=AnalysisEngine())
+
+        first = gdm._refine_target_description_to_bbox("the Send button", make_screen(100, 50), "main", "Rule1")
+        second = gdm._refine_target_description_to_bbox("the Send button", make_screen(104, 52), "main", "Rule1")
+        assert first["value"]["box"] == [100, 50, 30, 20]
+        assert second["value"]["box"] == [104, 52, 30, 20]
+        assert mock_ga.query_vision_model.call_count == 1
+
+        gdm._refine_target_description_to_bbox("the Send button", make_screen(250, 170), "main", "Rule1")  # Local verification fails
+        assert mock_ga.query_vision_model.call_count == 2
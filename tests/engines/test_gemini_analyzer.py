@@ -0,0 +1,222 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from PIL import Image
+
+from google.api_core import exceptions as google_api_exceptions
+
+from mark_i.engines.gemini_analyzer import CircuitBreaker, GeminiAnalyzer, gemini_analyzer_options_from_settings, scale_box_to_original
+
+
+def make_analyzer(**image_budget_kwargs) -> GeminiAnalyzer:
+    # No API key: the client stays uninitialized, which is enough for input preparation.
+    return GeminiAnalyzer(api_key=None, **image_budget_kwargs)
+
+
+dummy_large_image_bgr = np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+
+class TestImageBudget:
+    def test_no_budget_sends_full_resolution_pil_image(self):
+        analyzer = make_analyzer()
+        api_contents, error, image_scale = analyzer._validate_and_prepare_api_input("Describe", dummy_large_image_bgr, "Test")
+        assert error is None
+        assert image_scale == 1.0
+        assert isinstance(api_contents[1], Image.Image)
+        assert api_contents[1].size == (1920, 1080)
+
+    def test_max_long_edge_downscales(self):
+        analyzer = make_analyzer(image_max_long_edge=960)
+        api_contents, error, image_scale = analyzer._validate_and_prepare_api_input("Describe", dummy_large_image_bgr, "Test")
+        assert error is None
+        assert image_scale == pytest.approx(0.5)
+        assert api_contents[1].size == (960, 540)
+
+    def test_max_pixels_downscales(self):
+        analyzer = make_analyzer(image_max_pixels=1920 * 1080 // 4)
+        api_contents, _, image_scale = analyzer._validate_and_prepare_api_input("Describe", dummy_large_image_bgr, "Test")
+        assert image_scale == pytest.approx(0.5)
+        assert api_contents[1].size == (960, 540)
+
+    def test_small_image_is_not_upscaled(self):
+        analyzer = make_analyzer(image_max_long_edge=4000)
+        _, _, image_scale = analyzer._validate_and_prepare_api_input("Describe", dummy_large_image_bgr, "Test")
+        assert image_scale == 1.0
+
+    @pytest.mark.parametrize("image_format, expected_mime", [("jpeg", "image/jpeg"), ("jpg", "image/jpeg"), ("webp", "image/webp")])
+    def test_lossy_formats_are_sent_as_inline_blobs(self, image_format, expected_mime):
+        analyzer = make_analyzer(image_format=image_format, image_quality=70, image_grayscale=True)
+        api_contents, error, _ = analyzer._validate_and_prepare_api_input("Describe", dummy_large_image_bgr, "Test")
+        assert error is None
+        blob = api_contents[1]
+        assert blob["mime_type"] == expected_mime
+        assert isinstance(blob["data"], bytes) and len(blob["data"]) > 0
+
+    def test_invalid_format_falls_back_to_png(self):
+        analyzer = make_analyzer(image_format="bmp")
+        assert analyzer.image_format == "png"
+
+    def test_query_result_reports_image_scale_on_input_error(self):
+        analyzer = make_analyzer(image_max_long_edge=960)
+        analyzer.client_initialized = True
+        result = analyzer.query_vision_model(prompt="", image_data=dummy_large_image_bgr)
+        assert result["status"] == "error_input"
+        assert result["image_scale"] == 1.0
+
+
+def test_scale_box_to_original():
+    assert scale_box_to_original([10, 20, 30, 40], 0.5) == [20, 40, 60, 80]
+    assert scale_box_to_original([10.4, 20.6, 30, 40], 1.0) == [10, 21, 30, 40]
+
+
+def test_gemini_analyzer_options_from_settings():
+    settings = {"gemini_image_max_long_edge": 1280, "gemini_image_format": "jpeg"}
+    kwargs = gemini_analyzer_options_from_settings(lambda key, default: settings.get(key, default))
+    assert kwargs["image_max_long_edge"] == 1280
+    assert kwargs["image_format"] == "jpeg"
+    assert kwargs["image_grayscale"] is False
+    analyzer = make_analyzer(**kwargs)
+    assert analyzer.image_max_long_edge == 1280
+
+
+class TestQueryVisionModelBatch:
+    def _batch_result(self, json_content, status="success"):
+        return {"status": status, "text_content": "", "json_content": json_content, "error_message": None, "model_used": "m", "latency_ms": 5, "raw_gemini_response": None, "image_scale": 0.5}
+
+    def test_answers_are_split_per_question(self):
+        analyzer = make_analyzer()
+        answers = {"answers": [{"id": "q2", "answer": '{"count": 3}'}, {"id": "q1", "answer": "yes"}]}
+        with patch.object(analyzer, "query_vision_model", return_value=self._batch_result(answers)) as mock_query:
+            result = analyzer.query_vision_model_batch(["Dialog open?", "How many items? Reply as JSON."], dummy_large_image_bgr)
+        assert mock_query.call_count == 1
+        assert mock_query.call_args.kwargs["custom_generation_config"]["response_mime_type"] == "application/json"
+        assert result["status"] == "success"
+        assert result["responses"][0]["text_content"] == "yes"
+        assert result["responses"][0]["json_content"] is None
+        assert result["responses"][1]["json_content"] == {"count": 3}
+        assert result["responses"][1]["image_scale"] == 0.5
+
+    def test_unanswered_question_is_none(self):
+        analyzer = make_analyzer()
+        with patch.object(analyzer, "query_vision_model", return_value=self._batch_result({"answers": [{"id": "q1", "answer": "yes"}, {"id": "q9", "answer": "?"}]})):
+            result = analyzer.query_vision_model_batch(["A?", "B?"], dummy_large_image_bgr)
+        assert result["responses"][0]["text_content"] == "yes"
+        assert result["responses"][1] is None
+
+    def test_malformed_batch_response_is_an_error(self):
+        analyzer = make_analyzer()
+        with patch.object(analyzer, "query_vision_model", return_value=self._batch_result({"unexpected": True})):
+            result = analyzer.query_vision_model_batch(["A?", "B?"], dummy_large_image_bgr)
+        assert result["status"] == "error_response_format"
+        assert result["responses"] == [None, None]
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_fails_fast(self):
+        breaker = CircuitBreaker(failure_threshold=2, cooldown_sec=60)
+        breaker.record_failure()
+        assert breaker.allow_request() is True
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+
+    def test_half_open_allows_single_trial_then_closes_on_success(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=0)
+        breaker.record_failure()
+        assert breaker.allow_request() is True  # Trial call
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request() is False  # Only one trial at a time
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=0)
+        breaker.record_failure()
+        breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.snapshot()["state"] == CircuitBreaker.OPEN
+        assert breaker.snapshot()["times_opened"] == 2
+
+
+class TestCallPolicy:
+    @patch("mark_i.engines.gemini_analyzer.time.sleep")
+    def test_transient_error_is_retried_with_timeout(self, mock_sleep):
+        analyzer = make_analyzer(request_timeout_sec=7, max_retries=2)
+        model_instance = MagicMock()
+        model_instance.generate_content.side_effect = [google_api_exceptions.ServiceUnavailable("down"), "ok_response"]
+        response, error = analyzer._execute_sdk_call(model_instance, ["prompt"], "Test")
+        assert response == "ok_response" and error is None
+        assert model_instance.generate_content.call_count == 2
+        assert model_instance.generate_content.call_args.kwargs["request_options"] == {"timeout": 7.0}
+        mock_sleep.assert_called_once()
+        assert analyzer.get_metrics()["retries_total"] == 1
+
+    @patch("mark_i.engines.gemini_analyzer.time.sleep")
+    def test_retries_exhausted_records_circuit_failure(self, mock_sleep):
+        analyzer = make_analyzer(max_retries=1, circuit_failure_threshold=1)
+        model_instance = MagicMock()
+        model_instance.generate_content.side_effect = google_api_exceptions.ResourceExhausted("quota")
+        response, error = analyzer._execute_sdk_call(model_instance, ["prompt"], "Test")
+        assert response is None
+        assert error["status"] == "error_api"
+        assert model_instance.generate_content.call_count == 2
+        assert analyzer.circuit_breaker.state == CircuitBreaker.OPEN
+
+    @patch("mark_i.engines.gemini_analyzer.time.sleep")
+    def test_retries_stop_at_the_retry_budget(self, mock_sleep):
+        analyzer = make_analyzer(request_timeout_sec=10, max_retries=3, retry_base_delay_sec=0, retry_budget_sec=12)
+        clock = {"now": 100.0}
+
+        def slow_failure(*args, **kwargs):
+            clock["now"] += 5.0
+            raise google_api_exceptions.ServiceUnavailable("down")
+
+        model_instance = MagicMock()
+        model_instance.generate_content.side_effect = slow_failure
+        with patch("mark_i.engines.gemini_analyzer.time.monotonic", side_effect=lambda: clock["now"]):
+            _, error = analyzer._execute_sdk_call(model_instance, ["prompt"], "Test")
+        assert error["status"] == "error_api"
+        attempt_timeouts = [c.kwargs["request_options"]["timeout"] for c in model_instance.generate_content.call_args_list]
+        assert attempt_timeouts == [10.0, 7.0, 2.0]
+
+    def test_non_retryable_error_is_not_retried(self):
+        analyzer = make_analyzer(max_retries=3)
+        model_instance = MagicMock()
+        model_instance.generate_content.side_effect = google_api_exceptions.InvalidArgument("bad model")
+        _, error = analyzer._execute_sdk_call(model_instance, ["prompt"], "Test")
+        assert error["status"] == "error_api"
+        assert model_instance.generate_content.call_count == 1
+        assert analyzer.circuit_breaker.state == CircuitBreaker.CLOSED
+
+    def test_open_circuit_short_circuits_query(self):
+        analyzer = make_analyzer(circuit_failure_threshold=1, circuit_cooldown_sec=60)
+        analyzer.client_initialized = True
+        analyzer.circuit_breaker.record_failure()
+        with patch("mark_i.engines.gemini_analyzer.genai.GenerativeModel") as mock_model_cls:
+            result = analyzer.query_vision_model(prompt="Anything?", image_data=dummy_large_image_bgr)
+        assert result["status"] == "error_circuit_open"
+        mock_model_cls.assert_not_called()
+        metrics = analyzer.get_metrics()
+        assert metrics["short_circuited_total"] == 1
+        assert metrics["status_counts"] == {"error_circuit_open": 1}
+        assert metrics["circuit"]["state"] == CircuitBreaker.OPEN
+
+    def test_open_circuit_batch_does_not_touch_sdk(self):
+        analyzer = make_analyzer(circuit_failure_threshold=1, circuit_cooldown_sec=60)
+        analyzer.client_initialized = True
+        analyzer.circuit_breaker.record_failure()
+        with patch("mark_i.engines.gemini_analyzer.genai_types") as mock_types, patch("mark_i.engines.gemini_analyzer.genai") as mock_genai:
+            result = analyzer.query_vision_model_batch(["A?", "B?"], dummy_large_image_bgr)
+        assert result["status"] == "error_circuit_open"
+        assert not mock_types.mock_calls and not mock_genai.mock_calls
+
+    def test_sdk_setup_failure_releases_half_open_trial(self):
+        analyzer = make_analyzer(circuit_failure_threshold=1, circuit_cooldown_sec=0)
+        analyzer.client_initialized = True
+        analyzer.circuit_breaker.record_failure()
+        with patch.object(analyzer, "_ensure_sdk_client", return_value=False):
+            result = analyzer.query_vision_model(prompt="Anything?", image_data=dummy_large_image_bgr)
+        assert result["status"] == "error_client"
+        assert analyzer.circuit_breaker.state == CircuitBreaker.OPEN
+        assert analyzer.circuit_breaker.allow_request() is True  # The next trial is not blocked by a leaked slot
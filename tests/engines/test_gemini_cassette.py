@@ -0,0 +1,90 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import numpy as np
+
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+from mark_i.engines.gemini_cassette import GeminiCassette, request_fingerprints
+
+dummy_image_bgr = np.zeros((20, 20, 3), dtype=np.uint8)
+other_image_bgr = np.full((20, 20, 3), 255, dtype=np.uint8)
+
+
+def _success_response(text: str) -> dict:
+    return {"status": "success", "text_content": text, "json_content": None, "error_message": None, "raw_gemini_response": "raw"}
+
+
+def _record(cassette_path, responses_in_order, prompt="Is it ready?", image=dummy_image_bgr):
+    recorder = GeminiCassette(str(cassette_path), mode="record")
+    analyzer = GeminiAnalyzer(api_key=None, cassette=recorder)
+    analyzer.client_initialized = True  # Pretend a real client was configured
+    with patch("mark_i.engines.gemini_analyzer.genai.GenerativeModel"), patch.object(analyzer, "_execute_sdk_call", return_value=("sdk", None)), patch.object(
+        analyzer, "_process_sdk_response", side_effect=responses_in_order
+    ):
+        for _ in responses_in_order:
+            analyzer.query_vision_model(prompt=prompt, image_data=image)
+
+
+class TestGeminiCassette:
+    def test_record_then_replay_round_trip(self, tmp_path):
+        cassette_path = tmp_path / "session.jsonl"
+        _record(cassette_path, [_success_response("ready"), _success_response("still ready")])
+        lines = cassette_path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])["response"]["text_content"] == "ready"
+
+        replay_analyzer = GeminiAnalyzer(api_key=None, cassette=GeminiCassette(str(cassette_path), mode="replay"))
+        assert replay_analyzer.client_initialized is True  # No API key needed to replay
+        with patch("mark_i.engines.gemini_analyzer.genai.GenerativeModel") as mock_model_cls:
+            first = replay_analyzer.query_vision_model(prompt="Is it ready?", image_data=dummy_image_bgr)
+            second = replay_analyzer.query_vision_model(prompt="Is it ready?", image_data=dummy_image_bgr)
+            third = replay_analyzer.query_vision_model(prompt="Is it ready?", image_data=dummy_image_bgr)
+        mock_model_cls.assert_not_called()
+        assert [first["text_content"], second["text_content"], third["text_content"]] == ["ready", "still ready", "ready"]
+
+    def test_loose_match_ignores_image_unless_strict(self, tmp_path):
+        cassette_path = tmp_path / "session.jsonl"
+        _record(cassette_path, [_success_response("ready")])
+
+        loose = GeminiAnalyzer(api_key=None, cassette=GeminiCassette(str(cassette_path), mode="replay"))
+        assert loose.query_vision_model(prompt="Is it ready?", image_data=other_image_bgr)["text_content"] == "ready"
+
+        strict = GeminiAnalyzer(api_key=None, cassette=GeminiCassette(str(cassette_path), mode="replay", strict=True))
+        assert strict.query_vision_model(prompt="Is it ready?", image_data=other_image_bgr)["status"] == "error_cassette_miss"
+
+    def test_unknown_prompt_is_a_miss(self, tmp_path):
+        cassette_path = tmp_path / "session.jsonl"
+        _record(cassette_path, [_success_response("ready")])
+        cassette = GeminiCassette(str(cassette_path), mode="replay")
+        analyzer = GeminiAnalyzer(api_key=None, cassette=cassette)
+        assert analyzer.query_vision_model(prompt="Something else?", image_data=dummy_image_bgr)["status"] == "error_cassette_miss"
+        assert cassette.stats["misses"] == 1
+
+    @pytest.mark.parametrize("latency_mode", ["recorded", "distribution"])
+    def test_latency_injection(self, tmp_path, latency_mode):
+        cassette_path = tmp_path / "session.jsonl"
+        fingerprints = request_fingerprints("m", "p", None)
+        recorder = GeminiCassette(str(cassette_path), mode="record")
+        recorder.record(fingerprints, "m", _success_response("a"), latency_ms=250)
+        replayer = GeminiCassette(str(cassette_path), mode="replay", latency_mode=latency_mode)
+        with patch("mark_i.engines.gemini_cassette.time.sleep") as mock_sleep:
+            assert replayer.replay(fingerprints)["text_content"] == "a"
+        mock_sleep.assert_called_once_with(0.25)
+
+    def test_open_shares_instance_per_path_and_mode(self, tmp_path):
+        cassette_path = str(tmp_path / "shared.jsonl")
+        assert GeminiCassette.open(cassette_path, mode="record") is GeminiCassette.open(cassette_path, mode="record")
+
+    def test_invalid_mode_raises(self, tmp_path):
+        with pytest.raises(ValueError):
+            GeminiCassette(str(tmp_path / "x.jsonl"), mode="rewind")
+
+    def test_malformed_entries_are_skipped(self, tmp_path):
+        cassette_path = tmp_path / "session.jsonl"
+        _record(cassette_path, [_success_response("ready")])
+        valid_line = cassette_path.read_text(encoding="utf-8")
+        bad_lines = ["[1, 2]", '"just a string"', '{"loose_fingerprint": "x", "response": {}}', '{"exact_fingerprint": "x", "loose_fingerprint": "y", "response": "nope"}', "{not json"]
+        cassette_path.write_text("\n".join(bad_lines) + "\n" + valid_line, encoding="utf-8")
+        analyzer = GeminiAnalyzer(api_key=None, cassette=GeminiCassette(str(cassette_path), mode="replay"))
+        assert analyzer.query_vision_model(prompt="Is it ready?", image_data=dummy_image_bgr)["text_content"] == "ready"
@@ -0,0 +1,122 @@
+import json
+from unittest.mock import create_autospec, patch
+
+import pytest
+
+from mark_i.core.config_manager import ConfigManager
+from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.input_backends import PASTE_HOTKEY, ClipboardUnavailableError, DryRunInputBackend, InputBackend, InputFailSafeError, RecordingInputBackend, create_input_backend
+
+
+@pytest.fixture
+def recording_backend():
+    return RecordingInputBackend()
+
+
+@pytest.fixture
+def executor_with_recorder(recording_backend):
+    mock_cm = create_autospec(ConfigManager, instance=True)
+    return ActionExecutor(mock_cm, input_backend=recording_backend)
+
+
+class TestRecordingInputBackend:
+    def test_events_are_timestamped_in_order(self, recording_backend):
+        recording_backend.click(10, 20, clicks=2, button="right")
+        recording_backend.type_text("hi")
+        recording_backend.hotkey("ctrl", "s")
+        kinds = [event["kind"] for event in recording_backend.events]
+        assert kinds == ["click", "type_text", "hotkey"]
+        assert recording_backend.events[0]["x"] == 10 and recording_backend.events[0]["button"] == "right"
+        timestamps = [event["t"] for event in recording_backend.events]
+        assert timestamps == sorted(timestamps)
+
+    def test_close_writes_jsonl(self, tmp_path):
+        record_path = tmp_path / "out" / "events.jsonl"
+        backend = RecordingInputBackend(record_path=str(record_path))
+        backend.press("enter")
+        backend.close()
+        lines = record_path.read_text(encoding="utf-8").splitlines()
+        assert json.loads(lines[0])["key"] == "enter"
+
+    def test_dry_run_only_counts(self):
+        backend = DryRunInputBackend()
+        backend.press("a")
+        backend.press("b")
+        assert backend.event_counts["press"] == 2
+        assert not hasattr(backend, "events")
+
+
+def test_create_input_backend_rejects_unknown_name():
+    assert isinstance(create_input_backend("record"), RecordingInputBackend)
+    with pytest.raises(ValueError):
+        create_input_backend("telepathy")
+
+
+class TestActionExecutorWithBackend:
+    def test_type_text_goes_through_backend(self, executor_with_recorder, recording_backend):
+        executor_with_recorder.execute_action({"type": "type_text", "text": "hello", "interval": "0.0", "context": {"rule_name": "R1"}})
+        assert recording_backend.events[-1]["kind"] == "type_text"
+        assert recording_backend.events[-1]["text"] == "hello"
+
+    def test_press_key_csv_becomes_hotkey(self, executor_with_recorder, recording_backend):
+        executor_with_recorder.execute_action({"type": "press_key", "key": "ctrl,c", "context": {"rule_name": "R1"}})
+        assert recording_backend.events[-1] == {**recording_backend.events[-1], "kind": "hotkey", "keys": ["ctrl", "c"]}
+
+    def test_absolute_click_is_recorded(self, executor_with_recorder, recording_backend):
+        executor_with_recorder.execute_action({"type": "click", "target_relation": "absolute", "x": "15", "y": "25", "context": {"rule_name": "R1"}})
+        assert recording_backend.events[-1]["kind"] == "click"
+        assert (recording_backend.events[-1]["x"], recording_backend.events[-1]["y"]) == (15, 25)
+
+    def test_auto_input_method_pastes_long_text_only(self, recording_backend):
+        mock_cm = create_autospec(ConfigManager, instance=True)
+        mock_cm.get_setting.side_effect = lambda key, default: 10 if key == "paste_input_min_length" else default
+        executor = ActionExecutor(mock_cm, input_backend=recording_backend)
+        executor.execute_action({"type": "type_text", "text": "short", "input_method": "auto", "context": {"rule_name": "R1"}})
+        executor.execute_action({"type": "type_text", "text": "a much longer text", "input_method": "auto", "context": {"rule_name": "R1"}})
+        assert [event["kind"] for event in recording_backend.events] == ["type_text", "paste_text"]
+
+    @pytest.mark.parametrize("action_params", [{}, {"input_method": ""}])
+    def test_profile_default_input_method_applies_without_action_param(self, recording_backend, action_params):
+        mock_cm = create_autospec(ConfigManager, instance=True)
+        mock_cm.get_setting.side_effect = lambda key, default: "paste" if key == "type_text_input_method" else default
+        ActionExecutor(mock_cm, input_backend=recording_backend).execute_action({"type": "type_text", "text": "hi", **action_params, "context": {"rule_name": "R1"}})
+        assert recording_backend.events[-1] == {**recording_backend.events[-1], "kind": "paste_text", "text": "hi"}
+
+    def test_paste_falls_back_to_typing_without_clipboard(self, executor_with_recorder, recording_backend):
+        with patch.object(recording_backend, "paste_text", side_effect=ClipboardUnavailableError("no clipboard tool")):
+            executor_with_recorder.execute_action({"type": "type_text", "text": "hello", "input_method": "paste", "context": {"rule_name": "R1"}})
+        assert recording_backend.events[-1]["kind"] == "type_text"
+
+
+class HotkeyOnlyBackend(InputBackend):
+    def __init__(self):
+        self.hotkeys = []
+
+    def click(self, x, y, clicks=1, interval=0.0, button="left"):
+        pass
+
+    def type_text(self, text, interval=0.0):
+        pass
+
+    def press(self, key):
+        pass
+
+    def hotkey(self, *keys):
+        self.hotkeys.append(keys)
+
+
+def test_paste_text_restores_previous_clipboard():
+    backend = HotkeyOnlyBackend()
+    with patch("pyperclip.paste", return_value="previous"), patch("pyperclip.copy") as mock_copy:
+        backend.paste_text("bulk text", restore_delay_sec=0)
+    assert backend.hotkeys == [PASTE_HOTKEY]
+    assert [call_args[0][0] for call_args in mock_copy.call_args_list] == ["bulk text", "previous"]
+
+
+def test_paste_text_restores_clipboard_when_hotkey_fails():
+    backend = HotkeyOnlyBackend()
+    with patch("pyperclip.paste", return_value="previous"), patch("pyperclip.copy") as mock_copy, patch.object(
+        backend, "hotkey", side_effect=InputFailSafeError("mouse in corner")
+    ), pytest.raises(InputFailSafeError):
+        backend.paste_text("secret {captured} text", restore_delay_sec=0)
+    assert [call_args[0][0] for call_args in mock_copy.call_args_list] == ["secret {captured} text", "previous"]
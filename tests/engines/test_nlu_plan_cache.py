@@ -0,0 +1,102 @@
+from unittest.mock import patch, create_autospec
+
+import pytest
+import numpy as np
+
+from mark_i.core.config_manager import ConfigManager
+from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+from mark_i.engines.gemini_decision_module import GeminiDecisionModule
+from mark_i.engines.nlu_plan_cache import NluPlanCache, default_nlu_plan_cache_path
+
+sample_plan = {"command_type": "SINGLE_INSTRUCTION", "instruction_details": {"intent_verb": "CLICK", "target_description": "the OK button", "parameters": {}}}
+
+
+class TestNluPlanCache:
+    def test_put_get_and_persist(self, tmp_path):
+        cache_file = str(tmp_path / "cache" / "plans.json")
+        cache = NluPlanCache(cache_file, prompt_version="v1")
+        assert cache.get("click OK", "model-a") is None
+        cache.put("click OK", "model-a", sample_plan)
+        assert cache.get("click OK", "model-a") == sample_plan
+        assert cache.get("click OK", "model-b") is None
+
+        reloaded = NluPlanCache(cache_file, prompt_version="v1")
+        assert reloaded.get("click OK", "model-a") == sample_plan
+
+    def test_prompt_version_change_invalidates(self, tmp_path):
+        cache_file = str(tmp_path / "plans.json")
+        NluPlanCache(cache_file, prompt_version="v1").put("click OK", "model-a", sample_plan)
+        reloaded = NluPlanCache(cache_file, prompt_version="v2")
+        assert len(reloaded) == 0
+        assert reloaded.get("click OK", "model-a") is None
+
+    def test_returned_plan_is_a_copy(self, tmp_path):
+        cache = NluPlanCache(str(tmp_path / "plans.json"), prompt_version="v1")
+        cache.put("click OK", "model-a", sample_plan)
+        cache.get("click OK", "model-a")["command_type"] = "MUTATED"
+        assert cache.get("click OK", "model-a")["command_type"] == "SINGLE_INSTRUCTION"
+
+    def test_lru_eviction(self, tmp_path):
+        cache = NluPlanCache(str(tmp_path / "plans.json"), prompt_version="v1", max_entries=2)
+        cache.put("a", "m", sample_plan)
+        cache.put("b", "m", sample_plan)
+        cache.get("a", "m")  # 'a' becomes most recently used
+        cache.put("c", "m", sample_plan)
+        assert cache.get("b", "m") is None
+        assert cache.get("a", "m") is not None
+
+    def test_corrupt_file_starts_empty(self, tmp_path):
+        cache_file = tmp_path / "plans.json"
+        cache_file.write_text("{not json", encoding="utf-8")
+        assert len(NluPlanCache(str(cache_file), prompt_version="v1")) == 0
+
+
+@pytest.fixture
+def gdm_with_cache(tmp_path):
+    mock_ga = create_autospec(GeminiAnalyzer, instance=True)
+    mock_ga.client_initialized = True
+    mock_cm = create_autospec(ConfigManager, instance=True)
+    mock_cm.get_setting.side_effect = lambda key, default: default
+    mock_cm.project_root = str(tmp_path)
+    gdm = GeminiDecisionModule(gemini_analyzer=mock_ga, action_executor=create_autospec(ActionExecutor, instance=True), config_manager=mock_cm)
+    return gdm, mock_ga
+
+
+class TestGeminiDecisionModulePlanCache:
+    def test_repeated_command_skips_planning_query(self, gdm_with_cache, tmp_path):
+        gdm, mock_ga = gdm_with_cache
+        mock_ga.query_vision_model.return_value = {"status": "success", "json_content": {"parsed_task": sample_plan}}
+        images = {"r1": np.zeros((10, 10, 3), dtype=np.uint8)}
+        with patch.object(gdm, "_recursive_execute_plan_node", return_value=True) as mock_exec:
+            first = gdm.execute_nlu_task("Rule1", "click OK", images, {})
+            second = gdm.execute_nlu_task("Rule1", "click OK", images, {})
+        assert first["status"] == "success" and second["status"] == "success"
+        assert mock_ga.query_vision_model.call_count == 1
+        assert mock_exec.call_args[0][0] == sample_plan
+        assert (tmp_path / "cache" / "nlu_plan_cache.json").exists()
+        assert default_nlu_plan_cache_path(str(tmp_path)) == str(tmp_path / "cache" / "nlu_plan_cache.json")
+
+    def test_failed_parse_is_not_cached(self, gdm_with_cache):
+        gdm, mock_ga = gdm_with_cache
+        mock_ga.query_vision_model.return_value = {"status": "success", "json_content": {"unexpected": True}}
+        images = {"r1": np.zeros((10, 10, 3), dtype=np.uint8)}
+        gdm.execute_nlu_task("Rule1", "click OK", images, {})
+        gdm.execute_nlu_task("Rule1", "click OK", images, {})
+        assert mock_ga.query_vision_model.call_count == 2
+
+    def test_failed_or_aborted_run_drops_the_cached_plan(self, gdm_with_cache):
+        gdm, mock_ga = gdm_with_cache
+        mock_ga.query_vision_model.return_value = {"status": "success", "json_content": {"parsed_task": sample_plan}}
+        images = {"r1": np.zeros((10, 10, 3), dtype=np.uint8)}
+        with patch.object(gdm, "_recursive_execute_plan_node", return_value=True):
+            gdm.execute_nlu_task("Rule1", "click OK", images, {})  # Plans and caches
+        with patch.object(gdm, "_recursive_execute_plan_node", return_value=False):
+            assert gdm.execute_nlu_task("Rule1", "click OK", images, {})["status"] == "failure"  # Cached plan fails
+        assert len(gdm.nlu_plan_cache) == 0
+
+        with patch.object(gdm, "_recursive_execute_plan_node", side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                gdm.execute_nlu_task("Rule1", "click OK", images, {})  # Re-plans, caches, then aborts
+        assert len(gdm.nlu_plan_cache) == 0
+        assert mock_ga.query_vision_model.call_count == 2
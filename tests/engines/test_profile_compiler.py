@@ -0,0 +1,70 @@
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from mark_i.engines.profile_compiler import compile_profile, compiled_profile_path_for, load_compiled_profile, load_or_compile_profile, write_compiled_profile
+from mark_i.engines.rules_engine import build_rule_analysis_plan
+
+
+@pytest.fixture
+def profile_on_disk(tmp_path):
+    """A saved profile with one template image and rules that need local analyses."""
+    templates_dir = tmp_path / "templates"
+    templates_dir.mkdir()
+    template_image = np.arange(12 * 10 * 3, dtype=np.uint8).reshape((12, 10, 3))
+    cv2.imwrite(str(templates_dir / "button.png"), template_image)
+    profile = {
+        "profile_description": "Compiled",
+        "settings": {"monitoring_interval_seconds": 0.5},
+        "regions": [{"name": "main", "x": 0, "y": 0, "width": 100, "height": 100}],
+        "templates": [{"name": "button", "filename": "button.png"}],
+        "rules": [
+            {"name": "R1", "region": "main", "condition": {"type": "template_match_found", "template_filename": "button.png"}, "action": {"type": "log_message"}},
+            {"name": "R2", "region": "main", "condition": {"type": "ocr_contains_text", "text_to_find": "OK"}, "action": {"type": "log_message"}},
+        ],
+    }
+    profile_path = tmp_path / "bot.json"
+    profile_path.write_text(json.dumps(profile), encoding="utf-8")
+    return str(profile_path), template_image
+
+
+class TestProfileCompiler:
+    def test_round_trip_through_memory_mapped_sidecar(self, profile_on_disk):
+        profile_path, template_image = profile_on_disk
+        write_compiled_profile(compile_profile(profile_path))
+        loaded = load_compiled_profile(profile_path)
+        assert loaded is not None
+        assert loaded.profile_data["settings"]["monitoring_interval_seconds"] == 0.5
+        assert "analysis_dominant_colors_k" in loaded.profile_data["settings"]  # Merged with defaults
+        assert loaded.rule_plan["analysis_requirements"] == {"main": ["ocr"]}
+        np.testing.assert_array_equal(loaded.templates["button.png"], template_image)
+        assert not loaded.templates["button.png"].flags.writeable  # A view into the read-only mapping
+
+    def test_editing_the_profile_invalidates_the_sidecar(self, profile_on_disk):
+        profile_path, _ = profile_on_disk
+        write_compiled_profile(compile_profile(profile_path))
+        with open(profile_path, "a", encoding="utf-8") as f:
+            f.write("\n")
+        assert load_compiled_profile(profile_path) is None
+        rebuilt = load_or_compile_profile(profile_path)
+        assert rebuilt.profile_data["profile_description"] == "Compiled"
+        assert load_compiled_profile(profile_path) is not None  # Sidecar rewritten
+
+    def test_corrupt_sidecar_is_ignored(self, profile_on_disk):
+        profile_path, _ = profile_on_disk
+        with open(compiled_profile_path_for(profile_path), "wb") as f:
+            f.write(b"garbage")
+        assert load_compiled_profile(profile_path) is None
+
+
+def test_rule_plan_lists_batchable_gemini_prompts():
+    rules = [
+        {"name": "R1", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Dialog open?"}},
+        {"name": "R2", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Say {user}"}},
+        {"name": "R3", "condition": {"logical_operator": "AND", "sub_conditions": [{"type": "average_color_is", "region": "r2"}]}},
+    ]
+    plan = build_rule_analysis_plan(rules)
+    assert plan["batchable_gemini_prompts"] == {"r1": {"": {"Dialog open?": ["R1"]}}}
+    assert plan["analysis_requirements"] == {"r2": ["average_color"]}
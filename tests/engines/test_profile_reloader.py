@@ -0,0 +1,47 @@
+import json
+import os
+
+from mark_i.engines.profile_reloader import ProfileFileWatcher, diff_profiles
+
+BASE_PROFILE = {
+    "settings": {"monitoring_interval_seconds": 1.0},
+    "regions": [{"name": "main", "x": 0, "y": 0, "width": 10, "height": 10}, {"name": "side", "x": 20, "y": 0, "width": 10, "height": 10}],
+    "templates": [{"name": "ok", "filename": "ok.png"}],
+    "rules": [{"name": "R1", "region": "main", "condition": {"type": "always_true"}, "action": {"type": "log_message"}}],
+}
+
+
+def test_diff_profiles_reports_changed_entries_by_name():
+    new_profile = json.loads(json.dumps(BASE_PROFILE))
+    new_profile["settings"]["monitoring_interval_seconds"] = 0.5
+    new_profile["regions"][0]["width"] = 20
+    new_profile["rules"].append({"name": "R2", "region": "side", "condition": {"type": "always_true"}, "action": {"type": "log_message"}})
+    del new_profile["templates"][0]
+    diff = diff_profiles(BASE_PROFILE, new_profile)
+    assert diff.settings_changed == {"monitoring_interval_seconds"}
+    assert diff.regions_changed == {"main"} and not diff.regions_added and not diff.regions_removed
+    assert diff.rules_added == {"R2"} and not diff.rules_changed
+    assert diff.templates_removed == {"ok.png"}
+    assert diff.rules_affected == {"R2"}
+
+
+def test_diff_profiles_counts_replaced_template_files_and_ignores_identical_profiles():
+    diff = diff_profiles(BASE_PROFILE, json.loads(json.dumps(BASE_PROFILE)), changed_template_files={"ok.png"})
+    assert diff.templates_changed == {"ok.png"}
+    assert diff_profiles(BASE_PROFILE, json.loads(json.dumps(BASE_PROFILE))).is_empty()
+
+
+def test_watcher_reports_change_once_file_is_stable(tmp_path):
+    profile_path = tmp_path / "bot.json"
+    profile_path.write_text(json.dumps(BASE_PROFILE), encoding="utf-8")
+    watcher = ProfileFileWatcher(str(profile_path), poll_interval_sec=0)
+    assert watcher.poll() is False
+
+    profile_path.write_text(json.dumps({**BASE_PROFILE, "profile_description": "edited"}), encoding="utf-8")
+    os.utime(profile_path, ns=(1, 1))  # Ensure a different mtime even on coarse-grained filesystems
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "templates" / "ok.png").write_bytes(b"png")
+    assert watcher.poll() is False  # First sighting: the write may still be in progress
+    assert watcher.poll() is True
+    assert watcher.changed_template_files == {"ok.png"}
+    assert watcher.poll() is False
@@ -5,6 +5,7 @@ import numpy as np  # For dummy_image_bgr
 from mark_i.core.config_manager import ConfigManager
 from mark_i.engines.analysis_engine import AnalysisEngine
 from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.action_dispatcher import ActionDispatcher
 from mark_i.engines.gemini_analyzer import GeminiAnalyzer
 from mark_i.engines.gemini_decision_module import GeminiDecisionModule
 from mark_i.engines.rules_engine import RulesEngine
@@ -200,6 +201,15 @@ class TestRulesEngineEvaluateRules:
         rules_engine_instance_base.evaluate_rules({"r1": {"image": MagicMock()}})
         mock_action_executor_re.execute_action.assert_not_called()
 
+    def test_evaluate_rules_skips_rules_with_skipped_condition_types(self, rules_engine_instance_base: RulesEngine, mock_condition_evaluator_always_true, mock_action_executor_re):
+        rules_engine_instance_base._condition_evaluators["type_true"] = mock_condition_evaluator_always_true
+        rules_engine_instance_base.rules = [
+            {"name": "Cheap", "region": "r1", "condition": {"type": "type_true"}, "action": {"type": "log_message"}},
+            {"name": "Expensive", "region": "r1", "condition": {"logical_operator": "OR", "sub_conditions": [{"type": "type_true"}, {"type": "ocr_contains_text"}]}, "action": {"type": "log_message"}},
+        ]
+        rules_engine_instance_base.evaluate_rules({"r1": {"image": MagicMock()}}, skip_condition_types={"ocr_contains_text"})
+        assert [c[0][0]["context"]["rule_name"] for c in mock_action_executor_re.execute_action.call_args_list] == ["Cheap"]
+
     def test_evaluate_rules_action_dispatch_standard(self, rules_engine_instance_base: RulesEngine, mock_condition_evaluator_always_true, mock_action_executor_re):
         rules_engine_instance_base._condition_evaluators["type_true"] = mock_condition_evaluator_always_true
         action_spec = {"type": "click", "button": "left"}
@@ -223,7 +233,135 @@ class TestRulesEngineEvaluateRules:
         assert "r1" in call_args_gdm["initial_context_images"]
         assert call_args_gdm["initial_context_images"]["r1"] is dummy_image_bgr
 
+    def test_evaluate_rules_queues_standard_action_on_dispatcher(self, rules_engine_instance_base: RulesEngine, mock_condition_evaluator_always_true, mock_action_executor_re):
+        mock_dispatcher = create_autospec(ActionDispatcher, instance=True)
+        rules_engine_instance_base.action_dispatcher = mock_dispatcher
+        rules_engine_instance_base._condition_evaluators["type_true"] = mock_condition_evaluator_always_true
+        rules_engine_instance_base.rules = [{"name": "TestClickRule", "region": "r1", "condition": {"type": "type_true"}, "action": {"type": "click", "await_completion": True}}]
+        rules_engine_instance_base.evaluate_rules({"r1": {"image": MagicMock()}})
+        mock_action_executor_re.execute_action.assert_not_called()
+        mock_dispatcher.submit.assert_called_once()
+        assert mock_dispatcher.submit.call_args[0][0]["context"]["rule_name"] == "TestClickRule"
+        assert mock_dispatcher.submit.call_args.kwargs["await_completion"] is True
+
     def test_evaluate_rules_invalid_rule_structure(self, rules_engine_instance_base: RulesEngine, mock_action_executor_re):
         rules_engine_instance_base.rules = [{"name": "MalformedRule"}]  # Missing condition/action
         rules_engine_instance_base.evaluate_rules({})
         mock_action_executor_re.execute_action.assert_not_called()
+
+
+class TestRulesEngineGeminiBatching:
+    def _set_rules(self, engine: RulesEngine, rules):
+        engine.rules = rules
+        engine._batchable_gemini_prompts_per_region.clear()
+        engine._parse_rule_analysis_dependencies()
+
+    def test_static_queries_on_same_region_are_batched(self, rules_engine_instance_base: RulesEngine, dummy_image_bgr):
+        self._set_rules(
+            rules_engine_instance_base,
+            [
+                {"name": "R1", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Is a dialog open?", "expected_response_contains": "yes"}, "action": {"type": "log_message"}},
+                {"name": "R2", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Is the spinner visible?"}, "action": {"type": "log_message"}},
+                {"name": "R3", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Say {user}"}, "action": {"type": "log_message"}},
+            ],
+        )
+        assert rules_engine_instance_base._batchable_gemini_prompts_per_region == {"r1": {"": {"Is a dialog open?": ["R1"], "Is the spinner visible?": ["R2"]}}}
+
+        mock_ga = rules_engine_instance_base.gemini_analyzer_for_query
+        answer_1 = {"status": "success", "text_content": "yes", "json_content": None}
+        answer_2 = {"status": "success", "text_content": "no", "json_content": None}
+        mock_ga.query_vision_model_batch.return_value = {"status": "success", "responses": [answer_1, answer_2]}
+        all_region_data = {"r1": {"image": dummy_image_bgr}}
+        rules_engine_instance_base._prefetch_batched_gemini_queries(all_region_data)
+
+        mock_ga.query_vision_model_batch.assert_called_once_with(["Is a dialog open?", "Is the spinner visible?"], dummy_image_bgr, model_name_override=None)
+        assert all_region_data["r1"]["gemini_batched_responses"] == {("", "Is a dialog open?"): answer_1, ("", "Is the spinner visible?"): answer_2}
+
+    def test_single_query_is_not_batched(self, rules_engine_instance_base: RulesEngine, dummy_image_bgr):
+        self._set_rules(
+            rules_engine_instance_base,
+            [{"name": "R1", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Is a dialog open?"}, "action": {"type": "log_message"}}],
+        )
+        all_region_data = {"r1": {"image": dummy_image_bgr}}
+        rules_engine_instance_base._prefetch_batched_gemini_queries(all_region_data)
+        rules_engine_instance_base.gemini_analyzer_for_query.query_vision_model_batch.assert_not_called()
+        assert "gemini_batched_responses" not in all_region_data["r1"]
+
+    def test_questions_behind_a_short_circuit_or_of_skipped_rules_are_not_batched(self, rules_engine_instance_base: RulesEngine, dummy_image_bgr):
+        self._set_rules(
+            rules_engine_instance_base,
+            [
+                {"name": "R1", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Q1"}, "action": {"type": "log_message"}},
+                {"name": "R2", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Q2"}, "action": {"type": "log_message"}},
+                {"name": "R3", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Q3"}, "action": {"type": "log_message"}},
+                {
+                    "name": "Gated",
+                    "region": "r1",
+                    "condition": {"logical_operator": "AND", "sub_conditions": [{"type": "pixel_color", "relative_x": 0, "relative_y": 0, "expected_bgr": [1, 2, 3]}, {"type": "gemini_vision_query", "prompt": "Q4"}]},
+                    "action": {"type": "log_message"},
+                },
+            ],
+        )
+        assert set(rules_engine_instance_base._batchable_gemini_prompts_per_region["r1"][""]) == {"Q1", "Q2", "Q3"}
+
+        mock_ga = rules_engine_instance_base.gemini_analyzer_for_query
+        mock_ga.query_vision_model_batch.return_value = {"status": "error_api", "responses": [None, None]}
+        rules_engine_instance_base._prefetch_batched_gemini_queries({"r1": {"image": dummy_image_bgr}}, rule_will_run=lambda rule_name: rule_name != "R3")
+        mock_ga.query_vision_model_batch.assert_called_once_with(["Q1", "Q2"], dummy_image_bgr, model_name_override=None)
+
+    def test_rules_deferred_by_the_governor_are_left_out_of_the_batch(self, rules_engine_instance_base: RulesEngine, dummy_image_bgr):
+        from mark_i.engines.cycle_budget import CycleBudgetGovernor
+
+        self._set_rules(
+            rules_engine_instance_base,
+            [
+                {"name": "R1", "region": "r1", "priority": "low", "condition": {"type": "gemini_vision_query", "prompt": "Q1"}, "action": {"type": "log_message"}},
+                {"name": "R2", "region": "r1", "priority": "high", "condition": {"type": "gemini_vision_query", "prompt": "Q2"}, "action": {"type": "log_message"}},
+                {"name": "R3", "region": "r1", "priority": "high", "condition": {"type": "gemini_vision_query", "prompt": "Q3"}, "action": {"type": "log_message"}},
+            ],
+        )
+        governor = CycleBudgetGovernor()
+        governor.shed_level = 1
+        governor.begin_cycle(1.0)
+        mock_ga = rules_engine_instance_base.gemini_analyzer_for_query
+        mock_ga.query_vision_model_batch.return_value = {"status": "error_api", "responses": [None, None]}
+
+        rules_engine_instance_base.evaluate_rules({"r1": {"image": dummy_image_bgr}}, budget_governor=governor)
+
+        mock_ga.query_vision_model_batch.assert_called_once_with(["Q2", "Q3"], dummy_image_bgr, model_name_override=None)
+        assert set(rules_engine_instance_base.get_rule_stats()) == {"R2", "R3"}
+        assert governor.get_stats()["deferred_total"] == 1  # Asked once for R1, not again at evaluation
+
+    def test_failed_batch_leaves_packet_untouched(self, rules_engine_instance_base: RulesEngine, dummy_image_bgr):
+        self._set_rules(
+            rules_engine_instance_base,
+            [
+                {"name": "R1", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Q1"}, "action": {"type": "log_message"}},
+                {"name": "R2", "region": "r1", "condition": {"type": "gemini_vision_query", "prompt": "Q2"}, "action": {"type": "log_message"}},
+            ],
+        )
+        rules_engine_instance_base.gemini_analyzer_for_query.query_vision_model_batch.return_value = {"status": "error_api", "responses": [None, None]}
+        all_region_data = {"r1": {"image": dummy_image_bgr}}
+        rules_engine_instance_base._prefetch_batched_gemini_queries(all_region_data)
+        assert "gemini_batched_responses" not in all_region_data["r1"]
+
+
+class TestRulesEngineHotReload:
+    def test_apply_profile_update_rebuilds_only_changed_state(self, rules_engine_instance_base: RulesEngine, mock_config_manager_re):
+        from mark_i.engines.profile_reloader import diff_profiles
+
+        engine = rules_engine_instance_base
+        engine._loaded_templates[("/fake/profile/dir", "kept.png")] = np.zeros((2, 2, 3), dtype=np.uint8)
+        engine._loaded_templates[("/fake/profile/dir", "edited.png")] = np.zeros((2, 2, 3), dtype=np.uint8)
+        old_profile = {"templates": [{"name": "kept", "filename": "kept.png"}, {"name": "edited", "filename": "edited.png"}], "rules": []}
+        new_profile = {
+            "templates": [{"name": "kept", "filename": "kept.png"}, {"name": "edited", "filename": "edited.png", "note": "new crop"}],
+            "rules": [{"name": "OcrRule", "region": "r1", "condition": {"type": "ocr_contains_text", "text_to_find": "OK"}, "action": {"type": "log_message"}}],
+        }
+        mock_config_manager_re.get_profile_data.return_value = new_profile
+
+        engine.apply_profile_update(diff_profiles(old_profile, new_profile))
+
+        assert engine.rules == new_profile["rules"]
+        assert engine.get_analysis_requirements_for_region("r1") == {"ocr"}
+        assert set(key[1] for key in engine._loaded_templates) == {"kept.png"}  # Unchanged template stays warm
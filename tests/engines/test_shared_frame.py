@@ -0,0 +1,87 @@
+import threading
+
+import numpy as np
+import pytest
+
+from mark_i.engines.shared_frame import SharedFrameCapture, union_geometry
+
+
+class FakeCaptureEngine:
+    """Captures from a synthetic 'screen' whose pixel values encode their coordinates."""
+
+    def __init__(self, fail_shared_grab=False):
+        self.screen = np.arange(200 * 300 * 3, dtype=np.uint32).reshape(200, 300, 3).astype(np.uint8)
+        self.fail_shared_grab = fail_shared_grab
+        self.grabs = []
+
+    def capture_region(self, region_spec, out_buffer=None):
+        self.grabs.append(region_spec["name"])
+        if self.fail_shared_grab and region_spec["name"] == "shared_frame":
+            return None
+        x, y, w, h = region_spec["x"], region_spec["y"], region_spec["width"], region_spec["height"]
+        return self.screen[y : y + h, x : x + w].copy()
+
+
+def test_one_grab_serves_every_region_and_crops_match_direct_captures():
+    engine = FakeCaptureEngine()
+    regions = [{"name": "chat", "x": 10, "y": 20, "width": 50, "height": 30}, {"name": "hp_bar", "x": 200, "y": 150, "width": 40, "height": 10}]
+    shared_tick = SharedFrameCapture(engine).grab(regions)
+
+    chat = shared_tick.capture_region(regions[0])
+    same_area_other_profile = shared_tick.capture_region({"name": "messages", "x": 10, "y": 20, "width": 50, "height": 30})
+
+    assert engine.grabs == ["shared_frame"]
+    assert np.array_equal(chat, engine.screen[20:50, 10:60])
+    assert np.array_equal(shared_tick.capture_region(regions[1]), engine.screen[150:160, 200:240])
+    assert same_area_other_profile is chat and not chat.flags.writeable
+    assert shared_tick.stats["crops"] == 2 and shared_tick.stats["crops_reused"] == 1
+
+
+def test_failed_shared_grab_falls_back_to_per_region_capture():
+    engine = FakeCaptureEngine(fail_shared_grab=True)
+    region = {"name": "chat", "x": 0, "y": 0, "width": 5, "height": 5}
+    shared_tick = SharedFrameCapture(engine).grab([region])
+
+    assert np.array_equal(shared_tick.capture_region(region), engine.screen[0:5, 0:5])
+    assert engine.grabs == ["shared_frame", "chat"]
+
+
+def test_identical_analysis_is_computed_once_across_threads():
+    region = {"name": "chat", "x": 0, "y": 0, "width": 5, "height": 5}
+    shared_tick = SharedFrameCapture(FakeCaptureEngine()).grab([region])
+    calls = []
+    release = threading.Event()
+
+    def slow_ocr():
+        calls.append("ocr")
+        release.wait(5)
+        return {"text": "hello"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(shared_tick.analysis(region, ("ocr", None, "--psm 6"), slow_ocr))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["ocr"]
+    assert results == [{"text": "hello"}] * 3
+    assert shared_tick.analysis(region, ("ocr", None, "--psm 7"), lambda: {"text": "other config"}) == {"text": "other config"}
+
+
+def test_analysis_errors_reach_every_waiting_profile():
+    region = {"name": "chat", "x": 0, "y": 0, "width": 5, "height": 5}
+    shared_tick = SharedFrameCapture(FakeCaptureEngine()).grab([region])
+
+    def broken():
+        raise RuntimeError("tesseract crashed")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            shared_tick.analysis(region, ("ocr",), broken)
+
+
+def test_union_geometry():
+    assert union_geometry([(10, 20, 5, 5), (0, 30, 5, 10)]) == (0, 20, 15, 20)
+    assert union_geometry([]) is None
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from mark_i.engines.startup_warmup import StartupWarmup, WarmupSkipped
+
+
+def test_tasks_run_in_parallel_and_report_status():
+    barrier = threading.Barrier(2, timeout=5)  # Deadlocks unless both tasks run at the same time
+    warmup = StartupWarmup()
+    warmup.add_task("first", lambda: f"waited {barrier.wait()}")
+    warmup.add_task("second", lambda: f"waited {barrier.wait()}")
+
+    def _skip():
+        raise WarmupSkipped("no templates")
+
+    def _fail():
+        raise RuntimeError("Tesseract OCR unavailable")
+
+    warmup.add_task("templates", _skip)
+    warmup.add_task("ocr", _fail)
+
+    results = warmup.run(timeout_sec=5)
+
+    assert warmup.ready.is_set()
+    assert results["first"]["status"] == results["second"]["status"] == "ok"
+    assert results["templates"] == {"status": "skipped", "duration_ms": results["templates"]["duration_ms"], "detail": "no templates"}
+    assert results["ocr"]["status"] == "error" and "Tesseract" in results["ocr"]["detail"]
+    assert warmup.format_report().startswith("Warm-up finished in ")
+
+
+def test_slow_task_does_not_hold_up_readiness_past_the_deadline():
+    release = threading.Event()
+    warmup = StartupWarmup()
+    warmup.add_task("slow_gemini", lambda: release.wait(5) and "done")
+    warmup.add_task("capture", lambda: "1 region(s) grabbed")
+
+    start_time = time.perf_counter()
+    results = warmup.run(timeout_sec=0.1)
+    release.set()
+
+    assert time.perf_counter() - start_time < 2
+    assert warmup.ready.is_set()
+    assert results["slow_gemini"]["status"] == "timeout"
+    assert results["capture"]["status"] == "ok"
+
+
+def test_tasks_sharing_engine_state_are_stopped_and_awaited_at_the_deadline():
+    returned = threading.Event()
+    warmup = StartupWarmup()
+
+    def _preload_templates():
+        try:
+            while not warmup.cancelled.wait(0.01):  # One template per step
+                pass
+            return "stopped"
+        finally:
+            time.sleep(0.05)  # Finishing the current template
+            returned.set()
+
+    warmup.add_task("templates", _preload_templates, shares_engine_state=True)
+    results = warmup.run(timeout_sec=0.1)
+
+    assert returned.is_set()  # run() did not return while the task could still touch the cache
+    assert results["templates"]["status"] == "timeout" and results["templates"]["detail"].startswith("stopped at")
+
+
+def test_no_tasks_is_immediately_ready():
+    warmup = StartupWarmup()
+    assert warmup.run() == {}
+    assert warmup.ready.is_set()
+    assert warmup.format_report().endswith("no tasks")
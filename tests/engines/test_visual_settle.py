@@ -0,0 +1,171 @@
+from unittest.mock import MagicMock, create_autospec, patch
+
+import numpy as np
+
+from mark_i.core.config_manager import ConfigManager
+from mark_i.engines.action_executor import ActionExecutor
+from mark_i.engines.capture_engine import CaptureEngine
+from mark_i.engines.gemini_analyzer import GeminiAnalyzer
+from mark_i.engines.gemini_decision_module import GeminiDecisionModule
+from mark_i.engines.primitive_executors import PrimitiveSubActionExecuteResult
+from mark_i.engines.visual_settle import changed_pixel_fraction, wait_for_visual_settle
+
+black_frame = np.zeros((50, 50, 3), dtype=np.uint8)
+white_frame = np.full((50, 50, 3), 255, dtype=np.uint8)
+
+
+def frame_sequence(*frames):
+    """Capture function that returns the given frames in order, then repeats the last one."""
+    remaining = list(frames)
+    return lambda: remaining.pop(0) if len(remaining) > 1 else remaining[0]
+
+
+class TestWaitForVisualSettle:
+    def test_settles_once_frames_stop_changing(self):
+        result = wait_for_visual_settle(frame_sequence(black_frame, white_frame, black_frame, white_frame, white_frame, white_frame), timeout_sec=2.0, baseline_image=black_frame, poll_interval_sec=0)
+        assert result.settled is True
+        assert result.changed is True
+        assert result.frames_captured == 6
+        assert result.last_image is white_frame
+
+    def test_waits_for_a_slow_reaction_before_settling(self):
+        result = wait_for_visual_settle(frame_sequence(black_frame, black_frame, black_frame, black_frame, white_frame), timeout_sec=2.0, baseline_image=black_frame, poll_interval_sec=0)
+        assert result.settled is True
+        assert result.changed is True
+        assert result.last_image is white_frame
+
+    def test_unchanged_region_settles_after_minimum_wait(self):
+        result = wait_for_visual_settle(frame_sequence(black_frame), timeout_sec=2.0, baseline_image=black_frame, poll_interval_sec=0.001, unchanged_min_wait_sec=0.05)
+        assert result.settled is True
+        assert result.changed is False
+        assert result.elapsed_sec >= 0.05
+
+    def test_blinking_caret_does_not_prevent_settling(self):
+        caret_frame = black_frame.copy()
+        caret_frame[0, 0] = 255  # One pixel of 2500 (0.04%) changes
+        result = wait_for_visual_settle(frame_sequence(black_frame, caret_frame, black_frame, caret_frame), timeout_sec=2.0, poll_interval_sec=0)
+        assert result.settled is True
+
+    def test_times_out_while_region_keeps_changing(self):
+        frames = [black_frame, white_frame]
+        counter = {"n": 0}
+
+        def flicker():
+            counter["n"] += 1
+            return frames[counter["n"] % 2]
+
+        result = wait_for_visual_settle(flicker, timeout_sec=0.05, poll_interval_sec=0.001)
+        assert result.settled is False
+        assert result.frames_captured > 2
+
+    def test_expected_change_returns_immediately(self):
+        capture = MagicMock(side_effect=[black_frame, black_frame, white_frame, white_frame])
+        result = wait_for_visual_settle(capture, timeout_sec=2.0, expected_change_func=lambda frame: frame.mean() > 200, poll_interval_sec=0)
+        assert result.settled is True
+        assert capture.call_count == 3
+
+    def test_capture_failures_are_tolerated(self):
+        result = wait_for_visual_settle(frame_sequence(None, black_frame, black_frame, black_frame), timeout_sec=2.0, poll_interval_sec=0)
+        assert result.settled is True
+        assert result.frames_captured == 3
+
+
+def test_changed_pixel_fraction():
+    assert changed_pixel_fraction(black_frame, black_frame) == 0.0
+    assert changed_pixel_fraction(black_frame, white_frame) == 1.0
+    assert changed_pixel_fraction(black_frame, np.zeros((10, 10, 3), dtype=np.uint8)) == 1.0
+
+
+class TestGeminiDecisionModuleVisualSettle:
+    def _make_gdm(self, capture_engine=None):
+        mock_ga = create_autospec(GeminiAnalyzer, instance=True)
+        mock_ga.client_initialized = True
+        mock_cm = create_autospec(ConfigManager, instance=True)
+        mock_cm.get_setting.side_effect = lambda key, default: False if key == "gemini_nlu_plan_cache_enabled" else default
+        mock_cm.get_region_config.return_value = {"name": "main", "x": 0, "y": 0, "width": 50, "height": 50}
+        return GeminiDecisionModule(mock_ga, create_autospec(ActionExecutor, instance=True), mock_cm, capture_engine=capture_engine)
+
+    def test_sequence_waits_for_settle_and_passes_fresh_capture_to_next_step(self):
+        mock_capture_engine = create_autospec(CaptureEngine, instance=True)
+        mock_capture_engine.capture_region.return_value = white_frame
+        gdm = self._make_gdm(mock_capture_engine)
+        steps = [{"step_number": n, "instruction_details": {"intent_verb": "CLICK", "target_description": f"button {n}"}} for n in (1, 2)]
+        with patch.object(gdm, "_execute_primitive_sub_action", return_value=PrimitiveSubActionExecuteResult(success=True)) as mock_exec, patch(
+            "mark_i.engines.gemini_decision_module.time.sleep"
+        ) as mock_fixed_sleep:
+            assert gdm._handle_sequential_instructions_node(steps, {"main": black_frame}, "main", "Rule1", {}, "")
+        assert all(call_args[0][0] < 0.3 for call_args in mock_fixed_sleep.call_args_list)  # Only short settle polls, no fixed 0.3s delay
+        assert mock_capture_engine.capture_region.call_count >= 3
+        assert mock_exec.call_args_list[0][0][1]["main"] is black_frame
+        assert np.array_equal(mock_exec.call_args_list[1][0][1]["main"], white_frame)
+
+    def test_falls_back_to_fixed_delay_without_capture_engine(self):
+        gdm = self._make_gdm()
+        steps = [{"instruction_details": {"intent_verb": "CLICK", "target_description": "OK"}}, {"instruction_details": {"intent_verb": "CLICK", "target_description": "Done"}}]
+        with patch.object(gdm, "_execute_primitive_sub_action", return_value=PrimitiveSubActionExecuteResult(success=True)), patch(
+            "mark_i.engines.gemini_decision_module.time.sleep"
+        ) as mock_fixed_sleep:
+            gdm._handle_sequential_instructions_node(steps, {"main": black_frame}, "main", "Rule1", {"delay_between_nlu_steps_sec": 0.5}, "")
+        mock_fixed_sleep.assert_called_once_with(0.5)  # Between the two steps only, not after the last one
+
+
+class TestGeminiDecisionModuleContextRefresh:
+    region_configs = {
+        "main": {"name": "main", "x": 0, "y": 0, "width": 50, "height": 50},
+        "overlapping": {"name": "overlapping", "x": 40, "y": 40, "width": 50, "height": 50},
+        "elsewhere": {"name": "elsewhere", "x": 500, "y": 500, "width": 50, "height": 50},
+    }
+
+    def _make_gdm(self):
+        mock_ga = create_autospec(GeminiAnalyzer, instance=True)
+        mock_ga.client_initialized = True
+        mock_cm = create_autospec(ConfigManager, instance=True)
+        mock_cm.get_setting.side_effect = lambda key, default: False if key == "gemini_nlu_plan_cache_enabled" else default
+        mock_cm.get_region_config.side_effect = lambda name: dict(self.region_configs[name])
+        mock_capture_engine = create_autospec(CaptureEngine, instance=True)
+        mock_capture_engine.capture_region.side_effect = lambda spec, out_buffer=None: white_frame
+        return GeminiDecisionModule(mock_ga, create_autospec(ActionExecutor, instance=True), mock_cm, capture_engine=mock_capture_engine), mock_capture_engine
+
+    def test_only_regions_overlapping_the_acted_region_are_recaptured(self):
+        gdm, mock_capture_engine = self._make_gdm()
+        images = {"main": black_frame, "overlapping": black_frame, "elsewhere": black_frame}
+        gdm._refresh_context_after_step({"intent_verb": "CLICK"}, images, "main", {}, "Test")
+        assert np.array_equal(images["main"], white_frame)
+        assert np.array_equal(images["overlapping"], white_frame)
+        assert images["elsewhere"] is black_frame
+        captured_names = {call_args[0][0]["name"] for call_args in mock_capture_engine.capture_region.call_args_list}
+        assert captured_names == {"main", "overlapping"}
+
+    def test_inspection_steps_do_not_recapture(self):
+        gdm, mock_capture_engine = self._make_gdm()
+        images = {"main": black_frame}
+        gdm._refresh_context_after_step({"intent_verb": "CHECK_VISUAL_STATE"}, images, "main", {}, "Test")
+        mock_capture_engine.capture_region.assert_not_called()
+        assert images["main"] is black_frame
+
+    def test_captures_reuse_pooled_buffers(self):
+        gdm, mock_capture_engine = self._make_gdm()
+        mock_capture_engine.capture_region.side_effect = lambda spec, out_buffer=None: out_buffer if out_buffer is not None else black_frame.copy()
+        first_frames = [gdm._capture_context_region(self.region_configs["main"]) for _ in range(4)]
+        fifth_frame = gdm._capture_context_region(self.region_configs["main"])
+        assert len({id(frame) for frame in first_frames}) == 4  # Ring fills with distinct buffers first
+        assert fifth_frame is first_frames[0]  # Then the oldest buffer is reused
+
+    def test_context_image_survives_later_settle_polls(self):
+        gdm, mock_capture_engine = self._make_gdm()
+        screens = [black_frame] * 3 + [white_frame, black_frame] * 3 + [white_frame]  # Flickers long enough to cycle the ring
+
+        def capture_into_buffer(spec, out_buffer=None):
+            target = out_buffer if out_buffer is not None else np.empty_like(black_frame)
+            target[...] = screens.pop(0) if len(screens) > 1 else screens[0]
+            return target
+
+        mock_capture_engine.capture_region.side_effect = capture_into_buffer
+        images = {"main": white_frame}
+        with patch("mark_i.engines.visual_settle.time.sleep"):
+            gdm._refresh_context_after_step({"intent_verb": "CLICK"}, images, "main", {}, "Test")
+            assert np.array_equal(images["main"], black_frame)
+            context_image = images["main"]
+            gdm._wait_for_region_to_settle("main", context_image, {}, 0.0, "Test")
+        assert mock_capture_engine.capture_region.call_count > 4 + 3
+        assert np.array_equal(context_image, black_frame)  # The next step's baseline was not overwritten in place
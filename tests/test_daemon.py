@@ -0,0 +1,164 @@
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+from mark_i.core.flight_recorder import FlightRecorder
+from mark_i.core.metrics import LatencyHistogram
+from mark_i.daemon import ProfileDaemon, create_control_server
+
+
+class FakeController:
+    """Stands in for MainController: same status/metrics surface, no capture or input."""
+
+    instances = []
+
+    def __init__(self, profile_path):
+        self.profile_path = profile_path
+        self.running = False
+        self.ready_event = threading.Event()
+        self.last_cycle_completed_at = None
+        FakeController.instances.append(self)
+
+    def is_running(self):
+        return self.running
+
+    def start(self):
+        self.running = True
+        self.ready_event.set()
+
+    def stop(self):
+        self.running = False
+
+    def get_cycle_stats(self):
+        return {"cycles": 2, "overruns": 1, "missed_ticks": 1, "degraded_cycles": 0, "max_lateness_ms": 12.0}
+
+    def get_budget_stats(self):
+        return None
+
+    def get_metrics_snapshot(self):
+        histogram = LatencyHistogram()
+        histogram.observe(40)
+        gemini_histogram = LatencyHistogram()
+        gemini_histogram.observe(900)
+        return {
+            "running": self.running,
+            "ready": self.ready_event.is_set(),
+            "last_cycle_completed_at": None,
+            "cycles": self.get_cycle_stats(),
+            "cycle_duration_histogram": histogram.snapshot(),
+            "budget": None,
+            "rules": {"click_ok": {"evaluations": 2, "matches": 1, "evaluation_seconds": 0.004}},
+            "actions": None,
+            "caches": {"nlu_plan": {"hits": 1, "misses": 3}},
+            "gemini": {"vision_query": {"status_counts": {"success": 4, "error_api": 1}, "retries_total": 2, "short_circuited_total": 0, "circuit": {"state": "closed"}, "latency_histogram": gemini_histogram.snapshot()}},
+        }
+
+
+@pytest.fixture
+def control_server(tmp_path):
+    FakeController.instances.clear()
+    (tmp_path / "bot_a.json").write_text("{}")
+    profile_daemon = ProfileDaemon(controller_factory=FakeController, profile_path_resolver=lambda p: str(tmp_path / p) if (tmp_path / p).is_file() else None)
+    server = create_control_server(profile_daemon, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield profile_daemon, server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def request(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers={"Content-Type": "application/json", **(headers or {})})
+    response = connection.getresponse()
+    payload = response.read().decode("utf-8")
+    connection.close()
+    return response.status, json.loads(payload) if response.getheader("Content-Type") == "application/json" else payload
+
+
+def test_profile_lifecycle_through_the_api(control_server):
+    profile_daemon, port = control_server
+
+    status, loaded = request(port, "POST", "/profiles", {"profile": "bot_a.json", "start": True})
+    assert status == 201 and loaded["name"] == "bot_a" and loaded["running"] is True
+    assert request(port, "POST", "/profiles", {"profile": "bot_a.json"})[0] == 409
+    assert request(port, "POST", "/profiles", {"profile": "missing.json"})[0] == 404
+
+    assert request(port, "POST", "/profiles/bot_a/stop")[1]["running"] is False
+    assert request(port, "POST", "/profiles/bot_a/start")[1]["running"] is True
+    status, reloaded = request(port, "POST", "/profiles/bot_a/reload")
+    assert status == 200 and reloaded["running"] is True
+    assert len(FakeController.instances) == 2 and FakeController.instances[0].running is False
+
+    assert [p["name"] for p in request(port, "GET", "/profiles")[1]["profiles"]] == ["bot_a"]
+    assert request(port, "DELETE", "/profiles/bot_a")[1]["loaded"] is False
+    assert request(port, "GET", "/profiles/bot_a")[0] == 404
+    assert request(port, "POST", "/shutdown")[0] == 202
+    assert profile_daemon.shutdown_requested.is_set()
+
+
+def test_metrics_are_served_in_prometheus_format(control_server):
+    _, port = control_server
+    request(port, "POST", "/profiles", {"profile": "bot_a.json", "name": "a"})
+
+    status, metrics_text = request(port, "GET", "/metrics")
+
+    assert status == 200
+    assert "# TYPE mark_i_cycle_duration_seconds histogram" in metrics_text
+    assert 'mark_i_cycle_duration_seconds_bucket{profile="a",le="0.05"} 1' in metrics_text
+    assert 'mark_i_rule_evaluations_total{profile="a",rule="click_ok"} 2' in metrics_text
+    assert 'mark_i_cache_hit_ratio{profile="a",cache="nlu_plan"} 0.25' in metrics_text
+    assert 'mark_i_gemini_requests_total{profile="a",client="vision_query",status="error_api"} 1' in metrics_text
+    assert 'mark_i_gemini_request_duration_seconds_count{profile="a",client="vision_query"} 1' in metrics_text
+
+
+def test_flight_recorder_dump_through_the_api(control_server, tmp_path):
+    _, port = control_server
+    request(port, "POST", "/profiles", {"profile": "bot_a.json"})
+    assert request(port, "POST", "/profiles/bot_a/flight-recorder")[0] == 409  # No recorder on this controller
+
+    FakeController.instances[0].flight_recorder = FlightRecorder(name="bot_a", dump_dir=str(tmp_path / "dumps"))
+    status, dumped = request(port, "POST", "/profiles/bot_a/flight-recorder")
+    assert status == 200 and json.loads(open(dumped["dump_path"], encoding="utf-8").read())["reason"] == "control-api"
+
+
+def test_browser_style_requests_are_rejected(control_server):
+    profile_daemon, port = control_server
+    assert request(port, "POST", "/shutdown", headers={"Content-Type": "text/plain"})[0] == 415  # A "simple" cross-origin POST
+    assert request(port, "GET", "/profiles", headers={"Host": f"attacker.example:{port}"})[0] == 403  # DNS rebinding
+    assert request(port, "GET", "/profiles", headers={"Host": f"localhost:{port}"})[0] == 200
+    assert not profile_daemon.shutdown_requested.is_set()
+
+
+def test_token_is_required_when_configured_and_for_non_loopback_hosts(tmp_path):
+    with pytest.raises(ValueError):
+        create_control_server(ProfileDaemon(controller_factory=FakeController), host="0.0.0.0", port=0)
+
+    server = create_control_server(ProfileDaemon(controller_factory=FakeController), port=0, auth_token="s3cret")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        assert request(port, "GET", "/health")[0] == 200
+        assert request(port, "GET", "/metrics")[0] == 401
+        assert request(port, "GET", "/profiles", headers={"Authorization": "Bearer wrong"})[0] == 401
+        assert request(port, "GET", "/profiles", headers={"Authorization": "Bearer s3cret"})[0] == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets not available")
+def test_unix_socket_path_is_only_replaced_if_it_is_a_socket(tmp_path):
+    regular_file = tmp_path / "control.sock"
+    regular_file.write_text("keep me")
+    with pytest.raises(FileExistsError):
+        create_control_server(ProfileDaemon(controller_factory=FakeController), unix_socket_path=str(regular_file))
+    assert regular_file.read_text() == "keep me"
+
+    stale_socket_path = str(tmp_path / "stale.sock")
+    stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale_socket.bind(stale_socket_path)
+    stale_socket.close()
+    create_control_server(ProfileDaemon(controller_factory=FakeController), unix_socket_path=stale_socket_path).server_close()
@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+
+from mark_i.engines.shared_frame import SharedFrameCapture
+from mark_i.supervisor import ProfileSupervisor
+
+
+class FakeCaptureEngine:
+    def __init__(self):
+        self.grabs = 0
+
+    def capture_region(self, region_spec, out_buffer=None):
+        self.grabs += 1
+        return np.zeros((region_spec["height"], region_spec["width"], 3), dtype=np.uint8)
+
+
+class FakeController:
+    def __init__(self, monitoring_interval, fail=False):
+        self.monitoring_interval = monitoring_interval
+        self.log_sample_every_n_cycles = 1
+        self.regions_to_monitor = [{"name": "chat", "x": 0, "y": 0, "width": 10, "height": 10}]
+        self.action_dispatcher = None
+        self.fail = fail
+        self.cycles = 0
+        self.variables = {}
+
+    def run_cycle(self, degraded=False, shared_tick=None):
+        self.cycles += 1
+        shared_tick.analysis(self.regions_to_monitor[0], ("ocr",), lambda: {"text": "hi"})
+        self.variables["last"] = self.cycles
+        if self.fail:
+            raise RuntimeError("rule blew up")
+
+    def run_startup_warmup(self):
+        return {}
+
+
+def test_profiles_run_on_their_own_intervals_and_share_a_frame_per_tick():
+    capture_engine = FakeCaptureEngine()
+    supervisor = ProfileSupervisor(frame_capture=SharedFrameCapture(capture_engine))
+    fast, slow = FakeController(1.0), FakeController(2.0)
+    supervisor.add_profile("fast", fast)
+    supervisor.add_profile("slow", slow)
+
+    ran = [supervisor.run_tick(now) for now in (100.0, 101.0, 102.0, 103.0)]
+
+    assert ran == [["fast", "slow"], ["fast"], ["fast", "slow"], ["fast"]]
+    assert capture_engine.grabs == 4  # One grab per tick, not per profile
+    stats = supervisor.get_stats()
+    assert stats["analyses"] == 4 and stats["analyses_reused"] == 2
+
+
+def test_a_failing_profile_does_not_affect_the_others():
+    supervisor = ProfileSupervisor(frame_capture=SharedFrameCapture(FakeCaptureEngine()))
+    broken, healthy = FakeController(1.0, fail=True), FakeController(1.0)
+    supervisor.add_profile("broken", broken)
+    supervisor.add_profile("healthy", healthy)
+
+    supervisor.run_tick(10.0)
+    supervisor.run_tick(11.0)
+
+    assert healthy.cycles == broken.cycles == 2
+    assert healthy.variables == {"last": 2}
+
+
+def test_start_runs_ticks_until_stopped():
+    supervisor = ProfileSupervisor(frame_capture=SharedFrameCapture(FakeCaptureEngine()))
+    controller = FakeController(0.01)
+    supervisor.add_profile("bot", controller)
+
+    supervisor.start()
+    assert supervisor.ready_event.wait(5)
+    time.sleep(0.1)
+    supervisor.stop()
+
+    assert controller.cycles >= 2 and not supervisor.is_running()